@@ -43,6 +43,7 @@ INSTALLED_APPS = [
     'travaux',
     'resultats',
     'memoires',
+    'televersements',
 ]
 
 # Configuration du modèle utilisateur personnalisé
@@ -73,6 +74,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'users.context_processors.notifications',
             ],
         },
     },
@@ -100,6 +102,16 @@ DATABASES = {
 }
 
 
+# Cache (compteurs de notifications, agrégats des tableaux de bord).
+# En production avec plusieurs processus, utiliser un cache partagé (Redis, Memcached).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'myuom',
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
 
@@ -131,6 +143,14 @@ USE_I18N = True
 # Paramètres personnalisés
 RESULTATS_ACTIVES = True  # Activer/désactiver l'affichage des résultats pour les étudiants
 
+# Téléversement par morceaux (mémoires et remises volumineux)
+TELEVERSEMENT_TAILLE_MORCEAU = 5 * 1024 * 1024  # Taille maximale d'un morceau (5 Mo)
+TELEVERSEMENT_TAILLE_MAX = 500 * 1024 * 1024  # Taille maximale d'un fichier (500 Mo)
+
+# Traitements en arrière-plan après téléversement (pool de threads local)
+TACHES_NOMBRE_WORKERS = 4
+TACHES_SYNCHRONES = False  # True : exécuter les tâches immédiatement (tests, débogage)
+
 USE_L10N = True
 
 USE_TZ = True
@@ -152,3 +172,13 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 # Media files (uploads)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+
+# Stockage des médias : les fichiers archivés (compressés) sont lus de façon transparente
+STORAGES = {
+    'default': {'BACKEND': 'televersements.stockage.StockageArchive'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+# Archivage compressé des remises et mémoires anciens (commande archiver_fichiers)
+ARCHIVAGE_AGE_JOURS = 365
+ARCHIVAGE_ALGORITHME = ''  # 'zstd' ou 'gzip' ; vide : zstd si le paquet zstandard est installé, sinon gzip
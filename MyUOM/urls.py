@@ -27,6 +27,7 @@ urlpatterns = [
     path('travaux/', include('travaux.urls', namespace='travaux')),
     path('resultats/', include('resultats.urls', namespace='resultats')),
     path('memoires/', include('memoires.urls', namespace='memoires')),
+    path('televersements/', include('televersements.urls', namespace='televersements')),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,100 @@
+"""
+Cohortes d'étudiants : (faculté, promotion, niveau).
+
+Tous les étudiants d'une même cohorte voient les mêmes cours et les mêmes
+travaux ; ces listes sont donc mises en cache une seule fois par cohorte et
+invalidées à chaque modification d'un Cours ou d'un Travail qui la concerne.
+"""
+from itertools import product
+
+from django.core.cache import cache
+
+# Filet de sécurité si une modification échappe à l'invalidation (update() en masse, cascade)
+DUREE_CACHE_COHORTE = 600
+
+
+class Cohorte:
+    """Groupe d'étudiants partageant la même faculté, promotion et niveau"""
+
+    def __init__(self, faculte_id=None, promotion_id=None, niveau=''):
+        self.faculte_id = faculte_id
+        self.promotion_id = promotion_id
+        self.niveau = niveau or ''
+
+    @classmethod
+    def de_etudiant(cls, user):
+        """Cohorte d'un étudiant, ou None si son profil est absent"""
+        profil = getattr(user, 'student_profile', None)
+        if profil is None:
+            return None
+        return cls(profil.faculte_id, profil.promotion_id, profil.niveau)
+
+    @property
+    def cle(self):
+        return cle_cohorte(self.faculte_id, self.promotion_id, self.niveau)
+
+    def _cours_queryset(self):
+        from .models import Cours
+
+        cours = Cours.objects.filter(is_actif=True, is_visible_etudiants=True)
+        if self.promotion_id:
+            cours = cours.filter(promotion_id=self.promotion_id)
+        if self.faculte_id:
+            cours = cours.filter(faculte_id=self.faculte_id)
+        if self.niveau:
+            cours = cours.filter(niveau=self.niveau)
+        return cours
+
+    def cours(self):
+        """Cours visibles par la cohorte (liste mise en cache)"""
+        cle = f"{self.cle}:cours"
+        cours = cache.get(cle)
+        if cours is None:
+            cours = list(self._cours_queryset().select_related('enseignant').order_by('-date_creation'))
+            cache.set(cle, cours, DUREE_CACHE_COHORTE)
+        return cours
+
+    def travaux(self):
+        """Travaux publiés ou fermés des cours de la cohorte (liste mise en cache)"""
+        from travaux.models import Travail
+
+        cle = f"{self.cle}:travaux"
+        travaux = cache.get(cle)
+        if travaux is None:
+            travaux = list(
+                Travail.objects.filter(
+                    cours__in=self._cours_queryset(),
+                    is_visible_etudiants=True,
+                    statut__in=['publie', 'ferme']
+                ).select_related('cours', 'cours__enseignant').order_by('-date_creation')
+            )
+            cache.set(cle, travaux, DUREE_CACHE_COHORTE)
+        return travaux
+
+    def travaux_du_cours(self, cours_id):
+        """Travaux d'un cours de la cohorte, extraits de la liste en cache"""
+        return [travail for travail in self.travaux() if travail.cours_id == cours_id]
+
+    def contient_cours(self, cours_id):
+        return any(cours.id == cours_id for cours in self.cours())
+
+
+def cle_cohorte(faculte_id, promotion_id, niveau):
+    return f"cohorte:{faculte_id or '-'}:{promotion_id or '-'}:{niveau or '-'}"
+
+
+def invalider_cohortes(faculte_id, promotion_id, niveau):
+    """
+    Invalide toutes les cohortes qui peuvent voir un cours de ces caractéristiques.
+    Un critère vide côté étudiant n'est pas filtré : la cohorte sans faculté
+    (ou sans promotion, sans niveau) voit aussi ce cours.
+    """
+    cles = []
+    for f, p, n in product({faculte_id, None}, {promotion_id, None}, {niveau or '', ''}):
+        cle = cle_cohorte(f, p, n)
+        cles += [f"{cle}:cours", f"{cle}:travaux"]
+    cache.delete_many(cles)
+
+
+def invalider_cohortes_cours(cours):
+    invalider_cohortes(cours.faculte_id, cours.promotion_id, cours.niveau)
@@ -0,0 +1,72 @@
+"""
+Compteurs dénormalisés des cours et des travaux.
+
+Les compteurs sont ajustés par des UPDATE ... SET champ = champ + n (F()),
+jamais par lecture-modification-écriture, et ne sont jamais réécrits par
+une sauvegarde d'instance. recalculer_compteurs_* les reconstruit en masse.
+"""
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+COMPTEURS_COURS = ('nombre_inscrits', 'nombre_supports', 'nombre_travaux', 'nombre_remises')
+COMPTEURS_TRAVAIL = ('nombre_remises', 'nombre_remises_corrigees', 'nombre_remises_en_attente')
+
+# Statuts de remise comptés comme « corrigée » et « en attente » (cf. teacher_travail_detail)
+STATUT_CORRIGE = 'corrige'
+STATUT_EN_ATTENTE = 'remis'
+
+
+def incrementer(queryset, **deltas):
+    """Ajoute à chaque compteur son delta (positif ou négatif) en une requête"""
+    deltas = {champ: delta for champ, delta in deltas.items() if delta}
+    if deltas:
+        queryset.update(**{champ: F(champ) + delta for champ, delta in deltas.items()})
+
+
+def champs_hors_compteurs(instance, compteurs):
+    """Champs à enregistrer lors d'une sauvegarde d'instance, compteurs exclus"""
+    return [
+        champ.name for champ in instance._meta.concrete_fields
+        if not champ.primary_key and champ.name not in compteurs
+    ]
+
+
+def _compte(modele, lien, **filtres):
+    """Sous-requête : nombre de lignes de `modele` rattachées à l'objet courant par `lien`"""
+    lignes = (
+        modele.objects
+        .filter(**{lien: OuterRef('pk')}, **filtres)
+        .order_by()
+        .values(lien)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(lignes[:1]), 0)
+
+
+def recalculer_compteurs_cours(cours=None):
+    """Recalcule les compteurs des cours (tous par défaut) en une requête UPDATE"""
+    from .models import Cours, SupportCours, InscriptionCours
+    from travaux.models import Travail, RemiseTravail
+
+    if cours is None:
+        cours = Cours.objects.all()
+    return cours.update(
+        nombre_inscrits=_compte(InscriptionCours, 'cours', is_actif=True),
+        nombre_supports=_compte(SupportCours, 'cours'),
+        nombre_travaux=_compte(Travail, 'cours'),
+        nombre_remises=_compte(RemiseTravail, 'travail__cours'),
+    )
+
+
+def recalculer_compteurs_travaux(travaux=None):
+    """Recalcule les compteurs des travaux (tous par défaut) en une requête UPDATE"""
+    from travaux.models import Travail, RemiseTravail
+
+    if travaux is None:
+        travaux = Travail.objects.all()
+    return travaux.update(
+        nombre_remises=_compte(RemiseTravail, 'travail'),
+        nombre_remises_corrigees=_compte(RemiseTravail, 'travail', statut=STATUT_CORRIGE),
+        nombre_remises_en_attente=_compte(RemiseTravail, 'travail', statut=STATUT_EN_ATTENTE),
+    )
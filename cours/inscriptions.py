@@ -0,0 +1,130 @@
+"""
+Inscriptions automatiques d'une cohorte (faculté, promotion, niveau).
+
+Chaque étudiant d'une cohorte doit être inscrit aux cours actifs de la cohorte
+et aux UE actives de son niveau. Les inscriptions manquantes sont obtenues par
+différence d'ensembles (couples attendus - couples existants) puis insérées
+avec bulk_create(ignore_conflicts=True) ; une inscription existante, même
+désactivée, n'est jamais recréée ni modifiée.
+
+Le calcul est incrémental : un nouveau cours n'inscrit que sa cohorte, un
+étudiant qui change de cohorte n'est inscrit qu'à elle.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+TAILLE_LOT = 1000
+
+
+def _etudiants_de_la_cohorte(faculte_id, promotion_id, niveau):
+    from users.models import StudentProfile
+
+    return list(
+        StudentProfile.objects.filter(
+            faculte_id=faculte_id, promotion_id=promotion_id, niveau=niveau,
+            user__user_type='etudiant',
+        ).values_list('user_id', flat=True)
+    )
+
+
+def _manquantes(modele, champ, etudiant_ids, cible_ids):
+    """Couples (étudiant, cible) sans inscription, par différence d'ensembles"""
+    attendues = {(etudiant_id, cible_id) for etudiant_id in etudiant_ids for cible_id in cible_ids}
+    if not attendues:
+        return set()
+    existantes = modele.objects.filter(
+        etudiant_id__in=etudiant_ids, **{f'{champ}_id__in': cible_ids}
+    ).values_list('etudiant_id', f'{champ}_id')
+    return attendues - set(existantes)
+
+
+def inscrire_cohorte(faculte_id, promotion_id, niveau, etudiant_ids=None, cours_ids=None, ue_ids=None):
+    """
+    Crée les inscriptions manquantes de la cohorte aux cours et aux UE.
+    `etudiant_ids`, `cours_ids` et `ue_ids` restreignent le calcul aux nouveaux
+    venus. Retourne {'cours': n, 'ue': n} (inscriptions créées).
+    """
+    from resultats.models import InscriptionUE, UE
+    from .compteurs import recalculer_compteurs_cours
+    from .models import Cours, InscriptionCours
+
+    resultats = {'cours': 0, 'ue': 0}
+    if not (faculte_id and promotion_id and niveau):
+        return resultats
+
+    if etudiant_ids is None:
+        etudiant_ids = _etudiants_de_la_cohorte(faculte_id, promotion_id, niveau)
+    if not etudiant_ids:
+        return resultats
+
+    cours = Cours.objects.filter(faculte_id=faculte_id, promotion_id=promotion_id, niveau=niveau, is_actif=True)
+    if cours_ids is not None:
+        cours = cours.filter(id__in=cours_ids)
+    ues = UE.objects.filter(niveau=niveau, is_actif=True)
+    if ue_ids is not None:
+        ues = ues.filter(id__in=ue_ids)
+
+    maintenant = timezone.now()
+    with transaction.atomic():
+        cours_manquants = _manquantes(InscriptionCours, 'cours', etudiant_ids, list(cours.values_list('id', flat=True)))
+        ues_manquantes = _manquantes(InscriptionUE, 'ue', etudiant_ids, list(ues.values_list('id', flat=True)))
+
+        InscriptionCours.objects.bulk_create(
+            [
+                InscriptionCours(etudiant_id=etudiant_id, cours_id=cours_id, is_valide=True, date_validation=maintenant)
+                for etudiant_id, cours_id in cours_manquants
+            ],
+            batch_size=TAILLE_LOT, ignore_conflicts=True,
+        )
+        InscriptionUE.objects.bulk_create(
+            [
+                InscriptionUE(etudiant_id=etudiant_id, ue_id=ue_id, is_valide=True, date_validation=maintenant)
+                for etudiant_id, ue_id in ues_manquantes
+            ],
+            batch_size=TAILLE_LOT, ignore_conflicts=True,
+        )
+
+        # bulk_create ne passe pas par InscriptionCours.save() : compteurs recalculés
+        cours_modifies = {cours_id for _, cours_id in cours_manquants}
+        if cours_modifies:
+            recalculer_compteurs_cours(Cours.objects.filter(id__in=cours_modifies))
+
+    resultats['cours'] = len(cours_manquants)
+    resultats['ue'] = len(ues_manquantes)
+    return resultats
+
+
+def inscrire_aux_ues(ue_id):
+    """Nouvelle UE : inscription de toutes les cohortes de son niveau"""
+    from resultats.models import UE
+    from users.models import StudentProfile
+
+    ue = UE.objects.filter(pk=ue_id, is_actif=True).first()
+    if ue is None:
+        return {'cours': 0, 'ue': 0}
+    cohortes = (
+        StudentProfile.objects.filter(niveau=ue.niveau, faculte__isnull=False, promotion__isnull=False)
+        .values_list('faculte_id', 'promotion_id').distinct().order_by()
+    )
+    resultats = {'cours': 0, 'ue': 0}
+    for faculte_id, promotion_id in cohortes:
+        resultats['ue'] += inscrire_cohorte(faculte_id, promotion_id, ue.niveau, cours_ids=[], ue_ids=[ue_id])['ue']
+    return resultats
+
+
+def inscrire_toutes_les_cohortes():
+    """Rattrapage : inscriptions manquantes de toutes les cohortes ; retourne les totaux"""
+    from users.models import StudentProfile
+
+    cohortes = (
+        StudentProfile.objects.filter(faculte__isnull=False, promotion__isnull=False)
+        .exclude(niveau='')
+        .values_list('faculte_id', 'promotion_id', 'niveau').distinct().order_by()
+    )
+    resultats = {'cohortes': 0, 'cours': 0, 'ue': 0}
+    for cohorte in cohortes:
+        crees = inscrire_cohorte(*cohorte)
+        resultats['cohortes'] += 1
+        resultats['cours'] += crees['cours']
+        resultats['ue'] += crees['ue']
+    return resultats
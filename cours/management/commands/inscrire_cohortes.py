@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from cours.inscriptions import inscrire_toutes_les_cohortes
+
+
+class Command(BaseCommand):
+    help = "Inscrit chaque étudiant aux cours de sa cohorte et aux UE de son niveau (inscriptions manquantes uniquement)"
+
+    def handle(self, *args, **options):
+        resultats = inscrire_toutes_les_cohortes()
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultats['cohortes']} cohorte(s) : {resultats['cours']} inscription(s) aux cours, "
+            f"{resultats['ue']} inscription(s) aux UE créée(s)."
+        ))
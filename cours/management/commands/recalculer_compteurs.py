@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from cours.compteurs import recalculer_compteurs_cours, recalculer_compteurs_travaux
+
+
+class Command(BaseCommand):
+    help = "Recalcule les compteurs dénormalisés des cours et des travaux (inscrits, supports, remises...)"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            travaux = recalculer_compteurs_travaux()
+            cours = recalculer_compteurs_cours()
+        self.stdout.write(self.style.SUCCESS(f"Compteurs recalculés : {cours} cours, {travaux} travaux."))
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.6 on 2026-10-19 19:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cours', '0003_cours_credits'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='supportcours',
+            name='date_analyse',
+            field=models.DateTimeField(blank=True, help_text='Date de la dernière analyse', null=True),
+        ),
+        migrations.AddField(
+            model_name='supportcours',
+            name='empreinte_sha256',
+            field=models.CharField(blank=True, help_text='Empreinte SHA-256 du fichier', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='supportcours',
+            name='statut_analyse',
+            field=models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', "En cours d'analyse"), ('termine', 'Analysé'), ('erreur', 'Erreur')], default='en_attente', max_length=20),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.6 on 2026-10-19 19:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cours', '0004_supportcours_date_analyse_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cours',
+            name='nombre_inscrits',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='cours',
+            name='nombre_remises',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='cours',
+            name='nombre_supports',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='cours',
+            name='nombre_travaux',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-19 20:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cours', '0005_cours_nombre_inscrits_cours_nombre_remises_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='supportcours',
+            name='apercu',
+            field=models.JSONField(blank=True, default=dict, help_text='Vignette et aperçus des premières pages'),
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
@@ -71,17 +71,59 @@ class Cours(models.Model):
     is_actif = models.BooleanField(default=True, help_text="Cours actif")
     is_visible_etudiants = models.BooleanField(default=True, help_text="Visible pour les étudiants")
     
+    # Compteurs dénormalisés (maintenus par cours/compteurs.py)
+    nombre_inscrits = models.PositiveIntegerField(default=0, editable=False)
+    nombre_supports = models.PositiveIntegerField(default=0, editable=False)
+    nombre_travaux = models.PositiveIntegerField(default=0, editable=False)
+    nombre_remises = models.PositiveIntegerField(default=0, editable=False)
+    
     class Meta:
         verbose_name = "Cours"
         verbose_name_plural = "Cours"
         ordering = ['-date_creation']
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Cohorte au chargement : si elle change, l'ancienne doit aussi être invalidée
+        # (lue dans __dict__ pour ne pas charger des champs différés par .only())
+        champs = self.__dict__
+        self._cohorte_initiale = (champs.get('faculte_id'), champs.get('promotion_id'), champs.get('niveau'))
+
     def __str__(self):
         return f"{self.code} - {self.titre}"
     
     def get_display_name(self):
         return f"{self.code} - {self.titre}"
 
+    def _invalider_cohortes(self):
+        from .cohorte import invalider_cohortes
+        cohortes = {self._cohorte_initiale, (self.faculte_id, self.promotion_id, self.niveau)}
+        transaction.on_commit(lambda: [invalider_cohortes(*cohorte) for cohorte in cohortes])
+
+    def save(self, *args, **kwargs):
+        from .compteurs import COMPTEURS_COURS, champs_hors_compteurs
+        cohorte = (self.faculte_id, self.promotion_id, self.niveau)
+        nouvelle_cohorte = self._state.adding or cohorte != self._cohorte_initiale
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = champs_hors_compteurs(self, COMPTEURS_COURS)
+        super().save(*args, **kwargs)
+        self._invalider_cohortes()
+        self._cohorte_initiale = cohorte
+        from users.tableau_enseignant import invalider_tableau_enseignant
+        invalider_tableau_enseignant(self.enseignant_id)
+
+        if nouvelle_cohorte and self.is_actif:
+            # Nouveau cours (ou cours déplacé) : seule sa cohorte est inscrite
+            from televersements.taches import soumettre_tache
+            from .inscriptions import inscrire_cohorte
+            soumettre_tache(inscrire_cohorte, *cohorte, cours_ids=[self.pk], ue_ids=[])
+
+    def delete(self, *args, **kwargs):
+        from users.tableau_enseignant import invalider_tableau_enseignant
+        self._invalider_cohortes()
+        invalider_tableau_enseignant(self.enseignant_id)
+        return super().delete(*args, **kwargs)
+
 
 class SupportCours(models.Model):
     """
@@ -95,6 +137,13 @@ class SupportCours(models.Model):
         ('autre', 'Autre'),
     ]
     
+    STATUT_ANALYSE_CHOICES = [
+        ('en_attente', 'En attente'),
+        ('en_cours', "En cours d'analyse"),
+        ('termine', 'Analysé'),
+        ('erreur', 'Erreur'),
+    ]
+    
     # Informations de base
     titre = models.CharField(max_length=200, help_text="Titre du support")
     description = models.TextField(blank=True, help_text="Description du support")
@@ -107,6 +156,12 @@ class SupportCours(models.Model):
     )
     taille_fichier = models.PositiveIntegerField(null=True, blank=True, help_text="Taille en octets")
     
+    # Analyse du fichier en arrière-plan
+    statut_analyse = models.CharField(max_length=20, choices=STATUT_ANALYSE_CHOICES, default='en_attente')
+    empreinte_sha256 = models.CharField(max_length=64, blank=True, help_text="Empreinte SHA-256 du fichier")
+    date_analyse = models.DateTimeField(null=True, blank=True, help_text="Date de la dernière analyse")
+    apercu = models.JSONField(default=dict, blank=True, help_text="Vignette et aperçus des premières pages")
+    
     # Relations
     cours = models.ForeignKey(Cours, on_delete=models.CASCADE, related_name='supports')
     enseignant = models.ForeignKey(
@@ -133,10 +188,39 @@ class SupportCours(models.Model):
         return f"{self.cours.code} - {self.titre}"
     
     def save(self, *args, **kwargs):
+        from .compteurs import incrementer
         # Calculer la taille du fichier
         if self.fichier:
             self.taille_fichier = self.fichier.size
+        creation = self._state.adding
         super().save(*args, **kwargs)
+        if creation:
+            incrementer(Cours.objects.filter(pk=self.cours_id), nombre_supports=1)
+
+    def delete(self, *args, **kwargs):
+        from .compteurs import incrementer
+        incrementer(Cours.objects.filter(pk=self.cours_id), nombre_supports=-1)
+        return super().delete(*args, **kwargs)
+    
+    @property
+    def apercu_vignette(self):
+        """URL de la vignette de la première page ('' tant que l'aperçu n'est pas prêt)"""
+        from televersements.apercus import url_vignette
+        return url_vignette(self.apercu, self.empreinte_sha256)
+
+    @property
+    def apercu_pages(self):
+        from televersements.apercus import pages_apercu
+        return pages_apercu(self.apercu, self.empreinte_sha256)
+
+    def planifier_analyse(self):
+        """Planifie l'analyse du fichier du support, hors du cycle de la requête"""
+        from televersements.taches import soumettre_tache
+        from .taches import analyser_support
+        
+        SupportCours.objects.filter(pk=self.pk).update(statut_analyse='en_attente')
+        self.statut_analyse = 'en_attente'
+        soumettre_tache(analyser_support, self.pk)
 
 
 class InscriptionCours(models.Model):
@@ -165,5 +249,21 @@ class InscriptionCours(models.Model):
         unique_together = ['etudiant', 'cours']
         ordering = ['-date_inscription']
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._actif_initial = self.__dict__.get('is_actif', False) if self.pk else False
+
     def __str__(self):
         return f"{self.etudiant.matricule} - {self.cours.code}"
+
+    def save(self, *args, **kwargs):
+        from .compteurs import incrementer
+        super().save(*args, **kwargs)
+        incrementer(Cours.objects.filter(pk=self.cours_id), nombre_inscrits=int(self.is_actif) - int(self._actif_initial))
+        self._actif_initial = self.is_actif
+
+    def delete(self, *args, **kwargs):
+        from .compteurs import incrementer
+        if self._actif_initial:
+            incrementer(Cours.objects.filter(pk=self.cours_id), nombre_inscrits=-1)
+        return super().delete(*args, **kwargs)
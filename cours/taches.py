@@ -0,0 +1,55 @@
+"""
+Tâches d'arrière-plan liées aux supports de cours
+"""
+import logging
+
+from django.utils import timezone
+
+from televersements.utils import calculer_sha256
+
+logger = logging.getLogger(__name__)
+
+
+def analyser_support(support_id):
+    """Calcule la taille et l'empreinte du fichier d'un support"""
+    from .models import SupportCours
+
+    support = SupportCours.objects.filter(pk=support_id).first()
+    if support is None or not support.fichier:
+        return
+
+    # date_analyse marque le début : une analyse interrompue (worker arrêté) est reprise par analyser_fichiers
+    SupportCours.objects.filter(pk=support_id).update(statut_analyse='en_cours', date_analyse=timezone.now())
+    try:
+        taille = support.fichier.size
+        sha256 = calculer_sha256(support.fichier.path)
+    except Exception:
+        logger.exception("Analyse du support %s impossible", support_id)
+        SupportCours.objects.filter(pk=support_id).update(statut_analyse='erreur')
+        return
+
+    SupportCours.objects.filter(pk=support_id).update(
+        taille_fichier=taille,
+        empreinte_sha256=sha256,
+        statut_analyse='termine',
+        date_analyse=timezone.now(),
+    )
+    generer_apercu_support(support_id)
+
+
+def generer_apercu_support(support_id):
+    """Vignette et aperçus des premières pages du support (réutilisés si le contenu est connu)"""
+    from televersements.apercus import generer_apercu
+    from .models import SupportCours
+
+    support = SupportCours.objects.filter(pk=support_id).only('fichier', 'empreinte_sha256').first()
+    if support is None or not support.fichier or not support.empreinte_sha256:
+        return
+    try:
+        apercu = generer_apercu(support.fichier, support.empreinte_sha256)
+    except Exception:
+        # Fichier illisible ou corrompu : le support reste téléchargeable, sans aperçu
+        logger.warning("Aperçu du support %s impossible", support_id, exc_info=True)
+        return
+    # Le fichier a pu être remplacé pendant le rendu : l'aperçu n'est enregistré que s'il correspond
+    SupportCours.objects.filter(pk=support_id, empreinte_sha256=support.empreinte_sha256).update(apercu=apercu)
@@ -1,3 +1,344 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from resultats.models import UE, InscriptionUE
+from travaux.models import RemiseTravail, Travail
+from users.models import Faculte, Promotion, StudentProfile
+
+from .cohorte import Cohorte
+from .compteurs import recalculer_compteurs_cours, recalculer_compteurs_travaux
+from .inscriptions import inscrire_cohorte
+from .models import Cours, InscriptionCours, SupportCours
+
+User = get_user_model()
+
+COMPTEURS_COURS = ('nombre_inscrits', 'nombre_supports', 'nombre_travaux', 'nombre_remises')
+COMPTEURS_TRAVAIL = ('nombre_remises', 'nombre_remises_corrigees', 'nombre_remises_en_attente')
+
+
+class CompteursTests(TestCase):
+    """Compteurs dénormalisés des cours et des travaux"""
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        reglages = override_settings(MEDIA_ROOT=self.media, TACHES_SYNCHRONES=True)
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+
+        self.enseignant = User.objects.create_user('enseignant', password='x', matricule='UOM2025-100', user_type='enseignant')
+        self.cours = Cours.objects.create(
+            titre='Algorithmique', code='INFO101', niveau='L1', filiere='Informatique',
+            enseignant=self.enseignant, date_debut=date.today(), date_fin=date.today() + timedelta(days=90),
+        )
+        self.etudiants = [
+            User.objects.create_user(f'etudiant{i}', password='x', matricule=f'UOM2025-00{i}') for i in range(1, 4)
+        ]
+
+    def _travail(self, cours=None):
+        return Travail.objects.create(
+            titre='TP', description='TP', consignes='Rendre', niveau='L1', filiere='Informatique',
+            enseignant=self.enseignant, cours=cours or self.cours, statut='publie',
+            date_limite_remise=timezone.now() + timedelta(days=7),
+        )
+
+    def _remise(self, travail, etudiant, statut='remis'):
+        remise = RemiseTravail(etudiant=etudiant, travail=travail, statut=statut)
+        remise.fichier_principal.save('tp.txt', ContentFile(b'contenu'), save=False)
+        remise.save()
+        return remise
+
+    def _support(self):
+        support = SupportCours(titre='Chapitre 1', cours=self.cours, enseignant=self.enseignant)
+        support.fichier.save('chapitre.pdf', ContentFile(b'%PDF-1.4'), save=False)
+        support.save()
+        return support
+
+    def _compteurs(self, objet, champs):
+        objet.refresh_from_db()
+        return tuple(getattr(objet, champ) for champ in champs)
+
+    def _attendus_par_recalcul(self, objet, champs, recalculer):
+        """Compteurs obtenus en recalculant tout depuis les lignes existantes"""
+        recalculer(type(objet).objects.filter(pk=objet.pk))
+        return self._compteurs(objet, champs)
+
+    def test_compteurs_suivent_les_operations(self):
+        for etudiant in self.etudiants:
+            InscriptionCours.objects.create(etudiant=etudiant, cours=self.cours)
+        support = self._support()
+        travail = self._travail()
+        remises = [self._remise(travail, etudiant) for etudiant in self.etudiants]
+
+        self.assertEqual(self._compteurs(self.cours, COMPTEURS_COURS), (3, 1, 1, 3))
+        self.assertEqual(self._compteurs(travail, COMPTEURS_TRAVAIL), (3, 0, 3))
+
+        remises[0].statut = 'corrige'
+        remises[0].save()
+        remises[1].delete()
+        inscription = InscriptionCours.objects.get(etudiant=self.etudiants[2])
+        inscription.is_actif = False
+        inscription.save()
+        support.delete()
+
+        self.assertEqual(self._compteurs(self.cours, COMPTEURS_COURS), (2, 0, 1, 2))
+        self.assertEqual(self._compteurs(travail, COMPTEURS_TRAVAIL), (2, 1, 1))
+        # Les compteurs maintenus au fil de l'eau égalent ceux d'un recalcul complet
+        self.assertEqual(self._attendus_par_recalcul(travail, COMPTEURS_TRAVAIL, recalculer_compteurs_travaux), (2, 1, 1))
+        self.assertEqual(self._attendus_par_recalcul(self.cours, COMPTEURS_COURS, recalculer_compteurs_cours), (2, 0, 1, 2))
+
+    def test_travail_deplace_emporte_ses_remises(self):
+        autre = Cours.objects.create(
+            titre='Réseaux', code='INFO102', niveau='L1', filiere='Informatique',
+            enseignant=self.enseignant, date_debut=date.today(), date_fin=date.today() + timedelta(days=90),
+        )
+        travail = self._travail()
+        self._remise(travail, self.etudiants[0])
+        self._remise(travail, self.etudiants[1])
+
+        travail.cours = autre
+        travail.save()
+
+        self.assertEqual(self._compteurs(self.cours, ('nombre_travaux', 'nombre_remises')), (0, 0))
+        self.assertEqual(self._compteurs(autre, ('nombre_travaux', 'nombre_remises')), (1, 2))
+
+    def test_sauvegarde_d_instance_perimee_n_ecrase_pas_les_compteurs(self):
+        cours = Cours.objects.get(pk=self.cours.pk)
+        InscriptionCours.objects.create(etudiant=self.etudiants[0], cours=self.cours)
+
+        # `cours` a été chargé avant l'inscription : son compteur en mémoire vaut 0
+        cours.titre = 'Algorithmique avancée'
+        cours.save()
+
+        self.assertEqual(self._compteurs(self.cours, ('nombre_inscrits',)), (1,))
+
+    def test_recalcul_corrige_une_derive(self):
+        InscriptionCours.objects.create(etudiant=self.etudiants[0], cours=self.cours)
+        travail = self._travail()
+        self._remise(travail, self.etudiants[0], statut='corrige')
+        self._remise(travail, self.etudiants[1])
+
+        # Dérive : écritures hors des modèles (import SQL, suppression en masse...)
+        Cours.objects.filter(pk=self.cours.pk).update(nombre_inscrits=7, nombre_supports=4, nombre_travaux=0, nombre_remises=9)
+        Travail.objects.filter(pk=travail.pk).update(nombre_remises=0, nombre_remises_corrigees=5, nombre_remises_en_attente=0)
+
+        call_command('recalculer_compteurs', stdout=StringIO())
+
+        self.assertEqual(self._compteurs(self.cours, COMPTEURS_COURS), (1, 0, 1, 2))
+        self.assertEqual(self._compteurs(travail, COMPTEURS_TRAVAIL), (2, 1, 1))
+
+    def test_recalcul_limite_au_queryset(self):
+        travail = self._travail()
+        self._remise(travail, self.etudiants[0])
+        autre = self._travail()
+        Travail.objects.filter(pk__in=[travail.pk, autre.pk]).update(nombre_remises=5)
+
+        self.assertEqual(recalculer_compteurs_travaux(Travail.objects.filter(pk=travail.pk)), 1)
+
+        self.assertEqual(self._compteurs(travail, ('nombre_remises',)), (1,))
+        self.assertEqual(self._compteurs(autre, ('nombre_remises',)), (5,))
+
+
+class InscriptionsCohorteTests(TestCase):
+    """Inscriptions automatiques d'une cohorte : seules les inscriptions manquantes sont créées"""
+
+    def setUp(self):
+        reglages = override_settings(TACHES_SYNCHRONES=True)
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+        self.faculte = Faculte.objects.create(code='FSI', nom='Sciences informatiques')
+        self.promotion = Promotion.objects.create(annee_debut=2024, annee_fin=2025)
+        self.cohorte = (self.faculte.id, self.promotion.id, 'L1')
+        self.enseignant = User.objects.create_user('enseignant', password='x', matricule='UOM2025-100', user_type='enseignant')
+        self.cours = self._cours('INFO101')
+        self.ue = UE.objects.create(
+            code='INFO101', nom='Algorithmique', niveau='L1', semestre='S1', filiere='Informatique', credits=6,
+            enseignant_responsable=self.enseignant, date_debut=date(2024, 9, 1), date_fin=date(2025, 1, 31),
+        )
+        self.etudiants = [self._etudiant(numero) for numero in (1, 2, 3)]
+
+    def _cours(self, code, niveau='L1'):
+        return Cours.objects.create(
+            titre=code, code=code, niveau=niveau, filiere='Informatique', enseignant=self.enseignant,
+            faculte=self.faculte, promotion=self.promotion,
+            date_debut=date.today(), date_fin=date.today() + timedelta(days=90),
+        )
+
+    def _etudiant(self, numero, niveau='L1'):
+        etudiant = User.objects.create_user(f'etudiant{numero}', password='x', matricule=f'UOM2025-00{numero}')
+        StudentProfile.objects.create(user=etudiant, niveau=niveau, faculte=self.faculte, promotion=self.promotion)
+        return etudiant
+
+    def _inscriptions(self):
+        return (
+            set(InscriptionCours.objects.values_list('etudiant_id', 'cours_id')),
+            set(InscriptionUE.objects.values_list('etudiant_id', 'ue_id')),
+        )
+
+    def test_second_passage_ne_cree_rien(self):
+        self.assertEqual(inscrire_cohorte(*self.cohorte), {'cours': 3, 'ue': 3})
+        # Inscription désactivée à la main : ni recréée ni réactivée
+        InscriptionCours.objects.filter(etudiant=self.etudiants[0]).update(is_actif=False)
+        avant = self._inscriptions()
+
+        self.assertEqual(inscrire_cohorte(*self.cohorte), {'cours': 0, 'ue': 0})
+
+        self.assertEqual(self._inscriptions(), avant)
+        self.assertFalse(InscriptionCours.objects.get(etudiant=self.etudiants[0]).is_actif)
+        self.assertEqual(Cours.objects.get(pk=self.cours.pk).nombre_inscrits, 3)
+
+    def test_nouveau_cours_ou_etudiant_seulement_le_manquant(self):
+        inscrire_cohorte(*self.cohorte)
+        cours_initiaux, ues_initiales = self._inscriptions()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            nouveau_cours = self._cours('INFO102')
+            # Cours d'un autre niveau : la cohorte L1 n'y est pas inscrite
+            self._cours('INFO201', niveau='L2')
+        cours, ues = self._inscriptions()
+        self.assertEqual(cours - cours_initiaux, {(etudiant.id, nouveau_cours.id) for etudiant in self.etudiants})
+        self.assertEqual(ues, ues_initiales)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            nouveau = self._etudiant(4)
+        self.assertEqual(
+            self._inscriptions(),
+            (
+                cours | {(nouveau.id, self.cours.id), (nouveau.id, nouveau_cours.id)},
+                ues | {(nouveau.id, self.ue.id)},
+            ),
+        )
+
+    def test_profil_inscrit_seulement_si_la_cohorte_change(self):
+        profil = StudentProfile.objects.get(user=self.etudiants[0])
+
+        def taches_soumises():
+            with mock.patch('televersements.taches.soumettre_tache') as soumettre:
+                profil.save()
+            return [(appel.args[0].__name__, appel.args[1:]) for appel in soumettre.call_args_list]
+
+        profil.emergency_contact = 'Parent'
+        self.assertEqual(taches_soumises(), [])
+
+        profil.niveau = 'L2'
+        self.assertEqual(taches_soumises(), [('inscrire_cohorte', (self.faculte.id, self.promotion.id, 'L2'))])
+
+        # Nouvelle sauvegarde sans changement : la cohorte de référence a suivi
+        self.assertEqual(taches_soumises(), [])
+
+
+class CohorteTests(TestCase):
+    """Listes de cours et de travaux partagées en cache par cohorte"""
+
+    def setUp(self):
+        reglages = override_settings(TACHES_SYNCHRONES=True)
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.faculte = Faculte.objects.create(code='FSI', nom='Sciences informatiques')
+        self.promotion = Promotion.objects.create(annee_debut=2024, annee_fin=2025)
+        self.enseignant = User.objects.create_user('enseignant', password='x', matricule='UOM2025-100', user_type='enseignant')
+        self.cours = self._cours('INFO101')
+        self._cours('INFO201', niveau='L2')
+        self.travail = self._travail('TP 1')
+        self.etudiants = []
+        for numero in (1, 2):
+            etudiant = User.objects.create_user(f'etudiant{numero}', password='x', matricule=f'UOM2025-00{numero}')
+            StudentProfile.objects.create(user=etudiant, niveau='L1', faculte=self.faculte, promotion=self.promotion)
+            self.etudiants.append(etudiant)
+        self.cohorte = Cohorte(self.faculte.id, self.promotion.id, 'L1')
+
+    def _cours(self, code, niveau='L1'):
+        return Cours.objects.create(
+            titre=code, code=code, niveau=niveau, filiere='Informatique', enseignant=self.enseignant,
+            faculte=self.faculte, promotion=self.promotion,
+            date_debut=date.today(), date_fin=date.today() + timedelta(days=90),
+        )
+
+    def _travail(self, titre, cours=None):
+        return Travail.objects.create(
+            titre=titre, description='TP', consignes='Rendre', niveau='L1', filiere='Informatique',
+            enseignant=self.enseignant, cours=cours or self.cours, statut='publie',
+            date_limite_remise=timezone.now() + timedelta(days=7),
+        )
+
+    @staticmethod
+    def _codes(cohorte):
+        return [cours.code for cours in cohorte.cours()]
+
+    def test_listes_en_cache_par_cohorte(self):
+        with self.assertNumQueries(2):
+            self.assertEqual(self._codes(self.cohorte), ['INFO101'])
+            self.assertEqual([travail.titre for travail in self.cohorte.travaux()], ['TP 1'])
+
+        # Une autre instance de la même cohorte lit le cache
+        meme_cohorte = Cohorte.de_etudiant(User.objects.select_related('student_profile').get(pk=self.etudiants[1].pk))
+        with self.assertNumQueries(0):
+            self.assertEqual(self._codes(meme_cohorte), ['INFO101'])
+            self.assertEqual(meme_cohorte.travaux_du_cours(self.cours.id), [self.travail])
+            self.assertTrue(meme_cohorte.contient_cours(self.cours.id))
+
+        # Une cohorte d'un autre niveau a sa propre liste
+        self.assertEqual(self._codes(Cohorte(self.faculte.id, self.promotion.id, 'L2')), ['INFO201'])
+
+    def test_invalidation_par_cours_et_travaux(self):
+        self.cohorte.cours()
+        self.cohorte.travaux()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            nouveau = self._cours('INFO102')
+        self.assertEqual(sorted(self._codes(self.cohorte)), ['INFO101', 'INFO102'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second = self._travail('TP 2', cours=nouveau)
+        self.assertEqual(sorted(travail.titre for travail in self.cohorte.travaux()), ['TP 1', 'TP 2'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.travail.titre = 'TP 1 (corrigé)'
+            self.travail.save()
+        self.assertEqual(sorted(travail.titre for travail in self.cohorte.travaux()), ['TP 1 (corrigé)', 'TP 2'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertEqual([travail.titre for travail in self.cohorte.travaux()], ['TP 1 (corrigé)'])
+
+        # Cours passé en L2 : retiré de la liste L1, ajouté à la liste L2
+        Cohorte(self.faculte.id, self.promotion.id, 'L2').cours()
+        with self.captureOnCommitCallbacks(execute=True):
+            nouveau.niveau = 'L2'
+            nouveau.save()
+        self.assertEqual(self._codes(self.cohorte), ['INFO101'])
+        self.assertEqual(sorted(self._codes(Cohorte(self.faculte.id, self.promotion.id, 'L2'))), ['INFO102', 'INFO201'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cours.delete()
+        self.assertEqual((self._codes(self.cohorte), self.cohorte.travaux()), ([], []))
+
+    def test_remises_de_l_etudiant_superposees(self):
+        RemiseTravail.objects.create(etudiant=self.etudiants[0], travail=self.travail, statut='corrige', note=15)
+
+        pages = []
+        for etudiant in self.etudiants:
+            self.client.force_login(etudiant)
+            reponse = self.client.get(reverse('student_travaux'))
+            self.assertEqual(reponse.status_code, 200)
+            pages.append(reponse.context)
+
+        # Même liste de la cohorte, remise propre à chaque étudiant
+        termines = pages[0]['travaux_termines']
+        self.assertEqual([(travail.id, remise.etudiant_id) for travail, remise in termines], [(self.travail.id, self.etudiants[0].id)])
+        self.assertEqual(pages[0]['travaux_ouverts'], [])
+        self.assertEqual(pages[1]['travaux_ouverts'], [(self.travail, None)])
+        self.assertEqual(pages[1]['travaux_termines'], [])
@@ -5,7 +5,10 @@ from django.db.models import Q
 from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
 from django.http import JsonResponse
 from .models import Cours, SupportCours, InscriptionCours
+from .cohorte import Cohorte
 from users.models import CustomUser, Faculte, Promotion
+from users.notifications import notifier_support_ajoute
+from users.suppression import lancer_suppression
 from .forms import CoursCreationForm, SupportCoursForm
 
 
@@ -231,10 +234,9 @@ def admin_cours_delete(request, cours_id):
     cours = get_object_or_404(Cours, id=cours_id)
     
     if request.method == 'POST':
-        code = cours.code
-        cours.delete()
-        messages.success(request, f"Cours {code} supprimé avec succès.")
-        return redirect('cours:admin_cours_list')
+        tache = lancer_suppression(cours, 'cours', request.user, libelle=f"{cours.code} - {cours.titre}")
+        messages.success(request, f"Suppression du cours {cours.code} lancée en arrière-plan.")
+        return redirect('admin_suppression_suivi', tache_id=tache.id)
     
     return redirect('cours:admin_cours_list')
 
@@ -338,18 +340,14 @@ def teacher_cours_detail(request, cours_id):
         cours=cours
     ).order_by('ordre_affichage', '-date_publication')
 
-    # Statistiques
-    total_travaux = len(travaux_ouverts) + len(travaux_fermes) + len(travaux_termines)
-    total_remises = len([r for _, r in travaux_ouverts if r]) + len([r for _, r in travaux_termines if r])
-
     context = {
         'cours': cours,
         'travaux_ouverts': travaux_ouverts,
         'travaux_fermes': travaux_fermes,
         'travaux_termines': travaux_termines,
         'supports_cours': supports_cours,
-        'total_travaux': total_travaux,
-        'total_remises': total_remises,
+        'total_travaux': cours.nombre_travaux,
+        'total_remises': cours.nombre_remises,
     }
 
     return render(request, 'cours/teacher_cours_detail.html', context)
@@ -407,25 +405,8 @@ def student_cours_list(request):
             'niveau_etudiant': None,
         })
     
-    # Filtrer les cours selon la promotion, faculté ET niveau de l'étudiant
-    cours = Cours.objects.filter(
-        is_actif=True,
-        is_visible_etudiants=True
-    )
-    
-    # Filtrage par promotion
-    if promotion:
-        cours = cours.filter(promotion=promotion)
-    
-    # Filtrage par faculté
-    if faculte:
-        cours = cours.filter(faculte=faculte)
-    
-    # Filtrage par niveau (L1, L2, L3, M1, M2, etc.)
-    if niveau_etudiant:
-        cours = cours.filter(niveau=niveau_etudiant)
-    
-    cours = cours.order_by('-date_creation')
+    # Cours de la cohorte (promotion, faculté ET niveau), partagés en cache par ses étudiants
+    cours = Cohorte.de_etudiant(request.user).cours()
     
     return render(request, 'cours/student_cours_list.html', {
         'cours': cours,
@@ -549,6 +530,8 @@ def teacher_support_create(request, cours_id):
             enseignant=request.user,
             is_public=is_public
         )
+        support.planifier_analyse()
+        notifier_support_ajoute(support)
         
         messages.success(request, f"Support '{titre}' publié avec succès pour le cours {cours.code}.")
         return redirect('cours:teacher_cours_detail', cours_id=cours_id)
@@ -573,10 +556,13 @@ def teacher_support_edit(request, support_id):
         support.type_support = request.POST.get('type_support', support.type_support)
         support.is_public = request.POST.get('is_public') == 'on'
         
-        if 'fichier' in request.FILES:
+        fichier_modifie = 'fichier' in request.FILES
+        if fichier_modifie:
             support.fichier = request.FILES['fichier']
         
         support.save()
+        if fichier_modifie:
+            support.planifier_analyse()
         
         messages.success(request, f"Support '{support.titre}' modifié avec succès.")
         return redirect('cours:teacher_cours_detail', cours_id=support.cours.id)
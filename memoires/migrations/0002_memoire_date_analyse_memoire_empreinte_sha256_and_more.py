@@ -0,0 +1,38 @@
+# Generated by Django 5.0.6 on 2026-10-19 19:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('memoires', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='memoire',
+            name='date_analyse',
+            field=models.DateTimeField(blank=True, help_text='Date de la dernière analyse', null=True),
+        ),
+        migrations.AddField(
+            model_name='memoire',
+            name='empreinte_sha256',
+            field=models.CharField(blank=True, help_text='Empreinte SHA-256 du fichier', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='memoire',
+            name='statut_analyse',
+            field=models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', "En cours d'analyse"), ('termine', 'Analysé'), ('erreur', 'Erreur')], default='en_attente', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='memoire',
+            name='taille_fichier',
+            field=models.BigIntegerField(blank=True, help_text='Taille du fichier en octets', null=True),
+        ),
+        migrations.AddField(
+            model_name='memoire',
+            name='texte_extrait',
+            field=models.TextField(blank=True, help_text='Texte extrait du mémoire'),
+        ),
+    ]
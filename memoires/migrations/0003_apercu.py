@@ -0,0 +1,28 @@
+# Generated by Django 5.0.6 on 2026-10-19 20:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('memoires', '0002_memoire_date_analyse_memoire_empreinte_sha256_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='memoire',
+            name='apercu',
+            field=models.JSONField(blank=True, default=dict, help_text='Vignette et aperçus des premières pages'),
+        ),
+        migrations.AlterField(
+            model_name='certificatmemoire',
+            name='id',
+            field=models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID'),
+        ),
+        migrations.AlterField(
+            model_name='memoire',
+            name='id',
+            field=models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID'),
+        ),
+    ]
@@ -31,6 +31,13 @@ class Memoire(models.Model):
         ('autre', 'Autre'),
     ]
     
+    STATUT_ANALYSE_CHOICES = [
+        ('en_attente', 'En attente'),
+        ('en_cours', "En cours d'analyse"),
+        ('termine', 'Analysé'),
+        ('erreur', 'Erreur'),
+    ]
+    
     # Étudiant
     etudiant = models.ForeignKey(
         User,
@@ -74,6 +81,14 @@ class Memoire(models.Model):
         help_text="Fichier PDF du mémoire final"
     )
     
+    # Analyse du fichier en arrière-plan
+    statut_analyse = models.CharField(max_length=20, choices=STATUT_ANALYSE_CHOICES, default='en_attente')
+    taille_fichier = models.BigIntegerField(null=True, blank=True, help_text="Taille du fichier en octets")
+    empreinte_sha256 = models.CharField(max_length=64, blank=True, help_text="Empreinte SHA-256 du fichier")
+    texte_extrait = models.TextField(blank=True, help_text="Texte extrait du mémoire")
+    date_analyse = models.DateTimeField(null=True, blank=True, help_text="Date de la dernière analyse")
+    apercu = models.JSONField(default=dict, blank=True, help_text="Vignette et aperçus des premières pages")
+    
     # Dates
     date_soumission_sujet = models.DateTimeField(auto_now_add=True)
     date_validation = models.DateTimeField(null=True, blank=True)
@@ -118,6 +133,26 @@ class Memoire(models.Model):
         except:
             return None
     
+    @property
+    def apercu_vignette(self):
+        """URL de la vignette de la première page ('' tant que l'aperçu n'est pas prêt)"""
+        from televersements.apercus import url_vignette
+        return url_vignette(self.apercu, self.empreinte_sha256)
+
+    @property
+    def apercu_pages(self):
+        from televersements.apercus import pages_apercu
+        return pages_apercu(self.apercu, self.empreinte_sha256)
+
+    def planifier_analyse(self):
+        """Planifie l'analyse du fichier déposé, hors du cycle de la requête"""
+        from televersements.taches import soumettre_tache
+        from .taches import analyser_memoire
+        
+        Memoire.objects.filter(pk=self.pk).update(statut_analyse='en_attente')
+        self.statut_analyse = 'en_attente'
+        soumettre_tache(analyser_memoire, self.pk)
+    
     def peut_deposer_final(self):
         """Vérifie si l'étudiant peut déposer le mémoire final"""
         return self.statut == 'valide' or self.statut == 'en_cours'
@@ -0,0 +1,55 @@
+"""
+Tâches d'arrière-plan liées aux mémoires
+"""
+import logging
+
+from django.utils import timezone
+
+from televersements.analyse import analyser_fichier
+
+logger = logging.getLogger(__name__)
+
+
+def analyser_memoire(memoire_id):
+    """Calcule la taille, l'empreinte et le texte du mémoire déposé"""
+    from .models import Memoire
+
+    memoire = Memoire.objects.filter(pk=memoire_id).first()
+    if memoire is None or not memoire.fichier_memoire:
+        return
+
+    # date_analyse marque le début : une analyse interrompue (worker arrêté) est reprise par analyser_fichiers
+    Memoire.objects.filter(pk=memoire_id).update(statut_analyse='en_cours', date_analyse=timezone.now())
+    try:
+        infos = analyser_fichier(memoire.fichier_memoire)
+    except Exception:
+        logger.exception("Analyse du mémoire %s impossible", memoire_id)
+        Memoire.objects.filter(pk=memoire_id).update(statut_analyse='erreur')
+        return
+
+    Memoire.objects.filter(pk=memoire_id).update(
+        taille_fichier=infos['taille'],
+        empreinte_sha256=infos['sha256'],
+        texte_extrait=infos['texte'],
+        statut_analyse='termine',
+        date_analyse=timezone.now(),
+    )
+    generer_apercu_memoire(memoire_id)
+
+
+def generer_apercu_memoire(memoire_id):
+    """Vignette et aperçus des premières pages du mémoire (réutilisés si le contenu est connu)"""
+    from televersements.apercus import generer_apercu
+    from .models import Memoire
+
+    memoire = Memoire.objects.filter(pk=memoire_id).only('fichier_memoire', 'empreinte_sha256').first()
+    if memoire is None or not memoire.fichier_memoire or not memoire.empreinte_sha256:
+        return
+    try:
+        apercu = generer_apercu(memoire.fichier_memoire, memoire.empreinte_sha256)
+    except Exception:
+        # Fichier illisible ou corrompu : le mémoire reste téléchargeable, sans aperçu
+        logger.warning("Aperçu du mémoire %s impossible", memoire_id, exc_info=True)
+        return
+    # Le fichier a pu être redéposé pendant le rendu : l'aperçu n'est enregistré que s'il correspond
+    Memoire.objects.filter(pk=memoire_id, empreinte_sha256=memoire.empreinte_sha256).update(apercu=apercu)
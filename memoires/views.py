@@ -8,6 +8,7 @@ from django.db.models import Q
 
 from .models import Memoire, CertificatMemoire
 from users.models import CustomUser
+from users.notifications import notifier_memoire_valide
 
 
 # ==================== VUES ÉTUDIANTS ====================
@@ -122,6 +123,7 @@ def student_deposer_memoire(request):
             memoire.date_depot_final = timezone.now()
             memoire.statut = 'termine'
             memoire.save()
+            memoire.planifier_analyse()
             messages.success(request, "✅ Votre mémoire a été déposé avec succès. Vous pouvez maintenant lancer la vérification anti-plagiat.")
             return redirect('memoires:student_memoire_dashboard')
     
@@ -325,6 +327,7 @@ def admin_valider_memoire(request, memoire_id):
                 memoire.statut = 'valide'
                 memoire.date_validation = timezone.now()
                 memoire.save()
+                notifier_memoire_valide(memoire)
                 messages.success(request, f"Sujet validé et encadrement attribué pour {memoire.etudiant.get_full_name()}.")
         
         elif action == 'refuser':
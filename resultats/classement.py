@@ -0,0 +1,107 @@
+"""
+Classement des étudiants par cohorte : (promotion, niveau, année académique, semestre).
+
+La promotion et le niveau sont ceux enregistrés sur chaque cote lors de son
+calcul, pas ceux du profil : après le passage dans l'année supérieure, les
+cotes d'une année close restent classées parmi les mêmes étudiants.
+
+Les moyennes d'une cohorte sont lues en une requête et classées par un tri
+NumPy vectorisé ; seules les cohortes dont une cote a changé
+(classement_a_jour = False) sont reclassées.
+"""
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+
+TAILLE_LOT = 500
+
+CHAMPS_CLASSEMENT = ['rang', 'effectif_classement', 'centile', 'classement_a_jour']
+
+
+def _filtre_cohorte(promotion_id, niveau, annee_academique, semestre):
+    return {
+        'promotion_id': promotion_id,
+        'niveau': niveau,
+        'annee_academique': annee_academique,
+        'semestre': semestre,
+    }
+
+
+def cotes_de_la_cohorte(cote):
+    """Cotes de la même cohorte que `cote` (vide si la cote n'a pas de promotion)"""
+    from .models import CoteEtudiant
+
+    if cote.promotion_id is None:
+        return CoteEtudiant.objects.none()
+    return CoteEtudiant.objects.filter(
+        **_filtre_cohorte(cote.promotion_id, cote.niveau, cote.annee_academique, cote.semestre)
+    )
+
+
+def rangs(moyennes):
+    """
+    Rang de chaque moyenne (1 = meilleure), les ex aequo partageant le même rang
+    (1, 2, 2, 4...), et rang centile : % de la cohorte classé en dessous,
+    les ex aequo comptant pour moitié.
+    """
+    moyennes = np.asarray(moyennes, dtype=float)
+    croissantes = np.sort(moyennes)
+    inferieures = np.searchsorted(croissantes, moyennes, side='left')
+    inferieures_ou_egales = np.searchsorted(croissantes, moyennes, side='right')
+    rang = len(moyennes) - inferieures_ou_egales + 1
+    centile = (inferieures + (inferieures_ou_egales - inferieures) / 2) * 100 / len(moyennes)
+    return rang, centile
+
+
+def classer_cohorte(promotion_id, niveau, annee_academique, semestre):
+    """Recalcule rang et centile de toutes les cotes d'une cohorte ; retourne l'effectif"""
+    from .models import CoteEtudiant
+
+    with transaction.atomic():
+        lignes = list(
+            CoteEtudiant.objects.select_for_update()
+            .filter(**_filtre_cohorte(promotion_id, niveau, annee_academique, semestre))
+            .values_list('id', 'moyenne')
+        )
+        if not lignes:
+            return 0
+
+        ids, moyennes = zip(*lignes)
+        rang, centile = rangs(moyennes)
+        effectif = len(ids)
+        cotes = [
+            CoteEtudiant(
+                id=cote_id,
+                rang=int(rang[i]),
+                effectif_classement=effectif,
+                centile=Decimal(str(round(float(centile[i]), 2))),
+                classement_a_jour=True,
+            )
+            for i, cote_id in enumerate(ids)
+        ]
+        CoteEtudiant.objects.bulk_update(cotes, CHAMPS_CLASSEMENT, batch_size=TAILLE_LOT)
+    return effectif
+
+
+def cohortes_a_reclasser(toutes=False):
+    """Cohortes contenant au moins une cote modifiée depuis le dernier classement"""
+    from .models import CoteEtudiant
+
+    cotes = CoteEtudiant.objects.filter(promotion__isnull=False)
+    if not toutes:
+        cotes = cotes.filter(classement_a_jour=False)
+    return (
+        cotes.values_list('promotion_id', 'niveau', 'annee_academique', 'semestre')
+        .order_by()
+        .distinct()
+    )
+
+
+def mettre_a_jour_classements(toutes=False):
+    """Reclasse les cohortes modifiées (ou toutes) ; retourne {'cohortes', 'cotes'}"""
+    resultats = {'cohortes': 0, 'cotes': 0}
+    for cohorte in list(cohortes_a_reclasser(toutes)):
+        resultats['cotes'] += classer_cohorte(*cohorte)
+        resultats['cohortes'] += 1
+    return resultats
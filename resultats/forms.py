@@ -0,0 +1,52 @@
+from django import forms
+from django.utils import timezone
+
+from .models import Note
+
+
+class ImportNotesForm(forms.Form):
+    """Paramètres d'une évaluation dont les notes sont importées depuis un fichier"""
+    type_note = forms.ChoiceField(
+        choices=Note.TYPE_NOTE_CHOICES,
+        initial='examen',
+        label="Type d'évaluation",
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+    titre = forms.CharField(
+        max_length=200,
+        label="Titre de l'évaluation",
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Ex: Examen de fin de semestre'})
+    )
+    date_evaluation = forms.DateField(
+        initial=timezone.localdate,
+        label="Date de l'évaluation",
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'})
+    )
+    note_maximale = forms.DecimalField(
+        max_digits=5, decimal_places=2, min_value=1, initial=20,
+        label='Note maximale',
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'step': 0.5})
+    )
+    coefficient = forms.DecimalField(
+        max_digits=3, decimal_places=2, min_value=0, initial=1,
+        label='Coefficient',
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'step': 0.1})
+    )
+    is_publie = forms.BooleanField(
+        required=False, initial=False,
+        label='Publier les notes (visibles et notifiées aux étudiants)',
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+    )
+    fichier = forms.FileField(
+        label='Fichier de notes (.csv ou .xlsx)',
+        widget=forms.FileInput(attrs={'class': 'form-control', 'accept': '.csv,.xlsx'})
+    )
+
+    def clean_fichier(self):
+        f = self.cleaned_data['fichier']
+        if not f.name.lower().endswith(('.csv', '.xlsx')):
+            raise forms.ValidationError('Seuls les fichiers .csv et .xlsx sont acceptés.')
+        # Taille max ~ 5 Mo
+        if f.size > 5 * 1024 * 1024:
+            raise forms.ValidationError('Le fichier dépasse 5 Mo.')
+        return f
@@ -0,0 +1,222 @@
+"""
+Import en masse des notes d'une UE depuis un fichier CSV ou XLSX.
+
+Le fichier est lu ligne à ligne, les matricules sont résolus en une seule
+requête et les notes sont créées ou mises à jour par lots (bulk_create /
+bulk_update). Une note est identifiée par (étudiant, UE, type, titre) :
+réimporter le même fichier corrigé met à jour les notes au lieu de les dupliquer.
+"""
+import codecs
+import csv
+from decimal import Decimal, InvalidOperation
+from itertools import chain
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Note
+from .utils import marquer_cotes_a_recalculer
+
+User = get_user_model()
+
+TAILLE_LOT = 500
+
+# En-têtes acceptés (insensibles à la casse) -> champ
+COLONNES = {
+    'matricule': 'matricule',
+    'note': 'note',
+    'note_obtenue': 'note',
+    'commentaire': 'commentaire',
+}
+
+CHAMPS_MIS_A_JOUR = [
+    'note_obtenue', 'note_maximale', 'coefficient', 'date_evaluation',
+    'commentaire', 'is_publie', 'date_publication', 'enseignant',
+]
+
+
+def _lignes_csv(fichier):
+    lignes = codecs.iterdecode(fichier, 'utf-8-sig')
+    premiere = next(lignes, '')
+    try:
+        dialecte = csv.Sniffer().sniff(premiere, delimiters=',;\t')
+    except csv.Error:
+        dialecte = csv.excel
+    yield from csv.reader(chain([premiere], lignes), dialect=dialecte)
+
+
+def _lignes_xlsx(fichier):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("L'import de fichiers .xlsx nécessite openpyxl ; utilisez un fichier .csv.")
+    # read_only : les lignes sont lues à la demande, sans charger toute la feuille
+    classeur = load_workbook(fichier, read_only=True, data_only=True)
+    try:
+        for ligne in classeur.active.iter_rows(values_only=True):
+            yield ['' if valeur is None else str(valeur) for valeur in ligne]
+    finally:
+        classeur.close()
+
+
+def lire_lignes(fichier):
+    """
+    Itère sur les lignes de données d'un fichier de notes : (numéro de ligne, {champ: valeur}).
+    Lève ValueError si le format ou les en-têtes sont invalides.
+    """
+    if fichier.name.lower().endswith('.xlsx'):
+        lignes = _lignes_xlsx(fichier)
+    else:
+        lignes = _lignes_csv(fichier)
+
+    entetes = next(lignes, None) or []
+    positions = {}
+    for position, entete in enumerate(entetes):
+        champ = COLONNES.get(str(entete).strip().lower())
+        if champ and champ not in positions:
+            positions[champ] = position
+    if 'matricule' not in positions or 'note' not in positions:
+        raise ValueError("Les colonnes « matricule » et « note » sont obligatoires.")
+
+    for numero, ligne in enumerate(lignes, start=2):
+        valeurs = {
+            champ: (ligne[position].strip() if position < len(ligne) else '')
+            for champ, position in positions.items()
+        }
+        if any(valeurs.values()):
+            yield numero, valeurs
+
+
+def lire_note_obtenue(valeur, note_maximale):
+    """Convertit une note ('12,5', '12.5') ; lève ValueError si invalide"""
+    try:
+        note = Decimal(valeur.replace(',', '.'))
+    except InvalidOperation:
+        raise ValueError(f"Note invalide : « {valeur} »")
+    if not note.is_finite():
+        raise ValueError(f"Note invalide : « {valeur} »")
+    if note < 0 or note > note_maximale:
+        raise ValueError(f"La note doit être comprise entre 0 et {note_maximale}")
+    return note.quantize(Decimal('0.01'))
+
+
+def importer_notes_ue(ue, fichier, evaluation, enseignant=None):
+    """
+    Importe les notes d'une évaluation de l'UE.
+
+    `evaluation` contient type_note, titre, date_evaluation, note_maximale,
+    coefficient et is_publie. Toutes les lignes sont validées avant écriture :
+    à la moindre erreur aucune note n'est enregistrée.
+    Retourne {'total', 'crees', 'mis_a_jour', 'errors': [{'ligne', 'matricule', 'erreur'}]}.
+    """
+    resultats = {
+        'total': 0,
+        'crees': 0,
+        'mis_a_jour': 0,
+        'errors': []
+    }
+    note_maximale = evaluation['note_maximale']
+
+    # 1. Lecture et validation ligne par ligne
+    lignes = {}
+    vues = {}  # matricule -> première ligne où il apparaît, même invalide
+    try:
+        for numero, valeurs in lire_lignes(fichier):
+            resultats['total'] += 1
+            matricule = valeurs['matricule']
+            try:
+                if not matricule:
+                    raise ValueError("Matricule manquant")
+                if matricule in vues:
+                    raise ValueError(f"Matricule en double (déjà à la ligne {vues[matricule]})")
+                vues[matricule] = numero
+                if not valeurs['note']:
+                    raise ValueError("Note manquante")
+                note = lire_note_obtenue(valeurs['note'], note_maximale)
+            except ValueError as e:
+                resultats['errors'].append({'ligne': numero, 'matricule': matricule, 'erreur': str(e)})
+                continue
+            lignes[matricule] = {'ligne': numero, 'note': note, 'commentaire': valeurs.get('commentaire', '')}
+    except (ValueError, UnicodeDecodeError) as e:
+        message = str(e) if isinstance(e, ValueError) else "Le fichier doit être encodé en UTF-8."
+        resultats['errors'].append({'ligne': None, 'matricule': '', 'erreur': message})
+        return resultats
+    except Exception:
+        resultats['errors'].append({'ligne': None, 'matricule': '', 'erreur': "Fichier illisible ou corrompu."})
+        return resultats
+
+    # 2. Résolution des matricules en une requête
+    etudiants = dict(
+        User.objects.filter(user_type='etudiant', matricule__in=list(lignes))
+        .values_list('matricule', 'id')
+    )
+    for matricule, ligne in lignes.items():
+        if matricule not in etudiants:
+            resultats['errors'].append({
+                'ligne': ligne['ligne'], 'matricule': matricule, 'erreur': "Aucun étudiant avec ce matricule"
+            })
+
+    if resultats['errors'] or not lignes:
+        resultats['errors'].sort(key=lambda erreur: erreur['ligne'] or 0)
+        return resultats
+
+    # 3. Création / mise à jour par lots
+    maintenant = timezone.now()
+    enseignant_id = enseignant.id if enseignant else ue.enseignant_responsable_id
+    a_creer, a_mettre_a_jour, publiees = [], [], []
+
+    with transaction.atomic():
+        existantes = {}
+        for note in Note.objects.select_for_update().filter(
+            ue=ue,
+            type_note=evaluation['type_note'],
+            titre=evaluation['titre'],
+            etudiant_id__in=etudiants.values()
+        ).order_by('id'):
+            existantes.setdefault(note.etudiant_id, note)
+
+        for matricule, ligne in lignes.items():
+            etudiant_id = etudiants[matricule]
+            note = existantes.get(etudiant_id)
+            if note is None:
+                note = Note(
+                    etudiant_id=etudiant_id,
+                    ue=ue,
+                    type_note=evaluation['type_note'],
+                    titre=evaluation['titre'],
+                    enseignant_id=enseignant_id,
+                    date_publication=maintenant,
+                )
+                a_creer.append(note)
+            else:
+                note.ue = ue
+                note.enseignant_id = enseignant_id
+                a_mettre_a_jour.append(note)
+
+            if evaluation['is_publie'] and not note._publie_initial:
+                note.date_publication = maintenant
+                publiees.append(note)
+            note.note_obtenue = ligne['note']
+            note.note_maximale = note_maximale
+            note.coefficient = evaluation['coefficient']
+            note.date_evaluation = evaluation['date_evaluation']
+            note.is_publie = evaluation['is_publie']
+            if ligne['commentaire']:
+                note.commentaire = ligne['commentaire']
+
+        # bulk_create / bulk_update ne passent pas par Note.save()
+        Note.objects.bulk_create(a_creer, batch_size=TAILLE_LOT)
+        Note.objects.bulk_update(a_mettre_a_jour, CHAMPS_MIS_A_JOUR, batch_size=TAILLE_LOT)
+
+        if publiees:
+            from users.notifications import notifier_notes_publiees
+            notifier_notes_publiees(publiees)
+        marquer_cotes_a_recalculer(etudiants.values(), ue.semestre)
+
+        from users.tableau_enseignant import invalider_tableau_enseignant
+        invalider_tableau_enseignant(ue.enseignant_responsable_id)
+
+    resultats['crees'] = len(a_creer)
+    resultats['mis_a_jour'] = len(a_mettre_a_jour)
+    return resultats
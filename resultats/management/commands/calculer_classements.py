@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from resultats.classement import mettre_a_jour_classements
+
+
+class Command(BaseCommand):
+    help = "Classe les étudiants par promotion, niveau et semestre (seules les cohortes modifiées par défaut)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--toutes',
+            action='store_true',
+            help="Reclasser toutes les cohortes, même celles à jour",
+        )
+
+    def handle(self, *args, **options):
+        resultats = mettre_a_jour_classements(toutes=options['toutes'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Classements mis à jour : {resultats['cohortes']} cohorte(s), {resultats['cotes']} cote(s)."
+        ))
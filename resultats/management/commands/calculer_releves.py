@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from resultats.releve import mettre_a_jour_releves
+
+
+class Command(BaseCommand):
+    help = "Calcule les relevés pluriannuels (moyennes annuelles, crédits cumulés) des étudiants dont une cote a changé"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tous',
+            action='store_true',
+            help="Recalculer tout l'historique de tous les étudiants",
+        )
+
+    def handle(self, *args, **options):
+        resultats = mettre_a_jour_releves(tous=options['tous'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Relevés mis à jour : {resultats['etudiants']} étudiant(s), {resultats['annees']} année(s)."
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from resultats.statistiques import calculer_statistiques
+
+
+class Command(BaseCommand):
+    help = "Recalcule les statistiques précalculées par UE, promotion et faculté (à planifier, ex: cron nocturne)"
+
+    def handle(self, *args, **options):
+        lignes = calculer_statistiques()
+        self.stdout.write(self.style.SUCCESS(
+            f"Statistiques recalculées : {lignes['ue']} UE, {lignes['promotions']} promotions, "
+            f"{lignes['facultes']} facultés."
+        ))
@@ -0,0 +1,57 @@
+# Generated by Django 5.0.6 on 2026-10-19 19:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resultats', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConfigurationResultats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nom', models.CharField(default='resultats_actives', max_length=50, unique=True)),
+                ('valeur', models.BooleanField(default=True, help_text="Activer l'affichage des résultats pour les étudiants")),
+                ('description', models.TextField(blank=True, help_text='Description de la configuration')),
+                ('date_modification', models.DateTimeField(auto_now=True)),
+                ('modifie_par', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='configurations_modifiees', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Configuration Résultats',
+                'verbose_name_plural': 'Configurations Résultats',
+            },
+        ),
+        migrations.CreateModel(
+            name='CoteEtudiant',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('annee_academique', models.CharField(help_text='Année académique (ex: 2024-2025)', max_length=9)),
+                ('semestre', models.CharField(choices=[('S1', 'Semestre 1'), ('S2', 'Semestre 2'), ('S3', 'Semestre 3'), ('S4', 'Semestre 4'), ('S5', 'Semestre 5'), ('S6', 'Semestre 6'), ('S7', 'Semestre 7'), ('S8', 'Semestre 8'), ('S9', 'Semestre 9'), ('S10', 'Semestre 10')], max_length=5)),
+                ('moyenne', models.DecimalField(decimal_places=2, help_text='Moyenne du semestre', max_digits=5)),
+                ('total_credits', models.PositiveIntegerField(default=0, help_text='Total crédits obtenus')),
+                ('total_credits_possible', models.PositiveIntegerField(default=30, help_text='Total crédits possibles')),
+                ('mention', models.CharField(choices=[('excellent', 'Excellent'), ('tres_bien', 'Très Bien'), ('bien', 'Bien'), ('assez_bien', 'Assez Bien'), ('passable', 'Passable'), ('mediocre', 'Médiocre'), ('faible', 'Faible'), ('tres_faible', 'Très Faible')], help_text='Mention obtenue', max_length=20)),
+                ('decision', models.CharField(choices=[('admis', 'Admis'), ('ajourne', 'Ajourné'), ('repechage', 'Repêchage'), ('exclus', 'Exclus')], default='ajourne', help_text='Décision du jury', max_length=20)),
+                ('nombre_ue_a_reprendre', models.PositiveIntegerField(default=0, help_text="Nombre d'UE à reprendre")),
+                ('observation', models.TextField(blank=True, help_text='Observation du jury')),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+                ('date_modification', models.DateTimeField(auto_now=True)),
+                ('is_definitif', models.BooleanField(default=False, help_text='Cote définitive')),
+                ('cree_par', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cotes_creees', to=settings.AUTH_USER_MODEL)),
+                ('etudiant', models.ForeignKey(limit_choices_to={'user_type': 'etudiant'}, on_delete=django.db.models.deletion.CASCADE, related_name='cotes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Cote Étudiant',
+                'verbose_name_plural': 'Cotes Étudiants',
+                'ordering': ['-annee_academique', '-semestre'],
+                'unique_together': {('etudiant', 'annee_academique', 'semestre')},
+            },
+        ),
+    ]
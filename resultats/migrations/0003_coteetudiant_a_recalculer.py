@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-19 19:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resultats', '0002_configurationresultats_coteetudiant'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coteetudiant',
+            name='a_recalculer',
+            field=models.BooleanField(db_index=True, default=False, help_text='Notes modifiées depuis le dernier calcul'),
+        ),
+    ]
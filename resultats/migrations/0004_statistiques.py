@@ -0,0 +1,75 @@
+# Generated by Django 5.0.6 on 2026-10-19 19:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resultats', '0003_coteetudiant_a_recalculer'),
+        ('users', '0005_notification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatistiqueUE',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre_etudiants', models.PositiveIntegerField(default=0)),
+                ('moyenne', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('mediane', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('ecart_type', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('minimum', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('maximum', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('taux_reussite', models.DecimalField(decimal_places=2, default=0, help_text="% d'étudiants ayant validé l'UE", max_digits=5)),
+                ('date_calcul', models.DateTimeField(auto_now=True)),
+                ('ue', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='statistique', to='resultats.ue')),
+            ],
+            options={
+                'verbose_name': 'Statistique UE',
+                'verbose_name_plural': 'Statistiques UE',
+                'ordering': ['ue__niveau', 'ue__semestre', 'ue__code'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StatistiqueFaculte',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('annee_academique', models.CharField(max_length=20)),
+                ('nombre_etudiants', models.PositiveIntegerField(default=0)),
+                ('montant_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('montant_paye', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('taux_recouvrement', models.DecimalField(decimal_places=2, default=0, help_text='% du montant dû effectivement payé', max_digits=5)),
+                ('date_calcul', models.DateTimeField(auto_now=True)),
+                ('faculte', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='statistiques', to='users.faculte')),
+            ],
+            options={
+                'verbose_name': 'Statistique Faculté',
+                'verbose_name_plural': 'Statistiques Facultés',
+                'ordering': ['-annee_academique', 'faculte'],
+                'unique_together': {('faculte', 'annee_academique')},
+            },
+        ),
+        migrations.CreateModel(
+            name='StatistiquePromotion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('annee_academique', models.CharField(max_length=9)),
+                ('semestre', models.CharField(max_length=5)),
+                ('nombre_cotes', models.PositiveIntegerField(default=0)),
+                ('moyenne', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('mediane', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('taux_admis', models.DecimalField(decimal_places=2, default=0, help_text='% de cotes avec la décision « admis »', max_digits=5)),
+                ('mentions', models.JSONField(blank=True, default=dict, help_text='{mention: nombre de cotes}')),
+                ('date_calcul', models.DateTimeField(auto_now=True)),
+                ('promotion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='statistiques', to='users.promotion')),
+            ],
+            options={
+                'verbose_name': 'Statistique Promotion',
+                'verbose_name_plural': 'Statistiques Promotions',
+                'ordering': ['-annee_academique', 'semestre', 'promotion'],
+                'unique_together': {('promotion', 'annee_academique', 'semestre')},
+            },
+        ),
+    ]
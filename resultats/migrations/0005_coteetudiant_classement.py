@@ -0,0 +1,33 @@
+# Generated by Django 5.0.6 on 2026-10-19 19:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resultats', '0004_statistiques'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coteetudiant',
+            name='centile',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Rang centile dans la promotion', max_digits=5, null=True),
+        ),
+        migrations.AddField(
+            model_name='coteetudiant',
+            name='classement_a_jour',
+            field=models.BooleanField(db_index=True, default=False, help_text='Faux si la cohorte doit être reclassée'),
+        ),
+        migrations.AddField(
+            model_name='coteetudiant',
+            name='effectif_classement',
+            field=models.PositiveIntegerField(blank=True, help_text="Nombre d'étudiants classés", null=True),
+        ),
+        migrations.AddField(
+            model_name='coteetudiant',
+            name='rang',
+            field=models.PositiveIntegerField(blank=True, help_text='Rang dans la promotion (ex aequo : même rang)', null=True),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.0.6 on 2026-10-19 19:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resultats', '0005_coteetudiant_classement'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coteetudiant',
+            name='releve_a_jour',
+            field=models.BooleanField(db_index=True, default=False, help_text="Faux si le relevé de l'étudiant doit être recalculé"),
+        ),
+        migrations.CreateModel(
+            name='ReleveAnnuel',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('annee_academique', models.CharField(help_text='Année académique (ex: 2024-2025)', max_length=9)),
+                ('nombre_semestres', models.PositiveIntegerField(default=0)),
+                ('moyenne_annee', models.DecimalField(blank=True, decimal_places=2, help_text='Moyenne des semestres pondérée par les crédits', max_digits=5, null=True)),
+                ('credits_annee', models.PositiveIntegerField(default=0, help_text="Crédits obtenus dans l'année")),
+                ('credits_possibles_annee', models.PositiveIntegerField(default=0)),
+                ('credits_cumules', models.PositiveIntegerField(default=0, help_text='Crédits obtenus depuis la première année')),
+                ('credits_possibles_cumules', models.PositiveIntegerField(default=0)),
+                ('points_cumules', models.DecimalField(decimal_places=2, default=0, help_text='Somme des moyennes x crédits possibles depuis la première année', max_digits=10)),
+                ('moyenne_cumulee', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('date_calcul', models.DateTimeField(auto_now=True)),
+                ('etudiant', models.ForeignKey(limit_choices_to={'user_type': 'etudiant'}, on_delete=django.db.models.deletion.CASCADE, related_name='releves_annuels', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Relevé annuel',
+                'verbose_name_plural': 'Relevés annuels',
+                'ordering': ['etudiant', 'annee_academique'],
+                'unique_together': {('etudiant', 'annee_academique')},
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.6 on 2026-10-19 20:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def initialiser_cohortes(apps, schema_editor):
+    """Cohorte des cotes existantes : celle du profil, qui servait jusqu'ici au classement"""
+    CoteEtudiant = apps.get_model('resultats', 'CoteEtudiant')
+    StudentProfile = apps.get_model('users', 'StudentProfile')
+
+    profils = StudentProfile.objects.filter(user_id=OuterRef('etudiant_id'))
+    CoteEtudiant.objects.update(
+        promotion_id=Subquery(profils.values('promotion_id')[:1]),
+        niveau=Coalesce(Subquery(profils.values('niveau')[:1]), Value('')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resultats', '0006_releve_annuel'),
+        ('users', '0009_tachesuppression'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coteetudiant',
+            name='niveau',
+            field=models.CharField(blank=True, help_text="Niveau de l'étudiant pour cette cote", max_length=20),
+        ),
+        migrations.AddField(
+            model_name='coteetudiant',
+            name='promotion',
+            field=models.ForeignKey(blank=True, help_text="Promotion de l'étudiant pour cette cote", null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cotes', to='users.promotion'),
+        ),
+        migrations.RunPython(initialiser_cohortes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.6 on 2026-10-19 20:33
+
+from django.db import migrations, models
+
+
+def recalculer_releves(apps, schema_editor):
+    """Cumuls existants comptant deux fois les semestres repris : relevés à refaire"""
+    CoteEtudiant = apps.get_model('resultats', 'CoteEtudiant')
+    CoteEtudiant.objects.update(releve_a_jour=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resultats', '0007_coteetudiant_cohorte'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='releveannuel',
+            name='semestres_cumules',
+            field=models.JSONField(blank=True, default=dict, help_text='Dernière tentative de chaque semestre retenue dans les cumuls : {semestre: [crédits, crédits possibles, points]}'),
+        ),
+        migrations.RunPython(recalculer_releves, migrations.RunPython.noop),
+    ]
@@ -41,6 +41,15 @@ class UE(models.Model):
     def get_display_name(self):
         return f"{self.code} - {self.nom}"
 
+    def save(self, *args, **kwargs):
+        creation = self._state.adding
+        super().save(*args, **kwargs)
+        if creation and self.is_actif:
+            # Nouvelle UE : inscription des étudiants de son niveau
+            from televersements.taches import soumettre_tache
+            from cours.inscriptions import inscrire_aux_ues
+            soumettre_tache(inscrire_aux_ues, self.pk)
+
 class Note(models.Model):
     TYPE_NOTE_CHOICES = [
         ('tp', 'Travaux Pratiques'), ('td', 'Travaux Dirigés'), ('examen', 'Examen'),
@@ -66,9 +75,36 @@ class Note(models.Model):
         verbose_name_plural = "Notes"
         ordering = ['-date_publication']
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # État de publication au chargement : l'étudiant n'est notifié qu'à la publication
+        self._publie_initial = self.__dict__.get('is_publie', False) if self.pk else False
+
     def __str__(self):
         return f"{self.etudiant.matricule} - {self.ue.code} - {self.note_obtenue}/{self.note_maximale}"
+
+    def save(self, *args, **kwargs):
+        vient_d_etre_publiee = self.is_publie and not self._publie_initial
+        super().save(*args, **kwargs)
+        self._publie_initial = self.is_publie
+        self._invalider_tableau_enseignant()
+        if vient_d_etre_publiee:
+            from users.notifications import notifier_notes_publiees
+            notifier_notes_publiees([self])
     
+    def delete(self, *args, **kwargs):
+        self._invalider_tableau_enseignant()
+        return super().delete(*args, **kwargs)
+
+    def _invalider_tableau_enseignant(self):
+        """Avancement de la saisie des notes : tableau du responsable de l'UE"""
+        from users.tableau_enseignant import invalider_tableau_enseignant
+        if Note.ue.is_cached(self):
+            responsable_id = self.ue.enseignant_responsable_id
+        else:
+            responsable_id = UE.objects.filter(pk=self.ue_id).values_list('enseignant_responsable_id', flat=True).first()
+        invalider_tableau_enseignant(responsable_id)
+
     def get_pourcentage(self):
         if self.note_maximale > 0:
             return (self.note_obtenue / self.note_maximale) * 100
@@ -156,6 +192,17 @@ class CoteEtudiant(models.Model):
     date_modification = models.DateTimeField(auto_now=True)
     cree_par = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='cotes_creees')
     is_definitif = models.BooleanField(default=False, help_text="Cote définitive")
+    a_recalculer = models.BooleanField(default=False, db_index=True, help_text="Notes modifiées depuis le dernier calcul")
+    # Cohorte de l'étudiant au moment du calcul : le classement d'une année close
+    # ne suit pas le profil quand l'étudiant passe dans l'année supérieure
+    promotion = models.ForeignKey('users.Promotion', on_delete=models.SET_NULL, null=True, blank=True, related_name='cotes', help_text="Promotion de l'étudiant pour cette cote")
+    niveau = models.CharField(max_length=20, blank=True, help_text="Niveau de l'étudiant pour cette cote")
+    # Classement dans la cohorte (promotion, niveau, année, semestre), cf. resultats.classement
+    rang = models.PositiveIntegerField(null=True, blank=True, help_text="Rang dans la promotion (ex aequo : même rang)")
+    effectif_classement = models.PositiveIntegerField(null=True, blank=True, help_text="Nombre d'étudiants classés")
+    centile = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True, help_text="Rang centile dans la promotion")
+    classement_a_jour = models.BooleanField(default=False, db_index=True, help_text="Faux si la cohorte doit être reclassée")
+    releve_a_jour = models.BooleanField(default=False, db_index=True, help_text="Faux si le relevé de l'étudiant doit être recalculé")
 
     class Meta:
         verbose_name = "Cote Étudiant"
@@ -163,8 +210,58 @@ class CoteEtudiant(models.Model):
         unique_together = ['etudiant', 'annee_academique', 'semestre']
         ordering = ['-annee_academique', '-semestre']
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Valeurs au chargement : seule leur modification impose de reclasser la
+        # cohorte (moyenne) ou de recalculer le relevé (moyenne et crédits)
+        champs = self.__dict__
+        self._moyenne_initiale = champs.get('moyenne') if self.pk else None
+        self._credits_initiaux = (champs.get('total_credits'), champs.get('total_credits_possible')) if self.pk else None
+        self._cohorte_initiale = (champs.get('promotion_id'), champs.get('niveau')) if self.pk else None
+
     def __str__(self):
         return f"{self.etudiant.matricule} - {self.annee_academique} - {self.get_semestre_display()} - {self.moyenne}"
+
+    def save(self, *args, **kwargs):
+        from .classement import _filtre_cohorte
+        from users.models import StudentProfile
+
+        if self._state.adding and self.promotion_id is None and not self.niveau:
+            # Cote saisie hors de calculer_cote_etudiant : cohorte lue sur le profil
+            profil = StudentProfile.objects.filter(user_id=self.etudiant_id).values_list('promotion_id', 'niveau').first()
+            if profil:
+                self.promotion_id, self.niveau = profil[0], profil[1] or ''
+
+        champs_invalides = set()
+        cohorte_initiale = self._cohorte_initiale
+        cohorte_modifiee = not self._state.adding and (self.promotion_id, self.niveau) != cohorte_initiale
+        if self._state.adding or cohorte_modifiee or self.moyenne != self._moyenne_initiale:
+            self.classement_a_jour = False
+            champs_invalides.add('classement_a_jour')
+        if self._state.adding or champs_invalides or (self.total_credits, self.total_credits_possible) != self._credits_initiaux:
+            self.releve_a_jour = False
+            champs_invalides.add('releve_a_jour')
+        if champs_invalides and kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = set(kwargs['update_fields']) | champs_invalides
+        super().save(*args, **kwargs)
+        if cohorte_modifiee and cohorte_initiale[0] is not None:
+            # Les rangs de la cohorte quittée changent aussi
+            CoteEtudiant.objects.filter(
+                **_filtre_cohorte(*cohorte_initiale, self.annee_academique, self.semestre)
+            ).update(classement_a_jour=False)
+        self._moyenne_initiale = self.moyenne
+        self._credits_initiaux = (self.total_credits, self.total_credits_possible)
+        self._cohorte_initiale = (self.promotion_id, self.niveau)
+
+    def delete(self, *args, **kwargs):
+        from .classement import cotes_de_la_cohorte
+        from .releve import invalider_releve
+        cohorte = cotes_de_la_cohorte(self).exclude(pk=self.pk)
+        resultat = super().delete(*args, **kwargs)
+        # Les rangs des autres étudiants de la cohorte changent
+        cohorte.update(classement_a_jour=False)
+        invalider_releve(self.etudiant_id, self.annee_academique)
+        return resultat
     
     def get_mention_display_text(self):
         """Retourne le texte de la mention"""
@@ -255,4 +352,91 @@ class ConfigurationResultats(models.Model):
             config.valeur = valeur
             config.modifie_par = user
             config.save()
-        return config
\ No newline at end of file
+        return config
+
+class StatistiqueUE(models.Model):
+    """Statistiques précalculées des moyennes (notes publiées) des étudiants d'une UE"""
+    ue = models.OneToOneField(UE, on_delete=models.CASCADE, related_name='statistique')
+    nombre_etudiants = models.PositiveIntegerField(default=0)
+    moyenne = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    mediane = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    ecart_type = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    minimum = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    maximum = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    taux_reussite = models.DecimalField(max_digits=5, decimal_places=2, default=0, help_text="% d'étudiants ayant validé l'UE")
+    date_calcul = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Statistique UE"
+        verbose_name_plural = "Statistiques UE"
+        ordering = ['ue__niveau', 'ue__semestre', 'ue__code']
+
+    def __str__(self):
+        return f"{self.ue.code} - {self.moyenne}"
+
+
+class StatistiquePromotion(models.Model):
+    """Répartition des mentions et décisions des cotes d'une promotion pour un semestre"""
+    promotion = models.ForeignKey('users.Promotion', on_delete=models.CASCADE, related_name='statistiques')
+    annee_academique = models.CharField(max_length=9)
+    semestre = models.CharField(max_length=5)
+    nombre_cotes = models.PositiveIntegerField(default=0)
+    moyenne = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    mediane = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    taux_admis = models.DecimalField(max_digits=5, decimal_places=2, default=0, help_text="% de cotes avec la décision « admis »")
+    mentions = models.JSONField(default=dict, blank=True, help_text="{mention: nombre de cotes}")
+    date_calcul = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Statistique Promotion"
+        verbose_name_plural = "Statistiques Promotions"
+        unique_together = ['promotion', 'annee_academique', 'semestre']
+        ordering = ['-annee_academique', 'semestre', 'promotion']
+
+    def __str__(self):
+        return f"{self.promotion} - {self.annee_academique} - {self.semestre}"
+
+
+class StatistiqueFaculte(models.Model):
+    """Recouvrement des frais académiques d'une faculté pour une année"""
+    faculte = models.ForeignKey('users.Faculte', on_delete=models.CASCADE, related_name='statistiques')
+    annee_academique = models.CharField(max_length=20)
+    nombre_etudiants = models.PositiveIntegerField(default=0)
+    montant_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    montant_paye = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    taux_recouvrement = models.DecimalField(max_digits=5, decimal_places=2, default=0, help_text="% du montant dû effectivement payé")
+    date_calcul = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Statistique Faculté"
+        verbose_name_plural = "Statistiques Facultés"
+        unique_together = ['faculte', 'annee_academique']
+        ordering = ['-annee_academique', 'faculte']
+
+    def __str__(self):
+        return f"{self.faculte.code} - {self.annee_academique} - {self.taux_recouvrement}%"
+
+
+class ReleveAnnuel(models.Model):
+    """Ligne annuelle du relevé de notes d'un étudiant, avec les cumuls depuis sa première année"""
+    etudiant = models.ForeignKey(User, on_delete=models.CASCADE, related_name='releves_annuels', limit_choices_to={'user_type': 'etudiant'})
+    annee_academique = models.CharField(max_length=9, help_text="Année académique (ex: 2024-2025)")
+    nombre_semestres = models.PositiveIntegerField(default=0)
+    moyenne_annee = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True, help_text="Moyenne des semestres pondérée par les crédits")
+    credits_annee = models.PositiveIntegerField(default=0, help_text="Crédits obtenus dans l'année")
+    credits_possibles_annee = models.PositiveIntegerField(default=0)
+    credits_cumules = models.PositiveIntegerField(default=0, help_text="Crédits obtenus depuis la première année")
+    credits_possibles_cumules = models.PositiveIntegerField(default=0)
+    points_cumules = models.DecimalField(max_digits=10, decimal_places=2, default=0, help_text="Somme des moyennes x crédits possibles depuis la première année")
+    moyenne_cumulee = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    semestres_cumules = models.JSONField(default=dict, blank=True, help_text="Dernière tentative de chaque semestre retenue dans les cumuls : {semestre: [crédits, crédits possibles, points]}")
+    date_calcul = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Relevé annuel"
+        verbose_name_plural = "Relevés annuels"
+        unique_together = ['etudiant', 'annee_academique']
+        ordering = ['etudiant', 'annee_academique']
+
+    def __str__(self):
+        return f"{self.etudiant.matricule} - {self.annee_academique} - {self.moyenne_annee}"
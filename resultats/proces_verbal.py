@@ -0,0 +1,103 @@
+"""
+Procès-verbal de délibération d'une cohorte (promotion, niveau, année, semestre),
+telle qu'enregistrée sur les cotes (cf. resultats.classement).
+
+Les moyennes par (étudiant, UE) sont calculées par la base en une requête
+agrégée, puis pivotées en mémoire (dictionnaire) : une ligne par cote, une
+colonne par UE, suivies des crédits, de la moyenne, de la mention et de la
+décision. Le même tableau alimente le PDF et le tableur.
+"""
+import tempfile
+
+from django.db.models import F, Sum
+from django.template.loader import render_to_string
+
+
+class ProcesVerbal:
+    """Tableau étudiants x UE d'une cohorte"""
+
+    def __init__(self, promotion_id, niveau, annee_academique, semestre):
+        from .models import UE
+
+        self.promotion_id = promotion_id
+        self.niveau = niveau
+        self.annee_academique = annee_academique
+        self.semestre = semestre
+        self.ues = list(
+            UE.objects.filter(niveau=niveau, semestre=semestre, is_actif=True, is_visible_etudiants=True)
+            .only('id', 'code', 'nom', 'credits').order_by('code')
+        )
+
+    def _cotes(self):
+        from .classement import _filtre_cohorte
+        from .models import CoteEtudiant
+
+        return CoteEtudiant.objects.filter(
+            **_filtre_cohorte(self.promotion_id, self.niveau, self.annee_academique, self.semestre)
+        )
+
+    def _moyennes_ue(self):
+        """{(etudiant_id, ue_id): moyenne pondérée} en une requête agrégée"""
+        from .models import Note
+
+        agregats = (
+            Note.objects.filter(
+                etudiant_id__in=self._cotes().values('etudiant_id'),
+                ue__in=[ue.id for ue in self.ues],
+                is_publie=True,
+            )
+            .values('etudiant_id', 'ue_id')
+            .annotate(ponderee=Sum(F('note_obtenue') * F('coefficient')), poids=Sum('coefficient'))
+            .order_by()
+        )
+        return {
+            (agregat['etudiant_id'], agregat['ue_id']): round(agregat['ponderee'] / agregat['poids'], 2)
+            for agregat in agregats if agregat['poids']
+        }
+
+    @property
+    def entetes(self):
+        return (
+            ['N°', 'Matricule', 'Nom', 'Prénom']
+            + [f"{ue.code} ({ue.credits} cr.)" for ue in self.ues]
+            + ['Crédits', 'Moyenne', 'Mention', 'Décision']
+        )
+
+    def lignes(self):
+        """Lignes du procès-verbal, dans l'ordre de `entetes`"""
+        from .models import CoteEtudiant
+
+        moyennes = self._moyennes_ue()
+        mentions = dict(CoteEtudiant.MENTION_CHOICES)
+        decisions = dict(CoteEtudiant.DECISION_CHOICES)
+        cotes = self._cotes().values_list(
+            'etudiant_id', 'etudiant__matricule', 'etudiant__last_name', 'etudiant__first_name',
+            'total_credits', 'total_credits_possible', 'moyenne', 'mention', 'decision',
+        ).order_by('etudiant__last_name', 'etudiant__first_name')
+
+        for numero, (etudiant_id, matricule, nom, prenom, credits, credits_possibles,
+                     moyenne, mention, decision) in enumerate(cotes.iterator(chunk_size=2000), start=1):
+            yield (
+                [numero, matricule, nom, prenom]
+                + [moyennes.get((etudiant_id, ue.id)) for ue in self.ues]
+                + [f"{credits}/{credits_possibles}", moyenne, mentions.get(mention, mention),
+                   decisions.get(decision, decision)]
+            )
+
+    def fichier_pdf(self, contexte):
+        """PDF paysage (en-tête répété sur chaque page) écrit dans un fichier temporaire"""
+        from xhtml2pdf import pisa
+
+        html = render_to_string('resultats/proces_verbal_pdf.html', dict(
+            contexte,
+            entetes=self.entetes,
+            lignes=self.lignes(),
+            nombre_ues=len(self.ues),
+            ues=self.ues,
+        ))
+        fichier = tempfile.TemporaryFile()
+        if pisa.CreatePDF(html, dest=fichier).err:
+            fichier.close()
+            raise ValueError("Erreur lors de la génération du PDF")
+        fichier.seek(0)
+        return fichier
@@ -0,0 +1,191 @@
+"""
+Relevé de notes pluriannuel : moyenne de chaque année, crédits et moyenne cumulés.
+
+Une ligne ReleveAnnuel par (étudiant, année) conserve les cumuls depuis la
+première année. Les cumuls retiennent la dernière tentative de chaque semestre :
+un semestre repris (redoublement, réinscription à toutes les UE du niveau)
+remplace la tentative précédente, ses crédits ne sont pas comptés deux fois. Quand une cote change (releve_a_jour = False), seules les années
+à partir de la plus ancienne année modifiée sont recalculées, en repartant des
+cumuls de l'année précédente déjà enregistrés : l'historique antérieur n'est
+pas relu. La mise à jour est faite là où les cotes changent (tâches
+d'arrière-plan des vues de calcul, suppression d'une cote, commande
+calculer_releves) ; la consultation du relevé ne fait que lire.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Min
+
+TAILLE_LOT = 500
+
+
+def invalider_releve(etudiant_id, annee_academique):
+    """
+    Après la suppression d'une cote : les cumuls de cette année et des suivantes
+    sont à refaire, en arrière-plan
+    """
+    from televersements.taches import soumettre_tache
+    from .models import CoteEtudiant, ReleveAnnuel
+
+    CoteEtudiant.objects.filter(
+        etudiant_id=etudiant_id, annee_academique__gte=annee_academique
+    ).update(releve_a_jour=False)
+    if not CoteEtudiant.objects.filter(etudiant_id=etudiant_id, annee_academique=annee_academique).exists():
+        ReleveAnnuel.objects.filter(etudiant_id=etudiant_id, annee_academique=annee_academique).delete()
+    soumettre_tache(mettre_a_jour_releves, etudiant_ids=[etudiant_id])
+
+
+def _arrondi(valeur):
+    return Decimal(valeur).quantize(Decimal('0.01'))
+
+
+def _lignes_annuelles(etudiant_id, cotes, base):
+    """
+    ReleveAnnuel des années de `cotes` (triées par année), cumulés à partir de
+    `base` : la ligne de l'année précédente, ou None.
+    """
+    from .models import ReleveAnnuel
+
+    # {semestre: [crédits, crédits possibles, points]} de la dernière tentative
+    semestres_cumules = dict(base.semestres_cumules) if base else {}
+    if base and not semestres_cumules and base.credits_possibles_cumules:
+        # Ligne antérieure au détail par semestre : ses cumuls sont repris tels quels
+        semestres_cumules[''] = [base.credits_cumules, base.credits_possibles_cumules, str(base.points_cumules)]
+
+    lignes = []
+    annees = {}
+    for annee, semestre, moyenne, credits, credits_possibles in cotes:
+        annees.setdefault(annee, []).append((semestre, moyenne, credits, credits_possibles))
+
+    for annee, semestres in annees.items():
+        credits_annee = sum(credits for _, _, credits, _ in semestres)
+        credits_possibles_annee = sum(possibles for _, _, _, possibles in semestres)
+        points_annee = sum((moyenne * possibles for _, moyenne, _, possibles in semestres), Decimal('0'))
+
+        for semestre, moyenne, credits, possibles in semestres:
+            semestres_cumules[semestre] = [credits, possibles, str(moyenne * possibles)]
+        credits_cumules = sum(credits for credits, _, _ in semestres_cumules.values())
+        credits_possibles_cumules = sum(possibles for _, possibles, _ in semestres_cumules.values())
+        points_cumules = sum((Decimal(points) for _, _, points in semestres_cumules.values()), Decimal('0'))
+        lignes.append(ReleveAnnuel(
+            etudiant_id=etudiant_id,
+            annee_academique=annee,
+            nombre_semestres=len(semestres),
+            moyenne_annee=_arrondi(points_annee / credits_possibles_annee) if credits_possibles_annee else None,
+            credits_annee=credits_annee,
+            credits_possibles_annee=credits_possibles_annee,
+            credits_cumules=credits_cumules,
+            credits_possibles_cumules=credits_possibles_cumules,
+            points_cumules=points_cumules,
+            moyenne_cumulee=_arrondi(points_cumules / credits_possibles_cumules) if credits_possibles_cumules else None,
+            semestres_cumules=dict(semestres_cumules),
+        ))
+    return lignes
+
+
+def _mettre_a_jour_lot(premieres_annees):
+    """Recalcule les relevés de {etudiant_id: plus ancienne année modifiée}"""
+    from .models import Bulletin, CoteEtudiant, ReleveAnnuel
+
+    etudiant_ids = list(premieres_annees)
+    annee_minimale = min(premieres_annees.values())
+
+    with transaction.atomic():
+        cotes = list(
+            CoteEtudiant.objects.select_for_update()
+            .filter(etudiant_id__in=etudiant_ids, annee_academique__gte=annee_minimale)
+            .values_list(
+                'id', 'etudiant_id', 'annee_academique', 'semestre', 'moyenne', 'total_credits', 'total_credits_possible'
+            )
+            .order_by('etudiant_id', 'annee_academique', 'semestre')
+        )
+        anciennes = list(ReleveAnnuel.objects.filter(etudiant_id__in=etudiant_ids).order_by('annee_academique'))
+
+        # Base des cumuls : dernière ligne antérieure à la première année modifiée
+        bases = {}
+        a_supprimer = []
+        for releve in anciennes:
+            if releve.annee_academique < premieres_annees[releve.etudiant_id]:
+                bases[releve.etudiant_id] = releve
+            else:
+                a_supprimer.append(releve.id)
+
+        cotes_par_etudiant = {}
+        cote_ids = []
+        for cote_id, etudiant_id, annee, semestre, moyenne, credits, possibles in cotes:
+            if annee >= premieres_annees[etudiant_id]:
+                cotes_par_etudiant.setdefault(etudiant_id, []).append((annee, semestre, moyenne, credits, possibles))
+                cote_ids.append(cote_id)
+
+        releves = []
+        for etudiant_id, cotes_etudiant in cotes_par_etudiant.items():
+            releves.extend(_lignes_annuelles(etudiant_id, cotes_etudiant, bases.get(etudiant_id)))
+
+        ReleveAnnuel.objects.filter(id__in=a_supprimer).delete()
+        ReleveAnnuel.objects.bulk_create(releves, batch_size=TAILLE_LOT)
+
+        # Bulletin.moyenne_annee reprend la moyenne annuelle calculée
+        moyennes = {(releve.etudiant_id, releve.annee_academique): releve.moyenne_annee for releve in releves}
+        bulletins = list(
+            Bulletin.objects.filter(etudiant_id__in=etudiant_ids, annee_academique__gte=annee_minimale)
+            .only('id', 'etudiant_id', 'annee_academique', 'moyenne_annee')
+        )
+        bulletins = [bulletin for bulletin in bulletins if (bulletin.etudiant_id, bulletin.annee_academique) in moyennes]
+        for bulletin in bulletins:
+            bulletin.moyenne_annee = moyennes[(bulletin.etudiant_id, bulletin.annee_academique)]
+        Bulletin.objects.bulk_update(bulletins, ['moyenne_annee'], batch_size=TAILLE_LOT)
+
+        CoteEtudiant.objects.filter(id__in=cote_ids).update(releve_a_jour=True)
+    return len(releves)
+
+
+def mettre_a_jour_releves(etudiant_ids=None, tous=False):
+    """
+    Recalcule les relevés des étudiants dont une cote a changé (ou tous).
+    Retourne {'etudiants', 'annees'}.
+    """
+    from .models import CoteEtudiant
+
+    cotes = CoteEtudiant.objects.all()
+    if etudiant_ids is not None:
+        cotes = cotes.filter(etudiant_id__in=etudiant_ids)
+    if not tous:
+        cotes = cotes.filter(releve_a_jour=False)
+    premieres_annees = dict(
+        cotes.values('etudiant_id').annotate(premiere=Min('annee_academique'))
+        .values_list('etudiant_id', 'premiere').order_by()
+    )
+    if tous:
+        # Tout l'historique est recalculé : aucune base antérieure n'est conservée
+        premieres_annees = {etudiant_id: '' for etudiant_id in premieres_annees}
+
+    resultats = {'etudiants': len(premieres_annees), 'annees': 0}
+    etudiant_ids = list(premieres_annees)
+    for debut in range(0, len(etudiant_ids), TAILLE_LOT):
+        lot = {etudiant_id: premieres_annees[etudiant_id] for etudiant_id in etudiant_ids[debut:debut + TAILLE_LOT]}
+        resultats['annees'] += _mettre_a_jour_lot(lot)
+    return resultats
+
+
+def historique(etudiant):
+    """
+    Relevé complet d'un étudiant, en lecture seule : une entrée par année avec
+    ses cotes semestrielles, la ligne ReleveAnnuel et `a_jour`, faux tant que
+    la mise à jour en arrière-plan des cumuls de l'année n'est pas passée.
+    """
+    from .models import CoteEtudiant, ReleveAnnuel
+
+    releves = {releve.annee_academique: releve for releve in ReleveAnnuel.objects.filter(etudiant=etudiant)}
+    annees = {}
+    cotes = CoteEtudiant.objects.filter(etudiant=etudiant)
+    for cote in sorted(cotes, key=lambda cote: (cote.annee_academique, int(cote.semestre[1:]))):
+        annees.setdefault(cote.annee_academique, []).append(cote)
+    return [
+        {
+            'annee_academique': annee,
+            'cotes': cotes,
+            'releve': releves.get(annee),
+            'a_jour': annee in releves and all(cote.releve_a_jour for cote in cotes),
+        }
+        for annee, cotes in annees.items()
+    ]
@@ -0,0 +1,217 @@
+"""
+Simulateur de délibération : « et si » sur les règles de décision d'une cohorte.
+
+Les notes publiées de la cohorte (promotion, niveau, année, semestre, telles
+qu'enregistrées sur les cotes) sont chargées une fois en une matrice
+étudiants x UE de moyennes, mise en cache ; chaque scénario n'est ensuite
+qu'une suite d'opérations NumPy sur cette matrice. Rien n'est écrit tant qu'un scénario n'est pas adopté.
+"""
+from decimal import Decimal
+
+import numpy as np
+from django.core.cache import cache
+from django.db import transaction
+
+# Règles appliquées par calculer_cote_etudiant / CoteEtudiant.calculer_decision
+REGLES_ACTUELLES = {
+    'seuil_validation_ue': 10,
+    'seuil_admis': 10,
+    'max_ue_admis': 0,
+    'seuil_repechage': 8,
+    'max_ue_repechage': 2,
+    'ues_neutralisees': [],
+}
+
+# Bornes inférieures des mentions (cf. CoteEtudiant.calculer_mention)
+BORNES_MENTIONS = [6, 8, 10, 12, 14, 16, 18]
+MENTIONS = np.array(['tres_faible', 'faible', 'mediocre', 'passable', 'assez_bien', 'bien', 'tres_bien', 'excellent'])
+
+DUREE_CACHE_MATRICE = 600
+
+CHAMPS_ADOPTES = [
+    'moyenne', 'total_credits', 'total_credits_possible', 'mention', 'decision',
+    'nombre_ue_a_reprendre', 'cree_par', 'releve_a_jour',
+]
+
+
+def lire_regles(donnees):
+    """Règles d'un scénario (valeurs actuelles par défaut) ; lève ValueError si invalides"""
+    regles = dict(REGLES_ACTUELLES)
+    try:
+        for cle in ('seuil_validation_ue', 'seuil_admis', 'seuil_repechage'):
+            if donnees.get(cle) not in (None, ''):
+                regles[cle] = float(str(donnees[cle]).replace(',', '.'))
+        for cle in ('max_ue_admis', 'max_ue_repechage'):
+            if donnees.get(cle) not in (None, ''):
+                regles[cle] = int(donnees[cle])
+        regles['ues_neutralisees'] = [int(ue_id) for ue_id in donnees.get('ues_neutralisees') or []]
+    except (TypeError, ValueError):
+        raise ValueError("Les règles du scénario doivent être des nombres.")
+
+    if not all(0 <= regles[cle] <= 20 for cle in ('seuil_validation_ue', 'seuil_admis', 'seuil_repechage')):
+        raise ValueError("Les seuils doivent être compris entre 0 et 20.")
+    if regles['max_ue_admis'] < 0 or regles['max_ue_repechage'] < 0:
+        raise ValueError("Le nombre d'UE à reprendre ne peut pas être négatif.")
+    return regles
+
+
+class MatriceCohorte:
+    """Moyennes par UE (étudiants x UE) des cotes d'une cohorte"""
+
+    def __init__(self, promotion_id, niveau, annee_academique, semestre):
+        self.promotion_id = promotion_id
+        self.niveau = niveau
+        self.annee_academique = annee_academique
+        self.semestre = semestre
+
+    @property
+    def cle(self):
+        return f"deliberation:{self.promotion_id}:{self.niveau}:{self.annee_academique}:{self.semestre}"
+
+    @classmethod
+    def charger(cls, promotion_id, niveau, annee_academique, semestre, depuis_cache=True):
+        """Matrice de la cohorte, lue en cache ou construite en trois requêtes"""
+        matrice = cls(promotion_id, niveau, annee_academique, semestre)
+        donnees = cache.get(matrice.cle) if depuis_cache else None
+        if donnees is None:
+            donnees = matrice._construire()
+            cache.set(matrice.cle, donnees, DUREE_CACHE_MATRICE)
+        matrice.__dict__.update(donnees)
+        return matrice
+
+    def _construire(self):
+        from .classement import _filtre_cohorte
+        from .models import CoteEtudiant, Note, UE
+
+        cotes = list(
+            CoteEtudiant.objects.filter(
+                **_filtre_cohorte(self.promotion_id, self.niveau, self.annee_academique, self.semestre)
+            ).values_list(
+                'id', 'etudiant_id', 'etudiant__matricule', 'etudiant__last_name', 'etudiant__first_name',
+                'moyenne', 'total_credits', 'mention', 'decision', 'is_definitif',
+            ).order_by('etudiant__matricule')
+        )
+        ues = list(
+            UE.objects.filter(niveau=self.niveau, semestre=self.semestre, is_actif=True, is_visible_etudiants=True)
+            .values_list('id', 'code', 'nom', 'credits').order_by('code')
+        )
+
+        etudiants = np.array([cote[1] for cote in cotes], dtype=np.int64)
+        ue_ids = np.array([ue[0] for ue in ues], dtype=np.int64)
+        moyennes = np.full((len(etudiants), len(ue_ids)), np.nan)
+
+        if len(etudiants) and len(ue_ids):
+            notes = list(
+                Note.objects.filter(etudiant_id__in=etudiants.tolist(), ue_id__in=ue_ids.tolist(), is_publie=True)
+                .values_list('etudiant_id', 'ue_id', 'note_obtenue', 'coefficient')
+            )
+            if notes:
+                colonnes = list(zip(*notes))
+                # Position (ligne, colonne) de chaque note dans la matrice
+                ordre_etudiants = np.argsort(etudiants)
+                lignes = ordre_etudiants[np.searchsorted(etudiants, colonnes[0], sorter=ordre_etudiants)]
+                ordre_ues = np.argsort(ue_ids)
+                cols = ordre_ues[np.searchsorted(ue_ids, colonnes[1], sorter=ordre_ues)]
+                cases = lignes * len(ue_ids) + cols
+
+                valeurs = np.asarray(colonnes[2], dtype=float)
+                coefficients = np.asarray(colonnes[3], dtype=float)
+                taille = moyennes.size
+                ponderees = np.bincount(cases, weights=valeurs * coefficients, minlength=taille)
+                poids = np.bincount(cases, weights=coefficients, minlength=taille)
+                avec_notes = np.bincount(cases, minlength=taille) > 0
+                moyennes = np.where(
+                    avec_notes,
+                    np.divide(ponderees, poids, out=np.zeros(taille), where=poids > 0),
+                    np.nan
+                ).reshape(moyennes.shape)
+
+        return {
+            'cotes': cotes,
+            'ues': ues,
+            'ue_ids': ue_ids,
+            'credits': np.array([ue[3] for ue in ues], dtype=np.int64),
+            'moyennes_ue': moyennes,
+        }
+
+    def simuler(self, regles):
+        """Moyennes, crédits, UE à reprendre, mentions et décisions sous `regles`"""
+        actives = ~np.isin(self.ue_ids, regles['ues_neutralisees'])
+        presentes = ~np.isnan(self.moyennes_ue) & actives
+        notes = np.where(presentes, self.moyennes_ue, 0)
+        validees = presentes & (notes >= regles['seuil_validation_ue'])
+
+        nombre_ues = presentes.sum(axis=1)
+        moyenne = np.divide(notes.sum(axis=1), nombre_ues, out=np.zeros(len(nombre_ues)), where=nombre_ues > 0)
+        a_reprendre = (presentes & ~validees).sum(axis=1)
+
+        admis = (moyenne >= regles['seuil_admis']) & (a_reprendre <= regles['max_ue_admis'])
+        repechage = (moyenne >= regles['seuil_repechage']) & (a_reprendre <= regles['max_ue_repechage'])
+        return {
+            'moyenne': np.round(moyenne, 2),
+            'total_credits': (validees * self.credits).sum(axis=1),
+            'total_credits_possible': (presentes * self.credits).sum(axis=1),
+            'nombre_ue_a_reprendre': a_reprendre,
+            'mention': MENTIONS[np.digitize(moyenne, BORNES_MENTIONS)],
+            'decision': np.where(admis, 'admis', np.where(repechage, 'repechage', 'ajourne')),
+        }
+
+    def comparer(self, regles):
+        """Écarts entre les cotes enregistrées et le scénario, avec le bilan des décisions"""
+        simulation = self.simuler(regles)
+        ecarts = []
+        bilan = {}
+        for i, (_, _, matricule, nom, prenom, moyenne, credits, mention, decision, definitif) in enumerate(self.cotes):
+            nouvelle_decision = str(simulation['decision'][i])
+            bilan.setdefault(decision, {'avant': 0, 'apres': 0})['avant'] += 1
+            bilan.setdefault(nouvelle_decision, {'avant': 0, 'apres': 0})['apres'] += 1
+
+            ligne = {
+                'matricule': matricule,
+                'nom': f"{nom} {prenom}".strip(),
+                'moyenne': float(moyenne),
+                'nouvelle_moyenne': float(simulation['moyenne'][i]),
+                'credits': credits,
+                'nouveaux_credits': int(simulation['total_credits'][i]),
+                'mention': mention,
+                'nouvelle_mention': str(simulation['mention'][i]),
+                'decision': decision,
+                'nouvelle_decision': nouvelle_decision,
+                'is_definitif': definitif,
+            }
+            if (ligne['nouvelle_decision'] != decision or ligne['nouvelle_mention'] != mention
+                    or ligne['nouveaux_credits'] != credits or abs(ligne['nouvelle_moyenne'] - ligne['moyenne']) >= 0.01):
+                ecarts.append(ligne)
+        return {'effectif': len(self.cotes), 'bilan': bilan, 'ecarts': ecarts}
+
+    def adopter(self, regles, utilisateur):
+        """Enregistre le scénario sur les cotes non définitives ; retourne le nombre de cotes modifiées"""
+        from .models import CoteEtudiant
+
+        simulation = self.simuler(regles)
+        cotes = []
+        moyennes_modifiees = []
+        for i, (cote_id, _, _, _, _, moyenne, _, _, _, definitif) in enumerate(self.cotes):
+            if definitif:
+                continue
+            nouvelle_moyenne = Decimal(str(simulation['moyenne'][i]))
+            if nouvelle_moyenne != moyenne:
+                moyennes_modifiees.append(cote_id)
+            cotes.append(CoteEtudiant(
+                id=cote_id,
+                moyenne=nouvelle_moyenne,
+                total_credits=int(simulation['total_credits'][i]),
+                total_credits_possible=int(simulation['total_credits_possible'][i]),
+                mention=str(simulation['mention'][i]),
+                decision=str(simulation['decision'][i]),
+                nombre_ue_a_reprendre=int(simulation['nombre_ue_a_reprendre'][i]),
+                cree_par=utilisateur,
+                releve_a_jour=False,
+            ))
+        with transaction.atomic():
+            CoteEtudiant.objects.bulk_update(cotes, CHAMPS_ADOPTES, batch_size=500)
+            # bulk_update ne passe pas par save() : le classement est invalidé ici
+            # (le relevé l'est par releve_a_jour=False ci-dessus)
+            CoteEtudiant.objects.filter(id__in=moyennes_modifiees).update(classement_a_jour=False)
+        cache.delete(self.cle)
+        return len(cotes)
@@ -0,0 +1,210 @@
+"""
+Statistiques précalculées (rollups) par UE, promotion et faculté.
+
+Les données sont extraites en colonnes (values_list, une requête par table)
+puis agrégées en quelques passes NumPy vectorisées : aucun calcul par étudiant
+en Python. Les résultats remplacent le contenu des tables Statistique*, que les
+pages d'analyse lisent directement.
+"""
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+
+# Moyenne à partir de laquelle une UE est validée (cf. calculer_cote_etudiant)
+SEUIL_VALIDATION = 10
+
+TAILLE_PAQUET = 5000
+
+
+def _colonnes(queryset, *champs):
+    """Colonnes d'un queryset sous forme de tableaux NumPy (une seule requête)"""
+    lignes = list(queryset.values_list(*champs).iterator(chunk_size=TAILLE_PAQUET))
+    if not lignes:
+        return [np.empty(0) for _ in champs]
+    return [np.asarray(colonne) for colonne in zip(*lignes)]
+
+
+def _coder(*colonnes):
+    """
+    Regroupe les lignes par combinaison de valeurs des colonnes.
+    Retourne (liste des clés, indice du groupe de chaque ligne).
+    """
+    code = np.zeros(len(colonnes[0]), dtype=np.int64)
+    valeurs = []
+    for colonne in colonnes:
+        uniques, inverse = np.unique(colonne, return_inverse=True)
+        code = code * len(uniques) + inverse.ravel()
+        valeurs.append(uniques)
+    codes, inverse = np.unique(code, return_inverse=True)
+
+    # Décodage des clés : divisions successives, de la dernière colonne à la première
+    cles_colonnes = []
+    reste = codes
+    for uniques in reversed(valeurs):
+        reste, indice = np.divmod(reste, len(uniques))
+        cles_colonnes.append(uniques[indice].tolist())
+    return list(zip(*reversed(cles_colonnes))), inverse.ravel()
+
+
+def _resumer(groupes, valeurs, nombre_groupes):
+    """Effectif, moyenne, médiane, écart-type, minimum et maximum de chaque groupe"""
+    ordre = np.lexsort((valeurs, groupes))  # tri par groupe, puis par valeur
+    triees = valeurs[ordre]
+    nombre = np.bincount(groupes, minlength=nombre_groupes)
+    debuts = np.concatenate(([0], np.cumsum(nombre)[:-1]))
+
+    moyenne = np.add.reduceat(triees, debuts) / nombre
+    variance = np.add.reduceat(triees ** 2, debuts) / nombre - moyenne ** 2
+    return {
+        'nombre': nombre,
+        'moyenne': moyenne,
+        'mediane': (triees[debuts + (nombre - 1) // 2] + triees[debuts + nombre // 2]) / 2,
+        'ecart_type': np.sqrt(np.maximum(variance, 0)),
+        'minimum': np.minimum.reduceat(triees, debuts),
+        'maximum': np.maximum.reduceat(triees, debuts),
+    }
+
+
+def _decimal(valeur):
+    return Decimal(str(round(float(valeur), 2)))
+
+
+def _pourcentage(partie, total):
+    return np.divide(partie * 100, total, out=np.zeros(len(total)), where=total > 0)
+
+
+def calculer_statistiques_ue():
+    """Moyenne pondérée de chaque étudiant par UE, puis distribution de ces moyennes par UE"""
+    from .models import Note, StatistiqueUE
+
+    ues, etudiants, notes, coefficients = _colonnes(
+        Note.objects.filter(is_publie=True), 'ue_id', 'etudiant_id', 'note_obtenue', 'coefficient'
+    )
+    statistiques = []
+    if len(ues):
+        notes = notes.astype(float)
+        coefficients = coefficients.astype(float)
+
+        # Passe 1 : moyenne pondérée par couple (UE, étudiant)
+        couples, indices = _coder(ues, etudiants)
+        ponderees = np.bincount(indices, weights=notes * coefficients, minlength=len(couples))
+        poids = np.bincount(indices, weights=coefficients, minlength=len(couples))
+        moyennes = np.divide(ponderees, poids, out=np.zeros(len(couples)), where=poids > 0)
+
+        # Passe 2 : distribution des moyennes par UE
+        ue_cles, groupes = _coder(np.array([ue for ue, _ in couples]))
+        resume = _resumer(groupes, moyennes, len(ue_cles))
+        reussites = np.bincount(groupes, weights=moyennes >= SEUIL_VALIDATION, minlength=len(ue_cles))
+        taux = _pourcentage(reussites, resume['nombre'])
+
+        statistiques = [
+            StatistiqueUE(
+                ue_id=ue_id,
+                nombre_etudiants=int(resume['nombre'][i]),
+                moyenne=_decimal(resume['moyenne'][i]),
+                mediane=_decimal(resume['mediane'][i]),
+                ecart_type=_decimal(resume['ecart_type'][i]),
+                minimum=_decimal(resume['minimum'][i]),
+                maximum=_decimal(resume['maximum'][i]),
+                taux_reussite=_decimal(taux[i]),
+            )
+            for i, (ue_id,) in enumerate(ue_cles)
+        ]
+
+    with transaction.atomic():
+        StatistiqueUE.objects.all().delete()
+        StatistiqueUE.objects.bulk_create(statistiques, batch_size=500)
+    return len(statistiques)
+
+
+def calculer_statistiques_promotions():
+    """Moyennes, taux d'admis et répartition des mentions par (promotion, année, semestre)"""
+    from .models import CoteEtudiant, StatistiquePromotion
+
+    promotions, annees, semestres, moyennes, mentions, decisions = _colonnes(
+        CoteEtudiant.objects.filter(promotion__isnull=False),
+        'promotion_id', 'annee_academique', 'semestre',
+        'moyenne', 'mention', 'decision'
+    )
+    statistiques = []
+    if len(promotions):
+        cles, groupes = _coder(promotions, annees, semestres)
+        resume = _resumer(groupes, moyennes.astype(float), len(cles))
+        admis = np.bincount(groupes, weights=decisions == 'admis', minlength=len(cles))
+        taux = _pourcentage(admis, resume['nombre'])
+
+        # Tableau (groupe x mention) rempli en une passe
+        noms_mentions, indices_mentions = np.unique(mentions, return_inverse=True)
+        repartition = np.zeros((len(cles), len(noms_mentions)), dtype=np.int64)
+        np.add.at(repartition, (groupes, indices_mentions.ravel()), 1)
+
+        statistiques = [
+            StatistiquePromotion(
+                promotion_id=promotion_id,
+                annee_academique=annee,
+                semestre=semestre,
+                nombre_cotes=int(resume['nombre'][i]),
+                moyenne=_decimal(resume['moyenne'][i]),
+                mediane=_decimal(resume['mediane'][i]),
+                taux_admis=_decimal(taux[i]),
+                mentions={
+                    str(mention): int(nombre)
+                    for mention, nombre in zip(noms_mentions, repartition[i]) if nombre
+                },
+            )
+            for i, (promotion_id, annee, semestre) in enumerate(cles)
+        ]
+
+    with transaction.atomic():
+        StatistiquePromotion.objects.all().delete()
+        StatistiquePromotion.objects.bulk_create(statistiques, batch_size=500)
+    return len(statistiques)
+
+
+def calculer_statistiques_facultes():
+    """Montants dus et payés (et taux de recouvrement) par (faculté, année académique)"""
+    from users.models import FraisAcademique
+    from .models import StatistiqueFaculte
+
+    facultes, annees, etudiants, totaux, payes = _colonnes(
+        FraisAcademique.objects.filter(etudiant__student_profile__faculte__isnull=False),
+        'etudiant__student_profile__faculte_id', 'annee_academique', 'etudiant_id',
+        'montant_total', 'montant_paye'
+    )
+    statistiques = []
+    if len(facultes):
+        cles, groupes = _coder(facultes, annees)
+        montants_totaux = np.bincount(groupes, weights=totaux.astype(float), minlength=len(cles))
+        montants_payes = np.bincount(groupes, weights=payes.astype(float), minlength=len(cles))
+        taux = _pourcentage(montants_payes, montants_totaux)
+
+        # Étudiants distincts : un seul couple (groupe, étudiant) compté par groupe
+        couples, _ = _coder(groupes, etudiants)
+        nombre_etudiants = np.bincount([groupe for groupe, _ in couples], minlength=len(cles))
+
+        statistiques = [
+            StatistiqueFaculte(
+                faculte_id=faculte_id,
+                annee_academique=annee,
+                nombre_etudiants=int(nombre_etudiants[i]),
+                montant_total=_decimal(montants_totaux[i]),
+                montant_paye=_decimal(montants_payes[i]),
+                taux_recouvrement=_decimal(taux[i]),
+            )
+            for i, (faculte_id, annee) in enumerate(cles)
+        ]
+
+    with transaction.atomic():
+        StatistiqueFaculte.objects.all().delete()
+        StatistiqueFaculte.objects.bulk_create(statistiques, batch_size=500)
+    return len(statistiques)
+
+
+def calculer_statistiques():
+    """Recalcule toutes les statistiques ; retourne le nombre de lignes par table"""
+    return {
+        'ue': calculer_statistiques_ue(),
+        'promotions': calculer_statistiques_promotions(),
+        'facultes': calculer_statistiques_facultes(),
+    }
@@ -1,3 +1,461 @@
-from django.test import TestCase
+import json
+from datetime import date
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from users.models import Faculte, FraisAcademique, Promotion, StudentProfile
+
+from .classement import mettre_a_jour_classements, rangs
+from .imports import importer_notes_ue, lire_note_obtenue
+from .models import UE, CoteEtudiant, Note, ReleveAnnuel, StatistiqueFaculte, StatistiquePromotion, StatistiqueUE
+from .proces_verbal import ProcesVerbal
+from .releve import historique, mettre_a_jour_releves
+from .simulation import REGLES_ACTUELLES, MatriceCohorte
+from .statistiques import calculer_statistiques
+from .utils import calculer_cote_etudiant
+
+User = get_user_model()
+
+
+class CohorteMixin:
+    """Une faculté, deux années académiques (promotions) et une UE de L1"""
+
+    def setUp(self):
+        super().setUp()
+        reglages = override_settings(TACHES_SYNCHRONES=True)
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+        self.faculte = Faculte.objects.create(code='FSI', nom='Sciences informatiques')
+        self.promotion_passee = Promotion.objects.create(annee_debut=2023, annee_fin=2024)
+        self.promotion = Promotion.objects.create(annee_debut=2024, annee_fin=2025)
+        self.enseignant = User.objects.create_user('enseignant', password='x', matricule='UOM2025-900', user_type='enseignant')
+        self.ue = UE.objects.create(
+            code='INFO101', nom='Algorithmique', niveau='L1', semestre='S1', filiere='Informatique', credits=6,
+            enseignant_responsable=self.enseignant, date_debut=date(2024, 9, 1), date_fin=date(2025, 1, 31),
+        )
+        self.numero = 0
+
+    def _etudiant(self, niveau='L1', promotion=None):
+        self.numero += 1
+        etudiant = User.objects.create_user(f'etudiant{self.numero}', password='x', matricule=f'UOM2025-{self.numero:03d}')
+        StudentProfile.objects.create(
+            user=etudiant, niveau=niveau, faculte=self.faculte, promotion=promotion or self.promotion
+        )
+        return etudiant
+
+    def _cote(self, etudiant, moyenne, annee='2024-2025', semestre='S1', **champs):
+        moyenne = Decimal(str(moyenne))
+        champs.setdefault('decision', CoteEtudiant.calculer_decision(moyenne, 0))
+        return CoteEtudiant.objects.create(
+            etudiant=etudiant, annee_academique=annee, semestre=semestre, moyenne=moyenne,
+            mention=CoteEtudiant.calculer_mention(moyenne), **champs
+        )
+
+    def _note(self, etudiant, ue, note, coefficient=1, **champs):
+        Note.objects.create(
+            etudiant=etudiant, ue=ue, titre='Examen', note_obtenue=Decimal(str(note)),
+            coefficient=Decimal(str(coefficient)), enseignant=self.enseignant, date_evaluation=date(2025, 1, 15),
+            **champs
+        )
+
+
+class LireNoteObtenueTests(SimpleTestCase):
+
+    def test_valeurs_non_finies_refusees(self):
+        for valeur in ('nan', 'sNaN', 'inf', '-Infinity'):
+            with self.subTest(valeur=valeur), self.assertRaises(ValueError):
+                lire_note_obtenue(valeur, Decimal(20))
+
+    def test_virgule_decimale(self):
+        self.assertEqual(lire_note_obtenue('12,5', Decimal(20)), Decimal('12.50'))
+
+
+class ImportNotesTests(CohorteMixin, TestCase):
+
+    evaluation = {
+        'type_note': 'examen', 'titre': 'Examen', 'date_evaluation': date(2025, 1, 15),
+        'note_maximale': Decimal(20), 'coefficient': Decimal(1), 'is_publie': False,
+    }
+
+    def _importer(self, contenu):
+        fichier = SimpleUploadedFile('notes.csv', contenu.encode('utf-8'))
+        return importer_notes_ue(self.ue, fichier, self.evaluation, self.enseignant)
+
+    def test_seules_les_cotes_de_l_annee_en_cours_sont_a_recalculer(self):
+        etudiant = self._etudiant()
+        ancienne = self._cote(etudiant, 12, annee='2023-2024')
+        courante = self._cote(etudiant, 12)
+
+        resultats = self._importer(f"matricule;note\n{etudiant.matricule};14,5\n")
+
+        self.assertEqual(resultats['errors'], [])
+        self.assertEqual(resultats['crees'], 1)
+        ancienne.refresh_from_db()
+        courante.refresh_from_db()
+        self.assertTrue(courante.a_recalculer)
+        self.assertFalse(ancienne.a_recalculer)
+
+    def test_note_nan_signalee_sur_sa_ligne(self):
+        premier = self._etudiant()
+        second = self._etudiant()
+
+        resultats = self._importer(f"matricule;note\n{premier.matricule};12\n{second.matricule};nan\n")
+
+        self.assertEqual(resultats['crees'], 0)
+        self.assertEqual([(e['ligne'], e['matricule']) for e in resultats['errors']], [(3, second.matricule)])
+
+
+class ClassementTests(CohorteMixin, TestCase):
+    """Rangs par cohorte (promotion, niveau, année, semestre)"""
+
+    def _rangs(self, cotes):
+        for cote in cotes:
+            cote.refresh_from_db()
+        return [(cote.rang, cote.effectif_classement, cote.centile) for cote in cotes]
+
+    def test_ex_aequo_partagent_le_meme_rang(self):
+        rang, centile = rangs([15, 12, 12, 10])
+        self.assertEqual(rang.tolist(), [1, 2, 2, 4])
+        self.assertEqual(centile.tolist(), [87.5, 50.0, 50.0, 12.5])
+
+    def test_classement_de_la_cohorte(self):
+        cotes = [self._cote(self._etudiant(), moyenne) for moyenne in (15, 12, 12, 10)]
+        # Autre niveau : autre cohorte
+        autre = self._cote(self._etudiant(niveau='L2'), 18)
+
+        self.assertEqual(mettre_a_jour_classements(), {'cohortes': 2, 'cotes': 5})
+
+        self.assertEqual(self._rangs(cotes), [
+            (1, 4, Decimal('87.50')), (2, 4, Decimal('50.00')), (2, 4, Decimal('50.00')), (4, 4, Decimal('12.50')),
+        ])
+        self.assertEqual(self._rangs([autre]), [(1, 1, Decimal('50.00'))])
+        self.assertEqual(mettre_a_jour_classements(), {'cohortes': 0, 'cotes': 0})
+
+    def test_cohorte_enregistree_sur_la_cote(self):
+        premier, second = self._etudiant(), self._etudiant()
+        cotes = [self._cote(premier, 14), self._cote(second, 11)]
+        self.assertEqual((cotes[0].promotion_id, cotes[0].niveau), (self.promotion.id, 'L1'))
+        mettre_a_jour_classements()
+
+        # Passage dans l'année supérieure : le profil change, pas la cohorte des cotes
+        StudentProfile.objects.filter(user=second).update(niveau='L2', promotion=self.promotion_passee)
+        CoteEtudiant.objects.filter(pk=cotes[1].pk).update(classement_a_jour=False)
+        mettre_a_jour_classements()
+
+        self.assertEqual(self._rangs(cotes), [(1, 2, Decimal('75.00')), (2, 2, Decimal('25.00'))])
+
+    def test_changement_de_cohorte_reclasse_l_ancienne(self):
+        cotes = [self._cote(self._etudiant(), moyenne) for moyenne in (14, 12, 10)]
+        mettre_a_jour_classements()
+
+        cotes[0].niveau = 'L2'
+        cotes[0].save()
+        mettre_a_jour_classements()
+
+        self.assertEqual(self._rangs(cotes), [(1, 1, Decimal('50.00')), (1, 2, Decimal('75.00')), (2, 2, Decimal('25.00'))])
+
+
+class SimulationTests(CohorteMixin, TestCase):
+    """Simulateur de délibération"""
+
+    def setUp(self):
+        super().setUp()
+        self.ue_reseaux = UE.objects.create(
+            code='INFO102', nom='Réseaux', niveau='L1', semestre='S1', filiere='Informatique', credits=4,
+            enseignant_responsable=self.enseignant, date_debut=date(2024, 9, 1), date_fin=date(2025, 1, 31),
+        )
+
+    def test_regles_actuelles_reproduisent_calculer_cote_etudiant(self):
+        notes = [
+            [(self.ue, 15, 1), (self.ue_reseaux, 12, 1)],
+            [(self.ue, 14, 2), (self.ue, 5, 1), (self.ue_reseaux, 9.5, 1)],
+            [(self.ue, 7, 1), (self.ue_reseaux, 8, 1)],
+            [(self.ue, 11.25, 1)],
+            [(self.ue, 3, 1), (self.ue_reseaux, 4.5, 3)],
+        ]
+        etudiants = []
+        for notes_etudiant in notes:
+            etudiant = self._etudiant()
+            for ue, note, coefficient in notes_etudiant:
+                self._note(etudiant, ue, note, coefficient)
+            etudiants.append(etudiant)
+        cotes = {
+            cote.etudiant_id: cote
+            for cote in (calculer_cote_etudiant(etudiant, '2024-2025', 'S1') for etudiant in etudiants)
+        }
+
+        matrice = MatriceCohorte.charger(self.promotion.id, 'L1', '2024-2025', 'S1', depuis_cache=False)
+        simulation = matrice.simuler(REGLES_ACTUELLES)
+
+        self.assertEqual(len(matrice.cotes), len(etudiants))
+        for i, ligne in enumerate(matrice.cotes):
+            cote = cotes[ligne[1]]
+            with self.subTest(matricule=ligne[2]):
+                self.assertEqual(Decimal(str(simulation['moyenne'][i])), cote.moyenne)
+                self.assertEqual(simulation['total_credits'][i], cote.total_credits)
+                self.assertEqual(simulation['total_credits_possible'][i], cote.total_credits_possible)
+                self.assertEqual(simulation['nombre_ue_a_reprendre'][i], cote.nombre_ue_a_reprendre)
+                self.assertEqual(simulation['mention'][i], cote.mention)
+                self.assertEqual(simulation['decision'][i], cote.decision)
+        self.assertEqual(matrice.comparer(REGLES_ACTUELLES)['ecarts'], [])
+
+    def test_cohorte_lue_sur_les_cotes(self):
+        present, parti = self._etudiant(), self._etudiant()
+        for etudiant in (present, parti):
+            self._note(etudiant, self.ue, 12)
+            calculer_cote_etudiant(etudiant, '2024-2025', 'S1')
+        StudentProfile.objects.filter(user=parti).update(niveau='L2')
+
+        matrice = MatriceCohorte.charger(self.promotion.id, 'L1', '2024-2025', 'S1', depuis_cache=False)
+
+        self.assertEqual(sorted(ligne[1] for ligne in matrice.cotes), sorted([present.id, parti.id]))
+
+
+class ScenarioJsonTests(CohorteMixin, TestCase):
+    """Vues JSON du simulateur : un corps mal formé donne une erreur 400, jamais une 500"""
+
+    def setUp(self):
+        super().setUp()
+        admin = User.objects.create_user('admin', password='x', matricule='UOM2025-901', user_type='admin')
+        self.client.force_login(admin)
+
+    def _poster(self, vue, corps):
+        return self.client.post(reverse(f'resultats:{vue}'), data=corps, content_type='application/json')
+
+    def test_corps_invalides(self):
+        cohorte = {'promotion': self.promotion.id, 'niveau': 'L1', 'annee': '2024-2025', 'semestre': 'S1'}
+        for corps in ('[]', '"x"', '3', 'null', '{', json.dumps({**cohorte, 'regles': [1]}),
+                      json.dumps({**cohorte, 'regles': {'ues_neutralisees': 5}})):
+            for vue in ('admin_deliberation_simuler', 'admin_deliberation_adopter'):
+                with self.subTest(corps=corps, vue=vue):
+                    reponse = self._poster(vue, corps)
+                    self.assertEqual(reponse.status_code, 400)
+                    self.assertFalse(reponse.json()['success'])
+
+    def test_scenario_valide(self):
+        self._cote(self._etudiant(), 12)
+        corps = json.dumps({
+            'promotion': self.promotion.id, 'niveau': 'L1', 'annee': '2024-2025', 'semestre': 'S1',
+            'regles': {'seuil_admis': '12'},
+        })
+
+        reponse = self._poster('admin_deliberation_simuler', corps)
+
+        self.assertEqual(reponse.status_code, 200)
+        self.assertEqual(reponse.json()['effectif'], 1)
+
+
+class ProcesVerbalTests(CohorteMixin, TestCase):
+
+    def test_lignes_de_la_cohorte_enregistree(self):
+        premier, second = self._etudiant(), self._etudiant()
+        User.objects.filter(pk=premier.pk).update(last_name='Amisi')
+        User.objects.filter(pk=second.pk).update(last_name='Bakari')
+        self._note(premier, self.ue, 14, 2)
+        self._note(premier, self.ue, 11)
+        self._note(second, self.ue, 9)
+        for etudiant in (premier, second):
+            calculer_cote_etudiant(etudiant, '2024-2025', 'S1')
+        # Étudiant passé en L2 depuis : toujours sur le procès-verbal de L1
+        StudentProfile.objects.filter(user=second).update(niveau='L2')
+        # Notes d'un étudiant hors cohorte : ignorées
+        self._note(self._etudiant(), self.ue, 20)
+
+        lignes = list(ProcesVerbal(self.promotion.id, 'L1', '2024-2025', 'S1').lignes())
+
+        self.assertEqual([(ligne[1], ligne[4]) for ligne in lignes], [
+            (premier.matricule, Decimal('13.00')), (second.matricule, Decimal('9.00')),
+        ])
+        self.assertEqual(lignes[1][5:], ['0/6', Decimal('9.00'), 'Médiocre', 'Repêchage'])
+
+
+class ReleveTests(CohorteMixin, TestCase):
+    """Relevé pluriannuel : cumuls maintenus là où les cotes changent"""
+
+    def _releves(self, etudiant):
+        return list(
+            ReleveAnnuel.objects.filter(etudiant=etudiant).order_by('annee_academique')
+            .values_list('annee_academique', 'credits_annee', 'credits_cumules', 'credits_possibles_cumules', 'moyenne_cumulee')
+        )
+
+    def test_consultation_en_lecture_seule(self):
+        etudiant = self._etudiant()
+        self._cote(etudiant, 12, total_credits=30, total_credits_possible=30)
+
+        with self.assertNumQueries(2):
+            annees = historique(etudiant)
+
+        self.assertEqual([(annee['annee_academique'], annee['releve'], annee['a_jour']) for annee in annees],
+                         [('2024-2025', None, False)])
+        self.assertFalse(ReleveAnnuel.objects.exists())
+
+        mettre_a_jour_releves()
+
+        self.assertTrue(historique(etudiant)[0]['a_jour'])
+
+    def test_suppression_d_une_cote_rafraichit_le_releve(self):
+        etudiant = self._etudiant()
+        self._cote(etudiant, 12, annee='2023-2024', total_credits=30, total_credits_possible=30)
+        cote = self._cote(etudiant, 14, total_credits=30, total_credits_possible=30)
+        mettre_a_jour_releves()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            cote.delete()
+
+        self.assertEqual(self._releves(etudiant), [('2023-2024', 30, 30, 30, Decimal('12.00'))])
+        self.assertTrue(historique(etudiant)[0]['a_jour'])
+
+    def test_premier_calcul(self):
+        etudiant = self._etudiant()
+        self._cote(etudiant, 12, annee='2023-2024', semestre='S1', total_credits=30, total_credits_possible=30)
+        self._cote(etudiant, 9, annee='2023-2024', semestre='S2', total_credits=20, total_credits_possible=30)
+        self._cote(etudiant, 14, semestre='S3', total_credits=30, total_credits_possible=30)
+
+        self.assertEqual(mettre_a_jour_releves(), {'etudiants': 1, 'annees': 2})
+
+        self.assertEqual(self._releves(etudiant), [
+            ('2023-2024', 50, 50, 60, Decimal('10.50')),
+            ('2024-2025', 30, 80, 90, Decimal('11.67')),
+        ])
+        self.assertEqual(ReleveAnnuel.objects.get(annee_academique='2023-2024').moyenne_annee, Decimal('10.50'))
+        self.assertFalse(CoteEtudiant.objects.filter(releve_a_jour=False).exists())
+
+    def test_mise_a_jour_incrementale(self):
+        etudiant = self._etudiant()
+        self._cote(etudiant, 12, annee='2023-2024', total_credits=30, total_credits_possible=30)
+        cote = self._cote(etudiant, 10, semestre='S3', total_credits=30, total_credits_possible=30)
+        mettre_a_jour_releves()
+        premiere = ReleveAnnuel.objects.get(annee_academique='2023-2024')
+
+        cote.moyenne = Decimal('16')
+        cote.save()
+
+        # Seule l'année modifiée est recalculée, à partir des cumuls de l'année précédente
+        self.assertEqual(mettre_a_jour_releves(), {'etudiants': 1, 'annees': 1})
+        self.assertEqual(ReleveAnnuel.objects.get(annee_academique='2023-2024').pk, premiere.pk)
+        self.assertEqual(self._releves(etudiant)[1], ('2024-2025', 30, 60, 60, Decimal('14.00')))
+
+    def test_suppression_d_une_annee_intermediaire(self):
+        etudiant = self._etudiant()
+        self._cote(etudiant, 12, annee='2022-2023', total_credits=30, total_credits_possible=30)
+        intermediaire = self._cote(etudiant, 8, annee='2023-2024', semestre='S3', total_credits=10, total_credits_possible=30)
+        self._cote(etudiant, 14, semestre='S5', total_credits=30, total_credits_possible=30)
+        mettre_a_jour_releves()
+
+        intermediaire.delete()
+        mettre_a_jour_releves()
+
+        self.assertEqual(self._releves(etudiant), [
+            ('2022-2023', 30, 30, 30, Decimal('12.00')),
+            ('2024-2025', 30, 60, 60, Decimal('13.00')),
+        ])
+
+    def test_annee_redoublee_remplace_la_tentative_precedente(self):
+        etudiant = self._etudiant()
+        self._cote(etudiant, 8, annee='2023-2024', semestre='S1', total_credits=18, total_credits_possible=30)
+        self._cote(etudiant, 9, annee='2023-2024', semestre='S2', total_credits=12, total_credits_possible=30)
+        mettre_a_jour_releves()
+        # Redoublement : mêmes semestres, toutes les UE du niveau repassées
+        self._cote(etudiant, 13, semestre='S1', total_credits=30, total_credits_possible=30)
+        self._cote(etudiant, 11, semestre='S2', total_credits=30, total_credits_possible=30)
+        self._cote(etudiant, 12, annee='2025-2026', semestre='S3', total_credits=30, total_credits_possible=30)
+
+        mettre_a_jour_releves()
+
+        self.assertEqual(self._releves(etudiant), [
+            ('2023-2024', 30, 30, 60, Decimal('8.50')),
+            ('2024-2025', 60, 60, 60, Decimal('12.00')),
+            ('2025-2026', 30, 90, 90, Decimal('12.00')),
+        ])
+
+
+class StatistiquesTests(CohorteMixin, TestCase):
+    """Rollups NumPy comparés à des valeurs calculées à la main"""
+
+    def _ue(self, code):
+        return UE.objects.create(
+            code=code, nom=code, niveau='L1', semestre='S1', filiere='Informatique', credits=3,
+            enseignant_responsable=self.enseignant, date_debut=date(2024, 9, 1), date_fin=date(2025, 1, 31),
+        )
+
+    def test_statistiques_ue(self):
+        etudiants = [self._etudiant() for _ in range(4)]
+        # Moyennes pondérées : (12×2 + 18) / 3 = 14, puis 8, 10 et 6 (la note non publiée est ignorée)
+        self._note(etudiants[0], self.ue, 12, coefficient=2)
+        self._note(etudiants[0], self.ue, 18)
+        self._note(etudiants[1], self.ue, 8)
+        self._note(etudiants[2], self.ue, 10)
+        self._note(etudiants[3], self.ue, 6)
+        self._note(etudiants[3], self.ue, 20, is_publie=False)
+        ue_seule = self._ue('INFO102')
+        self._note(etudiants[0], ue_seule, 13)
+        ue_vide = self._ue('INFO103')
+        self._note(etudiants[1], ue_vide, 15, is_publie=False)
+
+        self.assertEqual(calculer_statistiques()['ue'], 2)
+
+        statistique = StatistiqueUE.objects.get(ue=self.ue)
+        self.assertEqual(statistique.nombre_etudiants, 4)
+        self.assertEqual(statistique.moyenne, Decimal('9.50'))
+        self.assertEqual(statistique.mediane, Decimal('9.00'))
+        # Écart-type de population : √((4,5² + 1,5² + 0,5² + 3,5²) / 4) = √8,75
+        self.assertEqual(statistique.ecart_type, Decimal('2.96'))
+        self.assertEqual((statistique.minimum, statistique.maximum), (Decimal('6.00'), Decimal('14.00')))
+        self.assertEqual(statistique.taux_reussite, Decimal('50.00'))
+
+        seule = StatistiqueUE.objects.get(ue=ue_seule)
+        self.assertEqual(
+            (seule.nombre_etudiants, seule.moyenne, seule.mediane, seule.ecart_type, seule.taux_reussite),
+            (1, Decimal('13.00'), Decimal('13.00'), Decimal('0.00'), Decimal('100.00')),
+        )
+        # UE sans note publiée : aucune ligne
+        self.assertFalse(StatistiqueUE.objects.filter(ue=ue_vide).exists())
+
+    def test_statistiques_promotion(self):
+        for moyenne in (15, 12, 8):
+            self._cote(self._etudiant(), moyenne, promotion=self.promotion, niveau='L1')
+        self._cote(self._etudiant(), 11, semestre='S2', promotion=self.promotion, niveau='L1')
+        # Cote d'un étudiant sans profil, donc sans promotion : hors des statistiques
+        self._cote(User.objects.create_user('libre', password='x', matricule='UOM2025-800'), 20)
+
+        self.assertEqual(calculer_statistiques()['promotions'], 2)
+
+        statistique = StatistiquePromotion.objects.get(promotion=self.promotion, semestre='S1')
+        self.assertEqual(statistique.nombre_cotes, 3)
+        self.assertEqual(statistique.moyenne, Decimal('11.67'))
+        self.assertEqual(statistique.mediane, Decimal('12.00'))
+        self.assertEqual(statistique.taux_admis, Decimal('66.67'))
+        self.assertEqual(statistique.mentions, {'bien': 1, 'assez_bien': 1, 'mediocre': 1})
+
+        seule = StatistiquePromotion.objects.get(promotion=self.promotion, semestre='S2')
+        self.assertEqual((seule.nombre_cotes, seule.moyenne, seule.mediane), (1, Decimal('11.00'), Decimal('11.00')))
+        self.assertEqual(seule.mentions, {'passable': 1})
+
+    def test_statistiques_faculte(self):
+        premier, second, troisieme = self._etudiant(), self._etudiant(), self._etudiant()
+        for etudiant, annee, total, paye in (
+            (premier, '2024-2025', 500, 200),
+            (second, '2024-2025', 100, 100),
+            (troisieme, '2024-2025', 500, 500),
+            (troisieme, '2023-2024', 300, 0),
+        ):
+            FraisAcademique.objects.create(
+                etudiant=etudiant, annee_academique=annee, montant_total=Decimal(total), montant_paye=Decimal(paye),
+            )
+        # Étudiant sans profil (donc sans faculté) : ignoré
+        sans_faculte = User.objects.create_user('libre', password='x', matricule='UOM2025-800')
+        FraisAcademique.objects.create(etudiant=sans_faculte, annee_academique='2024-2025', montant_total=Decimal(900))
+
+        self.assertEqual(calculer_statistiques()['facultes'], 2)
+
+        statistique = StatistiqueFaculte.objects.get(faculte=self.faculte, annee_academique='2024-2025')
+        # 800 payés sur 1100 dus
+        self.assertEqual(statistique.nombre_etudiants, 3)
+        self.assertEqual((statistique.montant_total, statistique.montant_paye), (Decimal('1100.00'), Decimal('800.00')))
+        self.assertEqual(statistique.taux_recouvrement, Decimal('72.73'))
+        ancienne = StatistiqueFaculte.objects.get(faculte=self.faculte, annee_academique='2023-2024')
+        self.assertEqual((ancienne.nombre_etudiants, ancienne.taux_recouvrement), (1, Decimal('0.00')))
@@ -7,14 +7,28 @@ urlpatterns = [
     # Vues étudiant
     path('student/resultats/', views.student_resultats, name='student_resultats'),
     path('student/bulletin/<int:bulletin_id>/pdf/', views.student_bulletin_pdf, name='student_bulletin_pdf'),
+    path('student/releve/', views.student_releve, name='student_releve'),
+    path('student/releve/pdf/', views.student_releve_pdf, name='student_releve_pdf'),
     
     # Vues admin
     path('admin/settings/', views.admin_resultats_settings, name='admin_resultats_settings'),
     path('admin/ues/', views.admin_ue_list, name='admin_ue_list'),
+    path('admin/ues/<int:ue_id>/import-notes/', views.admin_ue_import_notes, name='admin_ue_import_notes'),
     path('admin/notes/', views.admin_notes_list, name='admin_notes_list'),
+    path('admin/notes/export/', views.admin_notes_export, name='admin_notes_export'),
+    path('admin/statistiques/', views.admin_statistiques, name='admin_statistiques'),
+    path('admin/statistiques/json/', views.admin_statistiques_json, name='admin_statistiques_json'),
+    path('admin/deliberation/', views.admin_deliberation, name='admin_deliberation'),
+    path('admin/deliberation/simuler/', views.admin_deliberation_simuler, name='admin_deliberation_simuler'),
+    path('admin/deliberation/adopter/', views.admin_deliberation_adopter, name='admin_deliberation_adopter'),
+    path('admin/deliberation/proces-verbal/', views.admin_proces_verbal, name='admin_proces_verbal'),
     path('admin/cotes/', views.admin_cotes_list, name='admin_cotes_list'),
+    path('admin/cotes/export/', views.admin_cotes_export, name='admin_cotes_export'),
+    path('admin/etudiants/<int:etudiant_id>/releve/', views.admin_etudiant_releve, name='admin_etudiant_releve'),
+    path('admin/etudiants/<int:etudiant_id>/releve/pdf/', views.admin_etudiant_releve_pdf, name='admin_etudiant_releve_pdf'),
     path('admin/cotes/generer/<int:etudiant_id>/', views.admin_generer_cote, name='admin_generer_cote'),
     path('admin/cotes/recalculer-tout/', views.admin_recalculer_toutes_cotes, name='admin_recalculer_toutes_cotes'),
+    path('admin/cotes/recalculer-marquees/', views.admin_recalculer_cotes_marquees, name='admin_recalculer_cotes_marquees'),
 ]
 
 
@@ -27,6 +27,15 @@ def calculer_cote_etudiant(etudiant, annee_academique, semestre):
     if not faculte or not promotion or not niveau:
         return None
     
+    promotion_id = promotion.id
+    if str(promotion) != annee_academique:
+        # Année close : la cote garde la cohorte dans laquelle elle a été calculée
+        cohorte = CoteEtudiant.objects.filter(
+            etudiant=etudiant, annee_academique=annee_academique, semestre=semestre, promotion__isnull=False
+        ).values_list('promotion_id', 'niveau').first()
+        if cohorte:
+            promotion_id, niveau = cohorte
+    
     # Récupérer tous les cours de l'étudiant selon sa faculté, promotion et niveau
     cours_etudiant = Cours.objects.filter(
         faculte=faculte,
@@ -119,7 +128,10 @@ def calculer_cote_etudiant(etudiant, annee_academique, semestre):
             'decision': decision,
             'nombre_ue_a_reprendre': nombre_ue_a_reprendre,
             'observation': observation,
-            'is_definitif': False  # Par défaut, la cote n'est pas définitive
+            'promotion_id': promotion_id,
+            'niveau': niveau,
+            'is_definitif': False,  # Par défaut, la cote n'est pas définitive
+            'a_recalculer': False
         }
     )
     
@@ -174,6 +186,64 @@ def recalculer_toutes_cotes(annee_academique, semestre):
     return resultats
 
 
+def marquer_cotes_a_recalculer(etudiant_ids, semestre, annee_academique=None):
+    """
+    Marque les cotes (non définitives) d'un semestre dont les notes ont changé
+    sans passer par Note.save() (imports en masse). Seules les cotes de
+    `annee_academique` sont marquées ; à défaut, celles de l'année en cours de
+    chaque étudiant (sa promotion) : les années closes ne sont pas recalculées.
+    """
+    from resultats.models import CoteEtudiant
+    from users.models import StudentProfile
+
+    etudiant_ids = list(etudiant_ids)
+    if annee_academique:
+        annees = {annee_academique: etudiant_ids}
+    else:
+        annees = {}
+        promotions = (
+            StudentProfile.objects.filter(user_id__in=etudiant_ids, promotion__isnull=False)
+            .values_list('user_id', 'promotion__annee_debut', 'promotion__annee_fin')
+        )
+        for etudiant_id, debut, fin in promotions:
+            annees.setdefault(f"{debut}-{fin}", []).append(etudiant_id)
+
+    total = 0
+    for annee, etudiants in annees.items():
+        total += CoteEtudiant.objects.filter(
+            etudiant_id__in=etudiants,
+            annee_academique=annee,
+            semestre=semestre,
+            is_definitif=False
+        ).update(a_recalculer=True)
+    return total
+
+
+def recalculer_cotes_marquees():
+    """Recalcule uniquement les cotes marquées à recalculer"""
+    from resultats.models import CoteEtudiant
+
+    resultats = {
+        'total': 0,
+        'success': 0,
+        'errors': []
+    }
+
+    cotes = CoteEtudiant.objects.filter(a_recalculer=True).select_related('etudiant__student_profile')
+    for cote in cotes:
+        resultats['total'] += 1
+        try:
+            if calculer_cote_etudiant(cote.etudiant, cote.annee_academique, cote.semestre):
+                resultats['success'] += 1
+        except Exception as e:
+            resultats['errors'].append({
+                'etudiant': cote.etudiant.matricule,
+                'erreur': str(e)
+            })
+
+    return resultats
+
+
 def valider_cote(cote_id, valideur):
     """
     Valide une cote (la marque comme définitive)
@@ -1,16 +1,25 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
 from django.template.loader import render_to_string
 from django.utils import timezone
 from django.db.models import Q, Avg, Sum
 from django.conf import settings
+import json
 import os
 
-from .models import UE, Note, InscriptionUE, Bulletin, ConfigurationResultats, CoteEtudiant
-from users.models import CustomUser
-from .utils import calculer_cote_etudiant, recalculer_toutes_cotes
+from .models import (
+    UE, Note, InscriptionUE, Bulletin, ConfigurationResultats, CoteEtudiant,
+    StatistiqueUE, StatistiquePromotion, StatistiqueFaculte,
+)
+from users.models import CustomUser, Promotion
+from .utils import calculer_cote_etudiant, recalculer_toutes_cotes, recalculer_cotes_marquees
+from .forms import ImportNotesForm
+from .imports import importer_notes_ue
+from users.exports import FORMATS_EXPORT, reponse_export, xlsx_disponible
+from televersements.taches import soumettre_tache
 
 
 @login_required
@@ -124,6 +133,92 @@ def student_bulletin_pdf(request, bulletin_id):
     return HttpResponse(html_content, content_type='text/html')
 
 
+def _contexte_releve(etudiant):
+    """Historique complet d'un étudiant (cumuls signalés s'ils sont en cours de mise à jour)"""
+    from .releve import historique
+
+    annees = historique(etudiant)
+    return {
+        'etudiant': etudiant,
+        'student_profile': getattr(etudiant, 'student_profile', None),
+        'annees': annees,
+        'cumul': annees[-1]['releve'] if annees else None,
+        'releve_a_jour': all(annee['a_jour'] for annee in annees),
+        'date_generation': timezone.now(),
+    }
+
+
+def _reponse_releve_pdf(contexte):
+    from xhtml2pdf import pisa
+
+    etudiant = contexte['etudiant']
+    html = render_to_string('resultats/releve_pdf.html', contexte)
+    response = HttpResponse(content_type='application/pdf')
+    filename = f"releve_{etudiant.matricule or etudiant.username}_{timezone.now().strftime('%Y%m%d')}.pdf"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    if pisa.CreatePDF(html, dest=response).err:
+        raise Exception("Erreur lors de la génération du PDF")
+    return response
+
+
+@login_required
+def student_releve(request):
+    """Relevé de notes pluriannuel de l'étudiant"""
+    if not request.user.is_student_user():
+        messages.error(request, "Accès non autorisé.")
+        return redirect('login')
+
+    if not ConfigurationResultats.get_resultats_actives():
+        messages.info(request, "La consultation des résultats n'est pas encore activée.")
+        return render(request, 'resultats/student_resultats_disabled.html')
+
+    return render(request, 'resultats/releve.html', _contexte_releve(request.user))
+
+
+@login_required
+def student_releve_pdf(request):
+    """PDF du relevé de notes pluriannuel de l'étudiant"""
+    if not request.user.is_student_user():
+        messages.error(request, "Accès non autorisé.")
+        return redirect('login')
+
+    if not ConfigurationResultats.get_resultats_actives():
+        messages.error(request, "La consultation des résultats est actuellement désactivée.")
+        return redirect('student_resultats')
+
+    try:
+        return _reponse_releve_pdf(_contexte_releve(request.user))
+    except Exception as e:
+        messages.error(request, f"Erreur lors de la génération du relevé: {str(e)}")
+        return redirect('resultats:student_releve')
+
+
+@login_required
+def admin_etudiant_releve(request, etudiant_id):
+    """Relevé de notes pluriannuel d'un étudiant (admin)"""
+    if not request.user.is_admin_user() and not request.user.is_superuser:
+        messages.error(request, "Accès non autorisé.")
+        return redirect('login')
+
+    etudiant = get_object_or_404(CustomUser, id=etudiant_id, user_type='etudiant')
+    return render(request, 'resultats/releve.html', _contexte_releve(etudiant))
+
+
+@login_required
+def admin_etudiant_releve_pdf(request, etudiant_id):
+    """PDF du relevé de notes pluriannuel d'un étudiant (admin)"""
+    if not request.user.is_admin_user() and not request.user.is_superuser:
+        messages.error(request, "Accès non autorisé.")
+        return redirect('login')
+
+    etudiant = get_object_or_404(CustomUser, id=etudiant_id, user_type='etudiant')
+    try:
+        return _reponse_releve_pdf(_contexte_releve(etudiant))
+    except Exception as e:
+        messages.error(request, f"Erreur lors de la génération du relevé: {str(e)}")
+        return redirect('resultats:admin_etudiant_releve', etudiant_id=etudiant.id)
+
+
 @login_required
 def admin_resultats_settings(request):
     """Paramètres des résultats pour l'admin"""
@@ -166,6 +261,42 @@ def admin_ue_list(request):
     return render(request, 'resultats/admin_ue_list.html', context)
 
 
+@login_required
+def admin_ue_import_notes(request, ue_id):
+    """Importer les notes d'une évaluation de l'UE depuis un fichier CSV ou XLSX"""
+    if not request.user.is_admin_user() and not request.user.is_superuser:
+        messages.error(request, "Accès non autorisé.")
+        return redirect('login')
+
+    ue = get_object_or_404(UE.objects.select_related('enseignant_responsable'), id=ue_id)
+    resultats = None
+
+    if request.method == 'POST':
+        form = ImportNotesForm(request.POST, request.FILES)
+        if form.is_valid():
+            evaluation = dict(form.cleaned_data)
+            fichier = evaluation.pop('fichier')
+            resultats = importer_notes_ue(ue, fichier, evaluation)
+
+            if not resultats['errors']:
+                messages.success(
+                    request,
+                    f"{resultats['crees']} note(s) créée(s) et {resultats['mis_a_jour']} mise(s) à jour pour {ue.code}."
+                )
+                return redirect('resultats:admin_notes_list')
+            messages.error(request, f"Import annulé : {len(resultats['errors'])} erreur(s), aucune note enregistrée.")
+    else:
+        form = ImportNotesForm()
+
+    context = {
+        'ue': ue,
+        'form': form,
+        'resultats': resultats,
+    }
+
+    return render(request, 'resultats/admin_ue_import_notes.html', context)
+
+
 @login_required
 def admin_notes_list(request):
     """Liste des notes pour l'admin"""
@@ -182,13 +313,8 @@ def admin_notes_list(request):
     return render(request, 'resultats/admin_notes_list.html', context)
 
 
-@login_required
-def admin_cotes_list(request):
-    """Liste et gestion des cotes étudiants"""
-    if not request.user.is_admin_user() and not request.user.is_superuser:
-        messages.error(request, "Accès non autorisé.")
-        return redirect('login')
-    
+def _filtrer_cotes(request):
+    """Cotes correspondant aux filtres de la liste (partagé avec l'export)"""
     # Filtres
     search_query = request.GET.get('search', '')
     annee_filter = request.GET.get('annee', '2024-2025')
@@ -209,17 +335,91 @@ def admin_cotes_list(request):
     
     if semestre_filter:
         cotes = cotes.filter(semestre=semestre_filter)
+
+    return cotes, search_query, annee_filter, semestre_filter
+
+
+@login_required
+def admin_cotes_list(request):
+    """Liste et gestion des cotes étudiants"""
+    if not request.user.is_admin_user() and not request.user.is_superuser:
+        messages.error(request, "Accès non autorisé.")
+        return redirect('login')
+    
+    cotes, search_query, annee_filter, semestre_filter = _filtrer_cotes(request)
     
     context = {
         'cotes': cotes,
+        'nombre_cotes_a_recalculer': CoteEtudiant.objects.filter(a_recalculer=True).count(),
         'search_query': search_query,
         'annee_filter': annee_filter,
         'semestre_filter': semestre_filter,
+        'filtres_export': request.GET.urlencode(),
     }
     
     return render(request, 'resultats/admin_cotes_list.html', context)
 
 
+def _format_export(request):
+    """Format demandé (csv par défaut), ou None si l'export Excel est indisponible"""
+    format_export = request.GET.get('format', 'csv')
+    if format_export not in FORMATS_EXPORT:
+        format_export = 'csv'
+    if format_export == 'xlsx' and not xlsx_disponible():
+        messages.error(request, "L'export Excel n'est pas disponible sur ce serveur, utilisez le CSV.")
+        return None
+    return format_export
+
+
+@login_required
+def admin_cotes_export(request):
+    """Export CSV / XLSX des cotes (mêmes filtres que la liste)"""
+    if not request.user.is_admin_user() and not request.user.is_superuser:
+        messages.error(request, "Accès non autorisé.")
+        return redirect('login')
+
+    format_export = _format_export(request)
+    if format_export is None:
+        return redirect('resultats:admin_cotes_list')
+
+    cotes = _filtrer_cotes(request)[0]
+    entetes = [
+        'Matricule', 'Nom', 'Prénom', 'Faculté', 'Année académique', 'Semestre', 'Moyenne',
+        'Crédits obtenus', 'Crédits possibles', 'Mention', 'Décision', 'UE à reprendre', 'Définitive',
+    ]
+    lignes = cotes.values_list(
+        'etudiant__matricule', 'etudiant__last_name', 'etudiant__first_name',
+        'etudiant__student_profile__faculte__code', 'annee_academique', 'semestre', 'moyenne',
+        'total_credits', 'total_credits_possible', 'mention', 'decision', 'nombre_ue_a_reprendre',
+        'is_definitif',
+    )
+    return reponse_export(format_export, 'cotes', entetes, lignes)
+
+
+@login_required
+def admin_notes_export(request):
+    """Export CSV / XLSX de toutes les notes"""
+    if not request.user.is_admin_user() and not request.user.is_superuser:
+        messages.error(request, "Accès non autorisé.")
+        return redirect('login')
+
+    format_export = _format_export(request)
+    if format_export is None:
+        return redirect('resultats:admin_notes_list')
+
+    notes = Note.objects.order_by('ue__code', 'etudiant__matricule', 'date_evaluation')
+    entetes = [
+        'Matricule', 'Nom', 'Prénom', 'UE', 'Semestre', 'Type', 'Évaluation', 'Note', 'Note maximale',
+        'Coefficient', "Date d'évaluation", 'Publiée', 'Définitive', 'Enseignant',
+    ]
+    lignes = notes.values_list(
+        'etudiant__matricule', 'etudiant__last_name', 'etudiant__first_name', 'ue__code', 'ue__semestre',
+        'type_note', 'titre', 'note_obtenue', 'note_maximale', 'coefficient', 'date_evaluation',
+        'is_publie', 'is_definitive', 'enseignant__username',
+    )
+    return reponse_export(format_export, 'notes', entetes, lignes)
+
+
 @login_required
 def admin_generer_cote(request, etudiant_id):
     """Générer/recalculer la cote pour un étudiant"""
@@ -236,6 +436,8 @@ def admin_generer_cote(request, etudiant_id):
         try:
             cote = calculer_cote_etudiant(etudiant, annee_academique, semestre)
             if cote:
+                soumettre_tache(_actualiser_classements)
+                soumettre_tache(_actualiser_releves)
                 messages.success(request, f"Cote générée avec succès pour {etudiant.get_full_name()}.")
             else:
                 messages.warning(request, f"Impossible de générer la cote pour {etudiant.get_full_name()}. Vérifiez les données de l'étudiant.")
@@ -261,6 +463,9 @@ def admin_recalculer_toutes_cotes(request):
         try:
             resultats = recalculer_toutes_cotes(annee_academique, semestre)
             messages.success(request, f"Cotes recalculées: {resultats['success']}/{resultats['total']} étudiants.")
+            soumettre_tache(_actualiser_classements)
+            soumettre_tache(_actualiser_releves)
+            soumettre_tache(_actualiser_statistiques)
             
             if resultats['errors']:
                 for error in resultats['errors'][:5]:  # Afficher max 5 erreurs
@@ -270,4 +475,320 @@ def admin_recalculer_toutes_cotes(request):
         
         return redirect('resultats:admin_cotes_list')
     
-    return redirect('resultats:admin_cotes_list')
\ No newline at end of file
+    return redirect('resultats:admin_cotes_list')
+
+
+@login_required
+def admin_recalculer_cotes_marquees(request):
+    """Recalculer uniquement les cotes dont les notes ont changé"""
+    if not request.user.is_admin_user() and not request.user.is_superuser:
+        messages.error(request, "Accès non autorisé.")
+        return redirect('login')
+
+    if request.method == 'POST':
+        try:
+            resultats = recalculer_cotes_marquees()
+            messages.success(request, f"Cotes recalculées: {resultats['success']}/{resultats['total']} étudiants.")
+            soumettre_tache(_actualiser_classements)
+            soumettre_tache(_actualiser_releves)
+            soumettre_tache(_actualiser_statistiques)
+
+            if resultats['errors']:
+                for error in resultats['errors'][:5]:  # Afficher max 5 erreurs
+                    messages.warning(request, f"Erreur pour {error['etudiant']}: {error['erreur']}")
+        except Exception as e:
+            messages.error(request, f"Erreur lors du recalcul: {str(e)}")
+
+    return redirect('resultats:admin_cotes_list')
+
+
+def _actualiser_classements():
+    """Tâche d'arrière-plan : reclassement des cohortes dont les cotes ont changé"""
+    from .classement import mettre_a_jour_classements
+    mettre_a_jour_classements()
+
+
+def _actualiser_releves():
+    """Tâche d'arrière-plan : relevés pluriannuels des étudiants dont une cote a changé"""
+    from .releve import mettre_a_jour_releves
+    mettre_a_jour_releves()
+
+
+def _actualiser_statistiques():
+    """Tâche d'arrière-plan : recalcul des statistiques précalculées"""
+    from .statistiques import calculer_statistiques
+    calculer_statistiques()
+
+
+def _statistiques_filtrees(request):
+    """Statistiques précalculées filtrées par année et semestre (page et JSON)"""
+    annee_filter = request.GET.get('annee', '')
+    semestre_filter = request.GET.get('semestre', '')
+
+    statistiques_ue = StatistiqueUE.objects.select_related('ue')
+    statistiques_promotions = StatistiquePromotion.objects.select_related('promotion')
+    statistiques_facultes = StatistiqueFaculte.objects.select_related('faculte')
+
+    if annee_filter:
+        statistiques_promotions = statistiques_promotions.filter(annee_academique=annee_filter)
+        statistiques_facultes = statistiques_facultes.filter(annee_academique=annee_filter)
+    if semestre_filter:
+        statistiques_ue = statistiques_ue.filter(ue__semestre=semestre_filter)
+        statistiques_promotions = statistiques_promotions.filter(semestre=semestre_filter)
+
+    return statistiques_ue, statistiques_promotions, statistiques_facultes, annee_filter, semestre_filter
+
+
+@login_required
+def admin_statistiques(request):
+    """Tableaux d'analyse (lecture des statistiques précalculées)"""
+    if not request.user.is_admin_user() and not request.user.is_superuser:
+        messages.error(request, "Accès non autorisé.")
+        return redirect('login')
+
+    if request.method == 'POST':
+        soumettre_tache(_actualiser_statistiques)
+        messages.success(request, "Le recalcul des statistiques a été lancé, actualisez la page dans quelques instants.")
+        return redirect('resultats:admin_statistiques')
+
+    statistiques_ue, statistiques_promotions, statistiques_facultes, annee_filter, semestre_filter = _statistiques_filtrees(request)
+    mentions = dict(CoteEtudiant.MENTION_CHOICES)
+    for statistique in statistiques_promotions:
+        # Répartition dans l'ordre des mentions, avec pourcentages pour les barres
+        statistique.repartition = [
+            {
+                'code': code,
+                'libelle': libelle,
+                'nombre': statistique.mentions.get(code, 0),
+                'pourcentage': round(statistique.mentions.get(code, 0) * 100 / statistique.nombre_cotes, 1) if statistique.nombre_cotes else 0,
+            }
+            for code, libelle in mentions.items()
+        ]
+
+    derniers_calculs = [
+        statistique.date_calcul
+        for statistique in (
+            StatistiqueUE.objects.order_by('-date_calcul').first(),
+            StatistiquePromotion.objects.order_by('-date_calcul').first(),
+            StatistiqueFaculte.objects.order_by('-date_calcul').first(),
+        ) if statistique
+    ]
+
+    context = {
+        'statistiques_ue': statistiques_ue,
+        'statistiques_promotions': statistiques_promotions,
+        'statistiques_facultes': statistiques_facultes,
+        'annee_filter': annee_filter,
+        'semestre_filter': semestre_filter,
+        'annees': StatistiquePromotion.objects.values_list('annee_academique', flat=True).distinct().order_by('-annee_academique'),
+        'semestres': UE.SEMESTRE_CHOICES,
+        'date_calcul': max(derniers_calculs) if derniers_calculs else None,
+    }
+
+    return render(request, 'resultats/admin_statistiques.html', context)
+
+
+@login_required
+def admin_statistiques_json(request):
+    """Statistiques précalculées au format JSON (?annee=...&semestre=...)"""
+    if not request.user.is_admin_user() and not request.user.is_superuser:
+        return JsonResponse({'success': False, 'message': 'Accès non autorisé'}, status=403)
+
+    statistiques_ue, statistiques_promotions, statistiques_facultes, _, _ = _statistiques_filtrees(request)
+
+    def nombre(valeur):
+        return float(valeur) if valeur is not None else None
+
+    return JsonResponse({
+        'success': True,
+        'ue': [
+            {
+                'code': s.ue.code,
+                'nom': s.ue.nom,
+                'semestre': s.ue.semestre,
+                'nombre_etudiants': s.nombre_etudiants,
+                'moyenne': nombre(s.moyenne),
+                'mediane': nombre(s.mediane),
+                'ecart_type': nombre(s.ecart_type),
+                'minimum': nombre(s.minimum),
+                'maximum': nombre(s.maximum),
+                'taux_reussite': nombre(s.taux_reussite),
+                'date_calcul': s.date_calcul.isoformat(),
+            }
+            for s in statistiques_ue
+        ],
+        'promotions': [
+            {
+                'promotion': str(s.promotion),
+                'annee_academique': s.annee_academique,
+                'semestre': s.semestre,
+                'nombre_cotes': s.nombre_cotes,
+                'moyenne': nombre(s.moyenne),
+                'mediane': nombre(s.mediane),
+                'taux_admis': nombre(s.taux_admis),
+                'mentions': s.mentions,
+                'date_calcul': s.date_calcul.isoformat(),
+            }
+            for s in statistiques_promotions
+        ],
+        'facultes': [
+            {
+                'faculte': s.faculte.code,
+                'annee_academique': s.annee_academique,
+                'nombre_etudiants': s.nombre_etudiants,
+                'montant_total': nombre(s.montant_total),
+                'montant_paye': nombre(s.montant_paye),
+                'taux_recouvrement': nombre(s.taux_recouvrement),
+                'date_calcul': s.date_calcul.isoformat(),
+            }
+            for s in statistiques_facultes
+        ],
+    })
+
+
+def _cohorte_demandee(donnees):
+    """(promotion_id, niveau, année, semestre) lus dans `donnees`, ou None si incomplets"""
+    try:
+        promotion_id = int(donnees.get('promotion') or 0)
+    except (TypeError, ValueError):
+        return None
+    niveau = donnees.get('niveau', '')
+    annee_academique = donnees.get('annee', '')
+    semestre = donnees.get('semestre', '')
+    if not (promotion_id and niveau and annee_academique and semestre):
+        return None
+    return promotion_id, niveau, annee_academique, semestre
+
+
+@login_required
+def admin_deliberation(request):
+    """Simulateur de délibération : choix de la cohorte et des règles"""
+    if not request.user.is_admin_user() and not request.user.is_superuser:
+        messages.error(request, "Accès non autorisé.")
+        return redirect('login')
+
+    from .simulation import MatriceCohorte, REGLES_ACTUELLES
+
+    cohorte = _cohorte_demandee(request.GET)
+    matrice = MatriceCohorte.charger(*cohorte) if cohorte else None
+
+    context = {
+        'promotions': Promotion.objects.all(),
+        'niveaux': UE.NIVEAU_CHOICES,
+        'semestres': UE.SEMESTRE_CHOICES,
+        'annees': CoteEtudiant.objects.values_list('annee_academique', flat=True).distinct().order_by('-annee_academique'),
+        'promotion_filter': cohorte[0] if cohorte else None,
+        'niveau_filter': request.GET.get('niveau', ''),
+        'annee_filter': request.GET.get('annee', ''),
+        'semestre_filter': request.GET.get('semestre', ''),
+        'matrice': matrice,
+        'regles': REGLES_ACTUELLES,
+        'libelles': {
+            'mentions': dict(CoteEtudiant.MENTION_CHOICES),
+            'decisions': dict(CoteEtudiant.DECISION_CHOICES),
+        },
+    }
+
+    return render(request, 'resultats/admin_deliberation.html', context)
+
+
+def _scenario_json(request):
+    """Cohorte et règles d'un scénario envoyé en JSON ; lève ValueError si invalides"""
+    from .simulation import lire_regles
+
+    try:
+        donnees = json.loads(request.body)
+    except ValueError:
+        raise ValueError("Données invalides.")
+    if not isinstance(donnees, dict):
+        raise ValueError("Données invalides.")
+    cohorte = _cohorte_demandee(donnees)
+    if cohorte is None:
+        raise ValueError("Cohorte incomplète.")
+    regles = donnees.get('regles') or {}
+    if not isinstance(regles, dict):
+        raise ValueError("Les règles du scénario doivent être un objet.")
+    return cohorte, lire_regles(regles)
+
+
+@login_required
+def admin_deliberation_simuler(request):
+    """Évalue un scénario et renvoie les écarts avec les cotes actuelles (rien n'est enregistré)"""
+    if not request.user.is_admin_user() and not request.user.is_superuser:
+        return JsonResponse({'success': False, 'message': 'Accès non autorisé'}, status=403)
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'message': 'Méthode non autorisée'}, status=405)
+
+    from .simulation import MatriceCohorte
+
+    try:
+        cohorte, regles = _scenario_json(request)
+    except (ValueError, TypeError) as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+    comparaison = MatriceCohorte.charger(*cohorte).comparer(regles)
+    return JsonResponse({'success': True, **comparaison})
+
+
+@login_required
+def admin_deliberation_adopter(request):
+    """Applique un scénario aux cotes non définitives de la cohorte"""
+    if not request.user.is_admin_user() and not request.user.is_superuser:
+        return JsonResponse({'success': False, 'message': 'Accès non autorisé'}, status=403)
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'message': 'Méthode non autorisée'}, status=405)
+
+    from .simulation import MatriceCohorte
+
+    try:
+        cohorte, regles = _scenario_json(request)
+    except (ValueError, TypeError) as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+    # Adoption à partir des notes actuelles, pas de la matrice en cache
+    nombre = MatriceCohorte.charger(*cohorte, depuis_cache=False).adopter(regles, request.user)
+    soumettre_tache(_actualiser_classements)
+    soumettre_tache(_actualiser_releves)
+    soumettre_tache(_actualiser_statistiques)
+    return JsonResponse({'success': True, 'message': f"Scénario adopté : {nombre} cote(s) mise(s) à jour."})
+
+
+
+@login_required
+def admin_proces_verbal(request):
+    """Procès-verbal de délibération d'une cohorte (PDF, CSV ou XLSX)"""
+    if not request.user.is_admin_user() and not request.user.is_superuser:
+        messages.error(request, "Accès non autorisé.")
+        return redirect('login')
+
+    from django.http import FileResponse
+    from .proces_verbal import ProcesVerbal
+
+    cohorte = _cohorte_demandee(request.GET)
+    if cohorte is None:
+        messages.error(request, "Choisissez la promotion, le niveau, l'année et le semestre.")
+        return redirect('resultats:admin_deliberation')
+
+    promotion = get_object_or_404(Promotion, id=cohorte[0])
+    proces_verbal = ProcesVerbal(*cohorte)
+    nom_fichier = f"pv_{cohorte[1]}_{cohorte[2]}_{cohorte[3]}"
+
+    if request.GET.get('format', 'pdf') != 'pdf':
+        format_export = _format_export(request)
+        if format_export is None:
+            return redirect(f"{reverse('resultats:admin_deliberation')}?{request.GET.urlencode()}")
+        return reponse_export(format_export, nom_fichier, proces_verbal.entetes, proces_verbal.lignes())
+
+    try:
+        fichier = proces_verbal.fichier_pdf({
+            'promotion': promotion,
+            'niveau': dict(UE.NIVEAU_CHOICES).get(cohorte[1], cohorte[1]),
+            'annee_academique': cohorte[2],
+            'semestre': dict(UE.SEMESTRE_CHOICES).get(cohorte[3], cohorte[3]),
+            'date_generation': timezone.now(),
+        })
+    except Exception as e:
+        messages.error(request, f"Erreur lors de la génération du procès-verbal : {str(e)}")
+        return redirect(f"{reverse('resultats:admin_deliberation')}?{request.GET.urlencode()}")
+
+    return FileResponse(fichier, as_attachment=True, filename=f"{nom_fichier}.pdf", content_type='application/pdf')
@@ -0,0 +1 @@
+# Application de téléversement par morceaux (reprise après coupure)
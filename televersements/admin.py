@@ -0,0 +1,17 @@
+from django.contrib import admin
+from .models import FichierArchive, SessionTeleversement
+
+
+@admin.register(SessionTeleversement)
+class SessionTeleversementAdmin(admin.ModelAdmin):
+    list_display = ['nom_fichier', 'utilisateur', 'cible', 'octets_recus', 'taille_totale', 'statut', 'date_creation']
+    list_filter = ['cible', 'statut']
+    search_fields = ['nom_fichier', 'utilisateur__matricule', 'sha256']
+    readonly_fields = ['id', 'octets_recus', 'sha256', 'date_creation', 'date_modification']
+
+
+@admin.register(FichierArchive)
+class FichierArchiveAdmin(admin.ModelAdmin):
+    list_display = ['nom', 'algorithme', 'taille_originale', 'taille_compressee', 'date_archivage']
+    list_filter = ['algorithme']
+    search_fields = ['nom', 'sha256']
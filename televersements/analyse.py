@@ -0,0 +1,123 @@
+"""
+Analyse des fichiers téléversés : empreinte, extraction de texte et similarité
+"""
+import hashlib
+import os
+import re
+import zipfile
+
+import numpy as np
+
+from .utils import calculer_sha256
+
+# Limite du texte conservé en base pour la comparaison
+TAILLE_MAX_TEXTE = 200000
+
+# MinHash : nombre de fonctions de hachage (erreur type de l'estimation ~ 1/sqrt(128))
+NOMBRE_PERMUTATIONS = 128
+TAILLE_LOT_MINHASH = 4096
+# h(x) = (a*x + b) mod p, avec x sur 32 bits et a, b < p = 2**31 - 1 : le calcul tient sur 64 bits
+_PREMIER = np.uint64((1 << 31) - 1)
+_generateur = np.random.RandomState(5381)
+_COEFFICIENTS_A = _generateur.randint(1, (1 << 31) - 1, size=NOMBRE_PERMUTATIONS, dtype=np.uint64)
+_COEFFICIENTS_B = _generateur.randint(0, (1 << 31) - 1, size=NOMBRE_PERMUTATIONS, dtype=np.uint64)
+
+EXTENSIONS_TEXTE = {'.txt', '.md', '.csv', '.py', '.java', '.c', '.cpp', '.h', '.js', '.html', '.sql'}
+
+
+def extraire_texte(chemin):
+    """
+    Extrait le texte brut d'un fichier (texte, code source, DOCX, PDF).
+    La lecture des PDF nécessite pypdf ; sans lui, aucun texte n'est extrait.
+    """
+    extension = os.path.splitext(chemin)[1].lower()
+    texte = ''
+
+    if extension in EXTENSIONS_TEXTE:
+        with open(chemin, 'rb') as fichier:
+            texte = fichier.read(TAILLE_MAX_TEXTE * 4).decode('utf-8', errors='ignore')
+
+    elif extension == '.docx':
+        try:
+            with zipfile.ZipFile(chemin) as archive:
+                xml = archive.read('word/document.xml').decode('utf-8', errors='ignore')
+            texte = re.sub(r'<[^>]+>', ' ', xml)
+        except (zipfile.BadZipFile, KeyError):
+            texte = ''
+
+    elif extension == '.pdf':
+        try:
+            from pypdf import PdfReader
+        except ImportError:
+            return ''
+        try:
+            pages = []
+            longueur = 0
+            for page in PdfReader(chemin).pages:
+                contenu = page.extract_text() or ''
+                pages.append(contenu)
+                longueur += len(contenu)
+                if longueur >= TAILLE_MAX_TEXTE:
+                    break
+            texte = '\n'.join(pages)
+        except Exception:
+            texte = ''
+
+    return re.sub(r'\s+', ' ', texte).strip()[:TAILLE_MAX_TEXTE]
+
+
+def empreintes_texte(texte, taille=5):
+    """Ensemble des séquences de `taille` mots consécutifs (shingles)"""
+    mots = re.findall(r'\w+', texte.lower())
+    if len(mots) < taille:
+        return {' '.join(mots)} if mots else set()
+    return {' '.join(mots[i:i + taille]) for i in range(len(mots) - taille + 1)}
+
+
+def similarite(empreintes_a, empreintes_b):
+    """Indice de Jaccard entre deux ensembles d'empreintes (0 à 1)"""
+    if not empreintes_a or not empreintes_b:
+        return 0.0
+    return len(empreintes_a & empreintes_b) / len(empreintes_a | empreintes_b)
+
+
+def signature_minhash(empreintes):
+    """
+    Signature MinHash d'un ensemble d'empreintes : NOMBRE_PERMUTATIONS entiers
+    dont la proportion de valeurs communes à deux signatures estime l'indice
+    de Jaccard des deux ensembles. Liste vide si l'ensemble est vide.
+    """
+    if not empreintes:
+        return []
+    # Hachage stable d'un processus à l'autre (contrairement à hash())
+    valeurs = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(e.encode('utf-8'), digest_size=4).digest(), 'little') for e in empreintes),
+        dtype=np.uint64,
+        count=len(empreintes),
+    )
+    signature = np.full(NOMBRE_PERMUTATIONS, _PREMIER, dtype=np.uint64)
+    for debut in range(0, len(valeurs), TAILLE_LOT_MINHASH):
+        bloc = valeurs[debut:debut + TAILLE_LOT_MINHASH, np.newaxis]
+        np.minimum(signature, ((bloc * _COEFFICIENTS_A + _COEFFICIENTS_B) % _PREMIER).min(axis=0), out=signature)
+    return signature.tolist()
+
+
+def similarites_signatures(signature, signatures):
+    """Indices de Jaccard estimés entre `signature` et chacune des `signatures` (tableau NumPy)"""
+    if not signature or not signatures:
+        return np.zeros(len(signatures))
+    matrice = np.array(signatures, dtype=np.uint64)
+    return (matrice == np.array(signature, dtype=np.uint64)).mean(axis=1)
+
+
+def analyser_fichier(champ):
+    """
+    Calcule les informations dérivées d'un FieldFile.
+    Retourne un dictionnaire {taille, sha256, texte}.
+    """
+    chemin = champ.path
+    return {
+        'taille': os.path.getsize(chemin),
+        'sha256': calculer_sha256(chemin),
+        'texte': extraire_texte(chemin),
+    }
@@ -0,0 +1,188 @@
+"""
+Aperçus des documents (supports de cours, mémoires) : vignette de la première
+page et aperçus légers des premières pages, pour éviter de télécharger tout
+le fichier pour savoir ce qu'il contient.
+
+Les aperçus sont rangés sous apercus/<empreinte>/ avec un manifeste JSON :
+un même contenu (même SHA-256), publié dans plusieurs cours ou redéposé, n'est
+rendu qu'une fois. Le rendu des pages PDF en images nécessite pypdfium2 ;
+sans lui, l'aperçu se limite au texte des premières pages (pypdf).
+"""
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from .analyse import EXTENSIONS_TEXTE, extraire_texte
+
+# Largeur (en pixels) de la vignette et des aperçus de pages
+LARGEUR_VIGNETTE = 240
+LARGEUR_PAGE = 900
+
+# Nombre de pages prévisualisées et texte conservé par page
+NOMBRE_PAGES_APERCU = 3
+TAILLE_TEXTE_PAGE = 1500
+
+EXTENSIONS_IMAGE = {'.png', '.jpg', '.jpeg', '.gif', '.webp', '.bmp'}
+
+
+def rendu_pdf_disponible():
+    try:
+        import pypdfium2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def dossier_apercu(sha256):
+    return f"apercus/{sha256[:2]}/{sha256}"
+
+
+@contextmanager
+def fichier_local(champ):
+    """Chemin local du fichier d'un FieldFile (copie temporaire si le stockage n'en expose pas)"""
+    try:
+        chemin = champ.path
+    except NotImplementedError:
+        chemin = None
+    if chemin and os.path.exists(chemin):
+        yield chemin
+        return
+
+    # Fichier archivé (compressé) ou stockage distant : copie décompressée
+    extension = os.path.splitext(champ.name)[1]
+    with tempfile.NamedTemporaryFile(suffix=extension) as copie:
+        with champ.open('rb') as source:
+            shutil.copyfileobj(source, copie)
+        copie.flush()
+        yield copie.name
+
+
+def _redimensionner(image, largeur):
+    image = ImageOps.exif_transpose(image).convert('RGB')
+    if image.width > largeur:
+        image = image.resize((largeur, round(image.height * largeur / image.width)), Image.LANCZOS)
+    return image
+
+
+def _enregistrer_image(image, nom):
+    tampon = BytesIO()
+    image.save(tampon, format='WEBP', quality=75, method=4)
+    # Le nom dépend du contenu : une version déjà présente est remplacée à l'identique
+    default_storage.delete(nom)
+    return default_storage.save(nom, ContentFile(tampon.getvalue()))
+
+
+def _pages_pdf(chemin):
+    """(nombre de pages, images PIL des premières pages), rendues avec pypdfium2"""
+    import pypdfium2 as pdfium
+
+    document = pdfium.PdfDocument(chemin)
+    try:
+        images = []
+        for index in range(min(NOMBRE_PAGES_APERCU, len(document))):
+            page = document[index]
+            images.append(page.render(scale=LARGEUR_PAGE / page.get_width()).to_pil())
+            page.close()
+        return len(document), images
+    finally:
+        document.close()
+
+
+def _textes_pdf(chemin):
+    """(nombre de pages, texte des premières pages), ou (None, []) sans pypdf"""
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        return None, []
+    lecteur = PdfReader(chemin)
+    textes = [
+        ' '.join((page.extract_text() or '').split())[:TAILLE_TEXTE_PAGE]
+        for page in lecteur.pages[:NOMBRE_PAGES_APERCU]
+    ]
+    return len(lecteur.pages), textes
+
+
+def _construire(chemin, dossier):
+    extension = os.path.splitext(chemin)[1].lower()
+    apercu = {'vignette': '', 'pages': [], 'textes': [], 'nombre_pages': None}
+
+    images = []
+    if extension == '.pdf':
+        apercu['nombre_pages'], apercu['textes'] = _textes_pdf(chemin)
+        if rendu_pdf_disponible():
+            apercu['nombre_pages'], images = _pages_pdf(chemin)
+    elif extension in EXTENSIONS_IMAGE:
+        with Image.open(chemin) as image:
+            image.load()
+            images = [image.copy()]
+    elif extension in EXTENSIONS_TEXTE or extension == '.docx':
+        texte = extraire_texte(chemin)
+        apercu['textes'] = [texte[:TAILLE_TEXTE_PAGE]] if texte else []
+
+    for numero, image in enumerate(images, start=1):
+        apercu['pages'].append(_enregistrer_image(_redimensionner(image, LARGEUR_PAGE), f"{dossier}/page_{numero}.webp"))
+    if images:
+        apercu['vignette'] = _enregistrer_image(_redimensionner(images[0], LARGEUR_VIGNETTE), f"{dossier}/vignette.webp")
+    return apercu
+
+
+def generer_apercu(champ, sha256):
+    """
+    Aperçu du fichier `champ` (FieldFile) dont l'empreinte est `sha256` :
+    relu depuis le manifeste si ce contenu a déjà été traité, construit sinon.
+    """
+    dossier = dossier_apercu(sha256)
+    manifeste = f"{dossier}/apercu.json"
+    if default_storage.exists(manifeste):
+        with default_storage.open(manifeste, 'rb') as fichier:
+            apercu = json.loads(fichier.read())
+    else:
+        with fichier_local(champ) as chemin:
+            apercu = _construire(chemin, dossier)
+        default_storage.delete(manifeste)
+        default_storage.save(manifeste, ContentFile(json.dumps(apercu).encode('utf-8')))
+    apercu['sha256'] = sha256
+    return apercu
+
+
+def noms_fichiers(apercu):
+    """Fichiers du stockage utilisés par un aperçu"""
+    if not apercu or not apercu.get('sha256'):
+        return []
+    noms = [nom for nom in [apercu.get('vignette'), *apercu.get('pages', [])] if nom]
+    return [*noms, f"{dossier_apercu(apercu['sha256'])}/apercu.json"]
+
+
+def _a_jour(apercu, sha256):
+    """Vrai si l'aperçu a été construit pour le contenu actuel du fichier"""
+    return bool(sha256) and (apercu or {}).get('sha256') == sha256
+
+
+def url_vignette(apercu, sha256):
+    """URL de la vignette de la première page, '' si absente ou périmée"""
+    if _a_jour(apercu, sha256) and apercu.get('vignette'):
+        return default_storage.url(apercu['vignette'])
+    return ''
+
+
+def pages_apercu(apercu, sha256):
+    """Pages à afficher : [{'numero', 'image' (URL ou ''), 'texte'}], vide si l'aperçu est périmé"""
+    if not _a_jour(apercu, sha256):
+        return []
+    images = apercu.get('pages', [])
+    textes = apercu.get('textes', [])
+    return [
+        {
+            'numero': index + 1,
+            'image': default_storage.url(images[index]) if index < len(images) else '',
+            'texte': textes[index] if index < len(textes) else '',
+        }
+        for index in range(max(len(images), len(textes)))
+    ]
@@ -0,0 +1,6 @@
+from django.apps import AppConfig
+
+
+class TeleversementsConfig(AppConfig):
+    name = 'televersements'
+    verbose_name = 'Téléversements par morceaux'
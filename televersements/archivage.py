@@ -0,0 +1,74 @@
+"""
+Archivage compressé des fichiers des années passées (remises et mémoires).
+
+Les fichiers des enregistrements plus anciens que le seuil sont compressés un
+par un par le stockage (voir stockage.StockageArchive) ; les fichiers déjà
+traités (y compris ceux dont la compression ne valait pas la peine) sont
+repérés par lots dans FichierArchive et ignorés.
+"""
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+TAILLE_LOT = 500
+
+# (libellé, modèle, champs fichier, date de référence de l'enregistrement)
+CIBLES = [
+    ('remises', 'travaux.RemiseTravail', ('fichier_principal', 'fichiers_supplementaires'), 'date_remise'),
+    ('mémoires', 'memoires.Memoire', ('fichier_memoire',), 'date_depot_final'),
+]
+
+
+def age_par_defaut():
+    return getattr(settings, 'ARCHIVAGE_AGE_JOURS', 365)
+
+
+def _noms_a_archiver(modele, champs, champ_date, limite):
+    """Noms des fichiers des enregistrements antérieurs à `limite`, analyse terminée"""
+    # L'analyse (taille, empreinte, texte) lit le fichier d'origine sur le disque
+    lignes = modele.objects.filter(**{f"{champ_date}__lt": limite}, statut_analyse='termine')
+    for valeurs in lignes.values_list(*champs).iterator(chunk_size=TAILLE_LOT):
+        yield from (nom for nom in valeurs if nom)
+
+
+def _par_lots(noms):
+    lot = []
+    for nom in noms:
+        lot.append(nom)
+        if len(lot) == TAILLE_LOT:
+            yield lot
+            lot = []
+    if lot:
+        yield lot
+
+
+def archiver(jours=None, algorithme=None, simulation=False):
+    """
+    Compresse les fichiers des remises et des mémoires plus anciens que `jours`.
+    Retourne {libellé: {'fichiers', 'octets_avant', 'octets_apres'}}.
+    """
+    from .models import FichierArchive
+
+    limite = timezone.now() - timedelta(days=age_par_defaut() if jours is None else jours)
+    rapport = {}
+    for libelle, label, champs, champ_date in CIBLES:
+        modele = apps.get_model(label)
+        resultat = rapport[libelle] = {'fichiers': 0, 'octets_avant': 0, 'octets_apres': 0}
+        for lot in _par_lots(_noms_a_archiver(modele, champs, champ_date, limite)):
+            deja_traites = set(FichierArchive.objects.filter(nom__in=lot).values_list('nom', flat=True))
+            for nom in lot:
+                if nom in deja_traites or not default_storage.exists(nom) or default_storage.est_archive(nom):
+                    continue
+                if simulation:
+                    resultat['fichiers'] += 1
+                    resultat['octets_avant'] += default_storage.size(nom)
+                    continue
+                archive = default_storage.compresser(nom, algorithme)
+                if archive.algorithme:
+                    resultat['fichiers'] += 1
+                    resultat['octets_avant'] += archive.taille_originale
+                    resultat['octets_apres'] += archive.taille_compressee
+    return rapport
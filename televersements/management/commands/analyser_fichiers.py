@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from cours.models import SupportCours
+from cours.taches import analyser_support
+from memoires.models import Memoire
+from memoires.taches import analyser_memoire
+from travaux.models import RemiseTravail
+from travaux.taches import analyser_remise
+
+# Au-delà de ce délai, une analyse encore « en cours » est considérée comme interrompue
+DELAI_ANALYSE_INTERROMPUE = timedelta(hours=1)
+
+
+class Command(BaseCommand):
+    help = "Analyse les fichiers des remises, supports et mémoires en attente, en erreur ou interrompus"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tout', action='store_true', help="Ré-analyser tous les fichiers")
+
+    def handle(self, *args, **options):
+        cibles = [
+            ('remises', RemiseTravail, analyser_remise),
+            ('supports', SupportCours, analyser_support),
+            ('mémoires', Memoire, analyser_memoire),
+        ]
+
+        interrompue = Q(statut_analyse='en_cours') & (
+            Q(date_analyse__isnull=True) | Q(date_analyse__lt=timezone.now() - DELAI_ANALYSE_INTERROMPUE)
+        )
+        for libelle, modele, tache in cibles:
+            objets = modele.objects.all()
+            if not options['tout']:
+                objets = objets.filter(Q(statut_analyse__in=['en_attente', 'erreur']) | interrompue)
+
+            total = 0
+            for pk in objets.values_list('pk', flat=True).iterator():
+                tache(pk)
+                total += 1
+            self.stdout.write(self.style.SUCCESS(f"{total} {libelle} analysé(e)s."))
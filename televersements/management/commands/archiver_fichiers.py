@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from televersements.archivage import age_par_defaut, archiver
+from televersements.stockage import EXTENSIONS, zstd_disponible
+
+
+class Command(BaseCommand):
+    help = "Compresse les fichiers des remises et des mémoires des années passées"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--jours', type=int, default=None,
+            help=f"Archiver les enregistrements de plus de N jours ({age_par_defaut()} par défaut)"
+        )
+        parser.add_argument(
+            '--algorithme', choices=list(EXTENSIONS),
+            help="Algorithme de compression (zstd si le paquet zstandard est installé, sinon gzip)"
+        )
+        parser.add_argument('--simulation', action='store_true', help="Compter les fichiers sans les compresser")
+
+    def handle(self, *args, **options):
+        from django.core.files.storage import default_storage
+
+        if not hasattr(default_storage, 'compresser'):
+            raise CommandError("Le stockage par défaut ne gère pas l'archivage (STORAGES['default']).")
+        if options['algorithme'] == 'zstd' and not zstd_disponible():
+            raise CommandError("Le paquet zstandard n'est pas installé.")
+
+        rapport = archiver(options['jours'], options['algorithme'], simulation=options['simulation'])
+        for libelle, resultat in rapport.items():
+            avant = resultat['octets_avant'] / (1024 * 1024)
+            if options['simulation']:
+                self.stdout.write(f"{resultat['fichiers']} fichier(s) de {libelle} à archiver ({avant:.1f} Mo).")
+                continue
+            apres = resultat['octets_apres'] / (1024 * 1024)
+            self.stdout.write(self.style.SUCCESS(
+                f"{resultat['fichiers']} fichier(s) de {libelle} archivé(s) : {avant:.1f} Mo -> {apres:.1f} Mo."
+            ))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from cours.models import SupportCours
+from cours.taches import generer_apercu_support
+from memoires.models import Memoire
+from memoires.taches import generer_apercu_memoire
+
+
+class Command(BaseCommand):
+    help = "Génère les aperçus (vignette et premières pages) des supports et mémoires analysés qui n'en ont pas"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tout', action='store_true', help="Relire les aperçus de tous les fichiers")
+
+    def handle(self, *args, **options):
+        cibles = [
+            ('supports', SupportCours, generer_apercu_support),
+            ('mémoires', Memoire, generer_apercu_memoire),
+        ]
+
+        for libelle, modele, tache in cibles:
+            objets = modele.objects.filter(statut_analyse='termine').exclude(empreinte_sha256='')
+
+            total = 0
+            for pk, apercu, sha256 in objets.values_list('pk', 'apercu', 'empreinte_sha256').iterator():
+                if not options['tout'] and (apercu or {}).get('sha256') == sha256:
+                    continue
+                tache(pk)
+                total += 1
+            self.stdout.write(self.style.SUCCESS(f"{total} aperçu(s) de {libelle} généré(s)."))
@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from televersements.orphelins import DOSSIER_QUARANTAINE, orphelins, retirer, vider_quarantaine
+
+SECONDES_PAR_JOUR = 24 * 3600
+
+
+class Command(BaseCommand):
+    help = (
+        f"Met en quarantaine (MEDIA_ROOT/{DOSSIER_QUARANTAINE}/) les fichiers de MEDIA_ROOT référencés "
+        "par aucun enregistrement ; la suppression définitive exige --supprimer --confirmer"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--simulation', action='store_true', help="Lister les fichiers orphelins sans rien déplacer")
+        parser.add_argument(
+            '--jours', type=int, default=7,
+            help="Ignorer les fichiers modifiés depuis moins de N jours (7 par défaut)"
+        )
+        parser.add_argument(
+            '--quarantaine', action='store_true',
+            help="Comportement par défaut (option conservée pour les tâches planifiées existantes)"
+        )
+        parser.add_argument(
+            '--supprimer', action='store_true',
+            help="Supprimer définitivement les fichiers au lieu de les mettre en quarantaine (exige --confirmer)"
+        )
+        parser.add_argument(
+            '--vider-quarantaine', type=int, metavar='JOURS',
+            help="Supprimer les fichiers en quarantaine depuis plus de JOURS jours (exige --confirmer)"
+        )
+        parser.add_argument(
+            '--confirmer', action='store_true',
+            help="Confirmer une suppression définitive, après avoir vérifié la liste donnée par --simulation"
+        )
+
+    def handle(self, *args, **options):
+        simulation = options['simulation']
+        definitif = options['supprimer'] or options['vider_quarantaine'] is not None
+        if options['supprimer'] and options['quarantaine']:
+            raise CommandError("--supprimer et --quarantaine sont incompatibles.")
+        if definitif and not simulation and not options['confirmer']:
+            raise CommandError(
+                "Suppression définitive non confirmée : vérifiez la liste avec --simulation, "
+                "puis relancez avec --confirmer."
+            )
+        quarantaine = None if options['supprimer'] else DOSSIER_QUARANTAINE
+
+        total = 0
+        octets = 0
+        for nom, taille in orphelins(age_minimum=options['jours'] * SECONDES_PAR_JOUR):
+            if simulation:
+                self.stdout.write(f"{nom} ({taille} octets)")
+            elif not retirer(nom, quarantaine=quarantaine):
+                continue
+            total += 1
+            octets += taille
+
+        action = "trouvé(s)" if simulation else ("mis en quarantaine" if quarantaine else "supprimé(s)")
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} fichier(s) orphelin(s) {action} ({octets / (1024 * 1024):.1f} Mo)."
+        ))
+
+        if options['vider_quarantaine'] is not None and not simulation:
+            supprimes = vider_quarantaine(options['vider_quarantaine'] * SECONDES_PAR_JOUR)
+            self.stdout.write(self.style.SUCCESS(f"{supprimes} fichier(s) supprimé(s) de la quarantaine."))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from televersements.models import SessionTeleversement
+
+
+class Command(BaseCommand):
+    help = "Supprime les fichiers partiels des sessions de téléversement expirées"
+
+    def handle(self, *args, **options):
+        sessions = SessionTeleversement.objects.filter(
+            statut='en_cours',
+            date_expiration__lt=timezone.now()
+        )
+
+        total = 0
+        for session in sessions.iterator():
+            session.supprimer_fichier_partiel()
+            total += 1
+
+        sessions.update(statut='expire')
+        self.stdout.write(self.style.SUCCESS(f"{total} session(s) expirée(s) nettoyée(s)."))
@@ -0,0 +1,44 @@
+# Generated by Django 5.0.6 on 2026-10-19 19:11
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('memoires', '0001_initial'),
+        ('travaux', '0002_travail_cours'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionTeleversement',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('cible', models.CharField(choices=[('memoire', 'Mémoire final'), ('remise', 'Remise de travail')], max_length=20)),
+                ('nom_fichier', models.CharField(help_text="Nom du fichier d'origine", max_length=255)),
+                ('taille_totale', models.BigIntegerField(help_text='Taille totale annoncée en octets')),
+                ('sha256_attendu', models.CharField(blank=True, help_text='Empreinte SHA-256 annoncée (optionnelle)', max_length=64)),
+                ('octets_recus', models.BigIntegerField(default=0, help_text='Octets reçus et vérifiés')),
+                ('sha256', models.CharField(blank=True, help_text='Empreinte SHA-256 calculée à la validation', max_length=64)),
+                ('statut', models.CharField(choices=[('en_cours', 'En cours'), ('termine', 'Terminé'), ('expire', 'Expiré')], default='en_cours', max_length=20)),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+                ('date_modification', models.DateTimeField(auto_now=True)),
+                ('date_expiration', models.DateTimeField(help_text='Date après laquelle la session est abandonnée')),
+                ('memoire', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='sessions_televersement', to='memoires.memoire')),
+                ('travail', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='sessions_televersement', to='travaux.travail')),
+                ('utilisateur', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sessions_televersement', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Session de téléversement',
+                'verbose_name_plural': 'Sessions de téléversement',
+                'ordering': ['-date_creation'],
+            },
+        ),
+    ]
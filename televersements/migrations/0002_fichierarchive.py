@@ -0,0 +1,30 @@
+# Generated by Django 5.0.6 on 2026-10-19 20:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('televersements', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FichierArchive',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nom', models.CharField(help_text='Nom du fichier dans le stockage', max_length=255, unique=True)),
+                ('algorithme', models.CharField(blank=True, choices=[('zstd', 'Zstandard'), ('gzip', 'Gzip'), ('', 'Non compressé (gain insuffisant)')], max_length=10)),
+                ('taille_originale', models.BigIntegerField(help_text='Taille décompressée en octets')),
+                ('taille_compressee', models.BigIntegerField(help_text='Taille sur le disque en octets')),
+                ('sha256', models.CharField(help_text="Empreinte SHA-256 du contenu d'origine", max_length=64)),
+                ('date_archivage', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Fichier archivé',
+                'verbose_name_plural': 'Fichiers archivés',
+                'ordering': ['-date_archivage'],
+            },
+        ),
+    ]
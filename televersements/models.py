@@ -0,0 +1,131 @@
+import os
+import uuid
+
+from django.conf import settings
+from django.db import models
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+User = get_user_model()
+
+
+def dossier_sessions():
+    """Dossier où sont écrits les fichiers partiels des sessions en cours"""
+    return os.path.join(settings.MEDIA_ROOT, 'televersements', 'en_cours')
+
+
+class SessionTeleversement(models.Model):
+    """
+    Session de téléversement par morceaux.
+    Le fichier est écrit directement sur le disque, morceau par morceau,
+    et n'est rattaché au modèle cible qu'à la validation finale.
+    """
+    CIBLE_CHOICES = [
+        ('memoire', 'Mémoire final'),
+        ('remise', 'Remise de travail'),
+    ]
+
+    STATUT_CHOICES = [
+        ('en_cours', 'En cours'),
+        ('termine', 'Terminé'),
+        ('expire', 'Expiré'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    # Propriétaire et cible
+    utilisateur = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sessions_televersement')
+    cible = models.CharField(max_length=20, choices=CIBLE_CHOICES)
+    travail = models.ForeignKey(
+        'travaux.Travail',
+        on_delete=models.CASCADE,
+        related_name='sessions_televersement',
+        null=True,
+        blank=True
+    )
+    memoire = models.ForeignKey(
+        'memoires.Memoire',
+        on_delete=models.CASCADE,
+        related_name='sessions_televersement',
+        null=True,
+        blank=True
+    )
+
+    # Fichier attendu
+    nom_fichier = models.CharField(max_length=255, help_text="Nom du fichier d'origine")
+    taille_totale = models.BigIntegerField(help_text="Taille totale annoncée en octets")
+    sha256_attendu = models.CharField(max_length=64, blank=True, help_text="Empreinte SHA-256 annoncée (optionnelle)")
+
+    # Progression
+    octets_recus = models.BigIntegerField(default=0, help_text="Octets reçus et vérifiés")
+    sha256 = models.CharField(max_length=64, blank=True, help_text="Empreinte SHA-256 calculée à la validation")
+    statut = models.CharField(max_length=20, choices=STATUT_CHOICES, default='en_cours')
+
+    # Dates
+    date_creation = models.DateTimeField(auto_now_add=True)
+    date_modification = models.DateTimeField(auto_now=True)
+    date_expiration = models.DateTimeField(help_text="Date après laquelle la session est abandonnée")
+
+    class Meta:
+        verbose_name = "Session de téléversement"
+        verbose_name_plural = "Sessions de téléversement"
+        ordering = ['-date_creation']
+
+    def __str__(self):
+        return f"{self.utilisateur.matricule} - {self.nom_fichier} ({self.octets_recus}/{self.taille_totale})"
+
+    @property
+    def chemin_partiel(self):
+        """Chemin du fichier partiel sur le disque"""
+        return os.path.join(dossier_sessions(), f"{self.id}.part")
+
+    @property
+    def pourcentage(self):
+        if self.taille_totale > 0:
+            return round(self.octets_recus * 100 / self.taille_totale, 1)
+        return 100
+
+    def is_complet(self):
+        return self.octets_recus == self.taille_totale
+
+    def is_expiree(self):
+        return timezone.now() > self.date_expiration
+
+    def supprimer_fichier_partiel(self):
+        try:
+            os.remove(self.chemin_partiel)
+        except FileNotFoundError:
+            pass
+
+
+class FichierArchive(models.Model):
+    """
+    Fichier de média archivé sous forme compressée (voir televersements/stockage.py).
+    Le fichier est stocké sous son nom suivi de l'extension de l'algorithme ;
+    le nom référencé par les modèles ne change pas.
+    """
+    ALGORITHME_CHOICES = [
+        ('zstd', 'Zstandard'),
+        ('gzip', 'Gzip'),
+        ('', 'Non compressé (gain insuffisant)'),
+    ]
+
+    nom = models.CharField(max_length=255, unique=True, help_text="Nom du fichier dans le stockage")
+    algorithme = models.CharField(max_length=10, choices=ALGORITHME_CHOICES, blank=True)
+    taille_originale = models.BigIntegerField(help_text="Taille décompressée en octets")
+    taille_compressee = models.BigIntegerField(help_text="Taille sur le disque en octets")
+    sha256 = models.CharField(max_length=64, help_text="Empreinte SHA-256 du contenu d'origine")
+    date_archivage = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Fichier archivé"
+        verbose_name_plural = "Fichiers archivés"
+        ordering = ['-date_archivage']
+
+    def __str__(self):
+        return f"{self.nom} ({self.algorithme or 'non compressé'})"
+
+    @property
+    def gain(self):
+        """Octets économisés sur le disque"""
+        return self.taille_originale - self.taille_compressee if self.algorithme else 0
@@ -0,0 +1,144 @@
+"""
+Fichiers orphelins de MEDIA_ROOT : fichiers présents sur le disque mais
+référencés par aucun enregistrement (fichier remplacé lors d'une nouvelle
+remise ou d'un nouveau dépôt, objet supprimé, versions de photo périmées).
+
+Les noms référencés sont chargés une fois dans un ensemble ; l'arborescence
+est ensuite parcourue dossier par dossier avec os.scandir, sans jamais lister
+tout l'arbre en mémoire, et chaque fichier est comparé à l'ensemble.
+"""
+import os
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.db import models
+
+from .stockage import nom_original
+
+# Dossiers (relatifs à MEDIA_ROOT) jamais parcourus : fichiers partiels des
+# téléversements en cours, nettoyés par la commande nettoyer_televersements
+DOSSIERS_EXCLUS = ('televersements/en_cours',)
+
+DOSSIER_QUARANTAINE = 'quarantaine'
+
+
+def _versions_photos():
+    """Versions redimensionnées des photos de profil (hors FileField)"""
+    from users.models import StudentProfile
+
+    for versions in StudentProfile.objects.exclude(photo_versions={}).values_list('photo_versions', flat=True).iterator():
+        for formats in (versions or {}).get('tailles', {}).values():
+            yield from formats.values()
+
+
+def _apercus():
+    """Vignettes, pages et manifestes des aperçus de documents (partagés par empreinte)"""
+    from .apercus import noms_fichiers
+
+    for label in ('cours.SupportCours', 'memoires.Memoire'):
+        modele = apps.get_model(label)
+        for apercu in modele.objects.exclude(apercu={}).values_list('apercu', flat=True).iterator():
+            yield from noms_fichiers(apercu)
+
+
+# Fichiers référencés ailleurs que dans un FileField
+REFERENCES_SUPPLEMENTAIRES = [_versions_photos, _apercus]
+
+
+def fichiers_references():
+    """Ensemble des noms (relatifs à MEDIA_ROOT) référencés en base"""
+    references = set()
+    for modele in apps.get_models():
+        for champ in modele._meta.concrete_fields:
+            if not isinstance(champ, models.FileField):
+                continue
+            noms = modele._base_manager.exclude(**{champ.attname: ''}).exclude(**{f"{champ.attname}__isnull": True})
+            references.update(noms.values_list(champ.attname, flat=True).iterator())
+    for source in REFERENCES_SUPPLEMENTAIRES:
+        references.update(source())
+    return {os.path.normpath(nom).replace(os.sep, '/') for nom in references if nom}
+
+
+def parcourir(racine, exclus=()):
+    """
+    Parcourt `racine` dossier par dossier et produit (nom relatif, os.DirEntry)
+    pour chaque fichier. Seuls les chemins des dossiers restant à visiter sont
+    conservés ; les entrées d'un dossier sont lues au fil de l'eau.
+    """
+    exclus = {os.path.normpath(os.path.join(racine, dossier)) for dossier in exclus}
+    a_visiter = [racine]
+    while a_visiter:
+        dossier = a_visiter.pop()
+        try:
+            entrees = os.scandir(dossier)
+        except FileNotFoundError:
+            continue
+        with entrees:
+            for entree in entrees:
+                if entree.is_dir(follow_symlinks=False):
+                    if os.path.normpath(entree.path) not in exclus:
+                        a_visiter.append(entree.path)
+                elif entree.is_file(follow_symlinks=False):
+                    yield os.path.relpath(entree.path, racine).replace(os.sep, '/'), entree
+
+
+def orphelins(age_minimum=0, references=None, racine=None, quarantaine=DOSSIER_QUARANTAINE):
+    """
+    Produit (nom relatif, taille) des fichiers non référencés modifiés il y a
+    plus de `age_minimum` secondes (les fichiers plus récents peuvent appartenir
+    à un enregistrement pas encore validé).
+    """
+    racine = str(racine or settings.MEDIA_ROOT)
+    references = fichiers_references() if references is None else references
+    limite = time.time() - age_minimum
+    for nom, entree in parcourir(racine, exclus=(*DOSSIERS_EXCLUS, quarantaine)):
+        if nom in references or nom_original(nom) in references:
+            # Fichier référencé, ou sa version archivée compressée
+            continue
+        infos = entree.stat(follow_symlinks=False)
+        if infos.st_mtime <= limite:
+            yield nom, infos.st_size
+
+
+def _supprimer_dossiers_vides(racine, chemin):
+    """Supprime les dossiers devenus vides entre `chemin` et `racine`"""
+    dossier = os.path.dirname(chemin)
+    while os.path.normpath(dossier) != os.path.normpath(racine):
+        try:
+            os.rmdir(dossier)
+        except OSError:
+            return
+        dossier = os.path.dirname(dossier)
+
+
+def retirer(nom, racine=None, quarantaine=None):
+    """Supprime un fichier orphelin, ou le déplace dans le dossier de quarantaine"""
+    racine = str(racine or settings.MEDIA_ROOT)
+    chemin = os.path.join(racine, nom)
+    try:
+        if quarantaine:
+            destination = os.path.join(racine, quarantaine, nom)
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            os.replace(chemin, destination)
+        else:
+            os.remove(chemin)
+    except FileNotFoundError:
+        return False
+    _supprimer_dossiers_vides(racine, chemin)
+    return True
+
+
+def vider_quarantaine(age_minimum, racine=None, quarantaine=DOSSIER_QUARANTAINE):
+    """Supprime les fichiers placés en quarantaine il y a plus de `age_minimum` secondes"""
+    racine = str(racine or settings.MEDIA_ROOT)
+    dossier = os.path.join(racine, quarantaine)
+    limite = time.time() - age_minimum
+    total = 0
+    for nom, entree in parcourir(dossier):
+        # os.replace conserve la date de modification : on se fie à la date de changement d'état
+        if entree.stat(follow_symlinks=False).st_ctime <= limite:
+            os.remove(entree.path)
+            _supprimer_dossiers_vides(dossier, entree.path)
+            total += 1
+    return total
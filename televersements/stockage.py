@@ -0,0 +1,199 @@
+"""
+Stockage des médias avec archivage compressé.
+
+Un fichier archivé est remplacé sur le disque par sa version compressée
+(`nom.zst` ou `nom.gz`, l'algorithme est choisi fichier par fichier) ; le nom
+enregistré dans les FileField ne change pas. Le stockage retrouve la version
+compressée à l'ouverture et renvoie un flux décompressé au fil de la lecture :
+le code qui lit `remise.fichier_principal` ou `memoire.fichier_memoire` n'a
+pas à savoir si le fichier est archivé. La taille et l'empreinte d'origine
+sont conservées dans FichierArchive.
+"""
+import gzip
+import hashlib
+import io
+import os
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.urls import reverse
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+TAILLE_BLOC = 1024 * 1024
+
+# Extension ajoutée au nom du fichier compressé, par algorithme
+EXTENSIONS = {
+    'zstd': '.zst',
+    'gzip': '.gz',
+}
+
+# Au-delà de ce ratio (taille compressée / taille d'origine), le fichier est
+# laissé tel quel : la plupart des PDF et des images sont déjà compressés
+RATIO_MAXIMAL = 0.9
+
+
+def zstd_disponible():
+    return zstandard is not None
+
+
+def algorithme_par_defaut():
+    algorithme = getattr(settings, 'ARCHIVAGE_ALGORITHME', '')
+    if algorithme:
+        return algorithme
+    return 'zstd' if zstd_disponible() else 'gzip'
+
+
+def nom_original(nom):
+    """Nom référencé d'un fichier compressé (`x.pdf.gz` -> `x.pdf`), None sinon"""
+    for extension in EXTENSIONS.values():
+        if nom.endswith(extension):
+            return nom[:-len(extension)]
+    return None
+
+
+def _lecteur(algorithme, brut):
+    if algorithme == 'zstd':
+        return zstandard.ZstdDecompressor().stream_reader(brut, closefd=True)
+    return gzip.GzipFile(fileobj=brut, mode='rb')
+
+
+def _ecrivain(algorithme, brut):
+    if algorithme == 'zstd':
+        return zstandard.ZstdCompressor(level=10).stream_writer(brut, closefd=False)
+    return gzip.GzipFile(fileobj=brut, mode='wb', compresslevel=6)
+
+
+class FichierDecompresse(File):
+    """Flux décompressé d'un fichier archivé (lecture séquentielle)"""
+
+    def __init__(self, flux, brut, name, taille):
+        super().__init__(flux, name=name)
+        self._brut = brut
+        self.size = taille
+
+    def seekable(self):
+        # Empêche FileResponse de chercher la fin du flux pour en déduire la taille
+        return False
+
+    def close(self):
+        self.file.close()
+        self._brut.close()
+
+
+class StockageArchive(FileSystemStorage):
+    """FileSystemStorage qui lit de façon transparente les fichiers archivés compressés"""
+
+    def _version_compressee(self, name):
+        """(algorithme, chemin) de la version compressée de `name`, (None, None) si absente"""
+        chemin = self.path(name)
+        for algorithme, extension in EXTENSIONS.items():
+            if os.path.exists(chemin + extension):
+                return algorithme, chemin + extension
+        return None, None
+
+    def est_archive(self, name):
+        return not os.path.exists(self.path(name)) and self._version_compressee(name)[0] is not None
+
+    def _open(self, name, mode='rb'):
+        if os.path.exists(self.path(name)) or any(c in mode for c in 'wa+'):
+            return super()._open(name, mode)
+        algorithme, chemin = self._version_compressee(name)
+        if algorithme is None:
+            return super()._open(name, mode)
+
+        brut = open(chemin, 'rb')
+        flux = _lecteur(algorithme, brut)
+        if 'b' not in mode:
+            flux = io.TextIOWrapper(flux)
+        return FichierDecompresse(flux, brut, name, self.size(name))
+
+    def exists(self, name):
+        return super().exists(name) or self._version_compressee(name)[0] is not None
+
+    def size(self, name):
+        if os.path.exists(self.path(name)):
+            return super().size(name)
+        from .models import FichierArchive
+
+        taille = FichierArchive.objects.filter(nom=name).values_list('taille_originale', flat=True).first()
+        if taille is not None:
+            return taille
+        # Pas de métadonnées : on décompresse pour mesurer
+        algorithme, chemin = self._version_compressee(name)
+        if algorithme is None:
+            return super().size(name)
+        taille = 0
+        with _lecteur(algorithme, open(chemin, 'rb')) as flux:
+            for bloc in iter(lambda: flux.read(TAILLE_BLOC), b''):
+                taille += len(bloc)
+        return taille
+
+    def delete(self, name):
+        from .models import FichierArchive
+
+        super().delete(name)
+        chemin = self.path(name)
+        for extension in EXTENSIONS.values():
+            try:
+                os.remove(chemin + extension)
+            except FileNotFoundError:
+                pass
+        FichierArchive.objects.filter(nom=name).delete()
+
+    def url(self, name):
+        if name and self.est_archive(name):
+            # Servi décompressé par une vue : MEDIA_URL ne pointe que sur la version compressée
+            return reverse('televersements:fichier_archive', kwargs={'nom': name})
+        return super().url(name)
+
+    def compresser(self, name, algorithme=None):
+        """
+        Remplace le fichier `name` par sa version compressée et enregistre sa
+        taille et son empreinte d'origine. Retourne la ligne FichierArchive.
+        Si le gain est insuffisant, le fichier est laissé tel quel (algorithme vide).
+        """
+        from .models import FichierArchive
+
+        algorithme = algorithme or algorithme_par_defaut()
+        if algorithme == 'zstd' and not zstd_disponible():
+            raise ValueError("Le paquet zstandard n'est pas installé.")
+
+        chemin = self.path(name)
+        destination = chemin + EXTENSIONS[algorithme]
+        temporaire = destination + '.tmp'
+
+        empreinte = hashlib.sha256()
+        taille = 0
+        with open(chemin, 'rb') as source, open(temporaire, 'wb') as brut:
+            with _ecrivain(algorithme, brut) as sortie:
+                for bloc in iter(lambda: source.read(TAILLE_BLOC), b''):
+                    empreinte.update(bloc)
+                    taille += len(bloc)
+                    sortie.write(bloc)
+        taille_compressee = os.path.getsize(temporaire)
+
+        if taille_compressee > taille * RATIO_MAXIMAL:
+            os.remove(temporaire)
+            algorithme = ''
+            taille_compressee = taille
+        else:
+            os.replace(temporaire, destination)
+
+        archive, _ = FichierArchive.objects.update_or_create(
+            nom=name,
+            defaults={
+                'algorithme': algorithme,
+                'taille_originale': taille,
+                'taille_compressee': taille_compressee,
+                'sha256': empreinte.hexdigest(),
+            },
+        )
+        if algorithme:
+            # L'original n'est retiré qu'une fois la version compressée et ses métadonnées en place
+            os.remove(chemin)
+        return archive
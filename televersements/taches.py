@@ -0,0 +1,42 @@
+"""
+File de traitements en arrière-plan (pool de threads local).
+Les tâches sont soumises après la validation de la transaction en cours,
+de sorte que la réponse HTTP est renvoyée dès que le fichier est enregistré.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+_executeur = None
+
+
+def _get_executeur():
+    global _executeur
+    if _executeur is None:
+        _executeur = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'TACHES_NOMBRE_WORKERS', 4),
+            thread_name_prefix='myuom-taches',
+        )
+    return _executeur
+
+
+def _executer(fonction, args, kwargs):
+    try:
+        fonction(*args, **kwargs)
+    except Exception:
+        logger.exception("Échec de la tâche %s", fonction.__name__)
+    finally:
+        # Chaque thread ouvre sa propre connexion : on la libère après la tâche
+        connection.close()
+
+
+def soumettre_tache(fonction, *args, **kwargs):
+    """Planifie `fonction(*args, **kwargs)` après le commit de la transaction courante"""
+    if getattr(settings, 'TACHES_SYNCHRONES', False):
+        transaction.on_commit(lambda: fonction(*args, **kwargs))
+        return
+    transaction.on_commit(lambda: _get_executeur().submit(_executer, fonction, args, kwargs))
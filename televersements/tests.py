@@ -0,0 +1,445 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from datetime import date, timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from cours.models import Cours, SupportCours
+from cours.taches import analyser_support, generer_apercu_support
+from memoires.taches import analyser_memoire
+from memoires.models import Memoire
+from travaux.models import RemiseTravail, Travail
+
+from .apercus import fichier_local, generer_apercu, pages_apercu, url_vignette
+from .models import SessionTeleversement
+from .orphelins import DOSSIER_QUARANTAINE, orphelins, parcourir
+from .stockage import EXTENSIONS, zstd_disponible
+from .utils import recevoir_morceau
+
+User = get_user_model()
+
+
+class MediaTemporaireMixin:
+    """MEDIA_ROOT dans un dossier temporaire supprimé après chaque test"""
+
+    def setUp(self):
+        super().setUp()
+        self.media = tempfile.mkdtemp()
+        reglages = override_settings(MEDIA_ROOT=self.media, TACHES_SYNCHRONES=True)
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+
+
+def creer_travail():
+    enseignant = User.objects.create_user('enseignant', password='x', matricule='UOM2025-100', user_type='enseignant')
+    cours = Cours.objects.create(
+        titre='Algorithmique', code='INFO101', niveau='L1', filiere='Informatique',
+        enseignant=enseignant, date_debut=date.today(), date_fin=date.today() + timedelta(days=90),
+    )
+    return Travail.objects.create(
+        titre='TP 1', description='TP', consignes='Rendre un fichier', niveau='L1', filiere='Informatique',
+        enseignant=enseignant, cours=cours, statut='publie',
+        date_limite_remise=timezone.now() + timedelta(days=7),
+    )
+
+
+class TeleversementParMorceauxTests(MediaTemporaireMixin, TestCase):
+    """Protocole de téléversement par morceaux : reprise et vérification des empreintes"""
+
+    contenu = b'0123456789' * 3
+
+    def setUp(self):
+        super().setUp()
+        self.travail = creer_travail()
+        self.etudiant = User.objects.create_user('etudiant', password='x', matricule='UOM2025-001')
+        self.client.force_login(self.etudiant)
+
+    def _ouvrir_session(self, sha256=''):
+        reponse = self.client.post(reverse('televersements:session_creer'), {
+            'cible': 'remise',
+            'travail_id': self.travail.id,
+            'nom_fichier': 'tp1.txt',
+            'taille_totale': len(self.contenu),
+            'sha256': sha256,
+        })
+        self.assertEqual(reponse.status_code, 201)
+        return reponse.json()
+
+    def _envoyer(self, session, debut, fin, sha256=None):
+        morceau = self.contenu[debut:fin]
+        return self.client.put(
+            session['url_morceau'], data=morceau, content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f"bytes {debut}-{fin - 1}/{len(self.contenu)}",
+            HTTP_X_CHUNK_SHA256=hashlib.sha256(morceau).hexdigest() if sha256 is None else sha256,
+        )
+
+    def test_reprise_apres_coupure(self):
+        session = self._ouvrir_session(hashlib.sha256(self.contenu).hexdigest())
+        self.assertEqual(self._envoyer(session, 0, 10).json()['octets_recus'], 10)
+
+        # Le client a perdu la réponse du second morceau et renvoie le troisième
+        reponse = self._envoyer(session, 20, 30)
+        self.assertEqual(reponse.status_code, 409)
+        self.assertEqual(reponse.json()['octets_recus'], 10)
+
+        # Reprise : la même session est retrouvée avec la position à reprendre
+        reprise = self._ouvrir_session(hashlib.sha256(self.contenu).hexdigest())
+        self.assertEqual(reprise['id'], session['id'])
+        self.assertEqual(self.client.get(reprise['url_etat']).json()['octets_recus'], 10)
+
+        # Un morceau renvoyé deux fois n'est écrit qu'une fois
+        self.assertEqual(self._envoyer(session, 10, 20).status_code, 200)
+        self.assertEqual(self._envoyer(session, 10, 20).status_code, 409)
+        self.assertEqual(self._envoyer(session, 20, 30).json()['octets_recus'], 30)
+
+        reponse = self.client.post(session['url_validation'])
+        self.assertEqual(reponse.status_code, 200, reponse.content)
+        remise = RemiseTravail.objects.get(etudiant=self.etudiant, travail=self.travail)
+        with remise.fichier_principal.open('rb') as fichier:
+            self.assertEqual(fichier.read(), self.contenu)
+        self.assertEqual(SessionTeleversement.objects.get(pk=session['id']).statut, 'termine')
+
+    def test_morceau_avec_empreinte_invalide_rejete(self):
+        session = self._ouvrir_session()
+        self._envoyer(session, 0, 10)
+
+        reponse = self._envoyer(session, 10, 20, sha256='0' * 64)
+        self.assertEqual(reponse.status_code, 400)
+        self.assertEqual(reponse.json()['octets_recus'], 10)
+        objet = SessionTeleversement.objects.get(pk=session['id'])
+        self.assertEqual(objet.octets_recus, 10)
+        # Le fichier partiel reste à la dernière position valide, sans morceau temporaire
+        self.assertEqual(os.path.getsize(objet.chemin_partiel), 10)
+        self.assertEqual(os.listdir(os.path.dirname(objet.chemin_partiel)), [os.path.basename(objet.chemin_partiel)])
+
+    def test_morceau_lu_hors_transaction(self):
+        session = self._ouvrir_session()
+        profondeurs = []
+
+        def recevoir(*args, **kwargs):
+            profondeurs.append(len(connection.atomic_blocks))
+            return recevoir_morceau(*args, **kwargs)
+
+        profondeur_test = len(connection.atomic_blocks)
+        with mock.patch('televersements.views.recevoir_morceau', side_effect=recevoir):
+            self.assertEqual(self._envoyer(session, 0, 10).status_code, 200)
+        # Aucune transaction (ni verrou) ouverte par la vue pendant la lecture du corps
+        self.assertEqual(profondeurs, [profondeur_test])
+
+    def test_morceau_concurrent_deja_ecrit(self):
+        session = self._ouvrir_session()
+
+        def recevoir(objet, *args, **kwargs):
+            chemin = recevoir_morceau(objet, *args, **kwargs)
+            # Un autre envoi du même morceau aboutit pendant la lecture
+            SessionTeleversement.objects.filter(pk=objet.pk).update(octets_recus=10)
+            return chemin
+
+        with mock.patch('televersements.views.recevoir_morceau', side_effect=recevoir):
+            reponse = self._envoyer(session, 0, 10)
+        self.assertEqual(reponse.status_code, 409)
+        self.assertEqual(reponse.json()['octets_recus'], 10)
+        objet = SessionTeleversement.objects.get(pk=session['id'])
+        self.assertFalse(os.path.exists(objet.chemin_partiel))
+        self.assertEqual(os.listdir(os.path.dirname(objet.chemin_partiel)), [])
+
+    def test_empreinte_finale_invalide(self):
+        session = self._ouvrir_session(sha256='f' * 64)
+        for debut in (0, 10, 20):
+            self._envoyer(session, debut, debut + 10)
+
+        reponse = self.client.post(session['url_validation'])
+        self.assertEqual(reponse.status_code, 400)
+        objet = SessionTeleversement.objects.get(pk=session['id'])
+        self.assertEqual(objet.statut, 'expire')
+        self.assertFalse(os.path.exists(objet.chemin_partiel))
+        self.assertFalse(RemiseTravail.objects.filter(etudiant=self.etudiant).exists())
+
+    def test_validation_d_un_fichier_incomplet(self):
+        session = self._ouvrir_session()
+        self._envoyer(session, 0, 10)
+
+        reponse = self.client.post(session['url_validation'])
+        self.assertEqual(reponse.status_code, 409)
+        self.assertEqual(reponse.json()['octets_recus'], 10)
+
+
+class NettoyageMediasTests(MediaTemporaireMixin, TestCase):
+    """Commande nettoyer_medias : seuls les fichiers non référencés sont retirés"""
+
+    contenu = b'Rapport de TP\n' * 200
+
+    def setUp(self):
+        super().setUp()
+        travail = creer_travail()
+        self.remises = []
+        for numero in (1, 2):
+            etudiant = User.objects.create_user(f'etudiant{numero}', password='x', matricule=f'UOM2025-00{numero}')
+            remise = RemiseTravail(etudiant=etudiant, travail=travail)
+            remise.fichier_principal.save('tp.txt', ContentFile(self.contenu), save=False)
+            remise.save()
+            self.remises.append(remise.fichier_principal.name)
+        # Seconde remise archivée : seul `tp.txt.gz` reste sur le disque
+        self.assertEqual(default_storage.compresser(self.remises[1], 'gzip').algorithme, 'gzip')
+        self.orphelin = default_storage.save('remises/ancien.txt', ContentFile(b'remplace'))
+
+        anciennete = time.time() - 30 * 24 * 3600
+        for nom in (self.remises[0], self.remises[1] + '.gz', self.orphelin):
+            os.utime(default_storage.path(nom), (anciennete, anciennete))
+
+    def _nettoyer(self, *arguments):
+        sortie = StringIO()
+        call_command('nettoyer_medias', *arguments, stdout=sortie)
+        return sortie.getvalue()
+
+    def _presents(self):
+        return sorted(nom for nom, _ in parcourir(self.media))
+
+    def _references_intactes(self):
+        self.assertTrue(os.path.exists(default_storage.path(self.remises[0])))
+        self.assertTrue(os.path.exists(default_storage.path(self.remises[1]) + '.gz'))
+        with default_storage.open(self.remises[1]) as fichier:
+            self.assertEqual(fichier.read(), self.contenu)
+
+    def test_simulation_ne_deplace_rien(self):
+        avant = self._presents()
+
+        sortie = self._nettoyer('--simulation')
+
+        self.assertIn(self.orphelin, sortie)
+        self.assertNotIn(self.remises[0], sortie)
+        self.assertIn('1 fichier(s) orphelin(s) trouvé(s)', sortie)
+        self.assertEqual(self._presents(), avant)
+
+    def test_quarantaine_par_defaut(self):
+        self._nettoyer()
+
+        self.assertFalse(os.path.exists(default_storage.path(self.orphelin)))
+        self.assertTrue(os.path.exists(os.path.join(self.media, DOSSIER_QUARANTAINE, self.orphelin)))
+        self._references_intactes()
+
+    def test_suppression_definitive_exige_confirmation(self):
+        for arguments in (['--supprimer'], ['--vider-quarantaine', '0']):
+            with self.subTest(arguments=arguments), self.assertRaises(CommandError):
+                self._nettoyer(*arguments)
+        self.assertTrue(os.path.exists(default_storage.path(self.orphelin)))
+
+        self._nettoyer('--supprimer', '--confirmer')
+
+        self.assertFalse(os.path.exists(default_storage.path(self.orphelin)))
+        self.assertFalse(os.path.exists(os.path.join(self.media, DOSSIER_QUARANTAINE)))
+        self._references_intactes()
+
+
+class FichierArchiveTests(MediaTemporaireMixin, TestCase):
+    """Fichiers archivés compressés : relecture à l'identique, réservée aux ayants droit"""
+
+    contenu = ''.join(f"Ligne {i} du rapport de TP\n" for i in range(500)).encode('utf-8')
+
+    def setUp(self):
+        super().setUp()
+        self.travail = creer_travail()
+        self.etudiant = User.objects.create_user('etudiant', password='x', matricule='UOM2025-001')
+        remise = RemiseTravail(etudiant=self.etudiant, travail=self.travail)
+        remise.fichier_principal.save('rapport.txt', ContentFile(self.contenu), save=False)
+        remise.save()
+        self.nom = remise.fichier_principal.name
+
+    def _telecharger(self, utilisateur, nom=None):
+        self.client.force_login(utilisateur)
+        return self.client.get(reverse('televersements:fichier_archive', kwargs={'nom': nom or self.nom}))
+
+    def test_relecture_d_un_fichier_compresse(self):
+        algorithmes = ['gzip', 'zstd'] if zstd_disponible() else ['gzip']
+        for algorithme in algorithmes:
+            with self.subTest(algorithme=algorithme):
+                archive = default_storage.compresser(self.nom, algorithme)
+                self.assertEqual(archive.algorithme, algorithme)
+                self.assertFalse(os.path.exists(default_storage.path(self.nom)))
+                self.assertTrue(os.path.exists(default_storage.path(self.nom) + EXTENSIONS[algorithme]))
+                self.assertLess(archive.taille_compressee, len(self.contenu))
+                self.assertEqual(archive.sha256, hashlib.sha256(self.contenu).hexdigest())
+                self.assertEqual(default_storage.size(self.nom), len(self.contenu))
+                with default_storage.open(self.nom, 'rb') as fichier:
+                    self.assertEqual(fichier.read(), self.contenu)
+
+                reponse = self._telecharger(self.etudiant)
+                self.assertEqual(reponse.status_code, 200)
+                self.assertEqual(b''.join(reponse.streaming_content), self.contenu)
+                self.assertEqual(int(reponse['Content-Length']), len(self.contenu))
+
+                # Retour au fichier d'origine pour l'algorithme suivant
+                with default_storage.open(self.nom, 'rb') as fichier:
+                    donnees = fichier.read()
+                default_storage.delete(self.nom)
+                default_storage.save(self.nom, ContentFile(donnees))
+
+    def test_acces_reserve_aux_ayants_droit(self):
+        default_storage.compresser(self.nom, 'gzip')
+        admin = User.objects.create_user('admin', password='x', matricule='UOM2025-900', user_type='admin')
+        autre_etudiant = User.objects.create_user('autre', password='x', matricule='UOM2025-002')
+        autre_enseignant = User.objects.create_user(
+            'collegue', password='x', matricule='UOM2025-101', user_type='enseignant'
+        )
+
+        for utilisateur, statut in (
+            (self.etudiant, 200), (self.travail.enseignant, 200), (admin, 200),
+            (autre_etudiant, 404), (autre_enseignant, 404),
+        ):
+            with self.subTest(utilisateur=utilisateur.username):
+                self.assertEqual(self._telecharger(utilisateur).status_code, statut)
+
+    def test_acces_a_un_memoire_archive(self):
+        directeur = User.objects.create_user('directeur', password='x', matricule='UOM2025-102', user_type='enseignant')
+        memoire = Memoire(
+            etudiant=self.etudiant, titre='Mémoire', description='Sujet', objectifs='Objectifs',
+            domaine='informatique', directeur=directeur,
+        )
+        memoire.fichier_memoire.save('memoire.txt', ContentFile(self.contenu), save=False)
+        memoire.save()
+        nom = memoire.fichier_memoire.name
+        default_storage.compresser(nom, 'gzip')
+
+        self.assertEqual(self._telecharger(directeur, nom).status_code, 200)
+        self.assertEqual(self._telecharger(self.etudiant, nom).status_code, 200)
+        # L'enseignant du travail n'a aucun droit sur le mémoire
+        self.assertEqual(self._telecharger(self.travail.enseignant, nom).status_code, 404)
+
+
+def pdf_texte(texte):
+    """PDF d'une page contenant `texte` (assemblé à la main, sans dépendance)"""
+    flux = f"BT /F1 12 Tf 72 720 Td ({texte}) Tj ET".encode('latin-1')
+    objets = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(flux), flux),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    contenu = b"%PDF-1.4\n"
+    positions = []
+    for numero, objet in enumerate(objets, start=1):
+        positions.append(len(contenu))
+        contenu += b"%d 0 obj\n%s\nendobj\n" % (numero, objet)
+    xref = len(contenu)
+    contenu += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objets) + 1)
+    contenu += b"".join(b"%010d 00000 n \n" % position for position in positions)
+    contenu += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objets) + 1, xref)
+    return contenu
+
+
+class ApercusTests(MediaTemporaireMixin, TestCase):
+    """Aperçus des supports et mémoires : partagés par empreinte, jamais périmés, hors du nettoyage"""
+
+    def setUp(self):
+        super().setUp()
+        self.travail = creer_travail()
+        tampon = BytesIO()
+        Image.new('RGB', (1200, 1600), 'white').save(tampon, format='PNG')
+        self.image = tampon.getvalue()
+
+    def _support(self, nom, contenu, cours=None):
+        support = SupportCours(titre=nom, cours=cours or self.travail.cours, enseignant=self.travail.enseignant)
+        support.fichier.save(nom, ContentFile(contenu), save=False)
+        support.save()
+        analyser_support(support.pk)
+        support.refresh_from_db()
+        return support
+
+    def test_manifeste_reutilise_pour_le_meme_contenu(self):
+        premier = self._support('schema.png', self.image)
+        self.assertTrue(premier.apercu['vignette'].startswith(f"apercus/{premier.empreinte_sha256[:2]}/"))
+        for nom, largeur in ((premier.apercu['vignette'], 240), (premier.apercu['pages'][0], 900)):
+            with default_storage.open(nom) as fichier, Image.open(fichier) as image:
+                self.assertEqual(image.width, largeur)
+
+        # Même contenu republié dans un autre cours : relu depuis le manifeste, sans nouveau rendu
+        autre_cours = Cours.objects.create(
+            titre='Réseaux', code='INFO102', niveau='L1', filiere='Informatique', enseignant=self.travail.enseignant,
+            date_debut=date.today(), date_fin=date.today() + timedelta(days=90),
+        )
+        with mock.patch('televersements.apercus._construire') as construire:
+            second = self._support('copie.png', self.image, cours=autre_cours)
+        construire.assert_not_called()
+        self.assertEqual(second.apercu, premier.apercu)
+        self.assertEqual(second.apercu_vignette, default_storage.url(premier.apercu['vignette']))
+
+    def test_apercu_d_un_contenu_remplace_ignore(self):
+        support = self._support('schema.png', self.image)
+        self.assertEqual(len(support.apercu_pages), 1)
+
+        # Le fichier a changé : l'ancien aperçu n'est plus affiché
+        support.empreinte_sha256 = 'f' * 64
+        self.assertEqual((support.apercu_vignette, support.apercu_pages), ('', []))
+        self.assertEqual(url_vignette({}, 'f' * 64), '')
+
+        # Fichier remplacé pendant le rendu : l'aperçu calculé n'est pas enregistré
+        SupportCours.objects.filter(pk=support.pk).update(apercu={})
+
+        def remplacer(champ, sha256):
+            SupportCours.objects.filter(pk=support.pk).update(empreinte_sha256='e' * 64)
+            return generer_apercu(champ, sha256)
+
+        with mock.patch('televersements.apercus.generer_apercu', side_effect=remplacer):
+            generer_apercu_support(support.pk)
+        self.assertEqual(SupportCours.objects.get(pk=support.pk).apercu, {})
+
+    def test_texte_pdf_sans_pypdfium2(self):
+        directeur = User.objects.create_user('directeur', password='x', matricule='UOM2025-102', user_type='enseignant')
+        etudiant = User.objects.create_user('etudiant', password='x', matricule='UOM2025-001')
+        memoire = Memoire(
+            etudiant=etudiant, titre='Mémoire', description='Sujet', objectifs='Objectifs',
+            domaine='informatique', directeur=directeur,
+        )
+        memoire.fichier_memoire.save('memoire.pdf', ContentFile(pdf_texte('Introduction du memoire')), save=False)
+        memoire.save()
+
+        with mock.patch('televersements.apercus.rendu_pdf_disponible', return_value=False):
+            analyser_memoire(memoire.pk)
+
+        memoire.refresh_from_db()
+        self.assertEqual(memoire.apercu['nombre_pages'], 1)
+        self.assertEqual(memoire.apercu['textes'], ['Introduction du memoire'])
+        self.assertEqual((memoire.apercu['vignette'], memoire.apercu['pages']), ('', []))
+        self.assertEqual(
+            pages_apercu(memoire.apercu, memoire.empreinte_sha256),
+            [{'numero': 1, 'image': '', 'texte': 'Introduction du memoire'}],
+        )
+
+    def test_fichier_local_d_un_fichier_archive(self):
+        support = self._support('notes.txt', b'Chapitre 1\n' * 300)
+        default_storage.compresser(support.fichier.name, 'gzip')
+        self.assertFalse(os.path.exists(default_storage.path(support.fichier.name)))
+
+        with fichier_local(support.fichier) as chemin:
+            self.assertNotEqual(chemin, default_storage.path(support.fichier.name))
+            self.assertTrue(chemin.endswith('.txt'))
+            with open(chemin, 'rb') as fichier:
+                self.assertEqual(fichier.read(), b'Chapitre 1\n' * 300)
+        # La copie décompressée est supprimée à la sortie
+        self.assertFalse(os.path.exists(chemin))
+
+    def test_apercus_exclus_du_nettoyage(self):
+        support = self._support('schema.png', self.image)
+        perime = default_storage.save('apercus/00/' + '0' * 64 + '/vignette.webp', ContentFile(b'ancien'))
+
+        noms = {nom for nom, _ in orphelins()}
+
+        self.assertEqual({nom for nom in noms if nom.startswith('apercus/')}, {perime})
+        for nom in (support.apercu['vignette'], *support.apercu['pages']):
+            self.assertIn(nom, {nom for nom, _ in parcourir(self.media)})
@@ -0,0 +1,15 @@
+from django.urls import path
+from . import views
+
+app_name = 'televersements'
+
+urlpatterns = [
+    # Protocole de téléversement par morceaux (étudiants)
+    path('sessions/', views.session_creer, name='session_creer'),
+    path('sessions/<uuid:session_id>/', views.session_etat, name='session_etat'),
+    path('sessions/<uuid:session_id>/morceau/', views.session_morceau, name='session_morceau'),
+    path('sessions/<uuid:session_id>/valider/', views.session_valider, name='session_valider'),
+
+    # Fichiers archivés (compressés), servis décompressés
+    path('archives/<path:nom>', views.fichier_archive, name='fichier_archive'),
+]
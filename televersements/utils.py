@@ -0,0 +1,112 @@
+"""
+Utilitaires pour l'écriture des morceaux et le rattachement des fichiers téléversés
+"""
+import hashlib
+import os
+import uuid
+
+# Taille des blocs lus/écrits sur le disque
+TAILLE_BLOC = 1024 * 1024
+
+
+class ErreurTeleversement(Exception):
+    """Erreur de protocole : décalage, taille ou empreinte incorrecte"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def recevoir_morceau(session, flux, decalage, longueur, sha256_morceau=''):
+    """
+    Lit le morceau depuis le flux, par blocs, dans un fichier temporaire
+    voisin du fichier partiel et en vérifie la longueur et l'empreinte.
+    Cette lecture dépend du débit du client : elle se fait hors de toute
+    transaction. Retourne le chemin du fichier temporaire, à supprimer par
+    l'appelant.
+    """
+    if decalage != session.octets_recus:
+        raise ErreurTeleversement(
+            f"Décalage attendu {session.octets_recus}, reçu {decalage}.", status=409
+        )
+    if longueur <= 0 or decalage + longueur > session.taille_totale:
+        raise ErreurTeleversement("Taille du morceau invalide.")
+
+    os.makedirs(os.path.dirname(session.chemin_partiel), exist_ok=True)
+    chemin_morceau = f"{session.chemin_partiel}.{uuid.uuid4().hex}.morceau"
+    empreinte = hashlib.sha256()
+    lus = 0
+
+    try:
+        with open(chemin_morceau, 'wb') as fichier:
+            while lus < longueur:
+                bloc = flux.read(min(TAILLE_BLOC, longueur - lus))
+                if not bloc:
+                    break
+                fichier.write(bloc)
+                empreinte.update(bloc)
+                lus += len(bloc)
+
+        if lus != longueur:
+            raise ErreurTeleversement("Morceau incomplet, veuillez le renvoyer.")
+        if sha256_morceau and empreinte.hexdigest() != sha256_morceau.lower():
+            raise ErreurTeleversement("Empreinte du morceau invalide, veuillez le renvoyer.")
+    except BaseException:
+        os.remove(chemin_morceau)
+        raise
+
+    return chemin_morceau
+
+
+def ecrire_morceau(session, chemin_morceau, decalage):
+    """
+    Recopie un morceau déjà reçu (voir `recevoir_morceau`) à la position
+    `decalage` du fichier partiel. L'appelant tient le verrou de la session :
+    le décalage est revérifié ici, un autre envoi du même morceau ayant pu
+    aboutir pendant la lecture.
+    """
+    if decalage != session.octets_recus:
+        raise ErreurTeleversement(
+            f"Décalage attendu {session.octets_recus}, reçu {decalage}.", status=409
+        )
+
+    mode = 'r+b' if os.path.exists(session.chemin_partiel) else 'wb'
+    ecrits = 0
+    with open(session.chemin_partiel, mode) as fichier, open(chemin_morceau, 'rb') as morceau:
+        fichier.seek(decalage)
+        fichier.truncate()
+        for bloc in iter(lambda: morceau.read(TAILLE_BLOC), b''):
+            fichier.write(bloc)
+            ecrits += len(bloc)
+        fichier.flush()
+        os.fsync(fichier.fileno())
+
+    return decalage + ecrits
+
+
+def calculer_sha256(chemin):
+    """Calcule l'empreinte SHA-256 d'un fichier en le lisant par blocs"""
+    empreinte = hashlib.sha256()
+    with open(chemin, 'rb') as fichier:
+        for bloc in iter(lambda: fichier.read(TAILLE_BLOC), b''):
+            empreinte.update(bloc)
+    return empreinte.hexdigest()
+
+
+def attacher_fichier(instance, nom_champ, chemin_source, nom_fichier):
+    """
+    Déplace un fichier déjà présent sur le disque vers l'emplacement
+    `upload_to` du champ, sans le recopier, puis l'affecte à l'instance.
+    """
+    champ = instance._meta.get_field(nom_champ)
+    stockage = champ.storage
+    nom = champ.generate_filename(instance, nom_fichier)
+    nom = stockage.get_available_name(nom, max_length=champ.max_length)
+
+    destination = stockage.path(nom)
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    os.replace(chemin_source, destination)
+
+    setattr(instance, nom_champ, nom)
+    return nom
@@ -0,0 +1,289 @@
+import os
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.http import FileResponse, Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import timezone
+from django.views.decorators.http import require_http_methods
+
+from .models import SessionTeleversement
+from .utils import ErreurTeleversement, recevoir_morceau, ecrire_morceau, calculer_sha256, attacher_fichier
+
+TAILLE_MORCEAU = getattr(settings, 'TELEVERSEMENT_TAILLE_MORCEAU', 5 * 1024 * 1024)
+TAILLE_MAX = getattr(settings, 'TELEVERSEMENT_TAILLE_MAX', 500 * 1024 * 1024)
+DUREE_SESSION = getattr(settings, 'TELEVERSEMENT_DUREE_SESSION', timedelta(hours=24))
+
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+def _etat_session(session):
+    """Représentation JSON d'une session"""
+    return {
+        'success': True,
+        'id': str(session.id),
+        'statut': session.statut,
+        'nom_fichier': session.nom_fichier,
+        'taille_totale': session.taille_totale,
+        'octets_recus': session.octets_recus,
+        'pourcentage': session.pourcentage,
+        'taille_morceau': TAILLE_MORCEAU,
+        'url_etat': reverse('televersements:session_etat', args=[session.id]),
+        'url_morceau': reverse('televersements:session_morceau', args=[session.id]),
+        'url_validation': reverse('televersements:session_valider', args=[session.id]),
+    }
+
+
+def _verifier_cible(request, cible, travail_id=None):
+    """
+    Vérifie que l'étudiant peut téléverser vers la cible demandée.
+    Retourne (travail, memoire) ou lève ErreurTeleversement.
+    """
+    if cible == 'memoire':
+        from memoires.models import Memoire
+        memoire = Memoire.objects.filter(etudiant=request.user).first()
+        if not memoire or not memoire.peut_deposer_final():
+            raise ErreurTeleversement(
+                "Vous ne pouvez pas déposer votre mémoire final tant que votre sujet n'est pas validé.", status=403
+            )
+        return None, memoire
+
+    if cible == 'remise':
+        from travaux.models import Travail
+        travail = Travail.objects.filter(id=travail_id, is_visible_etudiants=True).first()
+        if not travail:
+            raise ErreurTeleversement("Travail introuvable.", status=404)
+        if not travail.is_remise_ouverte():
+            raise ErreurTeleversement("La date limite de remise est dépassée.", status=403)
+        return travail, None
+
+    raise ErreurTeleversement("Cible de téléversement inconnue.")
+
+
+@login_required
+@require_http_methods(['POST'])
+def session_creer(request):
+    """Ouvrir une session de téléversement par morceaux"""
+    if not request.user.is_student_user():
+        return JsonResponse({'success': False, 'message': 'Accès non autorisé'}, status=403)
+
+    cible = request.POST.get('cible', '')
+    nom_fichier = os.path.basename(request.POST.get('nom_fichier', '').strip())
+    sha256_attendu = request.POST.get('sha256', '').strip().lower()
+
+    try:
+        taille_totale = int(request.POST.get('taille_totale', ''))
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'Taille de fichier invalide.'}, status=400)
+
+    if not nom_fichier:
+        return JsonResponse({'success': False, 'message': 'Nom de fichier manquant.'}, status=400)
+    if taille_totale <= 0 or taille_totale > TAILLE_MAX:
+        return JsonResponse({'success': False, 'message': 'Taille de fichier non autorisée.'}, status=400)
+    if cible == 'memoire' and not nom_fichier.lower().endswith('.pdf'):
+        return JsonResponse({'success': False, 'message': 'Le fichier doit être au format PDF.'}, status=400)
+
+    try:
+        travail, memoire = _verifier_cible(request, cible, request.POST.get('travail_id'))
+    except ErreurTeleversement as e:
+        return JsonResponse({'success': False, 'message': e.message}, status=e.status)
+
+    # Reprendre une session identique encore ouverte plutôt que d'en créer une nouvelle
+    session = SessionTeleversement.objects.filter(
+        utilisateur=request.user,
+        cible=cible,
+        travail=travail,
+        memoire=memoire,
+        nom_fichier=nom_fichier,
+        taille_totale=taille_totale,
+        statut='en_cours',
+        date_expiration__gt=timezone.now(),
+    ).first()
+
+    if session is None:
+        session = SessionTeleversement.objects.create(
+            utilisateur=request.user,
+            cible=cible,
+            travail=travail,
+            memoire=memoire,
+            nom_fichier=nom_fichier,
+            taille_totale=taille_totale,
+            sha256_attendu=sha256_attendu,
+            date_expiration=timezone.now() + DUREE_SESSION,
+        )
+
+    return JsonResponse(_etat_session(session), status=201)
+
+
+@login_required
+@require_http_methods(['GET'])
+def session_etat(request, session_id):
+    """État d'une session (utilisé pour reprendre après une coupure)"""
+    session = get_object_or_404(SessionTeleversement, id=session_id, utilisateur=request.user)
+    return JsonResponse(_etat_session(session))
+
+
+@login_required
+@require_http_methods(['PUT'])
+def session_morceau(request, session_id):
+    """
+    Recevoir un morceau. En-têtes attendus :
+    - Content-Range: bytes <debut>-<fin>/<total>
+    - X-Chunk-SHA256 (optionnel) : empreinte du morceau
+    """
+    match = CONTENT_RANGE_RE.match(request.headers.get('Content-Range', ''))
+    if not match:
+        return JsonResponse({'success': False, 'message': 'En-tête Content-Range manquant ou invalide.'}, status=400)
+
+    debut, fin, total = (int(v) for v in match.groups())
+    longueur = fin - debut + 1
+    if longueur > TAILLE_MORCEAU:
+        return JsonResponse({'success': False, 'message': 'Morceau trop volumineux.'}, status=413)
+
+    def refus(session):
+        if session.statut != 'en_cours' or session.is_expiree():
+            return JsonResponse({'success': False, 'message': 'Session terminée ou expirée.'}, status=410)
+        if total != session.taille_totale:
+            return JsonResponse({'success': False, 'message': 'Taille totale incohérente.'}, status=400)
+        return None
+
+    def erreur(session, e):
+        data = _etat_session(session)
+        data.update({'success': False, 'message': e.message})
+        return JsonResponse(data, status=e.status)
+
+    # Validation sans verrou, puis lecture du corps hors transaction :
+    # un client lent ne doit pas garder la ligne de la session verrouillée
+    session = get_object_or_404(SessionTeleversement, id=session_id, utilisateur=request.user)
+    reponse = refus(session)
+    if reponse:
+        return reponse
+    sha256_morceau = request.headers.get('X-Chunk-SHA256', '')
+    try:
+        chemin_morceau = recevoir_morceau(session, request, debut, longueur, sha256_morceau)
+    except ErreurTeleversement as e:
+        return erreur(session, e)
+
+    try:
+        with transaction.atomic():
+            # Verrou court : deux morceaux ne peuvent pas s'écrire en même temps
+            session = SessionTeleversement.objects.select_for_update().get(id=session.id)
+            reponse = refus(session)
+            if reponse:
+                return reponse
+            try:
+                session.octets_recus = ecrire_morceau(session, chemin_morceau, debut)
+            except ErreurTeleversement as e:
+                return erreur(session, e)
+            session.save(update_fields=['octets_recus', 'date_modification'])
+    finally:
+        os.remove(chemin_morceau)
+
+    return JsonResponse(_etat_session(session))
+
+
+@login_required
+@require_http_methods(['POST'])
+def session_valider(request, session_id):
+    """Vérifier le fichier complet et le rattacher au mémoire ou à la remise"""
+    with transaction.atomic():
+        session = get_object_or_404(
+            SessionTeleversement.objects.select_for_update(),
+            id=session_id,
+            utilisateur=request.user,
+        )
+        if session.statut != 'en_cours':
+            return JsonResponse({'success': False, 'message': 'Session déjà terminée.'}, status=410)
+        if not session.is_complet():
+            data = _etat_session(session)
+            data.update({'success': False, 'message': 'Le fichier est incomplet.'})
+            return JsonResponse(data, status=409)
+
+        sha256 = calculer_sha256(session.chemin_partiel)
+        if session.sha256_attendu and sha256 != session.sha256_attendu:
+            session.statut = 'expire'
+            session.save(update_fields=['statut', 'date_modification'])
+            session.supprimer_fichier_partiel()
+            return JsonResponse({'success': False, 'message': 'Empreinte du fichier invalide, veuillez recommencer.'}, status=400)
+
+        try:
+            travail, memoire = _verifier_cible(request, session.cible, session.travail_id)
+        except ErreurTeleversement as e:
+            return JsonResponse({'success': False, 'message': e.message}, status=e.status)
+
+        if session.cible == 'memoire':
+            attacher_fichier(memoire, 'fichier_memoire', session.chemin_partiel, session.nom_fichier)
+            memoire.date_depot_final = timezone.now()
+            memoire.statut = 'termine'
+            memoire.save()
+            memoire.planifier_analyse()
+            messages.success(request, "✅ Votre mémoire a été déposé avec succès. Vous pouvez maintenant lancer la vérification anti-plagiat.")
+            redirection = reverse('memoires:student_memoire_dashboard')
+        else:
+            from travaux.models import RemiseTravail
+            remise = RemiseTravail.objects.filter(etudiant=request.user, travail=travail).first()
+            if remise is None:
+                remise = RemiseTravail(etudiant=request.user, travail=travail, statut='remis')
+            attacher_fichier(remise, 'fichier_principal', session.chemin_partiel, session.nom_fichier)
+            fichier_supplementaire = request.FILES.get('fichier_supplementaire')
+            if fichier_supplementaire:
+                remise.fichiers_supplementaires = fichier_supplementaire
+            remise.commentaire_etudiant = request.POST.get('commentaire_etudiant', remise.commentaire_etudiant)
+            remise.save()
+            remise.planifier_analyse()
+            messages.success(request, "Votre travail a été rendu avec succès.")
+            redirection = reverse('student_cours_detail', args=[travail.cours.id])
+
+        session.sha256 = sha256
+        session.statut = 'termine'
+        session.save(update_fields=['sha256', 'statut', 'date_modification'])
+
+    return JsonResponse({
+        'success': True,
+        'message': 'Fichier déposé avec succès.',
+        'sha256': sha256,
+        'redirection': redirection,
+    })
+
+
+def _peut_lire_archive(utilisateur, nom):
+    """
+    Mêmes droits que sur le fichier d'origine : l'étudiant, l'enseignant du
+    travail ou du cours (directeur ou encadreur pour un mémoire), un administrateur
+    """
+    from django.db.models import Q
+    from memoires.models import Memoire
+    from travaux.models import RemiseTravail
+
+    if utilisateur.is_superuser or utilisateur.is_admin_user():
+        return True
+    remises = RemiseTravail.objects.filter(Q(fichier_principal=nom) | Q(fichiers_supplementaires=nom))
+    if remises.filter(
+        Q(etudiant=utilisateur) | Q(travail__enseignant=utilisateur) | Q(travail__cours__enseignant=utilisateur)
+    ).exists():
+        return True
+    return Memoire.objects.filter(fichier_memoire=nom).filter(
+        Q(etudiant=utilisateur) | Q(directeur=utilisateur) | Q(encadreur=utilisateur)
+    ).exists()
+
+
+@login_required
+@require_http_methods(['GET'])
+def fichier_archive(request, nom):
+    """Sert un fichier archivé, décompressé au fil de la lecture"""
+    from django.core.files.storage import default_storage
+
+    if not getattr(default_storage, 'est_archive', None) or not default_storage.est_archive(nom):
+        raise Http404("Fichier introuvable.")
+    # Pas de 403 : l'existence d'un fichier d'autrui n'est pas révélée
+    if not _peut_lire_archive(request.user, nom):
+        raise Http404("Fichier introuvable.")
+    fichier = default_storage.open(nom, 'rb')
+    reponse = FileResponse(fichier, filename=os.path.basename(nom))
+    reponse['Content-Length'] = fichier.size
+    return reponse
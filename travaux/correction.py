@@ -0,0 +1,151 @@
+"""
+Correction en masse des remises : validation puis enregistrement en un seul bulk_update
+"""
+import csv
+import io
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Travail, RemiseTravail
+
+CHAMPS_CORRECTION = ['note', 'commentaire_enseignant', 'statut', 'date_correction']
+STATUTS_REMISE = {code for code, _ in RemiseTravail.STATUT_REMISE_CHOICES}
+STATUTS_CORRIGES = {'corrige', 'note_finalisee'}
+
+# Colonnes acceptées dans un fichier CSV de notes
+COLONNES_CSV = {
+    'matricule': 'matricule',
+    'note': 'note',
+    'commentaire': 'commentaire_enseignant',
+    'commentaire_enseignant': 'commentaire_enseignant',
+    'statut': 'statut',
+}
+
+
+def lire_note(valeur, note_maximale):
+    """Convertit une note saisie ('12,5', '12.5', '') ; lève ValueError si invalide"""
+    if valeur is None or str(valeur).strip() == '':
+        return None
+    try:
+        note = Decimal(str(valeur).strip().replace(',', '.'))
+    except InvalidOperation:
+        raise ValueError(f"Note invalide : « {valeur} »")
+    if not note.is_finite():
+        # 'nan', 'inf'... : Decimal les accepte mais toute comparaison lèverait InvalidOperation
+        raise ValueError(f"Note invalide : « {valeur} »")
+    if note < 0 or note > note_maximale:
+        raise ValueError(f"La note doit être comprise entre 0 et {note_maximale}")
+    return note.quantize(Decimal('0.01'))
+
+
+def _texte(donnees, champ):
+    """Valeur texte d'un champ saisi (None si absent) ; lève ValueError si ce n'est pas du texte"""
+    valeur = donnees.get(champ)
+    if valeur is not None and not isinstance(valeur, str):
+        raise ValueError(f"Valeur invalide pour « {champ} »")
+    return (valeur or '').strip()
+
+
+def appliquer_corrections(travail, corrections, cle='id'):
+    """
+    Applique des corrections à plusieurs remises d'un travail.
+
+    `corrections` associe un identifiant de remise (`cle` = 'id') ou un matricule
+    (`cle` = 'matricule') à un dictionnaire pouvant contenir note,
+    commentaire_enseignant et statut. Toutes les lignes sont validées avant
+    écriture : à la moindre erreur rien n'est enregistré.
+    Retourne (nombre de remises mises à jour, {identifiant: message d'erreur}).
+    """
+    from cours.compteurs import recalculer_compteurs_cours, recalculer_compteurs_travaux
+    from cours.models import Cours
+    from users.tableau_enseignant import invalider_tableau_du_travail
+
+    erreurs = {}
+    modifiees = []
+    maintenant = timezone.now()
+
+    with transaction.atomic():
+        remises = RemiseTravail.objects.select_for_update().filter(travail=travail)
+        if cle == 'matricule':
+            remises = remises.filter(etudiant__matricule__in=list(corrections)).select_related('etudiant')
+            index = {remise.etudiant.matricule: remise for remise in remises}
+        else:
+            index = {str(remise.id): remise for remise in remises.filter(id__in=list(corrections))}
+
+        for identifiant, donnees in corrections.items():
+            remise = index.get(str(identifiant))
+            if remise is None:
+                erreurs[identifiant] = "Aucune remise pour ce travail."
+                continue
+
+            try:
+                if 'note' in donnees:
+                    remise.note = lire_note(donnees['note'], travail.note_maximale)
+                if 'commentaire_enseignant' in donnees:
+                    remise.commentaire_enseignant = _texte(donnees, 'commentaire_enseignant')
+                statut = _texte(donnees, 'statut')
+                if statut:
+                    if statut not in STATUTS_REMISE:
+                        raise ValueError(f"Statut inconnu : « {statut} »")
+                    remise.statut = statut
+                elif remise.note is not None and remise.statut not in STATUTS_CORRIGES:
+                    # Une note saisie sans statut explicite vaut correction
+                    remise.statut = 'corrige'
+                if remise.statut in STATUTS_CORRIGES and remise.note is None:
+                    raise ValueError("Une remise corrigée doit avoir une note")
+            except ValueError as e:
+                erreurs[identifiant] = str(e)
+                continue
+
+            if remise.statut in STATUTS_CORRIGES and remise.date_correction is None:
+                remise.date_correction = maintenant
+            modifiees.append(remise)
+
+        if erreurs or not modifiees:
+            return 0, erreurs
+
+        RemiseTravail.objects.bulk_update(modifiees, CHAMPS_CORRECTION, batch_size=500)
+
+        # bulk_update ne passe pas par save() : compteurs recalculés pour ce travail
+        recalculer_compteurs_travaux(Travail.objects.filter(pk=travail.pk))
+        if travail.cours_id:
+            recalculer_compteurs_cours(Cours.objects.filter(pk=travail.cours_id))
+        invalider_tableau_du_travail(travail)
+
+    return len(modifiees), erreurs
+
+
+def lire_csv_corrections(fichier):
+    """
+    Lit un CSV de notes (colonnes matricule, note, commentaire, statut ;
+    séparateur ',' ou ';'). Retourne ({matricule: données}, [erreurs]).
+    """
+    contenu = fichier.read().decode('utf-8-sig')
+    try:
+        dialecte = csv.Sniffer().sniff(contenu[:2048], delimiters=',;')
+    except csv.Error:
+        dialecte = csv.excel
+    reader = csv.DictReader(io.StringIO(contenu), dialect=dialecte)
+
+    colonnes = {(nom or '').strip().lower(): nom for nom in reader.fieldnames or []}
+    if 'matricule' not in colonnes:
+        return {}, ["La colonne « matricule » est obligatoire."]
+
+    corrections = {}
+    erreurs = []
+    for numero, ligne in enumerate(reader, start=2):
+        matricule = (ligne.get(colonnes['matricule']) or '').strip()
+        if not matricule:
+            continue
+        if matricule in corrections:
+            erreurs.append(f"Ligne {numero} : matricule {matricule} en double.")
+            continue
+        # Cellule vide : valeur inchangée
+        corrections[matricule] = {
+            champ: ligne[colonnes[nom]].strip()
+            for nom, champ in COLONNES_CSV.items()
+            if nom in colonnes and champ != 'matricule' and (ligne.get(colonnes[nom]) or '').strip()
+        }
+    return corrections, erreurs
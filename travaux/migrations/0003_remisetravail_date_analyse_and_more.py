@@ -0,0 +1,38 @@
+# Generated by Django 5.0.6 on 2026-10-19 19:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('travaux', '0002_travail_cours'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='remisetravail',
+            name='date_analyse',
+            field=models.DateTimeField(blank=True, help_text='Date de la dernière analyse', null=True),
+        ),
+        migrations.AddField(
+            model_name='remisetravail',
+            name='empreinte_sha256',
+            field=models.CharField(blank=True, help_text='Empreinte SHA-256 du fichier principal', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='remisetravail',
+            name='statut_analyse',
+            field=models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', "En cours d'analyse"), ('termine', 'Analysé'), ('erreur', 'Erreur')], default='en_attente', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='remisetravail',
+            name='taille_fichier',
+            field=models.BigIntegerField(blank=True, help_text='Taille du fichier principal en octets', null=True),
+        ),
+        migrations.AddField(
+            model_name='remisetravail',
+            name='texte_extrait',
+            field=models.TextField(blank=True, help_text='Texte extrait du fichier principal'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.0.6 on 2026-10-19 19:22
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _compte(modele, lien, **filtres):
+    lignes = (
+        modele.objects.filter(**{lien: OuterRef('pk')}, **filtres)
+        .order_by().values(lien).annotate(total=Count('pk')).values('total')
+    )
+    return Coalesce(Subquery(lignes[:1]), 0)
+
+
+def initialiser_compteurs(apps, schema_editor):
+    """Calcule les compteurs des cours et travaux existants"""
+    Cours = apps.get_model('cours', 'Cours')
+    SupportCours = apps.get_model('cours', 'SupportCours')
+    InscriptionCours = apps.get_model('cours', 'InscriptionCours')
+    Travail = apps.get_model('travaux', 'Travail')
+    RemiseTravail = apps.get_model('travaux', 'RemiseTravail')
+
+    Travail.objects.update(
+        nombre_remises=_compte(RemiseTravail, 'travail'),
+        nombre_remises_corrigees=_compte(RemiseTravail, 'travail', statut='corrige'),
+        nombre_remises_en_attente=_compte(RemiseTravail, 'travail', statut='remis'),
+    )
+    Cours.objects.update(
+        nombre_inscrits=_compte(InscriptionCours, 'cours', is_actif=True),
+        nombre_supports=_compte(SupportCours, 'cours'),
+        nombre_travaux=_compte(Travail, 'cours'),
+        nombre_remises=_compte(RemiseTravail, 'travail__cours'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('travaux', '0003_remisetravail_date_analyse_and_more'),
+        ('cours', '0005_cours_nombre_inscrits_cours_nombre_remises_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='travail',
+            name='nombre_remises',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='travail',
+            name='nombre_remises_corrigees',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='travail',
+            name='nombre_remises_en_attente',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(initialiser_compteurs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-19 20:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('travaux', '0004_travail_nombre_remises_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='remisetravail',
+            name='signature_texte',
+            field=models.JSONField(blank=True, default=list, help_text='Signature MinHash du texte extrait (similarité)'),
+        ),
+    ]
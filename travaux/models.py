@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
@@ -69,6 +69,11 @@ class Travail(models.Model):
     statut = models.CharField(max_length=20, choices=STATUT_CHOICES, default='brouillon')
     is_visible_etudiants = models.BooleanField(default=True, help_text="Visible pour les étudiants")
     
+    # Compteurs dénormalisés (maintenus par cours/compteurs.py)
+    nombre_remises = models.PositiveIntegerField(default=0, editable=False)
+    nombre_remises_corrigees = models.PositiveIntegerField(default=0, editable=False)
+    nombre_remises_en_attente = models.PositiveIntegerField(default=0, editable=False)
+    
     # Fichiers joints (consignes, ressources)
     fichier_consignes = models.FileField(
         upload_to='travaux/consignes/%Y/%m/',
@@ -82,8 +87,56 @@ class Travail(models.Model):
         verbose_name_plural = "Travaux"
         ordering = ['-date_creation']
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cours_initial_id = self.__dict__.get('cours_id') if self.pk else None
+
     def __str__(self):
         return f"{self.titre} - {self.get_type_travail_display()}"
+
+    def _invalider_cohortes(self):
+        """Invalide les listes de travaux en cache des cohortes du cours (ancien et nouveau)"""
+        from cours.cohorte import invalider_cohortes
+        from cours.models import Cours
+        cours_ids = {self._cours_initial_id, self.cours_id} - {None}
+        if not cours_ids:
+            return
+        cohortes = list(Cours.objects.filter(pk__in=cours_ids).values_list('faculte_id', 'promotion_id', 'niveau'))
+        transaction.on_commit(lambda: [invalider_cohortes(*cohorte) for cohorte in cohortes])
+
+    def save(self, *args, **kwargs):
+        from cours.compteurs import COMPTEURS_TRAVAIL, champs_hors_compteurs
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = champs_hors_compteurs(self, COMPTEURS_TRAVAIL)
+        from users.tableau_enseignant import invalider_tableau_du_travail
+        super().save(*args, **kwargs)
+        self._invalider_cohortes()
+        invalider_tableau_du_travail(self)
+        if self.cours_id != self._cours_initial_id:
+            # Le travail (et ses remises) change de cours
+            self._ajuster_compteurs_cours(self._cours_initial_id, -1)
+            self._ajuster_compteurs_cours(self.cours_id, 1)
+        self._cours_initial_id = self.cours_id
+
+    def delete(self, *args, **kwargs):
+        from users.tableau_enseignant import invalider_tableau_du_travail
+        self._invalider_cohortes()
+        invalider_tableau_du_travail(self)
+        # Les remises supprimées en cascade ne passent pas par RemiseTravail.delete()
+        self._ajuster_compteurs_cours(self._cours_initial_id, -1)
+        return super().delete(*args, **kwargs)
+
+    def _ajuster_compteurs_cours(self, cours_id, sens):
+        from cours.compteurs import incrementer
+        from cours.models import Cours
+        if cours_id:
+            # Valeur lue en base : celle de l'instance peut être périmée
+            nombre_remises = Travail.objects.filter(pk=self.pk).values_list('nombre_remises', flat=True).first() or 0
+            incrementer(
+                Cours.objects.filter(pk=cours_id),
+                nombre_travaux=sens,
+                nombre_remises=sens * nombre_remises,
+            )
     
     def is_remise_ouverte(self):
         """Vérifie si la remise est encore ouverte"""
@@ -111,6 +164,13 @@ class RemiseTravail(models.Model):
         ('note_finalisee', 'Note finalisée'),
     ]
     
+    STATUT_ANALYSE_CHOICES = [
+        ('en_attente', 'En attente'),
+        ('en_cours', "En cours d'analyse"),
+        ('termine', 'Analysé'),
+        ('erreur', 'Erreur'),
+    ]
+    
     # Relations
     etudiant = models.ForeignKey(
         User,
@@ -163,14 +223,63 @@ class RemiseTravail(models.Model):
     )
     rapport_plagiat = models.TextField(blank=True, help_text="Rapport de détection de plagiat")
     
+    # Analyse du fichier en arrière-plan (taille, empreinte, texte, similarité)
+    statut_analyse = models.CharField(max_length=20, choices=STATUT_ANALYSE_CHOICES, default='en_attente')
+    taille_fichier = models.BigIntegerField(null=True, blank=True, help_text="Taille du fichier principal en octets")
+    empreinte_sha256 = models.CharField(max_length=64, blank=True, help_text="Empreinte SHA-256 du fichier principal")
+    texte_extrait = models.TextField(blank=True, help_text="Texte extrait du fichier principal")
+    signature_texte = models.JSONField(default=list, blank=True, help_text="Signature MinHash du texte extrait (similarité)")
+    date_analyse = models.DateTimeField(null=True, blank=True, help_text="Date de la dernière analyse")
+    
     class Meta:
         verbose_name = "Remise de travail"
         verbose_name_plural = "Remises de travaux"
         unique_together = ['etudiant', 'travail']
         ordering = ['-date_remise']
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Statut au chargement : les compteurs du travail ne bougent que s'il change
+        self._statut_initial = self.__dict__.get('statut') if self.pk else None
+
     def __str__(self):
         return f"{self.etudiant.matricule} - {self.travail.titre}"
+
+    def _ajuster_compteurs(self, ancien_statut, nouveau_statut):
+        """Reporte sur le travail et son cours le passage d'un statut à l'autre (None = absente)"""
+        from cours.compteurs import STATUT_CORRIGE, STATUT_EN_ATTENTE, incrementer
+        from cours.models import Cours
+
+        def present(statut, attendu=None):
+            return int(statut is not None and (attendu is None or statut == attendu))
+
+        delta_total = present(nouveau_statut) - present(ancien_statut)
+        incrementer(
+            Travail.objects.filter(pk=self.travail_id),
+            nombre_remises=delta_total,
+            nombre_remises_corrigees=present(nouveau_statut, STATUT_CORRIGE) - present(ancien_statut, STATUT_CORRIGE),
+            nombre_remises_en_attente=present(nouveau_statut, STATUT_EN_ATTENTE) - present(ancien_statut, STATUT_EN_ATTENTE),
+        )
+        if delta_total:
+            incrementer(Cours.objects.filter(travaux__pk=self.travail_id), nombre_remises=delta_total)
+
+    def _invalider_tableau_enseignant(self):
+        from users.tableau_enseignant import invalider_tableau_du_travail
+        # Travail déjà chargé : pas de requête pour trouver l'enseignant
+        invalider_tableau_du_travail(self.travail if RemiseTravail.travail.is_cached(self) else self.travail_id)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        if self.statut != self._statut_initial:
+            self._ajuster_compteurs(self._statut_initial, self.statut)
+            self._statut_initial = self.statut
+        self._invalider_tableau_enseignant()
+
+    def delete(self, *args, **kwargs):
+        if self._statut_initial is not None:
+            self._ajuster_compteurs(self._statut_initial, None)
+        self._invalider_tableau_enseignant()
+        return super().delete(*args, **kwargs)
     
     def is_en_retard(self):
         """Vérifie si la remise est en retard"""
@@ -185,3 +294,12 @@ class RemiseTravail(models.Model):
             'note_finalisee': 'info',
         }
         return colors.get(self.statut, 'secondary')
+    
+    def planifier_analyse(self):
+        """Planifie l'analyse du fichier remis, hors du cycle de la requête"""
+        from televersements.taches import soumettre_tache
+        from .taches import analyser_remise
+        
+        RemiseTravail.objects.filter(pk=self.pk).update(statut_analyse='en_attente')
+        self.statut_analyse = 'en_attente'
+        soumettre_tache(analyser_remise, self.pk)
@@ -0,0 +1,94 @@
+"""
+Tâches d'arrière-plan liées aux remises de travaux
+"""
+import logging
+from decimal import Decimal
+
+from django.utils import timezone
+
+from televersements.analyse import analyser_fichier, empreintes_texte, signature_minhash, similarites_signatures
+
+logger = logging.getLogger(__name__)
+
+
+def _completer_signatures(travail_id):
+    """Calcule, une seule fois, la signature des remises analysées avant l'ajout des signatures"""
+    from .models import RemiseTravail
+
+    anciennes = (
+        RemiseTravail.objects
+        .filter(travail_id=travail_id, signature_texte=[])
+        .exclude(texte_extrait='')
+        .values_list('pk', 'texte_extrait')
+    )
+    for pk, texte in anciennes.iterator():
+        RemiseTravail.objects.filter(pk=pk).update(signature_texte=signature_minhash(empreintes_texte(texte)))
+
+
+def comparer_avec_remises(remise, sha256, signature):
+    """
+    Compare le fichier d'une remise aux autres remises du même travail, à
+    partir de leurs empreintes et signatures MinHash enregistrées (le texte
+    des autres remises n'est pas relu). Retourne (score en %, rapport).
+    """
+    from .models import RemiseTravail
+
+    _completer_signatures(remise.travail_id)
+    autres = list(
+        RemiseTravail.objects
+        .filter(travail_id=remise.travail_id)
+        .exclude(pk=remise.pk)
+        .values_list('etudiant__matricule', 'empreinte_sha256', 'signature_texte')
+    )
+
+    meilleur_score = 0.0
+    meilleure_source = None
+
+    identiques = [matricule for matricule, autre_sha256, _ in autres if autre_sha256 and autre_sha256 == sha256]
+    if identiques:
+        meilleur_score, meilleure_source = 1.0, identiques[0]
+    else:
+        comparables = [(matricule, autre) for matricule, _, autre in autres if autre and len(autre) == len(signature)]
+        scores = similarites_signatures(signature, [autre for _, autre in comparables])
+        if len(scores) and scores.max() > 0:
+            indice = int(scores.argmax())
+            meilleur_score, meilleure_source = float(scores[indice]), comparables[indice][0]
+
+    pourcentage = round(meilleur_score * 100, 2)
+    if meilleure_source:
+        rapport = f"Similarité maximale de {pourcentage:.2f}% avec la remise de {meilleure_source}."
+    else:
+        rapport = "Aucune remise comparable pour ce travail."
+    return Decimal(str(pourcentage)), rapport
+
+
+def analyser_remise(remise_id):
+    """Calcule la taille, l'empreinte, le texte et la similarité d'une remise"""
+    from .models import RemiseTravail
+
+    remise = RemiseTravail.objects.filter(pk=remise_id).first()
+    if remise is None or not remise.fichier_principal:
+        return
+
+    # date_analyse marque le début : une analyse interrompue (worker arrêté) est reprise par analyser_fichiers
+    RemiseTravail.objects.filter(pk=remise_id).update(statut_analyse='en_cours', date_analyse=timezone.now())
+    try:
+        infos = analyser_fichier(remise.fichier_principal)
+        signature = signature_minhash(empreintes_texte(infos['texte']))
+        score, rapport = comparer_avec_remises(remise, infos['sha256'], signature)
+    except Exception:
+        logger.exception("Analyse de la remise %s impossible", remise_id)
+        RemiseTravail.objects.filter(pk=remise_id).update(statut_analyse='erreur')
+        return
+
+    # update() : n'écrase pas une correction faite entre-temps par l'enseignant
+    RemiseTravail.objects.filter(pk=remise_id).update(
+        taille_fichier=infos['taille'],
+        empreinte_sha256=infos['sha256'],
+        texte_extrait=infos['texte'],
+        signature_texte=signature,
+        score_plagiat=score,
+        rapport_plagiat=rapport,
+        statut_analyse='termine',
+        date_analyse=timezone.now(),
+    )
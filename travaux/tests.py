@@ -1,3 +1,246 @@
-from django.test import TestCase
+import io
+import json
+import shutil
+import tempfile
+import zipfile
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from cours.models import Cours
+from televersements.analyse import empreintes_texte, signature_minhash, similarite, similarites_signatures
+
+from .correction import appliquer_corrections, lire_note
+from .models import RemiseTravail, Travail
+from .taches import analyser_remise
+from .utils import iter_zip_remises
+
+User = get_user_model()
+
+TEXTE = (
+    "Le tri rapide choisit un pivot puis partitionne le tableau en deux sous tableaux "
+    "que l'on trie récursivement ; sa complexité moyenne est en n log n mais le pire cas "
+    "est quadratique lorsque le pivot est mal choisi, par exemple sur un tableau déjà trié. "
+)
+
+
+class TravailMixin:
+    """Un travail publié, un dossier de médias temporaire et une fabrique de remises"""
+
+    def setUp(self):
+        super().setUp()
+        self.media = tempfile.mkdtemp()
+        reglages = override_settings(MEDIA_ROOT=self.media, TACHES_SYNCHRONES=True)
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+
+        self.enseignant = User.objects.create_user('enseignant', password='x', matricule='UOM2025-100', user_type='enseignant')
+        cours = Cours.objects.create(
+            titre='Algorithmique', code='INFO101', niveau='L1', filiere='Informatique',
+            enseignant=self.enseignant, date_debut=date.today(), date_fin=date.today() + timedelta(days=90),
+        )
+        self.travail = Travail.objects.create(
+            titre='TP 1', description='TP', consignes='Rendre un fichier', niveau='L1', filiere='Informatique',
+            enseignant=self.enseignant, cours=cours, statut='publie',
+            date_limite_remise=timezone.now() + timedelta(days=7),
+        )
+        self.numero = 0
+
+    def _remise(self, contenu, nom='tp.txt'):
+        self.numero += 1
+        etudiant = User.objects.create_user(f'etudiant{self.numero}', password='x', matricule=f'UOM2025-{self.numero:03d}')
+        remise = RemiseTravail(etudiant=etudiant, travail=self.travail)
+        remise.fichier_principal.save(nom, ContentFile(contenu.encode('utf-8')), save=False)
+        remise.save()
+        return remise
+
+
+class AnalyseRemisesTests(TravailMixin, TestCase):
+    """Analyse en arrière-plan des remises : similarité par signatures MinHash"""
+
+    def test_signature_estime_l_indice_de_jaccard(self):
+        a = empreintes_texte(TEXTE * 3)
+        b = empreintes_texte(TEXTE * 2 + "Le tri fusion est stable et toujours en n log n, au prix d'un tableau auxiliaire.")
+        estime = similarites_signatures(signature_minhash(a), [signature_minhash(b)])[0]
+        self.assertAlmostEqual(estime, similarite(a, b), delta=0.15)
+        self.assertEqual(signature_minhash(set()), [])
+        self.assertEqual(signature_minhash(a), signature_minhash(set(a)))
+
+    def test_similarite_calculee_depuis_les_signatures_enregistrees(self):
+        premiere = self._remise(TEXTE)
+        analyser_remise(premiere.pk)
+        premiere.refresh_from_db()
+        self.assertEqual(premiere.statut_analyse, 'termine')
+        self.assertEqual(len(premiere.signature_texte), 128)
+
+        # Même texte dans un fichier différent (octets différents) : similarité maximale
+        copie = self._remise(TEXTE + "\n\n", nom='copie.txt')
+        analyser_remise(copie.pk)
+        copie.refresh_from_db()
+        self.assertEqual(copie.score_plagiat, 100)
+        self.assertIn(premiere.etudiant.matricule, copie.rapport_plagiat)
+
+        autre = self._remise("Les graphes orientés acycliques admettent un ordre topologique calculé par un parcours en profondeur.")
+        analyser_remise(autre.pk)
+        autre.refresh_from_db()
+        self.assertLess(autre.score_plagiat, 20)
+
+    def test_signature_des_remises_deja_analysees_completee(self):
+        ancienne = self._remise(TEXTE)
+        RemiseTravail.objects.filter(pk=ancienne.pk).update(texte_extrait=TEXTE, statut_analyse='termine', signature_texte=[])
+
+        nouvelle = self._remise(TEXTE)
+        analyser_remise(nouvelle.pk)
+
+        ancienne.refresh_from_db()
+        self.assertEqual(ancienne.signature_texte, signature_minhash(empreintes_texte(TEXTE)))
+
+    def test_erreur_inattendue_marque_la_remise_en_erreur(self):
+        remise = self._remise(TEXTE)
+        with mock.patch('travaux.taches.comparer_avec_remises', side_effect=UnicodeDecodeError('utf-8', b'', 0, 1, 'test')):
+            with self.assertLogs('travaux.taches', level='ERROR'):
+                analyser_remise(remise.pk)
+        remise.refresh_from_db()
+        self.assertEqual(remise.statut_analyse, 'erreur')
+
+    def test_analyse_interrompue_reprise_par_la_commande(self):
+        bloquee = self._remise(TEXTE)
+        recente = self._remise(TEXTE + " Variante.")
+        RemiseTravail.objects.filter(pk=bloquee.pk).update(
+            statut_analyse='en_cours', date_analyse=timezone.now() - timedelta(hours=2)
+        )
+        # Analyse en cours dans un autre worker : laissée de côté
+        RemiseTravail.objects.filter(pk=recente.pk).update(statut_analyse='en_cours', date_analyse=timezone.now())
+
+        call_command('analyser_fichiers', stdout=mock.Mock())
+
+        bloquee.refresh_from_db()
+        recente.refresh_from_db()
+        self.assertEqual(bloquee.statut_analyse, 'termine')
+        self.assertEqual(recente.statut_analyse, 'en_cours')
+
+
+class LireNoteTests(SimpleTestCase):
+
+    def test_virgule_ou_point_decimal(self):
+        self.assertEqual(lire_note('12,5', Decimal(20)), Decimal('12.50'))
+        self.assertEqual(lire_note(' 12.25 ', Decimal(20)), Decimal('12.25'))
+        self.assertIsNone(lire_note('', Decimal(20)))
+
+    def test_valeurs_non_finies_refusees(self):
+        for valeur in ('nan', 'NaN', 'sNaN', '-nan', 'inf', 'Infinity', '-Infinity'):
+            with self.subTest(valeur=valeur), self.assertRaises(ValueError):
+                lire_note(valeur, Decimal(20))
+
+    def test_hors_bornes_refusee(self):
+        for valeur in ('-1', '20,01', '1e3', 'douze'):
+            with self.subTest(valeur=valeur), self.assertRaises(ValueError):
+                lire_note(valeur, Decimal(20))
+
+
+class CorrectionEnMasseTests(TravailMixin, TestCase):
+
+    def test_note_nan_signalee_sans_rien_enregistrer(self):
+        premiere = self._remise(TEXTE)
+        seconde = self._remise(TEXTE)
+
+        nombre, erreurs = appliquer_corrections(self.travail, {
+            str(premiere.pk): {'note': '15'},
+            str(seconde.pk): {'note': 'nan'},
+        })
+
+        self.assertEqual(nombre, 0)
+        self.assertEqual(list(erreurs), [str(seconde.pk)])
+        premiere.refresh_from_db()
+        self.assertIsNone(premiere.note)
+
+    def test_champs_texte_d_un_autre_type_signales(self):
+        premiere = self._remise(TEXTE)
+        seconde = self._remise(TEXTE)
+
+        nombre, erreurs = appliquer_corrections(self.travail, {
+            str(premiere.pk): {'note': '15', 'statut': 5},
+            str(seconde.pk): {'note': '12', 'commentaire_enseignant': 3},
+        })
+
+        self.assertEqual(nombre, 0)
+        self.assertEqual(sorted(erreurs), sorted([str(premiere.pk), str(seconde.pk)]))
+        self.assertIn('statut', erreurs[str(premiere.pk)])
+
+    def test_vue_renvoie_les_lignes_invalides(self):
+        remise = self._remise(TEXTE)
+        self.client.force_login(self.enseignant)
+
+        reponse = self.client.post(
+            reverse('travaux:teacher_travail_correction_enregistrer', args=[self.travail.id]),
+            data=json.dumps({'corrections': [{'id': remise.pk, 'note': '14', 'statut': 5}]}),
+            content_type='application/json',
+        )
+
+        self.assertEqual(reponse.status_code, 400)
+        self.assertEqual(list(reponse.json()['erreurs']), [str(remise.pk)])
+
+
+class ArchiveRemisesTests(TravailMixin, TestCase):
+    """Archive ZIP des remises, générée en flux"""
+
+    @staticmethod
+    def _archive(morceaux):
+        with zipfile.ZipFile(io.BytesIO(b''.join(morceaux))) as archive:
+            return {nom: archive.read(nom) for nom in archive.namelist()}
+
+    def test_archive_en_flux(self):
+        premiere = self._remise('Rapport 1')
+        premiere.fichiers_supplementaires.save('annexes.zip', ContentFile(b'annexes'))
+        seconde = self._remise('Rapport 2', nom='tp.pdf')
+        # Remise sans fichier, et remise dont le fichier a disparu du disque : ignorées
+        sans_fichier = RemiseTravail.objects.create(
+            etudiant=User.objects.create_user('etudiant8', password='x', matricule='UOM2025-008'), travail=self.travail,
+        )
+        disparue = self._remise('Rapport 9')
+        disparue.fichier_principal.storage.delete(disparue.fichier_principal.name)
+
+        morceaux = list(iter_zip_remises([premiere, seconde, sans_fichier, disparue]))
+
+        self.assertGreater(len(morceaux), 1)
+        self.assertEqual(self._archive(morceaux), {
+            'UOM2025-001.txt': b'Rapport 1',
+            'UOM2025-001_supplementaire.zip': b'annexes',
+            'UOM2025-002.pdf': b'Rapport 2',
+        })
+
+    def test_noms_en_double(self):
+        premiere = self._remise('Rapport 1')
+        # Même étudiant, autre travail : même nom dans l'archive
+        autre_travail = Travail.objects.create(
+            titre='TP 2', description='TP', consignes='Rendre', niveau='L1', filiere='Informatique',
+            enseignant=self.enseignant, cours=self.travail.cours, statut='publie',
+            date_limite_remise=timezone.now() + timedelta(days=7),
+        )
+        doublon = RemiseTravail(etudiant=premiere.etudiant, travail=autre_travail)
+        doublon.fichier_principal.save('tp.TXT', ContentFile(b'Rapport 2'), save=False)
+        doublon.save()
+
+        self.assertEqual(self._archive(iter_zip_remises([premiere, doublon, premiere])), {
+            'UOM2025-001.txt': b'Rapport 1',
+            'UOM2025-001_2.TXT': b'Rapport 2',
+            'UOM2025-001_3.txt': b'Rapport 1',
+        })
+
+    def test_telechargement_par_l_enseignant(self):
+        self._remise('Rapport 1')
+        self._remise('Rapport 2')
+        self.client.force_login(self.enseignant)
+
+        reponse = self.client.get(reverse('travaux:teacher_travail_telecharger_remises', args=[self.travail.id]))
+
+        self.assertEqual(reponse['Content-Type'], 'application/zip')
+        self.assertEqual(sorted(self._archive(reponse.streaming_content)), ['UOM2025-001.txt', 'UOM2025-002.txt'])
@@ -9,6 +9,10 @@ urlpatterns = [
     path('teacher/cours/selection/', views.teacher_cours_selection, name='teacher_cours_selection'),
     path('teacher/cours/<int:cours_id>/travail/create/', views.teacher_travail_create, name='teacher_travail_create'),
     path('teacher/travaux/<int:travail_id>/', views.teacher_travail_detail, name='teacher_travail_detail'),
+    path('teacher/travaux/<int:travail_id>/remises/zip/', views.teacher_travail_telecharger_remises, name='teacher_travail_telecharger_remises'),
+    path('teacher/travaux/<int:travail_id>/correction/', views.teacher_travail_correction, name='teacher_travail_correction'),
+    path('teacher/travaux/<int:travail_id>/correction/enregistrer/', views.teacher_travail_correction_enregistrer, name='teacher_travail_correction_enregistrer'),
+    path('teacher/travaux/<int:travail_id>/correction/import/', views.teacher_travail_correction_import, name='teacher_travail_correction_import'),
     path('teacher/travaux/<int:travail_id>/toggle/', views.teacher_travail_toggle_status, name='teacher_travail_toggle_status'),
     path('teacher/remises/<int:remise_id>/', views.teacher_remise_detail, name='teacher_remise_detail'),
     
@@ -0,0 +1,100 @@
+"""
+Utilitaires pour les travaux et les remises des étudiants
+"""
+import os
+import zipfile
+
+# Taille des morceaux lus sur le disque lors de la construction de l'archive
+TAILLE_MORCEAU = 64 * 1024
+
+
+class _TamponZip:
+    """
+    Flux en écriture seule alimenté par ZipFile.
+    Sans méthode seek, ZipFile écrit l'archive de façon séquentielle
+    (descripteurs de données), ce qui permet de la vider au fil de l'eau.
+    """
+
+    def __init__(self):
+        self._morceaux = []
+        self._position = 0
+
+    def write(self, data):
+        self._morceaux.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def vider(self):
+        data = b''.join(self._morceaux)
+        self._morceaux = []
+        return data
+
+    def __iter__(self):
+        # Permet d'écrire « yield from tampon » sans émettre de morceaux vides
+        data = self.vider()
+        if data:
+            yield data
+
+
+def nom_fichier_remise(remise, champ, suffixe=''):
+    """Nom du fichier dans l'archive : matricule (+ suffixe) et extension d'origine"""
+    extension = os.path.splitext(champ.name)[1]
+    return f"{remise.etudiant.matricule}{suffixe}{extension}"
+
+
+def _nom_unique(nom, utilises):
+    """
+    Nom libre dans l'archive : « _2 », « _3 »... avant l'extension si le nom est
+    déjà pris (comparaison sans casse, pour l'extraction sous Windows ou macOS)
+    """
+    racine, extension = os.path.splitext(nom)
+    candidat = nom
+    numero = 1
+    while candidat.lower() in utilises:
+        numero += 1
+        candidat = f"{racine}_{numero}{extension}"
+    utilises.add(candidat.lower())
+    return candidat
+
+
+def iter_zip_remises(remises):
+    """
+    Génère une archive ZIP des fichiers des remises, morceau par morceau.
+    La mémoire utilisée reste constante quelle que soit la taille des fichiers
+    et aucun fichier temporaire n'est écrit.
+    """
+    tampon = _TamponZip()
+    utilises = set()
+
+    # ZIP_STORED : les remises (PDF, archives, images) sont déjà compressées
+    with zipfile.ZipFile(tampon, mode='w', compression=zipfile.ZIP_STORED) as archive:
+        for remise in remises:
+            fichiers = [(remise.fichier_principal, '')]
+            if remise.fichiers_supplementaires:
+                fichiers.append((remise.fichiers_supplementaires, '_supplementaire'))
+
+            for champ, suffixe in fichiers:
+                if not champ:
+                    continue
+                try:
+                    source = champ.open('rb')
+                except (FileNotFoundError, OSError):
+                    # Fichier absent du disque : on passe à la remise suivante
+                    continue
+
+                with source:
+                    nom = _nom_unique(nom_fichier_remise(remise, champ, suffixe), utilises)
+                    with archive.open(nom, mode='w', force_zip64=True) as destination:
+                        for morceau in iter(lambda: source.read(TAILLE_MORCEAU), b''):
+                            destination.write(morceau)
+                            yield from tampon
+                yield from tampon
+
+    # Répertoire central écrit à la fermeture de l'archive
+    yield from tampon
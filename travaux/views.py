@@ -1,11 +1,17 @@
+import json
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q
+from django.db.models import Q, Count, Sum
+from django.http import JsonResponse, StreamingHttpResponse
 from django.utils import timezone
 
 from .models import Travail, RemiseTravail
 from .forms import TravailForm
+from .utils import iter_zip_remises
+from .correction import appliquer_corrections, lire_csv_corrections
+from users.notifications import notifier_travail_publie
 
 
 @login_required
@@ -17,23 +23,20 @@ def teacher_travaux_list(request):
 
     travaux = Travail.objects.filter(enseignant=request.user).order_by('-date_creation')
     
-    # Statistiques
-    total_travaux = travaux.count()
-    travaux_publies = travaux.filter(statut='publie').count()
-    travaux_fermes = travaux.filter(statut='ferme').count()
-    
-    # Remises en attente
-    remises_attente = RemiseTravail.objects.filter(
-        travail__enseignant=request.user,
-        statut='remis'
-    ).count()
+    # Statistiques (une seule requête, remises lues dans les compteurs des travaux)
+    stats = travaux.aggregate(
+        total_travaux=Count('id'),
+        travaux_publies=Count('id', filter=Q(statut='publie')),
+        travaux_fermes=Count('id', filter=Q(statut='ferme')),
+        remises_attente=Sum('nombre_remises_en_attente'),
+    )
 
     context = {
         'travaux': travaux,
-        'total_travaux': total_travaux,
-        'travaux_publies': travaux_publies,
-        'travaux_fermes': travaux_fermes,
-        'remises_attente': remises_attente,
+        'total_travaux': stats['total_travaux'],
+        'travaux_publies': stats['travaux_publies'],
+        'travaux_fermes': stats['travaux_fermes'],
+        'remises_attente': stats['remises_attente'] or 0,
     }
     return render(request, 'travaux/teacher_travaux_list.html', context)
 
@@ -75,6 +78,8 @@ def teacher_travail_create(request, cours_id):
             travail.enseignant = request.user
             travail.cours = cours
             travail.save()
+            if travail.statut == 'publie':
+                notifier_travail_publie(travail)
             messages.success(request, f"Travail créé avec succès pour le cours {cours.code}.")
             return redirect('travaux:teacher_travaux_list')
         messages.error(request, "Veuillez corriger les erreurs.")
@@ -97,21 +102,39 @@ def teacher_travail_detail(request, travail_id):
     travail = get_object_or_404(Travail, id=travail_id, enseignant=request.user)
     remises = RemiseTravail.objects.filter(travail=travail).order_by('-date_remise')
     
-    # Statistiques
-    total_remises = remises.count()
-    remises_corrigees = remises.filter(statut='corrige').count()
-    remises_en_attente = remises.filter(statut='remis').count()
-
     context = {
         'travail': travail,
         'remises': remises,
-        'total_remises': total_remises,
-        'remises_corrigees': remises_corrigees,
-        'remises_en_attente': remises_en_attente,
+        'total_remises': travail.nombre_remises,
+        'remises_corrigees': travail.nombre_remises_corrigees,
+        'remises_en_attente': travail.nombre_remises_en_attente,
     }
     return render(request, 'travaux/teacher_travail_detail.html', context)
 
 
+@login_required
+def teacher_travail_telecharger_remises(request, travail_id):
+    """Télécharger toutes les remises d'un travail dans une archive ZIP générée à la volée"""
+    if not hasattr(request.user, 'user_type') or not request.user.is_teacher():
+        messages.error(request, "Accès non autorisé.")
+        return redirect('login')
+
+    travail = get_object_or_404(Travail, id=travail_id, enseignant=request.user)
+    remises = (
+        RemiseTravail.objects
+        .filter(travail=travail)
+        .select_related('etudiant')
+        .only('fichier_principal', 'fichiers_supplementaires', 'etudiant__matricule')
+        .order_by('etudiant__matricule')
+        .iterator(chunk_size=100)
+    )
+
+    response = StreamingHttpResponse(iter_zip_remises(remises), content_type='application/zip')
+    filename = f"remises_travail_{travail.id}_{timezone.now().strftime('%Y%m%d')}.zip"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
 @login_required
 def teacher_travail_toggle_status(request, travail_id):
     """Publier/Fermer un travail"""
@@ -121,6 +144,7 @@ def teacher_travail_toggle_status(request, travail_id):
 
     travail = get_object_or_404(Travail, id=travail_id, enseignant=request.user)
     
+    premiere_publication = travail.statut == 'brouillon'
     if travail.statut == 'brouillon':
         travail.statut = 'publie'
         travail.date_publication = timezone.now()
@@ -133,9 +157,108 @@ def teacher_travail_toggle_status(request, travail_id):
         messages.success(request, f"Travail '{travail.titre}' republié.")
     
     travail.save()
+    if premiere_publication:
+        notifier_travail_publie(travail)
     return redirect('travaux:teacher_travail_detail', travail_id=travail.id)
 
 
+@login_required
+def teacher_travail_correction(request, travail_id):
+    """Grille de correction de toutes les remises d'un travail"""
+    if not hasattr(request.user, 'user_type') or not request.user.is_teacher():
+        messages.error(request, "Accès non autorisé.")
+        return redirect('login')
+
+    travail = get_object_or_404(Travail, id=travail_id, enseignant=request.user)
+    remises = (
+        RemiseTravail.objects
+        .filter(travail=travail)
+        .select_related('etudiant')
+        .order_by('etudiant__matricule')
+    )
+
+    return render(request, 'travaux/teacher_travail_correction.html', {
+        'travail': travail,
+        'remises': remises,
+        'statuts': RemiseTravail.STATUT_REMISE_CHOICES,
+    })
+
+
+@login_required
+def teacher_travail_correction_enregistrer(request, travail_id):
+    """
+    Enregistrer plusieurs corrections (JSON) :
+    {"corrections": [{"id": 12, "note": "14.5", "commentaire_enseignant": "...", "statut": "corrige"}, ...]}
+    """
+    if not hasattr(request.user, 'user_type') or not request.user.is_teacher():
+        return JsonResponse({'success': False, 'message': 'Accès non autorisé'}, status=403)
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'message': 'Méthode non autorisée'}, status=405)
+
+    travail = get_object_or_404(Travail, id=travail_id, enseignant=request.user)
+    if not travail.is_correction_ouverte():
+        return JsonResponse({'success': False, 'message': 'La correction de ce travail est fermée.'}, status=403)
+
+    try:
+        lignes = json.loads(request.body)['corrections']
+        corrections = {str(ligne.pop('id')): ligne for ligne in lignes}
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return JsonResponse({'success': False, 'message': 'Données de correction invalides.'}, status=400)
+
+    nombre, erreurs = appliquer_corrections(travail, corrections)
+    if erreurs:
+        return JsonResponse({
+            'success': False,
+            'message': f"{len(erreurs)} ligne(s) invalide(s), aucune correction enregistrée.",
+            'erreurs': erreurs,
+        }, status=400)
+
+    travail.refresh_from_db(fields=['nombre_remises_corrigees', 'nombre_remises_en_attente'])
+    return JsonResponse({
+        'success': True,
+        'message': f"{nombre} remise(s) enregistrée(s).",
+        'remises_corrigees': travail.nombre_remises_corrigees,
+        'remises_en_attente': travail.nombre_remises_en_attente,
+    })
+
+
+@login_required
+def teacher_travail_correction_import(request, travail_id):
+    """Importer les notes d'un travail depuis un CSV (matricule, note, commentaire, statut)"""
+    if not hasattr(request.user, 'user_type') or not request.user.is_teacher():
+        messages.error(request, "Accès non autorisé.")
+        return redirect('login')
+
+    travail = get_object_or_404(Travail, id=travail_id, enseignant=request.user)
+    fichier = request.FILES.get('fichier_notes')
+
+    if request.method != 'POST' or not fichier:
+        messages.error(request, "Veuillez sélectionner un fichier CSV.")
+        return redirect('travaux:teacher_travail_correction', travail_id=travail.id)
+    if not travail.is_correction_ouverte():
+        messages.error(request, "La correction de ce travail est fermée.")
+        return redirect('travaux:teacher_travail_correction', travail_id=travail.id)
+
+    try:
+        corrections, erreurs_lecture = lire_csv_corrections(fichier)
+    except UnicodeDecodeError:
+        messages.error(request, "Le fichier doit être encodé en UTF-8.")
+        return redirect('travaux:teacher_travail_correction', travail_id=travail.id)
+
+    erreurs = list(erreurs_lecture)
+    if not erreurs:
+        nombre, erreurs_lignes = appliquer_corrections(travail, corrections, cle='matricule')
+        erreurs += [f"{matricule} : {message}" for matricule, message in erreurs_lignes.items()]
+
+    if erreurs:
+        messages.error(request, "Import annulé, aucune note enregistrée. " + " | ".join(erreurs[:10]))
+        if len(erreurs) > 10:
+            messages.error(request, f"… et {len(erreurs) - 10} autre(s) erreur(s).")
+    else:
+        messages.success(request, f"{nombre} note(s) importée(s) avec succès.")
+    return redirect('travaux:teacher_travail_correction', travail_id=travail.id)
+
+
 @login_required
 def teacher_remise_detail(request, remise_id):
     """Détails d'une remise pour correction"""
@@ -187,6 +310,7 @@ def student_rendre_travail(request, travail_id):
                 remise_existante.commentaire_etudiant = commentaire
                 remise_existante.date_modification = timezone.now()
                 remise_existante.save()
+                remise_existante.planifier_analyse()
                 messages.success(request, "Votre travail a été mis à jour avec succès.")
             else:
                 # Création d'une nouvelle remise
@@ -198,6 +322,7 @@ def student_rendre_travail(request, travail_id):
                     commentaire_etudiant=commentaire,
                     statut='remis'
                 )
+                remise.planifier_analyse()
                 messages.success(request, "Votre travail a été rendu avec succès.")
             
             return redirect('student_cours_detail', cours_id=travail.cours.id)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import CustomUser, StudentProfile, TeacherProfile, Faculte, Promotion, FraisAcademique
+from .models import CustomUser, StudentProfile, TeacherProfile, Faculte, Promotion, FraisAcademique, PaiementFrais, Notification, InstantaneStatistiques, TacheSuppression
 
 @admin.register(FraisAcademique)
 class FraisAcademiqueAdmin(admin.ModelAdmin):
@@ -26,3 +26,33 @@ class FraisAcademiqueAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+
+@admin.register(PaiementFrais)
+class PaiementFraisAdmin(admin.ModelAdmin):
+    list_display = ['reference', 'frais', 'montant', 'mode_paiement', 'date_paiement', 'date_import']
+    list_filter = ['mode_paiement', 'frais__annee_academique']
+    search_fields = ['reference', 'frais__etudiant__matricule']
+    raw_id_fields = ['frais']
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ['destinataire', 'type_notification', 'titre', 'is_read', 'date_creation']
+    list_filter = ['type_notification', 'is_read']
+    search_fields = ['destinataire__matricule', 'titre']
+    raw_id_fields = ['destinataire']
+
+
+@admin.register(InstantaneStatistiques)
+class InstantaneStatistiquesAdmin(admin.ModelAdmin):
+    list_display = ['date', 'total_etudiants', 'etudiants_actifs', 'total_enseignants', 'premiere_connexion_en_attente', 'date_calcul']
+    date_hierarchy = 'date'
+
+
+@admin.register(TacheSuppression)
+class TacheSuppressionAdmin(admin.ModelAdmin):
+    list_display = ['libelle', 'type_objet', 'statut', 'lignes_supprimees', 'lignes_total', 'fichiers_supprimes', 'date_creation', 'date_fin']
+    list_filter = ['type_objet', 'statut']
+    search_fields = ['libelle']
+    raw_id_fields = ['demandee_par']
@@ -0,0 +1,6 @@
+def notifications(request):
+    """Nombre de notifications non lues pour le badge de la barre de navigation"""
+    if not request.user.is_authenticated:
+        return {}
+    from .notifications import compter_non_lues
+    return {'notifications_non_lues': compter_non_lues(request.user)}
@@ -0,0 +1,102 @@
+"""
+Exports CSV / XLSX des listes d'administration.
+
+Les lignes sont lues par paquets (queryset.iterator) et écrites au fil de l'eau :
+la mémoire utilisée ne dépend pas du nombre de lignes exportées.
+"""
+import csv
+import datetime
+import tempfile
+
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+# Nombre de lignes lues par requête SQL lors d'un export
+TAILLE_PAQUET = 2000
+
+FORMATS_EXPORT = ('csv', 'xlsx')
+
+# Premiers caractères qui font interpréter une cellule comme une formule par un tableur
+DEBUTS_FORMULE = ('=', '+', '-', '@', '\t', '\r')
+
+
+def xlsx_disponible():
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _cellule(valeur):
+    """
+    Valeur exportable : dates en heure locale, booléens en Oui/Non, None vide.
+    Un texte qui commence comme une formule (nom, référence saisis par un
+    utilisateur) est préfixé d'une apostrophe pour rester du texte dans Excel.
+    """
+    if valeur is None:
+        return ''
+    if isinstance(valeur, str):
+        return "'" + valeur if valeur.startswith(DEBUTS_FORMULE) else valeur
+    if isinstance(valeur, bool):
+        return 'Oui' if valeur else 'Non'
+    if isinstance(valeur, datetime.datetime):
+        if timezone.is_aware(valeur):
+            valeur = timezone.localtime(valeur)
+        return valeur.replace(tzinfo=None, microsecond=0)
+    return valeur
+
+
+class _Echo:
+    """Pseudo-fichier : csv.writer renvoie directement la ligne formatée"""
+
+    def write(self, valeur):
+        return valeur
+
+
+def _iter_csv(entetes, lignes):
+    writer = csv.writer(_Echo(), delimiter=';')
+    # BOM : Excel reconnaît ainsi l'UTF-8 (accents des noms)
+    yield '\ufeff' + writer.writerow([_cellule(entete) for entete in entetes])
+    for ligne in lignes:
+        yield writer.writerow([_cellule(valeur) for valeur in ligne])
+
+
+def _fichier_xlsx(titre, entetes, lignes):
+    """Classeur en écriture seule (lignes vidées sur disque au fur et à mesure)"""
+    from openpyxl import Workbook
+
+    classeur = Workbook(write_only=True)
+    feuille = classeur.create_sheet(title=titre[:31])
+    feuille.append([_cellule(entete) for entete in entetes])
+    for ligne in lignes:
+        feuille.append([_cellule(valeur) for valeur in ligne])
+
+    fichier = tempfile.TemporaryFile()
+    classeur.save(fichier)
+    fichier.seek(0)
+    return fichier
+
+
+def reponse_export(format_export, nom_fichier, entetes, lignes):
+    """
+    Réponse HTTP exportant `lignes` (un values_list dans l'ordre de `entetes`, ou
+    tout itérable de lignes). Le CSV est envoyé pendant la lecture de la base ;
+    le XLSX est construit dans un fichier temporaire puis envoyé par morceaux.
+    """
+    if hasattr(lignes, 'iterator'):
+        lignes = lignes.iterator(chunk_size=TAILLE_PAQUET)
+    horodatage = timezone.localtime().strftime('%Y%m%d_%H%M')
+
+    if format_export == 'xlsx':
+        fichier = _fichier_xlsx(nom_fichier, entetes, lignes)
+        return FileResponse(
+            fichier,
+            as_attachment=True,
+            filename=f"{nom_fichier}_{horodatage}.xlsx",
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        )
+
+    response = StreamingHttpResponse(_iter_csv(entetes, lignes), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{nom_fichier}_{horodatage}.csv"'
+    return response
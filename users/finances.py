@@ -0,0 +1,137 @@
+"""
+Tableau de bord financier : montants dus, payés et restants des frais
+académiques, par faculté, promotion, niveau et statut.
+
+Les agrégats d'une année académique sont calculés en SQL (quelques GROUP BY)
+puis mis en cache ; le cache de l'année est invalidé à chaque enregistrement
+d'un FraisAcademique et après chaque opération en masse sur les frais.
+"""
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+# Filet de sécurité : changements de faculté / promotion d'un étudiant, update() en masse
+DUREE_CACHE_FINANCES = 900
+
+STATUTS = ('non_paye', 'partiel', 'complet')
+
+# Valeur de filtre des frais sans faculté, promotion ou niveau
+AUCUN = '-'
+
+# Regroupements du tableau : nom -> champs du GROUP BY (depuis FraisAcademique)
+REGROUPEMENTS = {
+    'faculte': ('etudiant__student_profile__faculte__code', 'etudiant__student_profile__faculte__nom'),
+    'promotion': ('etudiant__student_profile__promotion__annee_debut', 'etudiant__student_profile__promotion__annee_fin'),
+    'niveau': ('etudiant__student_profile__niveau',),
+    'statut': ('statut',),
+}
+
+
+def _filtre_et_libelle(nom, valeurs):
+    """(valeur du filtre de la liste détaillée, libellé affiché) d'une ligne groupée"""
+    from .models import FraisAcademique
+
+    if nom == 'statut':
+        return valeurs[0], dict(FraisAcademique._meta.get_field('statut').choices).get(valeurs[0], valeurs[0])
+    if not valeurs[0]:
+        return AUCUN, "Non renseigné"
+    if nom == 'faculte':
+        return valeurs[0], f"{valeurs[0]} — {valeurs[1]}"
+    if nom == 'promotion':
+        promotion = f"{valeurs[0]}-{valeurs[1]}"
+        return promotion, promotion
+    return valeurs[0], valeurs[0]
+
+
+def cle_finances(annee_academique):
+    return f"finances:{annee_academique}"
+
+
+def invalider_finances(*annees):
+    """Invalide les agrégats des années données (après validation de la transaction)"""
+    cles = [cle_finances(annee) for annee in set(annees) if annee]
+    if cles:
+        transaction.on_commit(lambda: cache.delete_many(cles))
+
+
+def _agregats():
+    agregats = {
+        'nombre': Count('id'),
+        'du': Sum('montant_total'),
+        'paye': Sum('montant_paye'),
+    }
+    for statut in STATUTS:
+        agregats[statut] = Count('id', filter=Q(statut=statut))
+    return agregats
+
+
+def _completer(ligne):
+    ligne['du'] = ligne['du'] or Decimal('0')
+    ligne['paye'] = ligne['paye'] or Decimal('0')
+    ligne['restant'] = ligne['du'] - ligne['paye']
+    ligne['taux'] = round(ligne['paye'] * 100 / ligne['du'], 1) if ligne['du'] else None
+    return ligne
+
+
+def _calculer(annee_academique):
+    from .models import FraisAcademique
+
+    frais = FraisAcademique.objects.filter(annee_academique=annee_academique)
+    donnees = {'totaux': _completer(frais.aggregate(**_agregats()))}
+    for nom, champs in REGROUPEMENTS.items():
+        lignes = frais.values(*champs).annotate(**_agregats()).order_by(*champs)
+        donnees[nom] = []
+        for ligne in lignes:
+            filtre, libelle = _filtre_et_libelle(nom, [ligne.pop(champ) for champ in champs])
+            donnees[nom].append(_completer({**ligne, 'filtre': filtre, 'libelle': libelle}))
+    return donnees
+
+
+def tableau_finances(annee_academique):
+    """Agrégats de l'année : {'totaux': {...}, 'faculte': [...], 'promotion': [...], ...}"""
+    cle = cle_finances(annee_academique)
+    donnees = cache.get(cle)
+    if donnees is None:
+        donnees = _calculer(annee_academique)
+        cache.set(cle, donnees, DUREE_CACHE_FINANCES)
+    return donnees
+
+
+def annees_facturees():
+    from .models import FraisAcademique
+
+    return list(
+        FraisAcademique.objects.values_list('annee_academique', flat=True)
+        .distinct().order_by('-annee_academique')
+    )
+
+
+def filtrer_frais(annee_academique, faculte='', promotion='', niveau='', statut=''):
+    """Frais de la liste détaillée (mêmes valeurs de filtre que le tableau)"""
+    from .models import FraisAcademique
+
+    frais = FraisAcademique.objects.filter(annee_academique=annee_academique)
+    if faculte == AUCUN:
+        frais = frais.filter(etudiant__student_profile__faculte__isnull=True)
+    elif faculte:
+        frais = frais.filter(etudiant__student_profile__faculte__code=faculte)
+    if promotion == AUCUN:
+        frais = frais.filter(etudiant__student_profile__promotion__isnull=True)
+    elif promotion:
+        try:
+            annee_debut, annee_fin = (int(annee) for annee in promotion.split('-'))
+        except ValueError:
+            return frais.none()
+        frais = frais.filter(
+            etudiant__student_profile__promotion__annee_debut=annee_debut,
+            etudiant__student_profile__promotion__annee_fin=annee_fin,
+        )
+    if niveau == AUCUN:
+        frais = frais.filter(Q(etudiant__student_profile__niveau='') | Q(etudiant__student_profile__isnull=True))
+    elif niveau:
+        frais = frais.filter(etudiant__student_profile__niveau=niveau)
+    if statut:
+        frais = frais.filter(statut=statut)
+    return frais
@@ -1,7 +1,7 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm, PasswordChangeForm
 from django.contrib.auth import get_user_model
-from .models import CustomUser, StudentProfile, TeacherProfile, Faculte, Promotion
+from .models import CustomUser, StudentProfile, TeacherProfile, Faculte, Promotion, FraisAcademique
 
 User = get_user_model()
 
@@ -295,3 +295,95 @@ class BulkStudentImportForm(forms.Form):
     )
 
 
+
+
+class PassageAnneeForm(forms.Form):
+    """Choix de la faculté et de la promotion qui terminent leur année"""
+    faculte = forms.ModelChoiceField(
+        label="Faculté",
+        queryset=Faculte.objects.filter(is_active=True),
+        empty_label="-- Sélectionner --",
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    promotion = forms.ModelChoiceField(
+        label="Promotion qui se termine",
+        queryset=Promotion.objects.all(),
+        empty_label="-- Sélectionner --",
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    montant_frais = forms.DecimalField(
+        label="Frais de la nouvelle année (USD)",
+        required=False,
+        min_value=0,
+        max_digits=10,
+        decimal_places=2,
+        help_text="Laisser vide pour reconduire le montant de l'année écoulée",
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'})
+    )
+
+
+class GenerationFraisForm(forms.Form):
+    """Génération des frais d'une faculté et d'une promotion, avec un tarif par niveau"""
+    faculte = forms.ModelChoiceField(
+        label="Faculté",
+        queryset=Faculte.objects.filter(is_active=True),
+        empty_label="-- Sélectionner --",
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    promotion = forms.ModelChoiceField(
+        label="Promotion",
+        queryset=Promotion.objects.all(),
+        empty_label="-- Sélectionner --",
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for niveau, libelle in StudentProfile._meta.get_field('niveau').choices:
+            self.fields[f'tarif_{niveau}'] = forms.DecimalField(
+                label=f"Tarif {libelle} (USD)",
+                required=False,
+                min_value=0,
+                max_digits=10,
+                decimal_places=2,
+                widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01', 'placeholder': niveau})
+            )
+
+    @property
+    def champs_tarifs(self):
+        return [self[nom] for nom in self.fields if nom.startswith('tarif_')]
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if not any(cleaned_data.get(nom) is not None for nom in self.fields if nom.startswith('tarif_')):
+            raise forms.ValidationError("Indiquez le tarif d'au moins un niveau.")
+        return cleaned_data
+
+    @property
+    def tarifs(self):
+        return {
+            nom[len('tarif_'):]: valeur
+            for nom, valeur in self.cleaned_data.items()
+            if nom.startswith('tarif_')
+        }
+
+
+class RapprochementPaiementsForm(forms.Form):
+    """Import d'un relevé bancaire ou mobile money (CSV)"""
+    releve = forms.FileField(
+        label="Relevé CSV",
+        help_text="Colonnes : reference et/ou matricule, montant, date (facultative)",
+        widget=forms.FileInput(attrs={'class': 'form-control', 'accept': '.csv'})
+    )
+    annee_academique = forms.RegexField(
+        label="Année académique",
+        regex=r'^\d{4}-\d{4}$',
+        error_messages={'invalid': "Format attendu : 2024-2025"},
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': '2024-2025'})
+    )
+    mode_paiement = forms.ChoiceField(
+        label="Mode de paiement",
+        choices=FraisAcademique._meta.get_field('mode_paiement').choices,
+        initial='virement',
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
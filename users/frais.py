@@ -0,0 +1,303 @@
+"""
+Frais académiques en masse.
+
+- Génération : une ligne FraisAcademique par étudiant d'une faculté et d'une
+  promotion, au tarif de son niveau (les étudiants déjà facturés sont ignorés).
+- Rapprochement : import d'un relevé bancaire ou mobile money (CSV). Chaque
+  ligne est associée à un frais par jointure de hachage en mémoire (référence,
+  puis matricule), les montants sont cumulés par frais puis écrits par
+  bulk_update ; les lignes sans correspondance sont renvoyées dans le rapport.
+"""
+import csv
+import io
+import unicodedata
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .finances import invalider_finances
+
+TAILLE_LOT = 1000
+
+# Colonnes reconnues dans un relevé (en-têtes normalisés : minuscules, sans accents)
+COLONNES_RELEVE = {
+    'reference': ('reference', 'ref', 'reference_paiement', 'transaction', 'id_transaction'),
+    'matricule': ('matricule', 'etudiant'),
+    'montant': ('montant', 'montant_paye', 'amount'),
+    'date': ('date', 'date_paiement', 'date_operation'),
+}
+
+FORMATS_DATE = ('%Y-%m-%d', '%d/%m/%Y', '%Y-%m-%d %H:%M:%S', '%d/%m/%Y %H:%M')
+
+
+def generer_frais(faculte, promotion, tarifs, annee_academique=None):
+    """
+    Crée les frais de l'année pour les étudiants de la faculté et de la promotion.
+    `tarifs` : {niveau: montant}. Retourne {'crees', 'existants', 'sans_tarif'}.
+    """
+    from .models import FraisAcademique, StudentProfile
+
+    annee = annee_academique or str(promotion)
+    tarifs = {niveau: montant for niveau, montant in tarifs.items() if montant is not None}
+    etudiants = StudentProfile.objects.filter(
+        faculte=faculte, promotion=promotion, user__user_type='etudiant'
+    ).values_list('user_id', 'niveau')
+
+    with transaction.atomic():
+        # Jointure plutôt qu'une clause IN : reste valable pour des dizaines de milliers d'étudiants
+        deja_factures = set(
+            FraisAcademique.objects.filter(
+                annee_academique=annee,
+                etudiant__student_profile__faculte=faculte,
+                etudiant__student_profile__promotion=promotion,
+            ).values_list('etudiant_id', flat=True)
+        )
+        frais = []
+        sans_tarif = 0
+        for etudiant_id, niveau in etudiants.iterator(chunk_size=TAILLE_LOT):
+            if etudiant_id in deja_factures:
+                continue
+            if niveau not in tarifs:
+                sans_tarif += 1
+                continue
+            # bulk_create ne passe pas par FraisAcademique.save() : statut fixé ici
+            frais.append(FraisAcademique(
+                etudiant_id=etudiant_id,
+                annee_academique=annee,
+                montant_total=tarifs[niveau],
+                statut=FraisAcademique.calculer_statut(tarifs[niveau], 0),
+            ))
+        FraisAcademique.objects.bulk_create(frais, batch_size=TAILLE_LOT, ignore_conflicts=True)
+        invalider_finances(annee)
+
+    return {'crees': len(frais), 'existants': len(deja_factures), 'sans_tarif': sans_tarif}
+
+
+def _normaliser(entete):
+    entete = unicodedata.normalize('NFKD', entete or '').encode('ascii', 'ignore').decode()
+    return entete.strip().lower().replace(' ', '_').replace('-', '_')
+
+
+def _lire_montant(valeur):
+    from .models import FraisAcademique
+
+    valeur = (valeur or '').strip().replace('\xa0', '').replace(' ', '')
+    # Séparateur décimal : le dernier de ',' ou '.' (1.234,50 ou 1,234.50)
+    if valeur.rfind(',') > valeur.rfind('.'):
+        valeur = valeur.replace('.', '').replace(',', '.')
+    else:
+        valeur = valeur.replace(',', '')
+    try:
+        montant = Decimal(valeur)
+    except InvalidOperation:
+        return None
+    # NaN, infini ou trop grand pour les colonnes de montant : ligne rejetée
+    champ = FraisAcademique._meta.get_field('montant_total')
+    if not montant.is_finite() or not 0 < montant < 10 ** (champ.max_digits - champ.decimal_places):
+        return None
+    return montant.quantize(Decimal(1).scaleb(-champ.decimal_places))
+
+
+def _lire_date(valeur):
+    valeur = (valeur or '').strip()
+    if not valeur:
+        return timezone.now()
+    for format_date in FORMATS_DATE:
+        try:
+            return timezone.make_aware(datetime.strptime(valeur, format_date))
+        except ValueError:
+            continue
+    return None
+
+
+def lire_releve(fichier):
+    """Lignes du relevé : liste de dicts (numero, reference, matricule, montant, date, brut)"""
+    contenu = fichier.read()
+    if isinstance(contenu, bytes):
+        contenu = contenu.decode('utf-8-sig')
+    try:
+        dialecte = csv.Sniffer().sniff(contenu[:4096], delimiters=',;\t')
+    except csv.Error:
+        dialecte = csv.excel
+    lecteur = csv.reader(io.StringIO(contenu), dialecte)
+
+    entetes = [_normaliser(entete) for entete in next(lecteur, [])]
+    positions = {}
+    for champ, alias in COLONNES_RELEVE.items():
+        for nom in alias:
+            if nom in entetes:
+                positions[champ] = entetes.index(nom)
+                break
+    if 'montant' not in positions or not ({'reference', 'matricule'} & set(positions)):
+        raise ValueError("Le relevé doit contenir une colonne « montant » et une colonne « reference » ou « matricule ».")
+
+    lignes = []
+    for numero, valeurs in enumerate(lecteur, start=2):
+        if not any(valeur.strip() for valeur in valeurs):
+            continue
+        brut = {
+            champ: valeurs[position].strip() if position < len(valeurs) else ''
+            for champ, position in positions.items()
+        }
+        lignes.append({
+            'numero': numero,
+            'reference': brut.get('reference', ''),
+            'matricule': brut.get('matricule', ''),
+            'montant': _lire_montant(brut.get('montant')),
+            'date': _lire_date(brut.get('date')),
+            'brut': brut,
+        })
+    return lignes
+
+
+def _references_importees(references):
+    from .models import PaiementFrais
+
+    references = list(references)
+    importees = set()
+    for debut in range(0, len(references), TAILLE_LOT):
+        importees.update(
+            PaiementFrais.objects.filter(reference__in=references[debut:debut + TAILLE_LOT])
+            .values_list('reference', flat=True)
+        )
+    return importees
+
+
+def rapprocher_paiements(fichier, annee_academique, mode_paiement=''):
+    """
+    Impute les paiements du relevé aux frais de l'année.
+    Retourne le rapport : lignes lues, rapprochées, montant imputé, frais mis à
+    jour, lignes déjà importées et lignes non rapprochées (avec le motif).
+    Si l'import n'a pas pu être enregistré, rien n'est imputé et `erreur`
+    en donne la raison.
+    """
+    lignes = lire_releve(fichier)
+    for _ in range(2):
+        try:
+            return _imputer_paiements(lignes, annee_academique, mode_paiement)
+        except IntegrityError:
+            # Un import concurrent a enregistré une de ces références entre la
+            # vérification et l'insertion : au second passage elle est comptée
+            # comme déjà importée
+            continue
+
+    rapport = _rapport_vide(lignes)
+    rapport['erreur'] = (
+        "Des références de ce relevé ont été importées en même temps par un autre import ; "
+        "aucun paiement n'a été imputé, veuillez relancer le rapprochement."
+    )
+    return rapport
+
+
+def _rapport_vide(lignes):
+    return {
+        'lignes': len(lignes),
+        'rapprochees': 0,
+        'montant_impute': Decimal('0'),
+        'frais_mis_a_jour': 0,
+        'deja_importees': 0,
+        'non_rapprochees': [],
+        'erreur': '',
+    }
+
+
+def _imputer_paiements(lignes, annee_academique, mode_paiement):
+    """Rapprochement proprement dit, dans une transaction annulée en bloc en cas d'erreur"""
+    from .models import FraisAcademique, PaiementFrais
+
+    rapport = _rapport_vide(lignes)
+    longueur_reference = PaiementFrais._meta.get_field('reference').max_length
+
+    def rejeter(ligne, motif):
+        rapport['non_rapprochees'].append({
+            'numero': ligne['numero'],
+            'reference': ligne['reference'],
+            'matricule': ligne['matricule'],
+            'montant': ligne['brut'].get('montant', ''),
+            'motif': motif,
+        })
+
+    maintenant = timezone.now()
+
+    with transaction.atomic():
+        importees = _references_importees({
+            ligne['reference'] for ligne in lignes
+            if ligne['reference'] and len(ligne['reference']) <= longueur_reference
+        })
+
+        # Table de hachage des frais de l'année : référence -> frais, matricule -> frais
+        frais_annee = list(
+            FraisAcademique.objects.select_for_update(of=('self',))
+            .filter(annee_academique=annee_academique)
+            .select_related('etudiant')
+            .only(
+                'id', 'montant_total', 'montant_paye', 'statut', 'date_paiement',
+                'mode_paiement', 'reference_paiement', 'etudiant__matricule',
+            )
+        )
+        par_reference = {frais.reference_paiement: frais for frais in frais_annee if frais.reference_paiement}
+        par_matricule = {frais.etudiant.matricule: frais for frais in frais_annee}
+
+        vues = set()
+        modifies = {}
+        paiements = []
+        for ligne in lignes:
+            reference = ligne['reference']
+            if reference and len(reference) > longueur_reference:
+                rejeter(ligne, f"Référence trop longue ({longueur_reference} caractères au plus)")
+                continue
+            if ligne['montant'] is None:
+                rejeter(ligne, "Montant invalide")
+                continue
+            if ligne['date'] is None:
+                rejeter(ligne, "Date invalide")
+                continue
+            if reference and reference in importees:
+                rapport['deja_importees'] += 1
+                continue
+            if reference and reference in vues:
+                rejeter(ligne, "Référence en double dans le relevé")
+                continue
+            frais = par_reference.get(reference) if reference else None
+            if frais is None:
+                frais = par_matricule.get(ligne['matricule'])
+            if frais is None:
+                rejeter(ligne, f"Aucun frais {annee_academique} pour cette référence ou ce matricule")
+                continue
+
+            if reference:
+                vues.add(reference)
+            frais.montant_paye += ligne['montant']
+            if frais.date_paiement is None or ligne['date'] > frais.date_paiement:
+                frais.date_paiement = ligne['date']
+            if mode_paiement:
+                frais.mode_paiement = mode_paiement
+            if reference and not frais.reference_paiement:
+                frais.reference_paiement = reference
+            modifies[frais.id] = frais
+            paiements.append(PaiementFrais(
+                frais_id=frais.id,
+                reference=reference or None,
+                montant=ligne['montant'],
+                date_paiement=ligne['date'],
+                mode_paiement=mode_paiement,
+            ))
+            rapport['rapprochees'] += 1
+            rapport['montant_impute'] += ligne['montant']
+
+        # bulk_update ne passe pas par FraisAcademique.save() : statut recalculé ici
+        for frais in modifies.values():
+            frais.statut = FraisAcademique.calculer_statut(frais.montant_total, frais.montant_paye)
+            frais.updated_at = maintenant
+        PaiementFrais.objects.bulk_create(paiements, batch_size=TAILLE_LOT)
+        FraisAcademique.objects.bulk_update(
+            list(modifies.values()),
+            ['montant_paye', 'statut', 'date_paiement', 'mode_paiement', 'reference_paiement', 'updated_at'],
+            batch_size=TAILLE_LOT,
+        )
+        rapport['frais_mis_a_jour'] = len(modifies)
+        invalider_finances(annee_academique)
+
+    return rapport
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from users.statistiques import enregistrer_instantane, invalider_indicateurs
+
+
+class Command(BaseCommand):
+    help = "Enregistre l'instantané quotidien des indicateurs du tableau de bord (à planifier, ex: cron nocturne)"
+
+    def handle(self, *args, **options):
+        instantane = enregistrer_instantane()
+        invalider_indicateurs()
+        self.stdout.write(self.style.SUCCESS(
+            f"Instantané du {instantane.date:%d/%m/%Y} enregistré : {instantane.total_etudiants} étudiants, "
+            f"{instantane.total_enseignants} enseignants."
+        ))
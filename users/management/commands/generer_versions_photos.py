@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from users.models import StudentProfile
+from users.taches import generer_versions_photo
+
+
+class Command(BaseCommand):
+    help = "Génère les versions redimensionnées des photos de profil qui n'en ont pas encore"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tout', action='store_true', help="Régénérer les versions de toutes les photos")
+
+    def handle(self, *args, **options):
+        profils = StudentProfile.objects.exclude(photo='').exclude(photo__isnull=True)
+
+        total = 0
+        for profil in profils.only('photo', 'photo_versions').iterator():
+            if not options['tout'] and profil.photo_versions.get('source') == profil.photo.name:
+                continue
+            if options['tout']:
+                # Forcer la régénération même si le contenu n'a pas changé
+                StudentProfile.objects.filter(pk=profil.pk).update(photo_empreinte='')
+            generer_versions_photo(profil.pk, profil.photo.name)
+            total += 1
+
+        self.stdout.write(self.style.SUCCESS(f"{total} photo(s) traitée(s)."))
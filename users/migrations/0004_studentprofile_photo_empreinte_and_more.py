@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-19 19:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_fraisacademique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentprofile',
+            name='photo_empreinte',
+            field=models.CharField(blank=True, help_text='Empreinte SHA-256 de la photo dont les versions ont été générées', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='studentprofile',
+            name='photo_versions',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
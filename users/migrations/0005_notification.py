@@ -0,0 +1,35 @@
+# Generated by Django 5.0.6 on 2026-10-19 19:18
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_studentprofile_photo_empreinte_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type_notification', models.CharField(choices=[('travail', 'Travail publié'), ('note', 'Note publiée'), ('memoire', 'Mémoire'), ('support', 'Support de cours'), ('rappel', 'Rappel')], max_length=20)),
+                ('titre', models.CharField(max_length=200)),
+                ('contenu', models.TextField(blank=True)),
+                ('lien', models.CharField(blank=True, help_text='Page à ouvrir depuis la notification', max_length=255)),
+                ('is_read', models.BooleanField(default=False)),
+                ('date_creation', models.DateTimeField(default=django.utils.timezone.now)),
+                ('destinataire', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Notification',
+                'verbose_name_plural': 'Notifications',
+                'ordering': ['-date_creation'],
+                'indexes': [models.Index(fields=['destinataire', 'is_read'], name='users_notif_destina_00694c_idx'), models.Index(fields=['destinataire', '-date_creation'], name='users_notif_destina_eadea4_idx')],
+            },
+        ),
+    ]
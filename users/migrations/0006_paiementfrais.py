@@ -0,0 +1,32 @@
+# Generated by Django 5.0.6 on 2026-10-19 19:47
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_notification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaiementFrais',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reference', models.CharField(blank=True, help_text='Référence de la transaction sur le relevé', max_length=100, null=True, unique=True)),
+                ('montant', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('date_paiement', models.DateTimeField(default=django.utils.timezone.now)),
+                ('mode_paiement', models.CharField(blank=True, max_length=50)),
+                ('date_import', models.DateTimeField(auto_now_add=True)),
+                ('frais', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='paiements', to='users.fraisacademique')),
+            ],
+            options={
+                'verbose_name': 'Paiement de frais',
+                'verbose_name_plural': 'Paiements de frais',
+                'ordering': ['-date_paiement'],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.6 on 2026-10-19 19:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_paiementfrais'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='fraisacademique',
+            index=models.Index(fields=['annee_academique', 'statut'], name='users_frais_annee_a_178b98_idx'),
+        ),
+    ]
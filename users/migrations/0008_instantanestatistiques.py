@@ -0,0 +1,34 @@
+# Generated by Django 5.0.6 on 2026-10-19 19:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_fraisacademique_annee_statut_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InstantaneStatistiques',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('total_etudiants', models.PositiveIntegerField(default=0)),
+                ('etudiants_actifs', models.PositiveIntegerField(default=0)),
+                ('total_enseignants', models.PositiveIntegerField(default=0)),
+                ('premiere_connexion_en_attente', models.PositiveIntegerField(default=0)),
+                ('total_facultes', models.PositiveIntegerField(default=0)),
+                ('facultes_actives', models.PositiveIntegerField(default=0)),
+                ('total_promotions', models.PositiveIntegerField(default=0)),
+                ('promotions_actives', models.PositiveIntegerField(default=0)),
+                ('date_calcul', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Instantané des statistiques',
+                'verbose_name_plural': 'Instantanés des statistiques',
+                'ordering': ['-date'],
+            },
+        ),
+    ]
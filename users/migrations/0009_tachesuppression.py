@@ -0,0 +1,42 @@
+# Generated by Django 5.0.6 on 2026-10-19 19:58
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_instantanestatistiques'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TacheSuppression',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('type_objet', models.CharField(choices=[('faculte', 'Faculté'), ('cours', 'Cours'), ('etudiant', 'Étudiant'), ('enseignant', 'Enseignant')], max_length=20)),
+                ('objet_id', models.PositiveIntegerField()),
+                ('libelle', models.CharField(help_text="Désignation de l'objet supprimé", max_length=255)),
+                ('statut', models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('terminee', 'Terminée'), ('erreur', 'Erreur')], default='en_attente', max_length=20)),
+                ('etape', models.CharField(blank=True, help_text='Table en cours de traitement', max_length=100)),
+                ('lignes_total', models.PositiveIntegerField(default=0)),
+                ('lignes_supprimees', models.PositiveIntegerField(default=0)),
+                ('fichiers_supprimes', models.PositiveIntegerField(default=0)),
+                ('message_erreur', models.TextField(blank=True)),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+                ('date_modification', models.DateTimeField(auto_now=True)),
+                ('date_debut', models.DateTimeField(blank=True, null=True)),
+                ('date_fin', models.DateTimeField(blank=True, null=True)),
+                ('demandee_par', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='suppressions_demandees', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Tâche de suppression',
+                'verbose_name_plural': 'Tâches de suppression',
+                'ordering': ['-date_creation'],
+                'indexes': [models.Index(fields=['type_objet', 'objet_id', 'statut'], name='users_tache_type_ob_10ac36_idx')],
+            },
+        ),
+    ]
@@ -6,6 +6,7 @@ from PIL import Image
 from io import BytesIO
 from django.core.files.uploadedfile import InMemoryUploadedFile
 import sys
+import uuid
 
 
 class Faculte(models.Model):
@@ -25,6 +26,19 @@ class Faculte(models.Model):
     def __str__(self):
         return f"{self.code} - {self.nom}"
 
+    def save(self, *args, **kwargs):
+        from .statistiques import invalider_indicateurs
+
+        super().save(*args, **kwargs)
+        invalider_indicateurs()
+
+    def delete(self, *args, **kwargs):
+        from .statistiques import invalider_indicateurs
+
+        resultat = super().delete(*args, **kwargs)
+        invalider_indicateurs()
+        return resultat
+
 
 class Promotion(models.Model):
     """Modèle pour gérer les promotions"""
@@ -47,6 +61,19 @@ class Promotion(models.Model):
     def nom_complet(self):
         return f"{self.annee_debut}-{self.annee_fin}"
 
+    def save(self, *args, **kwargs):
+        from .statistiques import invalider_indicateurs
+
+        super().save(*args, **kwargs)
+        invalider_indicateurs()
+
+    def delete(self, *args, **kwargs):
+        from .statistiques import invalider_indicateurs
+
+        resultat = super().delete(*args, **kwargs)
+        invalider_indicateurs()
+        return resultat
+
 
 class CustomUser(AbstractUser):
     """
@@ -124,6 +151,22 @@ class CustomUser(AbstractUser):
     
     def __str__(self):
         return f"{self.matricule} - {self.get_full_name() or self.username}"
+
+    def save(self, *args, **kwargs):
+        """Invalide les indicateurs du tableau de bord (sauf simple mise à jour de last_login)"""
+        from .statistiques import invalider_indicateurs
+
+        update_fields = kwargs.get('update_fields')
+        super().save(*args, **kwargs)
+        if update_fields is None or not set(update_fields) <= {'last_login'}:
+            invalider_indicateurs()
+
+    def delete(self, *args, **kwargs):
+        from .statistiques import invalider_indicateurs
+
+        resultat = super().delete(*args, **kwargs)
+        invalider_indicateurs()
+        return resultat
     
     def get_display_name(self):
         """Retourne le nom d'affichage complet"""
@@ -229,6 +272,14 @@ class StudentProfile(models.Model):
         blank=True,
         help_text="Téléphone d'urgence"
     )
+
+    # Versions redimensionnées : {'source': photo, 'tailles': {taille: {'webp': nom, 'jpeg': nom}}}
+    photo_versions = models.JSONField(default=dict, blank=True)
+    photo_empreinte = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text="Empreinte SHA-256 de la photo dont les versions ont été générées"
+    )
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -240,40 +291,80 @@ class StudentProfile(models.Model):
     def __str__(self):
         return f"Profil de {self.user.get_display_name()}"
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Nom de la photo et cohorte au chargement : la photo n'est retraitée et les
+        # inscriptions complétées que si elles changent. Lues dans __dict__ pour ne pas
+        # charger des champs différés par .only() (None : photo différée)
+        champs = self.__dict__
+        photo = champs.get('photo', models.DEFERRED)
+        self._photo_initiale = None if photo is models.DEFERRED else (getattr(photo, 'name', photo) or '')
+        self._cohorte_initiale = (
+            (champs.get('faculte_id'), champs.get('promotion_id'), champs.get('niveau')) if self.pk else None
+        )
+
+    def photo_a_change(self):
+        """Vrai si un nouveau fichier photo a été affecté depuis le chargement"""
+        if 'photo' not in self.__dict__:
+            # Photo différée et jamais lue ni affectée : inchangée
+            return False
+        if self._photo_initiale is None:
+            # Photo différée au chargement puis lue : seul un nouveau fichier compte
+            return bool(self.photo) and not self.photo._committed
+        if not self.photo:
+            return bool(self._photo_initiale)
+        return not self.photo._committed or self.photo.name != self._photo_initiale
+
     def save(self, *args, **kwargs):
         """
-        Sauvegarde du profil avec post-traitement de la photo:
-        - recadrage centre en carré
-        - redimensionnement doux à 256x256
+        Sauvegarde du profil. Les versions redimensionnées de la photo ne sont
+        générées (en arrière-plan) que lorsque le fichier a réellement changé ;
+        de même, l'étudiant n'est inscrit aux cours et UE que si sa cohorte change.
         """
+        photo_modifiee = self.photo_a_change()
+        cohorte = (self.faculte_id, self.promotion_id, self.niveau)
+        nouvelle_cohorte = cohorte != self._cohorte_initiale
         super().save(*args, **kwargs)
+        self._cohorte_initiale = cohorte
+
+        from televersements.taches import soumettre_tache
+        if photo_modifiee:
+            from .taches import generer_versions_photo
+            self._photo_initiale = self.photo.name if self.photo else ''
+            soumettre_tache(generer_versions_photo, self.pk, self._photo_initiale)
 
-        if self.photo and self.photo.name:
-            try:
-                from PIL import Image
-                import os
-                from django.conf import settings
-
-                photo_path = self.photo.path
-                with Image.open(photo_path) as img:
-                    img = img.convert('RGB')
-                    width, height = img.size
-                    # recadrage centre carré
-                    min_edge = min(width, height)
-                    left = (width - min_edge) // 2
-                    top = (height - min_edge) // 2
-                    right = left + min_edge
-                    bottom = top + min_edge
-                    img = img.crop((left, top, right, bottom))
-
-                    # redimensionner à 256x256
-                    img = img.resize((256, 256), Image.LANCZOS)
-
-                    # réécrire le fichier (JPEG)
-                    img.save(photo_path, format='JPEG', quality=90)
-            except Exception:
-                # En cas de problème d'image, on ne bloque pas la sauvegarde
-                pass
+        if nouvelle_cohorte:
+            from cours.inscriptions import inscrire_cohorte
+            soumettre_tache(inscrire_cohorte, *cohorte, etudiant_ids=[self.user_id])
+
+    def _versions_photo(self, taille):
+        """URLs {webp, jpeg} d'une version de la photo, ou de l'original à défaut"""
+        if not self.photo:
+            return None
+        # Versions absentes ou générées pour une photo précédente : on sert l'original
+        if self.photo_versions.get('source') != self.photo.name:
+            return {'webp': '', 'jpeg': self.photo.url}
+        from django.core.files.storage import default_storage
+        version = self.photo_versions['tailles'][taille]
+        return {
+            'webp': default_storage.url(version['webp']),
+            'jpeg': default_storage.url(version['jpeg']),
+        }
+
+    @property
+    def photo_avatar(self):
+        """Petite version (barre de navigation)"""
+        return self._versions_photo('avatar')
+
+    @property
+    def photo_vignette(self):
+        """Version intermédiaire (listes, tableau de bord)"""
+        return self._versions_photo('vignette')
+
+    @property
+    def photo_carte(self):
+        """Grande version (page de profil, fiche étudiant)"""
+        return self._versions_photo('carte')
 
 
 class TeacherProfile(models.Model):
@@ -403,6 +494,9 @@ class FraisAcademique(models.Model):
         verbose_name_plural = "Frais Académiques"
         ordering = ['-annee_academique', 'etudiant']
         unique_together = ['etudiant', 'annee_academique']
+        indexes = [
+            models.Index(fields=['annee_academique', 'statut']),
+        ]
     
     def __str__(self):
         return f"{self.etudiant.matricule} - {self.annee_academique} - {self.get_statut_display()}"
@@ -419,12 +513,189 @@ class FraisAcademique(models.Model):
             return (self.montant_paye / self.montant_total) * 100
         return 0
     
+    @staticmethod
+    def calculer_statut(montant_total, montant_paye):
+        """Statut correspondant aux montants (utilisé aussi par les mises à jour en masse)"""
+        if montant_paye >= montant_total:
+            return 'complet'
+        elif montant_paye > 0:
+            return 'partiel'
+        return 'non_paye'
+
     def save(self, *args, **kwargs):
-        """Met à jour le statut automatiquement"""
-        if self.montant_paye >= self.montant_total:
-            self.statut = 'complet'
-        elif self.montant_paye > 0:
-            self.statut = 'partiel'
-        else:
-            self.statut = 'non_paye'
+        """Met à jour le statut automatiquement et invalide le tableau de bord financier de l'année"""
+        from .finances import invalider_finances
+
+        self.statut = self.calculer_statut(self.montant_total, self.montant_paye)
         super().save(*args, **kwargs)
+        invalider_finances(self.annee_academique)
+
+    def delete(self, *args, **kwargs):
+        from .finances import invalider_finances
+
+        annee = self.annee_academique
+        resultat = super().delete(*args, **kwargs)
+        invalider_finances(annee)
+        return resultat
+
+
+class PaiementFrais(models.Model):
+    """
+    Paiement importé d'un relevé bancaire ou mobile money.
+    La référence unique empêche d'imputer deux fois la même ligne de relevé.
+    """
+    frais = models.ForeignKey(
+        FraisAcademique,
+        on_delete=models.CASCADE,
+        related_name='paiements'
+    )
+    reference = models.CharField(
+        max_length=100,
+        unique=True,
+        null=True,
+        blank=True,
+        help_text="Référence de la transaction sur le relevé"
+    )
+    montant = models.DecimalField(max_digits=10, decimal_places=2)
+    date_paiement = models.DateTimeField(default=timezone.now)
+    mode_paiement = models.CharField(max_length=50, blank=True)
+    date_import = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Paiement de frais"
+        verbose_name_plural = "Paiements de frais"
+        ordering = ['-date_paiement']
+
+    def __str__(self):
+        return f"{self.reference or '-'} - {self.montant}"
+
+
+class Notification(models.Model):
+    """
+    Notification persistante adressée à un utilisateur.
+    Les notifications d'une cohorte sont créées en masse (voir users/notifications.py).
+    """
+    TYPE_NOTIFICATION_CHOICES = [
+        ('travail', 'Travail publié'),
+        ('note', 'Note publiée'),
+        ('memoire', 'Mémoire'),
+        ('support', 'Support de cours'),
+        ('rappel', 'Rappel'),
+    ]
+
+    destinataire = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name='notifications'
+    )
+    type_notification = models.CharField(max_length=20, choices=TYPE_NOTIFICATION_CHOICES)
+    titre = models.CharField(max_length=200)
+    contenu = models.TextField(blank=True)
+    lien = models.CharField(max_length=255, blank=True, help_text="Page à ouvrir depuis la notification")
+    is_read = models.BooleanField(default=False)
+    date_creation = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Notification"
+        verbose_name_plural = "Notifications"
+        ordering = ['-date_creation']
+        indexes = [
+            models.Index(fields=['destinataire', 'is_read']),
+            models.Index(fields=['destinataire', '-date_creation']),
+        ]
+
+    def __str__(self):
+        return f"{self.destinataire.matricule} - {self.titre}"
+
+
+class InstantaneStatistiques(models.Model):
+    """
+    Instantané quotidien des indicateurs du tableau de bord administrateur.
+    Une ligne par jour (voir users/statistiques.py) : série utilisée pour les tendances.
+    """
+    date = models.DateField(unique=True)
+    total_etudiants = models.PositiveIntegerField(default=0)
+    etudiants_actifs = models.PositiveIntegerField(default=0)
+    total_enseignants = models.PositiveIntegerField(default=0)
+    premiere_connexion_en_attente = models.PositiveIntegerField(default=0)
+    total_facultes = models.PositiveIntegerField(default=0)
+    facultes_actives = models.PositiveIntegerField(default=0)
+    total_promotions = models.PositiveIntegerField(default=0)
+    promotions_actives = models.PositiveIntegerField(default=0)
+    date_calcul = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Instantané des statistiques"
+        verbose_name_plural = "Instantanés des statistiques"
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"Statistiques du {self.date:%d/%m/%Y}"
+
+
+class TacheSuppression(models.Model):
+    """
+    Suppression en arrière-plan d'un objet et de tout ce qui en dépend
+    (voir users/suppression.py) : suppression par lots et suivi de l'avancement.
+    """
+    TYPE_CHOICES = [
+        ('faculte', 'Faculté'),
+        ('cours', 'Cours'),
+        ('etudiant', 'Étudiant'),
+        ('enseignant', 'Enseignant'),
+    ]
+
+    STATUT_CHOICES = [
+        ('en_attente', 'En attente'),
+        ('en_cours', 'En cours'),
+        ('terminee', 'Terminée'),
+        ('erreur', 'Erreur'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    type_objet = models.CharField(max_length=20, choices=TYPE_CHOICES)
+    objet_id = models.PositiveIntegerField()
+    libelle = models.CharField(max_length=255, help_text="Désignation de l'objet supprimé")
+    demandee_par = models.ForeignKey(
+        CustomUser,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='suppressions_demandees'
+    )
+
+    # Avancement
+    statut = models.CharField(max_length=20, choices=STATUT_CHOICES, default='en_attente')
+    etape = models.CharField(max_length=100, blank=True, help_text="Table en cours de traitement")
+    lignes_total = models.PositiveIntegerField(default=0)
+    lignes_supprimees = models.PositiveIntegerField(default=0)
+    fichiers_supprimes = models.PositiveIntegerField(default=0)
+    message_erreur = models.TextField(blank=True)
+
+    # Dates
+    date_creation = models.DateTimeField(auto_now_add=True)
+    date_modification = models.DateTimeField(auto_now=True)
+    date_debut = models.DateTimeField(null=True, blank=True)
+    date_fin = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Tâche de suppression"
+        verbose_name_plural = "Tâches de suppression"
+        ordering = ['-date_creation']
+        indexes = [
+            models.Index(fields=['type_objet', 'objet_id', 'statut']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_type_objet_display()} {self.libelle} ({self.get_statut_display()})"
+
+    @property
+    def pourcentage(self):
+        if self.statut == 'terminee':
+            return 100
+        if self.lignes_total > 0:
+            return min(round(self.lignes_supprimees * 100 / self.lignes_total, 1), 99.9)
+        return 0
+
+    def is_active(self):
+        return self.statut in ('en_attente', 'en_cours')
@@ -0,0 +1,162 @@
+"""
+Création des notifications (fan-out à l'écriture) et compteur de non lues en cache
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.urls import reverse
+
+from .models import CustomUser, Notification
+
+# Nombre de notifications insérées par requête
+TAILLE_LOT = 500
+
+# Durée de vie du compteur de non lues en cache (secondes)
+DUREE_CACHE_COMPTEUR = 300
+
+
+def _cle_compteur(user_id):
+    return f"notifications:non_lues:{user_id}"
+
+
+def compter_non_lues(user):
+    """Nombre de notifications non lues, lu depuis le cache (COUNT seulement en cas d'absence)"""
+    cle = _cle_compteur(user.pk)
+    total = cache.get(cle)
+    if total is None:
+        total = Notification.objects.filter(destinataire=user, is_read=False).count()
+        cache.set(cle, total, DUREE_CACHE_COMPTEUR)
+    return total
+
+
+def invalider_compteurs(user_ids):
+    cache.delete_many([_cle_compteur(user_id) for user_id in user_ids])
+
+
+def etudiants_cohorte(faculte=None, promotion=None, niveau=None):
+    """Identifiants des étudiants actifs d'une cohorte (critères vides ignorés)"""
+    etudiants = CustomUser.objects.filter(user_type='etudiant', is_active=True)
+    if faculte:
+        etudiants = etudiants.filter(student_profile__faculte=faculte)
+    if promotion:
+        etudiants = etudiants.filter(student_profile__promotion=promotion)
+    if niveau:
+        etudiants = etudiants.filter(student_profile__niveau=niveau)
+    return etudiants.values_list('id', flat=True)
+
+
+def etudiants_du_cours(cours):
+    """Étudiants concernés par un cours, selon les mêmes règles que student_cours_detail"""
+    return etudiants_cohorte(cours.faculte_id, cours.promotion_id, cours.niveau)
+
+
+def notifier(destinataires, type_notification, titre, contenu='', lien=''):
+    """
+    Crée une notification pour chaque destinataire (identifiants) par lots de
+    TAILLE_LOT, puis invalide leurs compteurs une fois la transaction validée.
+    Retourne le nombre de notifications créées.
+    """
+    ids = list(dict.fromkeys(destinataires))
+    if not ids:
+        return 0
+
+    with transaction.atomic():
+        for debut in range(0, len(ids), TAILLE_LOT):
+            Notification.objects.bulk_create([
+                Notification(
+                    destinataire_id=user_id,
+                    type_notification=type_notification,
+                    titre=titre,
+                    contenu=contenu,
+                    lien=lien,
+                )
+                for user_id in ids[debut:debut + TAILLE_LOT]
+            ])
+        transaction.on_commit(lambda: invalider_compteurs(ids))
+
+    return len(ids)
+
+
+def marquer_lues(user, notification_ids=None):
+    """Marque comme lues les notifications indiquées (ou toutes) d'un utilisateur"""
+    notifications = Notification.objects.filter(destinataire=user, is_read=False)
+    if notification_ids is not None:
+        notifications = notifications.filter(id__in=notification_ids)
+    total = notifications.update(is_read=True)
+    if total:
+        invalider_compteurs([user.pk])
+    return total
+
+
+def notifier_travail_publie(travail):
+    """Prévient les étudiants de la cohorte du cours qu'un travail est publié"""
+    if not travail.is_visible_etudiants:
+        return 0
+    if travail.cours_id:
+        destinataires = etudiants_du_cours(travail.cours)
+        lien = reverse('student_cours_detail', args=[travail.cours_id])
+    else:
+        destinataires = etudiants_cohorte(niveau=travail.niveau)
+        lien = reverse('student_travaux')
+    return notifier(
+        destinataires,
+        'travail',
+        f"Nouveau travail : {travail.titre}",
+        f"{travail.get_type_travail_display()} à rendre avant le {travail.date_limite_remise:%d/%m/%Y %H:%M}.",
+        lien,
+    )
+
+
+def notifier_support_ajoute(support):
+    """Prévient les étudiants de la cohorte du cours qu'un support est disponible"""
+    if not support.is_public:
+        return 0
+    cours = support.cours
+    return notifier(
+        etudiants_du_cours(cours),
+        'support',
+        f"Nouveau support en {cours.code}",
+        f"« {support.titre} » a été ajouté au cours {cours.titre}.",
+        reverse('student_cours_detail', args=[cours.id]),
+    )
+
+
+def notifier_notes_publiees(notes):
+    """Une notification par note publiée, créées en une seule série d'insertions"""
+    lien = reverse('resultats:student_resultats')
+    notifications = [
+        Notification(
+            destinataire_id=note.etudiant_id,
+            type_notification='note',
+            titre=f"Note publiée : {note.ue.code}",
+            contenu=f"Votre note « {note.titre} » en {note.ue.nom} est disponible.",
+            lien=lien,
+        )
+        for note in notes if note.is_publie
+    ]
+    if not notifications:
+        return 0
+
+    with transaction.atomic():
+        Notification.objects.bulk_create(notifications, batch_size=TAILLE_LOT)
+        ids = {notification.destinataire_id for notification in notifications}
+        transaction.on_commit(lambda: invalider_compteurs(ids))
+    return len(notifications)
+
+
+def notifier_memoire_valide(memoire):
+    """Prévient l'étudiant et son encadrement de la validation du sujet"""
+    destinataires = [memoire.etudiant_id, memoire.directeur_id, memoire.encadreur_id]
+    etudiant = notifier(
+        [memoire.etudiant_id],
+        'memoire',
+        "Sujet de mémoire validé",
+        f"Votre sujet « {memoire.titre} » a été validé. Vous pouvez déposer votre mémoire.",
+        reverse('memoires:student_memoire_dashboard'),
+    )
+    encadrement = notifier(
+        [user_id for user_id in destinataires[1:] if user_id],
+        'memoire',
+        "Nouvel encadrement de mémoire",
+        f"Vous encadrez le mémoire « {memoire.titre} » de {memoire.etudiant.get_full_name()}.",
+    )
+    return etudiant + encadrement
@@ -0,0 +1,236 @@
+"""
+Passage d'année : fin d'année académique d'une faculté.
+
+Chaque étudiant de la promotion (année académique) est classé d'après les
+décisions de ses cotes de l'année : admis à tous les semestres -> niveau
+suivant, sinon -> redoublement. Les groupes sont calculés par agrégation SQL
+et opérations d'ensembles, puis appliqués par quelques UPDATE / INSERT en masse
+dans une seule transaction.
+"""
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+NIVEAU_SUIVANT = {'L1': 'L2', 'L2': 'L3', 'L3': 'M1', 'M1': 'M2'}
+
+# Issue de l'année pour un étudiant
+PASSE = 'passe'
+REDOUBLE = 'redouble'
+DIPLOME = 'diplome'
+EXCLU = 'exclu'
+SANS_COTE = 'sans_cote'
+SANS_NIVEAU = 'sans_niveau'
+
+LIBELLES = {
+    PASSE: "Passe au niveau suivant",
+    REDOUBLE: "Redouble",
+    DIPLOME: "Diplômé (fin de cycle)",
+    EXCLU: "Exclu",
+    SANS_COTE: "Sans cote (inchangé)",
+    SANS_NIVEAU: "Niveau non renseigné (inchangé)",
+}
+
+TAILLE_LOT = 1000
+
+
+class PassageAnnee:
+    """Passage des étudiants d'une faculté d'une promotion à la suivante"""
+
+    def __init__(self, faculte, promotion):
+        self.faculte = faculte
+        self.promotion = promotion
+        self.annee_academique = str(promotion)
+        self.groupes = self._calculer_groupes()
+
+    def _etudiants(self):
+        from .models import StudentProfile
+
+        return StudentProfile.objects.filter(faculte=self.faculte, promotion=self.promotion)
+
+    def _calculer_groupes(self):
+        """{issue: {etudiant_id: niveau}} en deux requêtes"""
+        from resultats.models import CoteEtudiant
+
+        niveaux = dict(self._etudiants().values_list('user_id', 'niveau'))
+        decisions = (
+            CoteEtudiant.objects.filter(etudiant_id__in=list(niveaux), annee_academique=self.annee_academique)
+            .values('etudiant_id')
+            .annotate(
+                total=Count('id'),
+                admis=Count('id', filter=Q(decision='admis')),
+                exclus=Count('id', filter=Q(decision='exclus')),
+            )
+            .order_by()
+        )
+
+        exclus = set()
+        admis = set()
+        avec_cote = set()
+        for ligne in decisions:
+            avec_cote.add(ligne['etudiant_id'])
+            if ligne['exclus']:
+                exclus.add(ligne['etudiant_id'])
+            elif ligne['admis'] == ligne['total']:
+                admis.add(ligne['etudiant_id'])
+
+        sans_niveau = {etudiant_id for etudiant_id, niveau in niveaux.items() if not niveau}
+        fin_de_cycle = {etudiant_id for etudiant_id, niveau in niveaux.items() if niveau and niveau not in NIVEAU_SUIVANT}
+        ensembles = {
+            PASSE: admis - fin_de_cycle - sans_niveau,
+            DIPLOME: admis & fin_de_cycle,
+            EXCLU: exclus - sans_niveau,
+            REDOUBLE: avec_cote - admis - exclus - sans_niveau,
+            SANS_COTE: set(niveaux) - avec_cote - sans_niveau,
+            SANS_NIVEAU: sans_niveau,
+        }
+        return {
+            issue: {etudiant_id: niveaux[etudiant_id] for etudiant_id in etudiants}
+            for issue, etudiants in ensembles.items()
+        }
+
+    @property
+    def resume(self):
+        return [
+            {'issue': issue, 'libelle': LIBELLES[issue], 'nombre': len(self.groupes[issue])}
+            for issue in (PASSE, REDOUBLE, DIPLOME, EXCLU, SANS_COTE, SANS_NIVEAU)
+            if issue != SANS_NIVEAU or self.groupes[issue]
+        ]
+
+    @property
+    def nombre_deplaces(self):
+        return len(self.groupes[PASSE]) + len(self.groupes[REDOUBLE])
+
+    def apercu(self):
+        """Lignes de l'aperçu : étudiant, niveau actuel, nouveau niveau, issue"""
+        from .models import CustomUser
+
+        issues = {
+            etudiant_id: (issue, niveau)
+            for issue, etudiants in self.groupes.items()
+            for etudiant_id, niveau in etudiants.items()
+        }
+        etudiants = CustomUser.objects.filter(id__in=list(issues)).only(
+            'id', 'matricule', 'first_name', 'last_name', 'username'
+        ).order_by('last_name', 'first_name')
+        lignes = []
+        for etudiant in etudiants:
+            issue, niveau = issues[etudiant.id]
+            lignes.append({
+                'etudiant': etudiant,
+                'niveau': niveau,
+                'nouveau_niveau': NIVEAU_SUIVANT[niveau] if issue == PASSE else niveau,
+                'issue': issue,
+                'libelle': LIBELLES[issue],
+            })
+        return lignes
+
+    def promotion_suivante(self):
+        from .models import Promotion
+
+        promotion, _ = Promotion.objects.get_or_create(
+            annee_debut=self.promotion.annee_debut + 1,
+            annee_fin=self.promotion.annee_fin + 1,
+        )
+        return promotion
+
+    def _figer_classements(self, etudiants):
+        """
+        Cohorte et rangs définitifs des cotes de l'année close, avant que le
+        profil des étudiants ne change ; retourne le nombre de cotes reclassées
+        """
+        from resultats.classement import classer_cohorte
+        from resultats.models import CoteEtudiant
+
+        cotes = CoteEtudiant.objects.filter(etudiant_id__in=list(etudiants), annee_academique=self.annee_academique)
+        # Cotes sans cohorte enregistrée : celle de l'année qui se termine
+        etudiants_par_niveau = {}
+        for etudiant_id, niveau in etudiants.items():
+            etudiants_par_niveau.setdefault(niveau, []).append(etudiant_id)
+        for niveau, etudiant_ids in etudiants_par_niveau.items():
+            cotes.filter(etudiant_id__in=etudiant_ids, promotion__isnull=True).update(
+                promotion=self.promotion, niveau=niveau, classement_a_jour=False
+            )
+
+        cohortes = (
+            cotes.filter(classement_a_jour=False, promotion__isnull=False)
+            .values_list('promotion_id', 'niveau', 'annee_academique', 'semestre')
+            .order_by()
+            .distinct()
+        )
+        return sum(classer_cohorte(*cohorte) for cohorte in list(cohortes))
+
+    def appliquer(self, montant_frais=None):
+        """
+        Applique le passage : classement de l'année close figé, niveaux et promotion
+        mis à jour, frais de la nouvelle année et inscriptions créés. Retourne le nombre de lignes par opération.
+        """
+        from cours.inscriptions import inscrire_cohorte
+        from .finances import invalider_finances
+        from .models import FraisAcademique, StudentProfile
+
+        resultats = {
+            'classements': 0, 'passes': 0, 'redoublants': 0, 'frais': 0, 'inscriptions_cours': 0, 'inscriptions_ue': 0,
+        }
+        if not self.nombre_deplaces:
+            return resultats
+
+        maintenant = timezone.now()
+        with transaction.atomic():
+            nouvelle_promotion = self.promotion_suivante()
+            nouvelle_annee = str(nouvelle_promotion)
+
+            # Classement de l'année close figé avant de changer les profils
+            resultats['classements'] = self._figer_classements(
+                {**self.groupes[PASSE], **self.groupes[REDOUBLE]}
+            )
+
+            # Nouveaux niveaux : un UPDATE par niveau de départ
+            nouveaux_niveaux = dict(self.groupes[REDOUBLE])
+            for niveau, suivant in NIVEAU_SUIVANT.items():
+                etudiants = [etudiant_id for etudiant_id, n in self.groupes[PASSE].items() if n == niveau]
+                if etudiants:
+                    resultats['passes'] += StudentProfile.objects.filter(
+                        user_id__in=etudiants, faculte=self.faculte, promotion=self.promotion
+                    ).update(niveau=suivant, promotion=nouvelle_promotion, updated_at=maintenant)
+                    nouveaux_niveaux.update(dict.fromkeys(etudiants, suivant))
+            if self.groupes[REDOUBLE]:
+                resultats['redoublants'] = StudentProfile.objects.filter(
+                    user_id__in=list(self.groupes[REDOUBLE]), faculte=self.faculte, promotion=self.promotion
+                ).update(promotion=nouvelle_promotion, updated_at=maintenant)
+
+            etudiant_ids = list(nouveaux_niveaux)
+
+            # Frais de la nouvelle année : montant imposé, ou reconduction de l'année écoulée
+            montants = dict(
+                FraisAcademique.objects.filter(etudiant_id__in=etudiant_ids, annee_academique=self.annee_academique)
+                .values_list('etudiant_id', 'montant_total')
+            )
+            deja_factures = set(
+                FraisAcademique.objects.filter(etudiant_id__in=etudiant_ids, annee_academique=nouvelle_annee)
+                .values_list('etudiant_id', flat=True)
+            )
+            frais = []
+            for etudiant_id in set(etudiant_ids) - deja_factures:
+                montant = montant_frais if montant_frais is not None else montants.get(etudiant_id)
+                if montant is not None:
+                    # bulk_create ne passe pas par FraisAcademique.save() : statut fixé ici
+                    frais.append(FraisAcademique(
+                        etudiant_id=etudiant_id,
+                        annee_academique=nouvelle_annee,
+                        montant_total=montant,
+                        statut=FraisAcademique.calculer_statut(montant, 0),
+                    ))
+            FraisAcademique.objects.bulk_create(frais, batch_size=TAILLE_LOT, ignore_conflicts=True)
+            resultats['frais'] = len(frais)
+            invalider_finances(nouvelle_annee)
+
+            # Inscriptions aux cours et UE des nouvelles cohortes
+            etudiants_par_niveau = {}
+            for etudiant_id, niveau in nouveaux_niveaux.items():
+                etudiants_par_niveau.setdefault(niveau, []).append(etudiant_id)
+            for niveau, etudiants in etudiants_par_niveau.items():
+                crees = inscrire_cohorte(self.faculte.id, nouvelle_promotion.id, niveau, etudiant_ids=etudiants)
+                resultats['inscriptions_cours'] += crees['cours']
+                resultats['inscriptions_ue'] += crees['ue']
+
+        return resultats
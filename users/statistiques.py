@@ -0,0 +1,103 @@
+"""
+Indicateurs du tableau de bord administrateur.
+
+Tous les indicateurs sont calculés en deux requêtes (agrégation conditionnelle
+sur les utilisateurs, puis facultés et promotions réunies par UNION) et mis en
+cache ; le cache est invalidé par les enregistrements d'utilisateurs, de
+facultés et de promotions. Chaque recalcul met aussi à jour l'instantané du
+jour (InstantaneStatistiques), dont la série donne les tendances.
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import CharField, Count, Q, Value
+from django.utils import timezone
+
+CLE_INDICATEURS = "tableau_bord:indicateurs"
+
+# Filet de sécurité si une modification échappe à l'invalidation (update() en masse)
+DUREE_CACHE_INDICATEURS = 600
+
+# Nombre de jours de la série affichée et écart de la tendance
+JOURS_SERIE = 30
+JOURS_TENDANCE = 7
+
+INDICATEURS = (
+    'total_etudiants', 'etudiants_actifs', 'total_enseignants', 'premiere_connexion_en_attente',
+    'total_facultes', 'facultes_actives', 'total_promotions', 'promotions_actives',
+)
+
+
+def invalider_indicateurs():
+    transaction.on_commit(lambda: cache.delete(CLE_INDICATEURS))
+
+
+def calculer_indicateurs():
+    """Valeurs actuelles des indicateurs (deux requêtes)"""
+    from .models import CustomUser, Faculte, Promotion
+
+    indicateurs = CustomUser.objects.aggregate(
+        total_etudiants=Count('id', filter=Q(user_type='etudiant')),
+        etudiants_actifs=Count('id', filter=Q(user_type='etudiant', is_active_student=True)),
+        total_enseignants=Count('id', filter=Q(user_type='enseignant')),
+        premiere_connexion_en_attente=Count('id', filter=Q(is_first_login=True)),
+    )
+
+    def compter(modele, nom):
+        return (
+            modele.objects.annotate(table=Value(nom, output_field=CharField()))
+            .values('table')
+            .annotate(total=Count('id'), actifs=Count('id', filter=Q(is_active=True)))
+            .values_list('table', 'total', 'actifs')
+            .order_by()
+        )
+
+    comptes = {table: (total, actifs) for table, total, actifs in compter(Faculte, 'facultes').union(compter(Promotion, 'promotions'))}
+    indicateurs['total_facultes'], indicateurs['facultes_actives'] = comptes.get('facultes', (0, 0))
+    indicateurs['total_promotions'], indicateurs['promotions_actives'] = comptes.get('promotions', (0, 0))
+    return indicateurs
+
+
+def enregistrer_instantane(indicateurs=None):
+    """Crée ou met à jour l'instantané du jour"""
+    from .models import InstantaneStatistiques
+
+    indicateurs = indicateurs if indicateurs is not None else calculer_indicateurs()
+    instantane, _ = InstantaneStatistiques.objects.update_or_create(
+        date=timezone.localdate(), defaults=indicateurs
+    )
+    return instantane
+
+
+def _tendances(indicateurs, serie):
+    """Écart de chaque indicateur avec l'instantané le plus proche d'il y a JOURS_TENDANCE jours"""
+    limite = timezone.localdate() - timedelta(days=JOURS_TENDANCE)
+    reference = next((jour for jour in serie if jour['date'] <= limite), None)
+    if reference is None:
+        return {}
+    return {nom: indicateurs[nom] - reference[nom] for nom in INDICATEURS}
+
+
+def tableau_de_bord():
+    """
+    Indicateurs, tendances et série quotidienne, lus depuis le cache.
+    En cas d'absence : recalcul, mise à jour de l'instantané du jour et lecture de la série.
+    """
+    from .models import InstantaneStatistiques
+
+    donnees = cache.get(CLE_INDICATEURS)
+    if donnees is None:
+        indicateurs = calculer_indicateurs()
+        enregistrer_instantane(indicateurs)
+        serie = list(
+            InstantaneStatistiques.objects.order_by('-date').values('date', *INDICATEURS)[:JOURS_SERIE]
+        )
+        donnees = {
+            'indicateurs': indicateurs,
+            'tendances': _tendances(indicateurs, serie),
+            'serie': serie[::-1],
+            'date_calcul': timezone.now(),
+        }
+        cache.set(CLE_INDICATEURS, donnees, DUREE_CACHE_INDICATEURS)
+    return donnees
@@ -0,0 +1,322 @@
+"""
+Suppression en arrière-plan des facultés, cours et utilisateurs.
+
+La cascade de Django (Collector) charge tout le graphe d'objets en mémoire et
+le supprime dans une seule transaction, qui verrouille les tables le temps de
+la requête. Ici, le graphe est parcouru à partir des métadonnées des modèles
+(relations CASCADE et SET_NULL) pour produire un plan d'étapes, des feuilles
+vers la racine ; chaque étape est exécutée par lots de TAILLE_LOT lignes, un
+DELETE (ou UPDATE ... SET NULL) brut par lot dans sa propre transaction. Les
+fichiers des lignes supprimées sont effacés du stockage après chaque lot.
+
+Les suppressions brutes ne passent pas par les méthodes delete() des modèles :
+les compteurs, les caches et les classements touchés sont donc repérés avant
+la suppression et rafraîchis en une fois à la fin.
+"""
+import logging
+import os
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.db import models, router, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+TAILLE_LOT = 500
+
+# Garde-fou contre les cycles de relations
+PROFONDEUR_MAX = 10
+
+# Une tâche « en cours » sans progression depuis ce délai est considérée
+# comme interrompue (redémarrage du serveur) et peut être relancée
+DELAI_REPRISE = timedelta(minutes=15)
+
+MODELES = {
+    'faculte': 'users.Faculte',
+    'cours': 'cours.Cours',
+    'etudiant': 'users.CustomUser',
+    'enseignant': 'users.CustomUser',
+}
+
+# Cours supprimés avec l'objet : champ qui les rattache à l'objet
+COURS_SUPPRIMES = {
+    'faculte': 'faculte_id',
+    'cours': 'pk',
+    'enseignant': 'enseignant_id',
+}
+
+
+class Etape:
+    """Lignes de `modele` atteintes depuis l'objet racine par le chemin `chemin`"""
+
+    def __init__(self, modele, chemin, champ_nul=None):
+        self.modele = modele
+        self.chemin = chemin
+        # Relation SET_NULL : la clé étrangère est remise à NULL au lieu de supprimer
+        self.champ_nul = champ_nul
+
+    def __str__(self):
+        return str(self.modele._meta.verbose_name_plural)
+
+    def lignes(self, objet_id):
+        filtre = {self.chemin: objet_id}
+        if self.champ_nul:
+            filtre[f"{self.champ_nul}__isnull"] = False
+        return self.modele._base_manager.filter(**filtre).order_by()
+
+
+def _relations(modele):
+    """Relations inverses à traiter (comme le Collector : y compris tables M2M et relations cachées)"""
+    return [
+        champ for champ in modele._meta.get_fields(include_hidden=True)
+        if champ.auto_created and not champ.concrete and (champ.one_to_one or champ.one_to_many)
+    ]
+
+
+def planifier(modele, chemin='pk', profondeur=0):
+    """Étapes de la suppression des lignes de `modele` désignées par `chemin`, dépendances d'abord"""
+    if profondeur > PROFONDEUR_MAX:
+        raise RuntimeError(f"Graphe de suppression trop profond ({modele._meta.label})")
+
+    etapes = []
+    for relation in _relations(modele):
+        champ = relation.field
+        chemin_enfant = f"{champ.name}__{chemin}"
+        if relation.on_delete is models.CASCADE:
+            etapes.extend(planifier(relation.related_model, chemin_enfant, profondeur + 1))
+        elif relation.on_delete is models.SET_NULL:
+            etapes.append(Etape(relation.related_model, chemin_enfant, champ_nul=champ.name))
+        elif relation.on_delete is not models.DO_NOTHING:
+            raise RuntimeError(
+                f"Suppression par lots impossible : {champ.model._meta.label}.{champ.name} "
+                f"({relation.on_delete.__name__})"
+            )
+    etapes.append(Etape(modele, chemin))
+    return etapes
+
+
+def _noms_fichiers(modele, ids):
+    """Noms (dans le stockage) des fichiers rattachés aux lignes `ids` de `modele`"""
+    champs = [champ.attname for champ in modele._meta.concrete_fields if isinstance(champ, models.FileField)]
+    versions = modele._meta.label == 'users.StudentProfile'
+    if not champs and not versions:
+        return []
+
+    noms = []
+    for ligne in modele._base_manager.filter(pk__in=ids).values(*champs, *(['photo_versions'] if versions else [])):
+        noms.extend(ligne[champ] for champ in champs if ligne[champ])
+        if versions:
+            for formats in (ligne['photo_versions'] or {}).get('tailles', {}).values():
+                noms.extend(formats.values())
+    return noms
+
+
+def _supprimer_fichiers(tache_id, noms, chemins):
+    """Efface les fichiers d'un lot (après le commit de sa suppression)"""
+    from .models import TacheSuppression
+
+    supprimes = 0
+    for nom in noms:
+        try:
+            default_storage.delete(nom)
+            supprimes += 1
+        except OSError:
+            logger.warning("Fichier %s non supprimé", nom, exc_info=True)
+    for chemin in chemins:
+        try:
+            os.remove(chemin)
+        except FileNotFoundError:
+            pass
+    if supprimes:
+        TacheSuppression.objects.filter(pk=tache_id).update(
+            fichiers_supprimes=models.F('fichiers_supprimes') + supprimes
+        )
+
+
+def _executer_etape(tache, etape):
+    from televersements.models import SessionTeleversement
+    from .models import TacheSuppression
+
+    modele = etape.modele
+    base = router.db_for_write(modele)
+    lignes = etape.lignes(tache.objet_id)
+    while True:
+        ids = list(lignes.values_list('pk', flat=True)[:TAILLE_LOT])
+        if not ids:
+            return
+
+        if etape.champ_nul:
+            with transaction.atomic(using=base):
+                modele._base_manager.filter(pk__in=ids).update(**{etape.champ_nul: None})
+            continue
+
+        noms = _noms_fichiers(modele, ids)
+        # Fichiers partiels des téléversements en cours (hors stockage)
+        chemins = [SessionTeleversement(id=pk).chemin_partiel for pk in ids] if modele is SessionTeleversement else []
+        with transaction.atomic(using=base):
+            supprimees = modele._base_manager.filter(pk__in=ids)._raw_delete(base)
+            TacheSuppression.objects.filter(pk=tache.pk).update(
+                lignes_supprimees=models.F('lignes_supprimees') + supprimees,
+                date_modification=timezone.now(),
+            )
+            transaction.on_commit(
+                lambda noms=noms, chemins=chemins: _supprimer_fichiers(tache.pk, noms, chemins), using=base
+            )
+
+
+def _concernes(type_objet, objet_id):
+    """
+    Objets qui survivent à la suppression mais dont les compteurs, caches ou
+    classements en dépendent, relevés avant de supprimer quoi que ce soit.
+    """
+    from cours.models import Cours, InscriptionCours, SupportCours
+    from resultats.models import CoteEtudiant, Note, UE
+    from travaux.models import RemiseTravail, Travail
+    from .models import FraisAcademique
+
+    concernes = {
+        'cours': set(), 'travaux': set(), 'cohortes': set(),
+        'enseignants': set(), 'annees_frais': set(), 'classements': set(),
+    }
+    if type_objet in COURS_SUPPRIMES:
+        cours = Cours.objects.filter(**{COURS_SUPPRIMES[type_objet]: objet_id})
+        for faculte_id, promotion_id, niveau, enseignant_id in cours.values_list('faculte_id', 'promotion_id', 'niveau', 'enseignant_id'):
+            concernes['cohortes'].add((faculte_id, promotion_id, niveau))
+            concernes['enseignants'].add(enseignant_id)
+        concernes['enseignants'].update(
+            Travail.objects.filter(cours__in=cours).values_list('enseignant_id', flat=True)
+        )
+
+    if type_objet == 'enseignant':
+        # Travaux et supports de l'enseignant publiés dans les cours d'un collègue
+        concernes['cours'].update(Travail.objects.filter(enseignant_id=objet_id).values_list('cours_id', flat=True))
+        concernes['cours'].update(SupportCours.objects.filter(enseignant_id=objet_id).values_list('cours_id', flat=True))
+        concernes['enseignants'].update(
+            Note.objects.filter(enseignant_id=objet_id).values_list('ue__enseignant_responsable_id', flat=True)
+        )
+
+    if type_objet == 'etudiant':
+        remises = RemiseTravail.objects.filter(etudiant_id=objet_id)
+        concernes['cours'].update(InscriptionCours.objects.filter(etudiant_id=objet_id).values_list('cours_id', flat=True))
+        concernes['cours'].update(remises.values_list('travail__cours_id', flat=True))
+        concernes['travaux'].update(remises.values_list('travail_id', flat=True))
+        concernes['enseignants'].update(remises.values_list('travail__enseignant_id', flat=True))
+        concernes['enseignants'].update(
+            UE.objects.filter(notes__etudiant_id=objet_id).values_list('enseignant_responsable_id', flat=True)
+        )
+        concernes['annees_frais'].update(
+            FraisAcademique.objects.filter(etudiant_id=objet_id).values_list('annee_academique', flat=True)
+        )
+        concernes['classements'].update(
+            CoteEtudiant.objects.filter(etudiant_id=objet_id, promotion__isnull=False)
+            .values_list('promotion_id', 'niveau', 'annee_academique', 'semestre')
+        )
+    return concernes
+
+
+def _rafraichir(concernes):
+    """Compteurs, caches et classements touchés par la suppression"""
+    from cours.cohorte import invalider_cohortes
+    from cours.compteurs import recalculer_compteurs_cours, recalculer_compteurs_travaux
+    from cours.models import Cours
+    from resultats.classement import _filtre_cohorte
+    from resultats.models import CoteEtudiant
+    from travaux.models import Travail
+    from .finances import invalider_finances
+    from .statistiques import invalider_indicateurs
+    from .tableau_enseignant import invalider_tableau_enseignant
+
+    if concernes['cours']:
+        recalculer_compteurs_cours(Cours.objects.filter(pk__in=concernes['cours']))
+        concernes['cohortes'].update(
+            Cours.objects.filter(pk__in=concernes['cours']).values_list('faculte_id', 'promotion_id', 'niveau')
+        )
+    if concernes['travaux']:
+        recalculer_compteurs_travaux(Travail.objects.filter(pk__in=concernes['travaux']))
+    for cohorte in concernes['cohortes']:
+        invalider_cohortes(*cohorte)
+    for cohorte in concernes['classements']:
+        # Les rangs des autres étudiants de la cohorte changent
+        CoteEtudiant.objects.filter(**_filtre_cohorte(*cohorte)).update(classement_a_jour=False)
+    invalider_tableau_enseignant(*concernes['enseignants'])
+    invalider_finances(*concernes['annees_frais'])
+    invalider_indicateurs()
+
+
+def executer_suppression(tache_id):
+    """Exécute une tâche de suppression (en arrière-plan) ; peut être relancée sans risque"""
+    from django.apps import apps
+    from .models import TacheSuppression
+
+    tache = TacheSuppression.objects.get(pk=tache_id)
+    if tache.statut == 'terminee':
+        return
+    TacheSuppression.objects.filter(pk=tache.pk).update(
+        statut='en_cours', date_debut=tache.date_debut or timezone.now(), message_erreur=''
+    )
+
+    try:
+        modele = apps.get_model(MODELES[tache.type_objet])
+        concernes = _concernes(tache.type_objet, tache.objet_id)
+        etapes = planifier(modele)
+        total = tache.lignes_supprimees + sum(
+            etape.lignes(tache.objet_id).count() for etape in etapes if not etape.champ_nul
+        )
+        TacheSuppression.objects.filter(pk=tache.pk).update(lignes_total=total)
+
+        for etape in etapes:
+            TacheSuppression.objects.filter(pk=tache.pk).update(etape=str(etape), date_modification=timezone.now())
+            _executer_etape(tache, etape)
+
+        _rafraichir(concernes)
+    except Exception as e:
+        logger.exception("Échec de la suppression %s", tache.pk)
+        TacheSuppression.objects.filter(pk=tache.pk).update(
+            statut='erreur', message_erreur=str(e), date_fin=timezone.now()
+        )
+        return
+
+    # Un même enregistrement peut être atteint par plusieurs chemins : le total
+    # estimé est ramené au nombre de lignes réellement supprimées
+    TacheSuppression.objects.filter(pk=tache.pk).update(
+        statut='terminee', etape='', lignes_total=models.F('lignes_supprimees'), date_fin=timezone.now()
+    )
+
+
+def _desactiver(objet):
+    """Retire l'objet des listes et des connexions le temps de la suppression"""
+    champ = 'is_actif' if hasattr(objet, 'is_actif') else 'is_active'
+    if getattr(objet, champ):
+        setattr(objet, champ, False)
+        objet.save(update_fields=[champ])
+
+
+def lancer_suppression(objet, type_objet, demandee_par=None, libelle=''):
+    """
+    Désactive `objet` et planifie sa suppression en arrière-plan.
+    Retourne la tâche (une tâche déjà active pour le même objet est réutilisée).
+    """
+    from televersements.taches import soumettre_tache
+    from .models import TacheSuppression
+
+    with transaction.atomic():
+        tache = (
+            TacheSuppression.objects.select_for_update()
+            .filter(type_objet=type_objet, objet_id=objet.pk, statut__in=['en_attente', 'en_cours'])
+            .first()
+        )
+        if tache is not None:
+            if tache.statut == 'en_attente' or tache.date_modification > timezone.now() - DELAI_REPRISE:
+                return tache
+            # Tâche interrompue : relancée là où elle s'est arrêtée
+        else:
+            tache = TacheSuppression.objects.create(
+                type_objet=type_objet,
+                objet_id=objet.pk,
+                libelle=libelle or str(objet),
+                demandee_par=demandee_par,
+            )
+        _desactiver(objet)
+        soumettre_tache(executer_suppression, tache.pk)
+    return tache
@@ -0,0 +1,136 @@
+"""
+Tableau de bord enseignant : cours, remises à corriger, échéances de
+correction, remises récentes et avancement de la saisie des notes par UE.
+
+Les données sont construites en quatre requêtes (compteurs dénormalisés des
+cours et des travaux, sous-requêtes de comptage pour les UE) puis mises en
+cache par enseignant ; le cache est invalidé quand un cours, un travail, une
+remise ou les notes d'une UE de l'enseignant changent.
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+# Filet de sécurité (compteurs d'inscrits ajustés par update(), notes saisies une à une)
+DUREE_CACHE_TABLEAU = 300
+
+# Horizon des échéances de correction affichées et nombre de remises récentes
+JOURS_ECHEANCES = 14
+NOMBRE_REMISES_RECENTES = 10
+
+
+def _cle_tableau(enseignant_id):
+    return f"tableau_enseignant:{enseignant_id}"
+
+
+def invalider_tableau_enseignant(*enseignant_ids):
+    cles = [_cle_tableau(enseignant_id) for enseignant_id in set(enseignant_ids) if enseignant_id]
+    if cles:
+        transaction.on_commit(lambda: cache.delete_many(cles))
+
+
+def invalider_tableau_du_travail(travail):
+    """Invalide le tableau de l'enseignant d'un travail (instance ou identifiant)"""
+    from travaux.models import Travail
+
+    if isinstance(travail, Travail):
+        invalider_tableau_enseignant(travail.enseignant_id)
+    else:
+        invalider_tableau_enseignant(
+            Travail.objects.filter(pk=travail).values_list('enseignant_id', flat=True).first()
+        )
+
+
+def _compte(modele, lien, **filtres):
+    lignes = (
+        modele.objects.filter(**{lien: OuterRef('pk')}, **filtres)
+        .order_by().values(lien).annotate(total=Count('pk')).values('total')
+    )
+    return Coalesce(Subquery(lignes[:1]), 0)
+
+
+def _calculer(enseignant_id):
+    from cours.models import Cours
+    from resultats.models import InscriptionUE, Note, UE
+    from travaux.models import RemiseTravail, Travail
+
+    maintenant = timezone.now()
+
+    cours = list(
+        Cours.objects.filter(enseignant_id=enseignant_id, is_actif=True)
+        .values('id', 'code', 'titre', 'niveau', 'nombre_inscrits', 'nombre_supports', 'nombre_travaux', 'nombre_remises')
+        .order_by('code')
+    )
+
+    # Travaux avec des remises à corriger ou une échéance de correction proche (une requête)
+    travaux = list(
+        Travail.objects.filter(enseignant_id=enseignant_id, statut__in=['publie', 'ferme'])
+        .filter(
+            Q(nombre_remises_en_attente__gt=0)
+            | Q(date_limite_correction__gte=maintenant, date_limite_correction__lte=maintenant + timedelta(days=JOURS_ECHEANCES))
+        )
+        .values(
+            'id', 'titre', 'cours__code', 'date_limite_remise', 'date_limite_correction',
+            'nombre_remises', 'nombre_remises_corrigees', 'nombre_remises_en_attente',
+        )
+        .order_by(F('date_limite_correction').asc(nulls_last=True), 'date_limite_remise')
+    )
+    for travail in travaux:
+        echeance = travail['date_limite_correction']
+        travail['en_retard'] = bool(echeance and echeance < maintenant and travail['nombre_remises_en_attente'])
+
+    remises_recentes = list(
+        RemiseTravail.objects.filter(travail__enseignant_id=enseignant_id)
+        .values(
+            'id', 'statut', 'date_remise', 'travail_id', 'travail__titre', 'travail__date_limite_remise',
+            'etudiant__matricule', 'etudiant__first_name', 'etudiant__last_name',
+        )
+        .order_by('-date_remise')[:NOMBRE_REMISES_RECENTES]
+    )
+    for remise in remises_recentes:
+        remise['en_retard'] = remise['date_remise'] > remise['travail__date_limite_remise']
+
+    # Saisie des notes : étudiants inscrits et étudiants déjà notés, par UE
+    ues = list(
+        UE.objects.filter(enseignant_responsable_id=enseignant_id, is_actif=True)
+        .annotate(
+            inscrits=_compte(InscriptionUE, 'ue', is_actif=True),
+            notes_saisies=Coalesce(Subquery(
+                Note.objects.filter(ue=OuterRef('pk')).order_by().values('ue')
+                .annotate(total=Count('etudiant', distinct=True)).values('total')[:1]
+            ), 0),
+        )
+        .values('id', 'code', 'nom', 'semestre', 'inscrits', 'notes_saisies')
+        .order_by('semestre', 'code')
+    )
+    for ue in ues:
+        ue['avancement'] = round(min(ue['notes_saisies'], ue['inscrits']) * 100 / ue['inscrits']) if ue['inscrits'] else None
+
+    return {
+        'cours': cours,
+        'travaux': travaux,
+        'remises_recentes': remises_recentes,
+        'ues': ues,
+        'totaux': {
+            'cours': len(cours),
+            'inscrits': sum(c['nombre_inscrits'] for c in cours),
+            'remises': sum(c['nombre_remises'] for c in cours),
+            'a_corriger': sum(t['nombre_remises_en_attente'] for t in travaux),
+            'en_retard': sum(1 for t in travaux if t['en_retard']),
+        },
+        'date_calcul': maintenant,
+    }
+
+
+def tableau_enseignant(enseignant_id):
+    """Données du tableau de bord de l'enseignant, lues depuis le cache"""
+    cle = _cle_tableau(enseignant_id)
+    donnees = cache.get(cle)
+    if donnees is None:
+        donnees = _calculer(enseignant_id)
+        cache.set(cle, donnees, DUREE_CACHE_TABLEAU)
+    return donnees
@@ -0,0 +1,97 @@
+"""
+Tâches d'arrière-plan liées aux profils : versions redimensionnées des photos
+"""
+import hashlib
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+# Côté (en pixels) des versions carrées générées pour chaque usage
+TAILLES_PHOTO = {
+    'avatar': 96,
+    'vignette': 160,
+    'carte': 320,
+}
+
+
+def _recadrer_carre(img):
+    """Recadrage centré en carré"""
+    largeur, hauteur = img.size
+    cote = min(largeur, hauteur)
+    gauche = (largeur - cote) // 2
+    haut = (hauteur - cote) // 2
+    return img.crop((gauche, haut, gauche + cote, haut + cote))
+
+
+def _supprimer_versions(versions):
+    for formats in (versions or {}).get('tailles', {}).values():
+        for nom in formats.values():
+            default_storage.delete(nom)
+
+
+def _creer_versions(contenu, prefixe):
+    """Écrit les versions WebP et JPEG de chaque taille, retourne leurs noms"""
+    with Image.open(BytesIO(contenu)) as img:
+        carre = _recadrer_carre(ImageOps.exif_transpose(img).convert('RGB'))
+
+    tailles = {}
+    # De la plus grande à la plus petite : chaque réduction part de la précédente
+    for taille, cote in sorted(TAILLES_PHOTO.items(), key=lambda t: -t[1]):
+        if carre.width > cote:
+            carre = carre.resize((cote, cote), Image.LANCZOS)
+        tailles[taille] = {}
+        for format_image, extension, options in (
+            ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+            ('JPEG', 'jpeg', {'quality': 85, 'optimize': True, 'progressive': True}),
+        ):
+            tampon = BytesIO()
+            carre.save(tampon, format=format_image, **options)
+            tailles[taille][extension] = default_storage.save(
+                f"{prefixe}_{taille}.{extension}", ContentFile(tampon.getvalue())
+            )
+    return tailles
+
+
+def generer_versions_photo(profil_id, nom_photo):
+    """
+    Génère les versions avatar/vignette/carte (WebP et JPEG) d'une photo de profil.
+    Si le contenu est identique à celui déjà traité, les versions existantes
+    sont simplement réattribuées. Une photo supprimée efface ses versions.
+    """
+    from .models import StudentProfile
+
+    profil = StudentProfile.objects.filter(pk=profil_id).only('photo', 'photo_versions', 'photo_empreinte').first()
+    if profil is None or (profil.photo.name or '') != nom_photo:
+        # Profil supprimé ou photo encore remplacée : une tâche plus récente s'en charge
+        return
+
+    anciennes = profil.photo_versions or {}
+    if not nom_photo:
+        StudentProfile.objects.filter(pk=profil_id).update(photo_versions={}, photo_empreinte='')
+        _supprimer_versions(anciennes)
+        return
+
+    with profil.photo.open('rb') as fichier:
+        contenu = fichier.read()
+    empreinte = hashlib.sha256(contenu).hexdigest()
+
+    if empreinte == profil.photo_empreinte and anciennes.get('tailles'):
+        StudentProfile.objects.filter(pk=profil_id, photo=nom_photo).update(
+            photo_versions={'source': nom_photo, 'tailles': anciennes['tailles']},
+        )
+        return
+
+    try:
+        tailles = _creer_versions(contenu, f"profiles/students/versions/{profil_id}/{empreinte[:12]}")
+    except (OSError, Image.DecompressionBombError):
+        return
+
+    versions = {'source': nom_photo, 'tailles': tailles}
+    # Ne publier les versions que si la photo n'a pas été remplacée entre-temps
+    publie = StudentProfile.objects.filter(pk=profil_id, photo=nom_photo).update(
+        photo_versions=versions,
+        photo_empreinte=empreinte,
+    )
+    _supprimer_versions(anciennes if publie else versions)
@@ -1,3 +1,766 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.models.deletion import Collector
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from cours.models import Cours, InscriptionCours, SupportCours
+from memoires.models import Memoire
+from resultats.models import UE, CoteEtudiant, InscriptionUE, Note
+from resultats.utils import calculer_cote_etudiant
+from travaux.correction import appliquer_corrections
+from travaux.models import RemiseTravail, Travail
+
+from .exports import _cellule, _fichier_xlsx, _iter_csv
+from .finances import AUCUN, filtrer_frais, tableau_finances
+from .frais import _lire_montant, generer_frais, rapprocher_paiements
+from .models import (
+    CustomUser, Faculte, FraisAcademique, InstantaneStatistiques, Notification, PaiementFrais, Promotion,
+    StudentProfile, TacheSuppression,
+)
+from .notifications import compter_non_lues, notifier_memoire_valide, notifier_support_ajoute, notifier_travail_publie
+from .passage import PassageAnnee
+from .statistiques import CLE_INDICATEURS, calculer_indicateurs, enregistrer_instantane, tableau_de_bord
+from .suppression import lancer_suppression
+from .tableau_enseignant import _cle_tableau, tableau_enseignant
+from .taches import TAILLES_PHOTO
+
+
+class ExportsTests(SimpleTestCase):
+    """Exports CSV / XLSX : les textes saisis par les utilisateurs ne deviennent jamais des formules"""
+
+    def test_texte_commencant_comme_une_formule_neutralise(self):
+        for valeur in ('=HYPERLINK("http://x")', '+33 6 12', '-2+3', '@SUM(A1)', '\t=1'):
+            with self.subTest(valeur=valeur):
+                self.assertEqual(_cellule(valeur), "'" + valeur)
+
+    def test_autres_valeurs_inchangees(self):
+        self.assertEqual(_cellule('Dupont'), 'Dupont')
+        self.assertEqual(_cellule(Decimal('-2.50')), Decimal('-2.50'))
+        self.assertEqual(_cellule(True), 'Oui')
+        self.assertEqual(_cellule(None), '')
+
+    def test_csv(self):
+        contenu = ''.join(_iter_csv(['Nom', '=Entête'], [['=1+1', 'Dupont']]))
+        self.assertEqual(contenu, "\ufeffNom;'=Entête\r\n'=1+1;Dupont\r\n")
+
+    def test_xlsx(self):
+        from openpyxl import load_workbook
+
+        with _fichier_xlsx('export', ['Nom'], [['=1+1'], [Decimal('-3')]]) as fichier:
+            feuille = load_workbook(fichier).active
+            self.assertEqual([cellule.value for cellule in feuille['A']], ['Nom', "'=1+1", -3])
+            self.assertEqual(feuille['A2'].data_type, 's')
+
+
+class PassageAnneeTests(TestCase):
+    """Passage d'année : le classement de l'année close ne suit pas les profils"""
+
+    def setUp(self):
+        reglages = override_settings(TACHES_SYNCHRONES=True)
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+        self.faculte = Faculte.objects.create(code='FSI', nom='Sciences informatiques')
+        self.promotion = Promotion.objects.create(annee_debut=2024, annee_fin=2025)
+        self.etudiants = []
+        for numero, moyenne in enumerate((15, 12, 8), start=1):
+            etudiant = CustomUser.objects.create_user(f'etudiant{numero}', password='x', matricule=f'UOM2025-00{numero}')
+            StudentProfile.objects.create(user=etudiant, niveau='L1', faculte=self.faculte, promotion=self.promotion)
+            moyenne = Decimal(moyenne)
+            CoteEtudiant.objects.create(
+                etudiant=etudiant, annee_academique='2024-2025', semestre='S1', moyenne=moyenne,
+                mention=CoteEtudiant.calculer_mention(moyenne), decision=CoteEtudiant.calculer_decision(moyenne, 0),
+            )
+            self.etudiants.append(etudiant)
+
+    def _cotes(self):
+        return list(
+            CoteEtudiant.objects.filter(annee_academique='2024-2025').order_by('etudiant__matricule')
+            .values_list('promotion_id', 'niveau', 'rang', 'effectif_classement', 'classement_a_jour')
+        )
+
+    def test_classement_fige_avant_le_passage(self):
+        # Cote antérieure au suivi des cohortes
+        CoteEtudiant.objects.filter(etudiant=self.etudiants[2]).update(promotion=None, niveau='')
+
+        resultats = PassageAnnee(self.faculte, self.promotion).appliquer()
+
+        self.assertEqual((resultats['passes'], resultats['redoublants'], resultats['classements']), (2, 1, 3))
+        profil = StudentProfile.objects.get(user=self.etudiants[0])
+        self.assertEqual((profil.niveau, str(profil.promotion)), ('L2', '2025-2026'))
+        self.assertEqual(self._cotes(), [
+            (self.promotion.id, 'L1', 1, 3, True),
+            (self.promotion.id, 'L1', 2, 3, True),
+            (self.promotion.id, 'L1', 3, 3, True),
+        ])
+
+    def test_recalcul_d_une_annee_close_garde_sa_cohorte(self):
+        PassageAnnee(self.faculte, self.promotion).appliquer()
+
+        cote = calculer_cote_etudiant(CustomUser.objects.get(pk=self.etudiants[0].pk), '2024-2025', 'S1')
+
+        self.assertEqual((cote.promotion_id, cote.niveau), (self.promotion.id, 'L1'))
+
+
+class PhotoProfilTests(TestCase):
+    """Versions de la photo de profil : générées seulement quand la photo change"""
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        reglages = override_settings(MEDIA_ROOT=self.media, TACHES_SYNCHRONES=True)
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        etudiant = CustomUser.objects.create_user('etudiant', password='x', matricule='UOM2025-001')
+        self.profil = StudentProfile.objects.create(user=etudiant, niveau='L1')
+
+    def _photo(self, couleur='red'):
+        tampon = BytesIO()
+        Image.new('RGB', (640, 480), couleur).save(tampon, format='PNG')
+        return SimpleUploadedFile('photo.png', tampon.getvalue(), content_type='image/png')
+
+    def _taches_soumises(self, profil):
+        with mock.patch('televersements.taches.soumettre_tache') as soumettre:
+            profil.save()
+        return [appel.args[0].__name__ for appel in soumettre.call_args_list]
+
+    def test_nouvelle_photo_genere_les_versions(self):
+        self.profil.photo = self._photo()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profil.save()
+
+        profil = StudentProfile.objects.get(pk=self.profil.pk)
+        versions = profil.photo_versions
+        self.assertEqual(versions['source'], profil.photo.name)
+        self.assertEqual(sorted(versions['tailles']), ['avatar', 'carte', 'vignette'])
+        for taille, cote in TAILLES_PHOTO.items():
+            for nom in versions['tailles'][taille].values():
+                with self.subTest(taille=taille, nom=nom), default_storage.open(nom) as fichier:
+                    self.assertEqual(Image.open(fichier).size, (cote, cote))
+        self.assertEqual(profil.photo_avatar['webp'], default_storage.url(versions['tailles']['avatar']['webp']))
+
+    def test_sauvegarde_sans_changement_de_photo(self):
+        self.profil.photo = self._photo()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profil.save()
+
+        profil = StudentProfile.objects.get(pk=self.profil.pk)
+        profil.emergency_contact = 'Parent'
+        self.assertNotIn('generer_versions_photo', self._taches_soumises(profil))
+
+        profil.photo = self._photo('blue')
+        self.assertEqual(self._taches_soumises(profil), ['generer_versions_photo'])
+
+    def test_photo_differee_non_chargee(self):
+        profil = StudentProfile.objects.only('user', 'faculte', 'promotion', 'niveau', 'emergency_contact').get(
+            pk=self.profil.pk
+        )
+        profil.emergency_contact = 'Parent'
+        # Aucune requête pour lire la photo différée : seule la mise à jour est envoyée
+        with self.assertNumQueries(1):
+            self.assertEqual(self._taches_soumises(profil), [])
+        self.assertNotIn('photo', profil.__dict__)
+
+
+class RapprochementPaiementsTests(TestCase):
+    """Rapprochement d'un relevé de paiements avec les frais de l'année"""
+
+    def setUp(self):
+        self.frais = []
+        for numero in (1, 2):
+            etudiant = CustomUser.objects.create_user(f'etudiant{numero}', password='x', matricule=f'UOM2025-00{numero}')
+            self.frais.append(FraisAcademique.objects.create(
+                etudiant=etudiant, annee_academique='2024-2025', montant_total=Decimal('500'),
+            ))
+
+    def _rapprocher(self, contenu):
+        return rapprocher_paiements(SimpleUploadedFile('releve.csv', contenu.encode('utf-8')), '2024-2025', 'banque')
+
+    def test_montants_invalides(self):
+        for valeur in ('', 'abc', '0', '-10', 'nan', 'sNaN', 'inf', '-Infinity', '1e999', '100000000', '1e8'):
+            with self.subTest(valeur=valeur):
+                self.assertIsNone(_lire_montant(valeur))
+        self.assertEqual(_lire_montant('1 234,50'), Decimal('1234.50'))
+        self.assertEqual(_lire_montant('1,234.5'), Decimal('1234.50'))
+        self.assertEqual(_lire_montant('99999999.99'), Decimal('99999999.99'))
+
+    def test_lignes_invalides_et_references_en_double(self):
+        rapport = self._rapprocher(
+            "reference;matricule;montant\n"
+            "REF-1;UOM2025-001;200\n"
+            "REF-1;UOM2025-001;200\n"
+            "REF-2;UOM2025-002;nan\n"
+            "REF-3;UOM2025-002;1e999\n"
+            "REF-4;UOM2025-002;inf\n"
+            "REF-5;UOM2025-002;150,50\n"
+            "REF-6;UOM2025-999;10\n"
+        )
+
+        self.assertEqual((rapport['lignes'], rapport['rapprochees']), (7, 2))
+        self.assertEqual(rapport['montant_impute'], Decimal('350.50'))
+        self.assertEqual(
+            [(ligne['numero'], ligne['motif']) for ligne in rapport['non_rapprochees']],
+            [
+                (3, "Référence en double dans le relevé"),
+                (4, "Montant invalide"),
+                (5, "Montant invalide"),
+                (6, "Montant invalide"),
+                (8, "Aucun frais 2024-2025 pour cette référence ou ce matricule"),
+            ],
+        )
+        for frais in self.frais:
+            frais.refresh_from_db()
+        self.assertEqual([frais.montant_paye for frais in self.frais], [Decimal('200'), Decimal('150.50')])
+        self.assertEqual(self.frais[0].statut, 'partiel')
+
+    def test_reference_deja_importee_ignoree(self):
+        self._rapprocher("reference;matricule;montant\nREF-1;UOM2025-001;500\n")
+
+        rapport = self._rapprocher("reference;matricule;montant\nREF-1;UOM2025-001;500\n")
+
+        self.assertEqual((rapport['rapprochees'], rapport['deja_importees']), (0, 1))
+        self.assertEqual(PaiementFrais.objects.count(), 1)
+        self.frais[0].refresh_from_db()
+        self.assertEqual((self.frais[0].montant_paye, self.frais[0].statut), (Decimal('500'), 'complet'))
+
+    def test_reference_trop_longue_rejetee(self):
+        rapport = self._rapprocher(
+            "reference;matricule;montant\n"
+            f"{'R' * 101};UOM2025-001;100\n"
+            f"{'R' * 100};UOM2025-002;100\n"
+        )
+
+        self.assertEqual(rapport['rapprochees'], 1)
+        self.assertEqual(
+            [(ligne['numero'], ligne['motif']) for ligne in rapport['non_rapprochees']],
+            [(2, "Référence trop longue (100 caractères au plus)")],
+        )
+        self.assertEqual(PaiementFrais.objects.get().reference, 'R' * 100)
+
+    def test_reference_importee_en_concurrence(self):
+        # Import concurrent : REF-1 est enregistrée entre la vérification et l'insertion
+        PaiementFrais.objects.create(frais=self.frais[0], reference='REF-1', montant=Decimal('100'))
+        contenu = "reference;matricule;montant\nREF-1;UOM2025-001;100\nREF-2;UOM2025-002;50\n"
+
+        with mock.patch('users.frais._references_importees', side_effect=[set(), {'REF-1'}]):
+            rapport = self._rapprocher(contenu)
+        self.assertEqual((rapport['rapprochees'], rapport['deja_importees'], rapport['erreur']), (1, 1, ''))
+
+        with mock.patch('users.frais._references_importees', return_value=set()):
+            rapport = self._rapprocher(contenu.replace('REF-2', 'REF-3'))
+        self.assertEqual(rapport['rapprochees'], 0)
+        self.assertIn("aucun paiement n'a été imputé", rapport['erreur'])
+        # Rien n'est imputé : la transaction de l'import a été annulée en bloc
+        self.assertFalse(PaiementFrais.objects.filter(reference='REF-3').exists())
+        self.frais[1].refresh_from_db()
+        self.assertEqual(self.frais[1].montant_paye, Decimal('50'))
+
+
+class FinancesTests(TestCase):
+    """Tableau de bord financier : agrégats par année, cache et liste détaillée"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.fsi = Faculte.objects.create(code='FSI', nom='Sciences informatiques')
+        self.fdr = Faculte.objects.create(code='FDR', nom='Droit')
+        self.promotion = Promotion.objects.create(annee_debut=2024, annee_fin=2025)
+        self.etudiants = {}
+        for numero, faculte, niveau, total, paye in (
+            (1, self.fsi, 'L1', 500, 200),
+            (2, self.fsi, 'L1', 500, 500),
+            (3, self.fsi, 'L2', 600, 0),
+            (4, self.fdr, 'L1', 400, 100),
+            (5, None, '', 300, 0),
+        ):
+            etudiant = CustomUser.objects.create_user(
+                f'etudiant{numero}', password='x', matricule=f'UOM2025-00{numero}', last_name=f'Nom{numero}'
+            )
+            if faculte:
+                StudentProfile.objects.create(user=etudiant, niveau=niveau, faculte=faculte, promotion=self.promotion)
+            FraisAcademique.objects.create(
+                etudiant=etudiant, annee_academique='2024-2025', montant_total=Decimal(total), montant_paye=Decimal(paye),
+            )
+            self.etudiants[numero] = etudiant
+        FraisAcademique.objects.create(
+            etudiant=self.etudiants[1], annee_academique='2023-2024',
+            montant_total=Decimal('450'), montant_paye=Decimal('450'),
+        )
+
+    @staticmethod
+    def _lignes(tableau, nom):
+        return {ligne['filtre']: (ligne['nombre'], ligne['du'], ligne['paye']) for ligne in tableau[nom]}
+
+    def test_agregats_par_annee(self):
+        tableau = tableau_finances('2024-2025')
+
+        totaux = tableau['totaux']
+        self.assertEqual((totaux['nombre'], totaux['du'], totaux['paye'], totaux['restant']), (5, 2300, 800, 1500))
+        self.assertEqual(totaux['taux'], Decimal('34.8'))
+        self.assertEqual((totaux['non_paye'], totaux['partiel'], totaux['complet']), (2, 2, 1))
+        self.assertEqual(
+            self._lignes(tableau, 'faculte'),
+            {AUCUN: (1, 300, 0), 'FDR': (1, 400, 100), 'FSI': (3, 1600, 700)},
+        )
+        self.assertEqual(self._lignes(tableau, 'niveau'), {AUCUN: (1, 300, 0), 'L1': (3, 1400, 800), 'L2': (1, 600, 0)})
+        self.assertEqual(self._lignes(tableau, 'promotion'), {AUCUN: (1, 300, 0), '2024-2025': (4, 2000, 800)})
+        self.assertEqual(
+            self._lignes(tableau, 'statut'),
+            {'complet': (1, 500, 500), 'partiel': (2, 900, 300), 'non_paye': (2, 900, 0)},
+        )
+
+        ancienne = tableau_finances('2023-2024')['totaux']
+        self.assertEqual((ancienne['nombre'], ancienne['du'], ancienne['taux']), (1, 450, Decimal('100.0')))
+
+    def test_cache_invalide_apres_chaque_ecriture(self):
+        tableau_finances('2024-2025')
+        with self.assertNumQueries(0):
+            tableau_finances('2024-2025')
+
+        frais = FraisAcademique.objects.get(etudiant=self.etudiants[3], annee_academique='2024-2025')
+        frais.montant_paye = Decimal('600')
+        with self.captureOnCommitCallbacks(execute=True):
+            frais.save()
+        self.assertEqual(tableau_finances('2024-2025')['totaux']['paye'], 1400)
+
+        nouveau = CustomUser.objects.create_user('etudiant6', password='x', matricule='UOM2025-006')
+        StudentProfile.objects.create(user=nouveau, niveau='L1', faculte=self.fsi, promotion=self.promotion)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(generer_frais(self.fsi, self.promotion, {'L1': Decimal('500')}, '2024-2025')['crees'], 1)
+        self.assertEqual(tableau_finances('2024-2025')['totaux']['du'], 2800)
+
+        releve = SimpleUploadedFile('releve.csv', "reference;matricule;montant\nREF-1;UOM2025-006;250\n".encode('utf-8'))
+        with self.captureOnCommitCallbacks(execute=True):
+            rapprocher_paiements(releve, '2024-2025')
+        self.assertEqual(tableau_finances('2024-2025')['totaux']['paye'], 1650)
+        # L'autre année n'est pas recalculée inutilement
+        tableau_finances('2023-2024')
+        with self.captureOnCommitCallbacks(execute=True):
+            frais.save()
+        with self.assertNumQueries(0):
+            tableau_finances('2023-2024')
+
+    def test_filtre_aucun(self):
+        for filtre in ('faculte', 'promotion', 'niveau'):
+            with self.subTest(filtre=filtre):
+                self.assertEqual(
+                    list(filtrer_frais('2024-2025', **{filtre: AUCUN}).values_list('etudiant__matricule', flat=True)),
+                    ['UOM2025-005'],
+                )
+        self.assertFalse(filtrer_frais('2024-2025', promotion='2024').exists())
+
+    def test_liste_detaillee_et_export_memes_filtres(self):
+        admin = CustomUser.objects.create_user('admin', password='x', matricule='UOM2025-900', user_type='admin')
+        self.client.force_login(admin)
+        filtres = {'annee': '2024-2025', 'faculte': 'FSI', 'niveau': 'L1'}
+
+        reponse = self.client.get(reverse('admin_finances_frais'), {**filtres, 'page': 'x'})
+        self.assertEqual(reponse.status_code, 200)
+        self.assertEqual(reponse.context['paginator'].count, 2)
+        self.assertEqual(
+            [frais.etudiant.matricule for frais in reponse.context['frais']], ['UOM2025-001', 'UOM2025-002']
+        )
+        self.assertIn('faculte=FSI', reponse.context['filtres_liens'])
+
+        reponse = self.client.get(reverse('admin_finances_export'), {**filtres, 'format': 'csv'})
+        lignes = b''.join(reponse.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual([ligne.split(';')[0] for ligne in lignes[1:]], ['UOM2025-001', 'UOM2025-002'])
+
+        reponse = self.client.get(reverse('admin_finances_export'), {'annee': '2024-2025', 'faculte': AUCUN})
+        lignes = b''.join(reponse.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual([ligne.split(';')[0] for ligne in lignes[1:]], ['UOM2025-005'])
+
+
+class IndicateursTableauBordTests(TestCase):
+    """Indicateurs du tableau de bord administrateur : deux requêtes, instantané du jour et cache"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        for numero, actif in ((1, True), (2, True), (3, False)):
+            CustomUser.objects.create_user(
+                f'etudiant{numero}', password='x', matricule=f'UOM2025-00{numero}', is_active_student=actif,
+                is_first_login=numero == 1,
+            )
+        self.enseignant = CustomUser.objects.create_user(
+            'enseignant', password='x', matricule='UOM2025-100', user_type='enseignant', is_first_login=False,
+        )
+        self.faculte = Faculte.objects.create(code='FSI', nom='Sciences informatiques')
+        Faculte.objects.create(code='FDR', nom='Droit', is_active=False)
+        self.promotion = Promotion.objects.create(annee_debut=2024, annee_fin=2025)
+
+    def test_indicateurs_en_deux_requetes(self):
+        with self.assertNumQueries(2):
+            indicateurs = calculer_indicateurs()
+
+        self.assertEqual(indicateurs, {
+            'total_etudiants': 3, 'etudiants_actifs': 2, 'total_enseignants': 1,
+            'premiere_connexion_en_attente': 1,
+            'total_facultes': 2, 'facultes_actives': 1, 'total_promotions': 1, 'promotions_actives': 1,
+        })
+
+    def test_instantane_du_jour_idempotent(self):
+        enregistrer_instantane()
+        CustomUser.objects.create_user('etudiant4', password='x', matricule='UOM2025-004')
+
+        instantane = enregistrer_instantane()
+
+        self.assertEqual(InstantaneStatistiques.objects.count(), 1)
+        self.assertEqual((instantane.date, instantane.total_etudiants), (timezone.localdate(), 4))
+
+    def test_tendances(self):
+        self.assertEqual(tableau_de_bord()['tendances'], {})
+
+        aujourd_hui = timezone.localdate()
+        InstantaneStatistiques.objects.create(date=aujourd_hui - timedelta(days=9), total_etudiants=1, total_facultes=1)
+        # Instantané plus proche de J-7 : c'est lui la référence, pas celui d'il y a 3 jours
+        InstantaneStatistiques.objects.create(date=aujourd_hui - timedelta(days=8), total_etudiants=2, total_facultes=2)
+        InstantaneStatistiques.objects.create(date=aujourd_hui - timedelta(days=3), total_etudiants=3, total_facultes=2)
+        cache.clear()
+
+        donnees = tableau_de_bord()
+
+        self.assertEqual((donnees['tendances']['total_etudiants'], donnees['tendances']['total_facultes']), (1, 0))
+        self.assertEqual(donnees['tendances']['total_enseignants'], 1)
+        self.assertEqual([jour['date'] for jour in donnees['serie']][-2:], [aujourd_hui - timedelta(days=3), aujourd_hui])
+
+    def test_cache_invalide_par_les_enregistrements(self):
+        tableau_de_bord()
+        with self.assertNumQueries(0):
+            tableau_de_bord()
+
+        # Simple mise à jour de last_login : le cache est conservé
+        with self.captureOnCommitCallbacks(execute=True):
+            self.enseignant.last_login = timezone.now()
+            self.enseignant.save(update_fields=['last_login'])
+        self.assertIsNotNone(cache.get(CLE_INDICATEURS))
+
+        for nom, enregistrer in (
+            ('CustomUser', lambda: CustomUser.objects.create_user('etudiant4', password='x', matricule='UOM2025-004')),
+            ('Faculte', lambda: Faculte.objects.create(code='FSE', nom='Économie')),
+            ('Promotion', self.promotion.save),
+            ('Faculte supprimée', self.faculte.delete),
+        ):
+            with self.subTest(modele=nom):
+                tableau_de_bord()
+                with self.captureOnCommitCallbacks(execute=True):
+                    enregistrer()
+                self.assertIsNone(cache.get(CLE_INDICATEURS))
+        self.assertEqual(tableau_de_bord()['indicateurs']['total_etudiants'], 4)
+
+
+class TableauEnseignantTests(TestCase):
+    """Tableau de bord enseignant : échéances, avancement des notes, requêtes et cache"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.maintenant = timezone.now()
+        self.enseignant = CustomUser.objects.create_user('enseignant', password='x', matricule='UOM2025-100', user_type='enseignant')
+        self.collegue = CustomUser.objects.create_user('collegue', password='x', matricule='UOM2025-101', user_type='enseignant')
+        self.cours = Cours.objects.create(
+            titre='Algorithmique', code='INFO101', niveau='L1', filiere='Informatique', enseignant=self.enseignant,
+            date_debut=date.today(), date_fin=date.today() + timedelta(days=90),
+        )
+        self.etudiants = [
+            CustomUser.objects.create_user(f'etudiant{numero}', password='x', matricule=f'UOM2025-00{numero}')
+            for numero in range(1, 5)
+        ]
+        # Correction en retard (une remise en attente), échéance proche, échéance lointaine
+        self.en_retard = self._travail('TP en retard', correction=-1)
+        self.proche = self._travail('TP proche', correction=3)
+        self._travail('TP lointain', correction=30)
+        self.remise = RemiseTravail.objects.create(etudiant=self.etudiants[0], travail=self.en_retard)
+        # Une remise déposée après la date limite du travail, l'autre avant
+        RemiseTravail.objects.filter(pk=self.remise.pk).update(
+            date_remise=self.en_retard.date_limite_remise + timedelta(hours=1)
+        )
+        a_temps = RemiseTravail.objects.create(etudiant=self.etudiants[1], travail=self.proche)
+        RemiseTravail.objects.filter(pk=a_temps.pk).update(date_remise=self.proche.date_limite_remise - timedelta(days=1))
+
+    def _travail(self, titre, correction):
+        return Travail.objects.create(
+            titre=titre, description='TP', consignes='Rendre', niveau='L1', filiere='Informatique',
+            enseignant=self.enseignant, cours=self.cours, statut='publie',
+            date_limite_remise=self.maintenant - timedelta(days=5),
+            date_limite_correction=self.maintenant + timedelta(days=correction),
+        )
+
+    def _ue(self, code):
+        return UE.objects.create(
+            code=code, nom=code, niveau='L1', semestre='S1', filiere='Informatique', credits=6,
+            enseignant_responsable=self.enseignant, date_debut=date(2024, 9, 1), date_fin=date(2025, 1, 31),
+        )
+
+    def test_retards_et_echeances(self):
+        donnees = tableau_enseignant(self.enseignant.id)
+
+        travaux = {travail['titre']: travail for travail in donnees['travaux']}
+        self.assertEqual(list(travaux), ['TP en retard', 'TP proche'])
+        self.assertTrue(travaux['TP en retard']['en_retard'])
+        self.assertFalse(travaux['TP proche']['en_retard'])
+        remises = {remise['etudiant__matricule']: remise['en_retard'] for remise in donnees['remises_recentes']}
+        self.assertEqual(remises, {'UOM2025-001': True, 'UOM2025-002': False})
+        self.assertEqual((donnees['totaux']['a_corriger'], donnees['totaux']['en_retard']), (2, 1))
+
+    def test_avancement_des_notes(self):
+        ue = self._ue('INFO101')
+        sans_inscrits = self._ue('INFO102')
+        for etudiant in self.etudiants:
+            InscriptionUE.objects.create(etudiant=etudiant, ue=ue)
+        # Trois étudiants notés sur quatre inscrits (deux notes pour le premier)
+        for etudiant in (*self.etudiants[:3], self.etudiants[0]):
+            Note.objects.create(
+                etudiant=etudiant, ue=ue, titre='Examen', note_obtenue=Decimal('12'),
+                enseignant=self.enseignant, date_evaluation=date(2025, 1, 15),
+            )
+
+        ues = {ue['code']: ue for ue in tableau_enseignant(self.enseignant.id)['ues']}
+
+        self.assertEqual((ues['INFO101']['inscrits'], ues['INFO101']['notes_saisies']), (4, 3))
+        self.assertEqual(ues['INFO101']['avancement'], 75)
+        self.assertEqual((ues[sans_inscrits.code]['inscrits'], ues[sans_inscrits.code]['avancement']), (0, None))
+
+    def test_nombre_de_requetes(self):
+        self._ue('INFO101')
+        with self.assertNumQueries(4):
+            tableau_enseignant(self.enseignant.id)
+        with self.assertNumQueries(0):
+            tableau_enseignant(self.enseignant.id)
+
+    def test_cache_invalide_par_enseignant(self):
+        tableau_enseignant(self.collegue.id)
+
+        for nom, action in (
+            ('remise enregistrée', lambda: RemiseTravail.objects.create(etudiant=self.etudiants[2], travail=self.proche)),
+            ('remise notée', lambda: appliquer_corrections(self.en_retard, {str(self.remise.id): {'note': '14'}})),
+        ):
+            with self.subTest(action=nom):
+                tableau_enseignant(self.enseignant.id)
+                with self.captureOnCommitCallbacks(execute=True):
+                    action()
+                self.assertIsNone(cache.get(_cle_tableau(self.enseignant.id)))
+                # Le tableau d'un autre enseignant est conservé
+                self.assertIsNotNone(cache.get(_cle_tableau(self.collegue.id)))
+
+        donnees = tableau_enseignant(self.enseignant.id)
+        self.assertEqual([travail['titre'] for travail in donnees['travaux']], ['TP proche'])
+        self.assertEqual(donnees['totaux']['a_corriger'], 2)
+
+
+class NotificationsTests(TestCase):
+    """Notifications créées en masse pour la cohorte et compteur de non lues en cache"""
+
+    def setUp(self):
+        reglages = override_settings(TACHES_SYNCHRONES=True)
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+        cache.clear()
+        self.addCleanup(cache.clear)
+        faculte = Faculte.objects.create(code='FSI', nom='Sciences informatiques')
+        promotion = Promotion.objects.create(annee_debut=2024, annee_fin=2025)
+        self.enseignant = CustomUser.objects.create_user('enseignant', password='x', matricule='UOM2025-100', user_type='enseignant')
+        self.cours = Cours.objects.create(
+            titre='Algorithmique', code='INFO101', niveau='L1', filiere='Informatique', enseignant=self.enseignant,
+            faculte=faculte, promotion=promotion, date_debut=date.today(), date_fin=date.today() + timedelta(days=90),
+        )
+        self.etudiants = []
+        # Deux étudiants actifs de la cohorte, un compte désactivé et un étudiant de L2
+        for numero, niveau, actif in ((1, 'L1', True), (2, 'L1', True), (3, 'L1', False), (4, 'L2', True)):
+            etudiant = CustomUser.objects.create_user(
+                f'etudiant{numero}', password='x', matricule=f'UOM2025-00{numero}', is_active=actif,
+            )
+            StudentProfile.objects.create(user=etudiant, niveau=niveau, faculte=faculte, promotion=promotion)
+            self.etudiants.append(etudiant)
+        self.cohorte = {self.etudiants[0].id, self.etudiants[1].id}
+
+    def _destinataires(self, type_notification):
+        return set(Notification.objects.filter(type_notification=type_notification).values_list('destinataire_id', flat=True))
+
+    def test_travail_publie(self):
+        travail = Travail.objects.create(
+            titre='TP 1', description='TP', consignes='Rendre', niveau='L1', filiere='Informatique',
+            enseignant=self.enseignant, cours=self.cours, statut='publie',
+            date_limite_remise=timezone.now() + timedelta(days=7),
+        )
+        with CaptureQueriesContext(connection) as requetes:
+            self.assertEqual(notifier_travail_publie(travail), 2)
+        # Sélection des destinataires et insertion en une requête chacune
+        self.assertEqual(
+            [requete['sql'].split()[0] for requete in requetes if 'SAVEPOINT' not in requete['sql']],
+            ['SELECT', 'INSERT'],
+        )
+        self.assertEqual(self._destinataires('travail'), self.cohorte)
+
+        travail.is_visible_etudiants = False
+        self.assertEqual(notifier_travail_publie(travail), 0)
+
+    def test_support_ajoute(self):
+        support = SupportCours.objects.create(titre='Chapitre 1', cours=self.cours, enseignant=self.enseignant)
+        self.assertEqual(notifier_support_ajoute(support), 2)
+        self.assertEqual(self._destinataires('support'), self.cohorte)
+
+        support.is_public = False
+        self.assertEqual(notifier_support_ajoute(support), 0)
+
+    def test_notes_publiees(self):
+        ue = UE.objects.create(
+            code='INFO101', nom='Algorithmique', niveau='L1', semestre='S1', filiere='Informatique', credits=6,
+            enseignant_responsable=self.enseignant, date_debut=date(2024, 9, 1), date_fin=date(2025, 1, 31),
+        )
+        note = Note.objects.create(
+            etudiant=self.etudiants[0], ue=ue, titre='Examen', note_obtenue=Decimal('12'), is_publie=False,
+            enseignant=self.enseignant, date_evaluation=date(2025, 1, 15),
+        )
+        self.assertEqual(self._destinataires('note'), set())
+
+        note.is_publie = True
+        note.save()
+        note.save()
+        # Une seule notification : à la publication, pas à chaque enregistrement
+        self.assertEqual(Notification.objects.filter(type_notification='note').count(), 1)
+        self.assertEqual(self._destinataires('note'), {self.etudiants[0].id})
+
+    def test_memoire_valide(self):
+        encadreur = CustomUser.objects.create_user('encadreur', password='x', matricule='UOM2025-101', user_type='enseignant')
+        memoire = Memoire.objects.create(
+            etudiant=self.etudiants[0], titre='Mémoire', description='Sujet', objectifs='Objectifs',
+            domaine='informatique', directeur=self.enseignant, encadreur=encadreur,
+        )
+
+        self.assertEqual(notifier_memoire_valide(memoire), 3)
+        self.assertEqual(self._destinataires('memoire'), {self.etudiants[0].id, self.enseignant.id, encadreur.id})
+
+    def test_compteur_de_non_lues_en_cache(self):
+        etudiant = self.etudiants[0]
+        with self.assertNumQueries(1):
+            self.assertEqual(compter_non_lues(etudiant), 0)
+        with self.assertNumQueries(0):
+            self.assertEqual(compter_non_lues(etudiant), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            notifier_support_ajoute(SupportCours.objects.create(titre='Chapitre 1', cours=self.cours, enseignant=self.enseignant))
+            notifier_support_ajoute(SupportCours.objects.create(titre='Chapitre 2', cours=self.cours, enseignant=self.enseignant))
+        self.client.force_login(etudiant)
+        self.assertEqual(self.client.get(reverse('notifications')).context['notifications_non_lues'], 2)
+
+        # Lecture d'une notification : compteur invalidé puis relu
+        notification = Notification.objects.filter(destinataire=etudiant).first()
+        reponse = self.client.post(reverse('notification_marquer_lue', args=[notification.id]))
+        self.assertEqual(reponse.json(), {'success': True, 'unread_count': 1})
+        self.client.get(reverse('notification_ouvrir', args=[notification.id]))
+        self.assertEqual(compter_non_lues(etudiant), 1)
+
+        self.client.post(reverse('notifications_tout_marquer_lu'))
+        self.assertEqual(compter_non_lues(etudiant), 0)
+        # Le compteur d'un autre étudiant de la cohorte n'est pas touché
+        self.assertEqual(compter_non_lues(self.etudiants[1]), 2)
+
+
+class SuppressionTests(TestCase):
+    """Suppression par lots : lignes supprimées, fichiers et compteurs des objets qui restent"""
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        reglages = override_settings(MEDIA_ROOT=self.media, TACHES_SYNCHRONES=True)
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+
+        faculte = Faculte.objects.create(code='FSI', nom='Sciences informatiques')
+        promotion = Promotion.objects.create(annee_debut=2024, annee_fin=2025)
+        self.enseignant = CustomUser.objects.create_user('enseignant', password='x', matricule='UOM2025-100', user_type='enseignant')
+        self.cours = Cours.objects.create(
+            titre='Algorithmique', code='INFO101', niveau='L1', filiere='Informatique', enseignant=self.enseignant,
+            date_debut=date.today(), date_fin=date.today() + timedelta(days=90),
+        )
+        self.travail = Travail.objects.create(
+            titre='TP 1', description='TP', consignes='Rendre un fichier', niveau='L1', filiere='Informatique',
+            enseignant=self.enseignant, cours=self.cours, statut='publie',
+            date_limite_remise=timezone.now() + timedelta(days=7),
+        )
+        self.etudiants = []
+        self.remises = []
+        for numero in (1, 2):
+            etudiant = CustomUser.objects.create_user(f'etudiant{numero}', password='x', matricule=f'UOM2025-00{numero}')
+            StudentProfile.objects.create(user=etudiant, niveau='L1', faculte=faculte, promotion=promotion)
+            InscriptionCours.objects.create(etudiant=etudiant, cours=self.cours)
+            remise = RemiseTravail(etudiant=etudiant, travail=self.travail)
+            remise.fichier_principal.save('tp.txt', ContentFile(b'contenu'), save=False)
+            remise.save()
+            CoteEtudiant.objects.create(
+                etudiant=etudiant, annee_academique='2024-2025', semestre='S1', moyenne=Decimal(12),
+                mention='passable', decision='admis', classement_a_jour=True,
+            )
+            frais = FraisAcademique.objects.create(etudiant=etudiant, annee_academique='2024-2025', montant_total=Decimal(500))
+            PaiementFrais.objects.create(
+                frais=frais, reference=f'REF-{numero}', montant=Decimal(100), date_paiement=timezone.now(),
+            )
+            self.etudiants.append(etudiant)
+            self.remises.append(remise)
+        CoteEtudiant.objects.update(classement_a_jour=True)
+
+    def _lignes_de_la_cascade(self, objet):
+        """Nombre de lignes que la cascade de Django supprimerait"""
+        collector = Collector(using='default')
+        collector.collect([objet])
+        return (
+            sum(len(objets) for objets in collector.data.values())
+            + sum(lignes.count() for lignes in collector.fast_deletes)
+        )
+
+    def _supprimer(self, objet, type_objet):
+        attendu = self._lignes_de_la_cascade(objet)
+        with self.captureOnCommitCallbacks(execute=True):
+            tache = lancer_suppression(objet, type_objet)
+        tache.refresh_from_db()
+        self.assertEqual(tache.statut, 'terminee', tache.message_erreur)
+        self.assertEqual((tache.lignes_supprimees, tache.lignes_total), (attendu, attendu))
+        return tache
+
+    def test_suppression_d_un_etudiant(self):
+        supprime, reste = self.etudiants
+        chemin = self.remises[0].fichier_principal.path
+
+        tache = self._supprimer(supprime, 'etudiant')
+
+        self.assertEqual(tache.fichiers_supprimes, 1)
+        self.assertFalse(os.path.exists(chemin))
+        self.assertTrue(os.path.exists(self.remises[1].fichier_principal.path))
+        self.assertFalse(CustomUser.objects.filter(pk=supprime.pk).exists())
+        for modele in (StudentProfile, InscriptionCours, RemiseTravail, CoteEtudiant, FraisAcademique):
+            with self.subTest(modele=modele.__name__):
+                self.assertEqual(modele.objects.count(), 1)
+        self.assertEqual(PaiementFrais.objects.get().reference, 'REF-2')
+
+        self.cours.refresh_from_db()
+        self.travail.refresh_from_db()
+        self.assertEqual((self.cours.nombre_inscrits, self.cours.nombre_remises), (1, 1))
+        self.assertEqual((self.travail.nombre_remises, self.travail.nombre_remises_en_attente), (1, 1))
+        # Le rang de l'étudiant restant est à recalculer
+        self.assertFalse(CoteEtudiant.objects.get(etudiant=reste).classement_a_jour)
+
+    def test_suppression_d_un_cours(self):
+        tache = self._supprimer(self.cours, 'cours')
+
+        self.assertEqual(tache.fichiers_supprimes, 2)
+        self.assertFalse(Cours.objects.exists())
+        self.assertFalse(Travail.objects.exists())
+        self.assertFalse(RemiseTravail.objects.exists())
+        self.assertFalse(InscriptionCours.objects.exists())
+        self.assertEqual(CustomUser.objects.count(), 3)
+        self.assertEqual(CoteEtudiant.objects.count(), 2)
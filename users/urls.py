@@ -17,11 +17,15 @@ urlpatterns = [
     path('student/resultats/pdf/', views.student_resultats_pdf, name='student_resultats_pdf'),
     path('student/profil/', views.student_profil, name='student_profil'),
     path('notifications/', views.notifications, name='notifications'),
+    path('notifications/tout-lire/', views.notifications_tout_marquer_lu, name='notifications_tout_marquer_lu'),
+    path('notifications/<int:notification_id>/', views.notification_ouvrir, name='notification_ouvrir'),
+    path('notifications/<int:notification_id>/lue/', views.notification_marquer_lue, name='notification_marquer_lue'),
     path('teacher/dashboard/', views.teacher_dashboard, name='teacher_dashboard'),
     path('admin/dashboard/', views.admin_dashboard, name='admin_dashboard'),
     
     # Gestion des étudiants (Admin)
     path('admin/students/', views.admin_student_list, name='admin_student_list'),
+    path('admin/students/export/', views.admin_student_export, name='admin_student_export'),
     path('admin/students/create/', views.admin_student_create, name='admin_student_create'),
     path('admin/students/<int:user_id>/', views.admin_student_detail, name='admin_student_detail'),
     path('admin/students/<int:user_id>/toggle-active/', views.admin_student_toggle_active, name='admin_student_toggle_active'),
@@ -30,6 +34,19 @@ urlpatterns = [
     path('admin/students/<int:user_id>/edit/', views.admin_student_edit, name='admin_student_edit'),
     path('admin/students/<int:user_id>/delete/', views.admin_student_delete, name='admin_student_delete'),
     path('admin/students/bulk-import/', views.admin_student_bulk_import, name='admin_student_bulk_import'),
+    path('admin/students/passage-annee/', views.admin_passage_annee, name='admin_passage_annee'),
+    
+    # Frais académiques (Admin)
+    path('admin/frais/', views.admin_frais, name='admin_frais'),
+    path('admin/frais/generer/', views.admin_frais_generer, name='admin_frais_generer'),
+    path('admin/frais/rapprochement/', views.admin_frais_rapprocher, name='admin_frais_rapprocher'),
+    path('admin/finances/', views.admin_finances, name='admin_finances'),
+    path('admin/finances/frais/', views.admin_finances_frais, name='admin_finances_frais'),
+    path('admin/finances/export/', views.admin_finances_export, name='admin_finances_export'),
+
+    # Suppressions en arrière-plan
+    path('admin/suppressions/<uuid:tache_id>/', views.admin_suppression_suivi, name='admin_suppression_suivi'),
+    path('admin/suppressions/<uuid:tache_id>/etat/', views.admin_suppression_etat, name='admin_suppression_etat'),
     
     # Gestion des enseignants (Admin)
     path('admin/teachers/', views.admin_teacher_list, name='admin_teacher_list'),
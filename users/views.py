@@ -5,12 +5,16 @@ from django.contrib import messages
 from django.db.models import Q
 from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
 from django.http import JsonResponse
+from django.urls import reverse
 import csv
-from .models import CustomUser, StudentProfile, TeacherProfile, Faculte, Promotion, FraisAcademique
+from .models import CustomUser, StudentProfile, TeacherProfile, Faculte, Promotion, FraisAcademique, Notification, TacheSuppression
+from .notifications import compter_non_lues, marquer_lues
+from .exports import FORMATS_EXPORT, reponse_export, xlsx_disponible
+from .suppression import lancer_suppression
 from .forms import (
     CustomLoginForm, PasswordChangeFirstLoginForm, ProfileCompletionForm,
     StudentCreationForm, TeacherCreationForm, BulkStudentImportForm,
-    StudentProfileForm
+    StudentProfileForm, PassageAnneeForm, GenerationFraisForm, RapprochementPaiementsForm
 )
 
 
@@ -232,8 +236,8 @@ def student_dashboard(request):
     else:
         travaux_a_rendre = []
     
-    # Notifications (pour l'instant vide, on l'implémentera plus tard)
-    notifications = []
+    # Notifications récentes
+    notifications = Notification.objects.filter(destinataire=request.user)[:5]
     
     # Récupérer le niveau de l'étudiant
     niveau = request.user.student_profile.niveau if hasattr(request.user, 'student_profile') else None
@@ -275,7 +279,11 @@ def teacher_dashboard(request):
         messages.error(request, "Accès non autorisé.")
         return redirect('login')
     
-    return render(request, 'users/teacher_dashboard.html', {'user': request.user})
+    from .tableau_enseignant import tableau_enseignant
+
+    context = {'user': request.user}
+    context.update(tableau_enseignant(request.user.id))
+    return render(request, 'users/teacher_dashboard.html', context)
 
 
 @login_required
@@ -285,37 +293,30 @@ def admin_dashboard(request):
         messages.error(request, "Accès non autorisé.")
         return redirect('login')
     
-    total_students = CustomUser.objects.filter(user_type='etudiant').count()
-    total_teachers = CustomUser.objects.filter(user_type='enseignant').count()
-    active_students = CustomUser.objects.filter(user_type='etudiant', is_active_student=True).count()
-    pending_first_login = CustomUser.objects.filter(is_first_login=True).count()
-    
-    # Statistiques facultés et promotions
-    total_facultes = Faculte.objects.count()
-    total_promotions = Promotion.objects.count()
-    active_facultes = Faculte.objects.filter(is_active=True).count()
-    active_promotions = Promotion.objects.filter(is_active=True).count()
-    
+    from .statistiques import tableau_de_bord
+
+    # Indicateurs précalculés (cache + instantanés quotidiens)
+    statistiques = tableau_de_bord()
+    indicateurs = statistiques['indicateurs']
+
     context = {
-        'total_students': total_students,
-        'total_teachers': total_teachers,
-        'active_students': active_students,
-        'pending_first_login': pending_first_login,
-        'total_facultes': total_facultes,
-        'total_promotions': total_promotions,
-        'active_facultes': active_facultes,
-        'active_promotions': active_promotions,
+        'total_students': indicateurs['total_etudiants'],
+        'total_teachers': indicateurs['total_enseignants'],
+        'active_students': indicateurs['etudiants_actifs'],
+        'pending_first_login': indicateurs['premiere_connexion_en_attente'],
+        'total_facultes': indicateurs['total_facultes'],
+        'total_promotions': indicateurs['total_promotions'],
+        'active_facultes': indicateurs['facultes_actives'],
+        'active_promotions': indicateurs['promotions_actives'],
+        'tendances': statistiques['tendances'],
+        'serie': statistiques['serie'],
+        'date_calcul': statistiques['date_calcul'],
     }
     return render(request, 'users/admin_dashboard.html', context)
 
 
-@login_required
-def admin_student_list(request):
-    """Liste des étudiants avec filtrage par faculté et promotion"""
-    if not request.user.is_admin_user() and not request.user.is_superuser:
-        messages.error(request, "Accès non autorisé.")
-        return redirect('login')
-    
+def _filtrer_etudiants(request):
+    """Étudiants correspondant aux filtres et au tri de la liste (partagé avec l'export)"""
     search_query = request.GET.get('search', '')
     faculte_filter = request.GET.get('faculte', '')
     promotion_filter = request.GET.get('promotion', '')
@@ -360,6 +361,18 @@ def admin_student_list(request):
     else:
         students = students.order_by('-created_at')
 
+    return students, search_query, faculte_filter, promotion_filter, order
+
+
+@login_required
+def admin_student_list(request):
+    """Liste des étudiants avec filtrage par faculté et promotion"""
+    if not request.user.is_admin_user() and not request.user.is_superuser:
+        messages.error(request, "Accès non autorisé.")
+        return redirect('login')
+    
+    students, search_query, faculte_filter, promotion_filter, order = _filtrer_etudiants(request)
+
     # Pagination
     page = request.GET.get('page', 1)
     paginator = Paginator(students, 10)
@@ -380,6 +393,11 @@ def admin_student_list(request):
     ).values_list('student_profile__promotion__annee_debut', 'student_profile__promotion__annee_fin').distinct().order_by('student_profile__promotion__annee_debut')
     
     promotion_choices = [('', 'Toutes les promotions')] + [(f"{debut}-{fin}", f"{debut}-{fin}") for debut, fin in existing_promotions]
+
+    # Filtres courants transmis aux liens d'export
+    filtres_export = request.GET.copy()
+    filtres_export.pop('page', None)
+    filtres_export.pop('format', None)
     
     return render(request, 'users/admin_student_list.html', {
         'students': students_page,
@@ -390,9 +408,37 @@ def admin_student_list(request):
         'promotion_choices': promotion_choices,
         'order': order,
         'paginator': paginator,
+        'filtres_export': filtres_export.urlencode(),
     })
 
 
+@login_required
+def admin_student_export(request):
+    """Export CSV / XLSX des étudiants (mêmes filtres que la liste)"""
+    if not request.user.is_admin_user() and not request.user.is_superuser:
+        messages.error(request, "Accès non autorisé.")
+        return redirect('login')
+
+    format_export = request.GET.get('format', 'csv')
+    if format_export not in FORMATS_EXPORT:
+        format_export = 'csv'
+    if format_export == 'xlsx' and not xlsx_disponible():
+        messages.error(request, "L'export Excel n'est pas disponible sur ce serveur, utilisez le CSV.")
+        return redirect('admin_student_list')
+
+    students = _filtrer_etudiants(request)[0]
+    entetes = [
+        'Matricule', 'Nom', 'Prénom', 'Email', 'Téléphone', 'Faculté', 'Promotion (début)',
+        'Promotion (fin)', 'Niveau', 'Filière', 'Actif', 'Date de création',
+    ]
+    lignes = students.values_list(
+        'matricule', 'last_name', 'first_name', 'email', 'phone', 'student_profile__faculte__code',
+        'student_profile__promotion__annee_debut', 'student_profile__promotion__annee_fin',
+        'student_profile__niveau', 'student_profile__filiere', 'is_active', 'created_at',
+    )
+    return reponse_export(format_export, 'etudiants', entetes, lignes)
+
+
 @login_required
 def admin_student_create(request):
     """Création d'un étudiant"""
@@ -518,6 +564,302 @@ def admin_student_bulk_import(request):
     return render(request, 'users/admin_student_bulk_import.html', {'form': form})
 
 
+@login_required
+def admin_passage_annee(request):
+    """Passage d'année d'une faculté : aperçu (GET) puis application (POST)"""
+    if not request.user.is_admin_user() and not request.user.is_superuser:
+        messages.error(request, "Accès non autorisé.")
+        return redirect('login')
+
+    from .passage import PassageAnnee
+
+    donnees = request.POST if request.method == 'POST' else (request.GET or None)
+    form = PassageAnneeForm(donnees)
+    passage = None
+
+    if form.is_valid():
+        passage = PassageAnnee(form.cleaned_data['faculte'], form.cleaned_data['promotion'])
+
+        if request.method == 'POST':
+            if not passage.nombre_deplaces:
+                messages.warning(request, "Aucun étudiant à faire passer pour cette faculté et cette promotion.")
+            else:
+                try:
+                    resultats = passage.appliquer(form.cleaned_data['montant_frais'])
+                    messages.success(
+                        request,
+                        f"Passage appliqué : {resultats['passes']} étudiant(s) au niveau suivant, "
+                        f"{resultats['redoublants']} redoublant(s), {resultats['frais']} frais créé(s), "
+                        f"{resultats['inscriptions_cours']} inscription(s) aux cours et "
+                        f"{resultats['inscriptions_ue']} aux UE ; classement de {passage.annee_academique} "
+                        f"figé ({resultats['classements']} cote(s) reclassée(s))."
+                    )
+                except Exception as e:
+                    messages.error(request, f"Erreur lors du passage d'année : {str(e)}")
+            return redirect('admin_passage_annee')
+
+    context = {
+        'form': form,
+        'passage': passage,
+        'lignes': passage.apercu() if passage else [],
+    }
+    return render(request, 'users/admin_passage_annee.html', context)
+
+
+# ===== FRAIS ACADÉMIQUES =====
+
+def _render_admin_frais(request, form_generation=None, form_rapprochement=None, rapport=None):
+    context = {
+        'form_generation': form_generation or GenerationFraisForm(),
+        'form_rapprochement': form_rapprochement or RapprochementPaiementsForm(),
+        'rapport': rapport,
+    }
+    return render(request, 'users/admin_frais.html', context)
+
+
+@login_required
+def admin_frais(request):
+    """Frais académiques : génération en masse et rapprochement des paiements"""
+    if not request.user.is_admin_user() and not request.user.is_superuser:
+        messages.error(request, "Accès non autorisé.")
+        return redirect('login')
+
+    return _render_admin_frais(request)
+
+
+@login_required
+def admin_frais_generer(request):
+    """Génère les frais de l'année d'une faculté et d'une promotion"""
+    if not request.user.is_admin_user() and not request.user.is_superuser:
+        messages.error(request, "Accès non autorisé.")
+        return redirect('login')
+
+    if request.method != 'POST':
+        return redirect('admin_frais')
+
+    from .frais import generer_frais
+
+    form = GenerationFraisForm(request.POST)
+    if not form.is_valid():
+        return _render_admin_frais(request, form_generation=form)
+
+    try:
+        resultats = generer_frais(form.cleaned_data['faculte'], form.cleaned_data['promotion'], form.tarifs)
+    except Exception as e:
+        messages.error(request, f"Erreur lors de la génération des frais : {str(e)}")
+        return redirect('admin_frais')
+
+    messages.success(
+        request,
+        f"{resultats['crees']} frais créé(s) pour {form.cleaned_data['promotion']}, "
+        f"{resultats['existants']} étudiant(s) déjà facturé(s)."
+    )
+    if resultats['sans_tarif']:
+        messages.warning(request, f"{resultats['sans_tarif']} étudiant(s) ignoré(s) : aucun tarif pour leur niveau.")
+    return redirect('admin_frais')
+
+
+@login_required
+def admin_frais_rapprocher(request):
+    """Importe un relevé de paiements et l'impute aux frais de l'année"""
+    if not request.user.is_admin_user() and not request.user.is_superuser:
+        messages.error(request, "Accès non autorisé.")
+        return redirect('login')
+
+    if request.method != 'POST':
+        return redirect('admin_frais')
+
+    from .frais import rapprocher_paiements
+
+    form = RapprochementPaiementsForm(request.POST, request.FILES)
+    if not form.is_valid():
+        return _render_admin_frais(request, form_rapprochement=form)
+
+    try:
+        rapport = rapprocher_paiements(
+            request.FILES['releve'],
+            form.cleaned_data['annee_academique'],
+            form.cleaned_data['mode_paiement'],
+        )
+    except (ValueError, UnicodeDecodeError) as e:
+        messages.error(request, f"Relevé illisible : {str(e)}")
+        return _render_admin_frais(request, form_rapprochement=form)
+    if rapport['erreur']:
+        messages.error(request, rapport['erreur'])
+        return _render_admin_frais(request, form_rapprochement=form)
+
+    messages.success(
+        request,
+        f"{rapport['rapprochees']} paiement(s) rapproché(s) sur {rapport['lignes']} ligne(s), "
+        f"{rapport['frais_mis_a_jour']} frais mis à jour."
+    )
+    return _render_admin_frais(request, form_rapprochement=form, rapport=rapport)
+
+
+def _annee_finances(request):
+    """Année académique demandée, sinon la plus récente facturée"""
+    from .finances import annees_facturees
+
+    annees = annees_facturees()
+    annee = request.GET.get('annee', '')
+    if annee not in annees:
+        annee = annees[0] if annees else ''
+    return annee, annees
+
+
+def _filtrer_frais_finances(request, annee):
+    from .finances import filtrer_frais
+
+    filtres = {nom: request.GET.get(nom, '') for nom in ('faculte', 'promotion', 'niveau', 'statut')}
+    return filtrer_frais(annee, **filtres), filtres
+
+
+@login_required
+def admin_finances(request):
+    """Tableau de bord financier : dû, payé et restant par faculté, promotion, niveau et statut"""
+    if not request.user.is_admin_user() and not request.user.is_superuser:
+        messages.error(request, "Accès non autorisé.")
+        return redirect('login')
+
+    from .finances import tableau_finances
+
+    annee, annees = _annee_finances(request)
+    tableau = tableau_finances(annee) if annee else None
+    regroupements = []
+    if tableau:
+        regroupements = [
+            {'filtre': nom, 'titre': titre, 'lignes': tableau[nom]}
+            for nom, titre in (
+                ('faculte', "Par faculté"), ('promotion', "Par promotion"),
+                ('niveau', "Par niveau"), ('statut', "Par statut"),
+            )
+        ]
+    context = {
+        'annee': annee,
+        'annees': annees,
+        'tableau': tableau,
+        'regroupements': regroupements,
+    }
+    return render(request, 'users/admin_finances.html', context)
+
+
+@login_required
+def admin_finances_frais(request):
+    """Liste détaillée (paginée) des frais d'un regroupement du tableau de bord"""
+    if not request.user.is_admin_user() and not request.user.is_superuser:
+        messages.error(request, "Accès non autorisé.")
+        return redirect('login')
+
+    annee, annees = _annee_finances(request)
+    frais, filtres = _filtrer_frais_finances(request, annee)
+    frais = frais.select_related(
+        'etudiant', 'etudiant__student_profile__faculte', 'etudiant__student_profile__promotion'
+    ).order_by('etudiant__last_name', 'etudiant__first_name', 'id')
+
+    paginator = Paginator(frais, 50)
+    page = request.GET.get('page', 1)
+    try:
+        frais_page = paginator.page(page)
+    except PageNotAnInteger:
+        frais_page = paginator.page(1)
+    except EmptyPage:
+        frais_page = paginator.page(paginator.num_pages)
+
+    filtres_liens = request.GET.copy()
+    filtres_liens.pop('page', None)
+    filtres_liens.pop('format', None)
+
+    context = {
+        'annee': annee,
+        'annees': annees,
+        'filtres': filtres,
+        'frais': frais_page,
+        'paginator': paginator,
+        'filtres_liens': filtres_liens.urlencode(),
+    }
+    return render(request, 'users/admin_finances_frais.html', context)
+
+
+@login_required
+def admin_finances_export(request):
+    """Export CSV / XLSX de la liste détaillée (mêmes filtres)"""
+    if not request.user.is_admin_user() and not request.user.is_superuser:
+        messages.error(request, "Accès non autorisé.")
+        return redirect('login')
+
+    format_export = request.GET.get('format', 'csv')
+    if format_export not in FORMATS_EXPORT:
+        format_export = 'csv'
+    if format_export == 'xlsx' and not xlsx_disponible():
+        messages.error(request, "L'export Excel n'est pas disponible sur ce serveur, utilisez le CSV.")
+        return redirect('admin_finances')
+
+    annee, annees = _annee_finances(request)
+    frais = _filtrer_frais_finances(request, annee)[0].order_by('etudiant__last_name', 'etudiant__first_name', 'id')
+    entetes = [
+        'Matricule', 'Nom', 'Prénom', 'Faculté', 'Promotion (début)', 'Promotion (fin)', 'Niveau',
+        'Année académique', 'Montant total', 'Montant payé', 'Statut', 'Date du dernier paiement',
+        'Mode de paiement', 'Référence',
+    ]
+    lignes = frais.values_list(
+        'etudiant__matricule', 'etudiant__last_name', 'etudiant__first_name',
+        'etudiant__student_profile__faculte__code', 'etudiant__student_profile__promotion__annee_debut',
+        'etudiant__student_profile__promotion__annee_fin', 'etudiant__student_profile__niveau',
+        'annee_academique', 'montant_total', 'montant_paye', 'statut', 'date_paiement',
+        'mode_paiement', 'reference_paiement',
+    )
+    return reponse_export(format_export, f"frais_{annee}", entetes, lignes)
+
+
+# ===== SUPPRESSIONS EN ARRIÈRE-PLAN =====
+
+def _etat_suppression(tache):
+    """Représentation JSON d'une tâche de suppression"""
+    return {
+        'success': True,
+        'id': str(tache.id),
+        'statut': tache.statut,
+        'statut_libelle': tache.get_statut_display(),
+        'etape': tache.etape,
+        'lignes_total': tache.lignes_total,
+        'lignes_supprimees': tache.lignes_supprimees,
+        'fichiers_supprimes': tache.fichiers_supprimes,
+        'pourcentage': tache.pourcentage,
+        'message_erreur': tache.message_erreur,
+    }
+
+
+@login_required
+def admin_suppression_suivi(request, tache_id):
+    """Suivi de l'avancement d'une suppression en arrière-plan"""
+    if not request.user.is_admin_user() and not request.user.is_superuser:
+        messages.error(request, "Accès non autorisé.")
+        return redirect('login')
+
+    tache = get_object_or_404(TacheSuppression, id=tache_id)
+    retours = {
+        'faculte': reverse('admin_faculte_management'),
+        'cours': reverse('cours:admin_cours_list'),
+        'etudiant': reverse('admin_student_list'),
+        'enseignant': reverse('admin_teacher_list'),
+    }
+    context = {
+        'tache': tache,
+        'url_retour': retours[tache.type_objet],
+    }
+    return render(request, 'users/admin_suppression.html', context)
+
+
+@login_required
+def admin_suppression_etat(request, tache_id):
+    """État d'une suppression en arrière-plan (JSON, interrogé par la page de suivi)"""
+    if not request.user.is_admin_user() and not request.user.is_superuser:
+        return JsonResponse({'success': False, 'message': 'Accès non autorisé'}, status=403)
+
+    tache = get_object_or_404(TacheSuppression, id=tache_id)
+    return JsonResponse(_etat_suppression(tache))
+
+
 # ===== GESTION DES FACULTÉS =====
 
 @login_required
@@ -680,9 +1022,12 @@ def admin_faculte_delete(request, faculte_id):
     
     if request.method == 'POST':
         try:
-            nom = faculte.nom
-            faculte.delete()
-            return JsonResponse({'success': True, 'message': f"Faculté '{nom}' supprimée avec succès."})
+            tache = lancer_suppression(faculte, 'faculte', request.user, libelle=faculte.nom)
+            return JsonResponse({
+                'success': True,
+                'message': f"Suppression de la faculté '{faculte.nom}' lancée.",
+                'url_suivi': reverse('admin_suppression_suivi', args=[tache.id]),
+            })
         except Exception as e:
             return JsonResponse({'success': False, 'message': f"Erreur lors de la suppression: {str(e)}"})
     
@@ -918,23 +1263,27 @@ def student_cours_detail(request, cours_id):
     
     try:
         from travaux.models import Travail, RemiseTravail
-        from django.utils import timezone
+        from cours.cohorte import Cohorte
         
-        # Récupérer tous les travaux du cours
-        travaux = Travail.objects.filter(
-            cours=cours,
-            is_visible_etudiants=True,
-            statut__in=['publie', 'ferme']
-        ).order_by('-date_creation')
+        # Travaux du cours : extraits de la liste en cache de la cohorte quand le cours en fait partie
+        cohorte = Cohorte.de_etudiant(request.user)
+        if cohorte.contient_cours(cours.id):
+            travaux = cohorte.travaux_du_cours(cours.id)
+        else:
+            travaux = Travail.objects.filter(
+                cours=cours,
+                is_visible_etudiants=True,
+                statut__in=['publie', 'ferme']
+            ).order_by('-date_creation')
         
         # Récupérer les remises de l'étudiant pour ce cours
         remises = RemiseTravail.objects.filter(
             etudiant=request.user,
             travail__cours=cours
-        ).select_related('travail')
+        )
         
         # Créer un dictionnaire des remises par travail
-        remises_dict = {remise.travail.id: remise for remise in remises}
+        remises_dict = {remise.travail_id: remise for remise in remises}
         
         # Classer les travaux
         for travail in travaux:
@@ -1025,44 +1374,24 @@ def student_travaux(request):
         return redirect('login')
 
     try:
-        from travaux.models import Travail, RemiseTravail
-        from cours.models import Cours
+        from travaux.models import RemiseTravail
+        from cours.cohorte import Cohorte
         from django.utils import timezone
 
-        # Récupérer les informations du profil étudiant
-        student_profile = request.user.student_profile
-        promotion = student_profile.promotion
-        faculte = student_profile.faculte
-        niveau_etudiant = student_profile.niveau
+        # Travaux de la cohorte (promotion, faculté et niveau), partagés en cache par ses étudiants
+        cohorte = Cohorte.de_etudiant(request.user)
+        if cohorte is None:
+            raise StudentProfile.DoesNotExist
+        travaux = cohorte.travaux()
 
-        # Récupérer les cours de l'étudiant selon sa promotion, faculté et niveau
-        cours_etudiant = Cours.objects.filter(
-            is_actif=True,
-            is_visible_etudiants=True
-        )
-        
-        if promotion:
-            cours_etudiant = cours_etudiant.filter(promotion=promotion)
-        if faculte:
-            cours_etudiant = cours_etudiant.filter(faculte=faculte)
-        if niveau_etudiant:
-            cours_etudiant = cours_etudiant.filter(niveau=niveau_etudiant)
-
-        # Récupérer les travaux des cours de l'étudiant
-        travaux = Travail.objects.filter(
-            cours__in=cours_etudiant,
-            is_visible_etudiants=True,
-            statut__in=['publie', 'ferme']
-        ).select_related('cours', 'cours__enseignant').order_by('-date_creation')
-
-        # Récupérer les remises de l'étudiant
+        # Seule la partie propre à l'étudiant est lue à chaque requête : ses remises
         remises = RemiseTravail.objects.filter(
             etudiant=request.user,
-            travail__in=travaux
+            travail_id__in=[travail.id for travail in travaux]
         ).select_related('travail', 'travail__cours').order_by('-date_remise')
 
         # Créer un dictionnaire des remises par travail
-        remises_dict = {remise.travail.id: remise for remise in remises}
+        remises_dict = {remise.travail_id: remise for remise in remises}
 
         # Classer les travaux
         travaux_ouverts = []
@@ -1316,43 +1645,50 @@ def student_resultats_pdf(request):
 @login_required
 def notifications(request):
     """Page des notifications"""
-    if not request.user.is_authenticated:
-        return redirect('login')
-    
-    # Notifications simulées pour l'instant
-    notifications = [
-        {
-            'id': 1,
-            'title': 'Nouveau TP publié',
-            'message': 'Un nouveau travail pratique a été publié pour le cours "Programmation Web".',
-            'date': '2024-10-02 14:30',
-            'is_read': False,
-            'type': 'travail'
-        },
-        {
-            'id': 2,
-            'title': 'Note publiée',
-            'message': 'Votre note pour l\'examen de "Base de données" est maintenant disponible.',
-            'date': '2024-10-01 16:45',
-            'is_read': False,
-            'type': 'note'
-        },
-        {
-            'id': 3,
-            'title': 'Rappel de remise',
-            'message': 'N\'oubliez pas de rendre votre TP de "Systèmes d\'information" avant demain.',
-            'date': '2024-09-30 09:15',
-            'is_read': True,
-            'type': 'rappel'
-        }
-    ]
-    
+    notifications_qs = Notification.objects.filter(destinataire=request.user)
+
+    page = request.GET.get('page', 1)
+    paginator = Paginator(notifications_qs, 20)
+    try:
+        notifications_page = paginator.page(page)
+    except PageNotAnInteger:
+        notifications_page = paginator.page(1)
+    except EmptyPage:
+        notifications_page = paginator.page(paginator.num_pages)
+
     return render(request, 'users/notifications.html', {
-        'notifications': notifications,
-        'unread_count': len([n for n in notifications if not n['is_read']])
+        'notifications': notifications_page,
+        'unread_count': compter_non_lues(request.user),
     })
 
 
+@login_required
+def notification_ouvrir(request, notification_id):
+    """Marquer une notification comme lue puis ouvrir la page associée"""
+    notification = get_object_or_404(Notification, id=notification_id, destinataire=request.user)
+    marquer_lues(request.user, [notification.id])
+    return redirect(notification.lien or 'notifications')
+
+
+@login_required
+def notification_marquer_lue(request, notification_id):
+    """Marquer une notification comme lue (AJAX)"""
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'message': 'Méthode non autorisée'}, status=405)
+    marquer_lues(request.user, [notification_id])
+    return JsonResponse({'success': True, 'unread_count': compter_non_lues(request.user)})
+
+
+@login_required
+def notifications_tout_marquer_lu(request):
+    """Marquer toutes les notifications comme lues"""
+    if request.method == 'POST':
+        total = marquer_lues(request.user)
+        if total:
+            messages.success(request, f"{total} notification(s) marquée(s) comme lue(s).")
+    return redirect('notifications')
+
+
 @login_required
 def student_profil(request):
     """Informations personnelles et changement de mot de passe simple"""
@@ -1440,7 +1776,7 @@ def admin_student_data(request, user_id):
             'emergency_phone': profile.emergency_phone if profile else '',
             
             # Photo
-            'photo': profile.photo.url if profile and profile.photo else '',
+            'photo': profile.photo_carte['jpeg'] if profile and profile.photo else '',
         }
         return JsonResponse(data)
     except CustomUser.DoesNotExist:
@@ -1507,10 +1843,9 @@ def admin_student_delete(request, user_id):
     student = get_object_or_404(CustomUser, id=user_id, user_type='etudiant')
     
     if request.method == 'POST':
-        matricule = student.matricule
-        student.delete()
-        messages.success(request, f"Étudiant {matricule} supprimé avec succès.")
-        return redirect('admin_student_list')
+        tache = lancer_suppression(student, 'etudiant', request.user, libelle=student.get_display_name())
+        messages.success(request, f"Suppression de l'étudiant {student.matricule} lancée en arrière-plan.")
+        return redirect('admin_suppression_suivi', tache_id=tache.id)
     
     return redirect('admin_student_list')
 
@@ -1689,10 +2024,9 @@ def admin_teacher_delete(request, user_id):
     teacher = get_object_or_404(CustomUser, id=user_id, user_type='enseignant')
     
     if request.method == 'POST':
-        matricule = teacher.matricule
-        teacher.delete()
-        messages.success(request, f"Enseignant {matricule} supprimé avec succès.")
-        return redirect('admin_teacher_list')
+        tache = lancer_suppression(teacher, 'enseignant', request.user, libelle=teacher.get_display_name())
+        messages.success(request, f"Suppression de l'enseignant {teacher.matricule} lancée en arrière-plan.")
+        return redirect('admin_suppression_suivi', tache_id=tache.id)
     
     return redirect('admin_teacher_list')
 